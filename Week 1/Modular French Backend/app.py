@@ -1,5 +1,6 @@
 # backend/app.py
 import sqlite3
+import atexit
 import json
 import os
 from flask import Flask, request, jsonify, g, url_for
@@ -14,7 +15,11 @@ NGROK_AUTH_TOKEN_HARDCODED = "..."
 
 # Import database and utility modules
 from lib.db import db
+from lib.json_provider import install_json_provider
+from lib.metrics import metrics
+from lib.review_writer import ReviewWriter
 from lib.utils import _format_datetime, _get_pagination_metadata
+import lib.cli
 
 # Import route modules
 import routes.dashboard
@@ -22,6 +27,9 @@ import routes.study_activities
 import routes.words
 import routes.groups
 import routes.study_sessions
+import routes.admin
+import routes.export
+import routes.students
 
 # --- Configuration ---
 DATABASE = 'lang_portal.db'
@@ -38,12 +46,58 @@ def create_app(test_config=None):
     if test_config is None:
         app.config.from_mapping(
             DATABASE=DATABASE,
-            PER_PAGE=PER_PAGE
+            PER_PAGE=PER_PAGE,
+            JSON_PROVIDER=os.environ.get('JSON_PROVIDER', 'auto'), # 'orjson', 'stdlib' or 'auto'
+            ADMIN_TOKEN=os.environ.get('ADMIN_TOKEN'), # Protects /api/admin/* when set
+            # GET/HEAD requests read from read-only snapshot connections
+            DB_READ_CONNECTIONS=os.environ.get('DB_READ_CONNECTIONS', '1') != '0',
+            # Log statements slower than this with their query plans (0 disables)
+            DB_SLOW_QUERY_MS=float(os.environ.get('DB_SLOW_QUERY_MS', 100)) or None,
+            DB_SLOW_QUERY_LOG_SIZE=100,
+            ASGI_THREADS=int(os.environ.get('ASGI_THREADS', 32)), # View threads when served by asgi.py
+            # Pre-forking production server (flask --app app serve)
+            SERVER_WORKERS=int(os.environ.get('SERVER_WORKERS', os.cpu_count() or 2)),
+            SERVER_THREADS=int(os.environ.get('SERVER_THREADS', 8)),
+            # Per-endpoint latency and SQL counters at /api/_metrics
+            METRICS_ENABLED=os.environ.get('METRICS_ENABLED', '1') != '0',
+            SERVER_TIMING=os.environ.get('SERVER_TIMING') == '1', # Server-Timing response header
+            N_PLUS_ONE_THRESHOLD=10, # Flag requests running one statement this many times
+            DASHBOARD_CACHE_SIZE=1024, # Computed dashboard payloads kept per process (LRU)
+            # Write-behind review logging: group-commit reviews from a background thread
+            REVIEW_WRITE_BEHIND=os.environ.get('REVIEW_WRITE_BEHIND') == '1',
+            REVIEW_BATCH_MAX_ITEMS=200,  # Commit once this many reviews are queued...
+            REVIEW_BATCH_INTERVAL_MS=5,  # ...or this long after the first one arrived
+            REVIEW_QUEUE_SIZE=10000,     # Bounded queue; submitters back off when full
+            REVIEW_ACK_TIMEOUT=5.0,      # Seconds a request waits for its batch to commit...
+            REVIEW_WRITE_TIMEOUT=30.0,   # ...and then for one already being written (503 after)
+            # Days of raw reviews kept by `flask --app app compact-reviews`
+            REVIEW_RETENTION_DAYS=int(os.environ.get('REVIEW_RETENTION_DAYS', 90))
         )
     else:
         app.config.update(test_config)
 
-    # Database connection management: close connection after each request
+    # Fast JSON encoding (orjson when available) with sqlite3.Row support
+    install_json_provider(app)
+
+    # Point the shared Db helper at this app's database and pool settings
+    db.init_app(app)
+
+    # Request latency and SQL instrumentation
+    if app.config.get('METRICS_ENABLED', True):
+        metrics.init_app(app)
+
+    # Optional write-behind queue for review logging, flushed on shutdown
+    if app.config.get('REVIEW_WRITE_BEHIND'):
+        review_writer = ReviewWriter(
+            db,
+            max_batch_items=app.config.get('REVIEW_BATCH_MAX_ITEMS', 200),
+            flush_interval_ms=app.config.get('REVIEW_BATCH_INTERVAL_MS', 5),
+            queue_size=app.config.get('REVIEW_QUEUE_SIZE', 10000)
+        )
+        app.extensions['review_writer'] = review_writer
+        atexit.register(review_writer.stop)
+
+    # Database connection management: return the connection to the pool after each request
     @app.teardown_appcontext
     def close_connection(exception):
         db.close()
@@ -69,6 +123,12 @@ def create_app(test_config=None):
     routes.words.load(app)
     routes.groups.load(app)
     routes.study_sessions.load(app)
+    routes.admin.load(app)
+    routes.export.load(app)
+    routes.students.load(app)
+
+    # Register maintenance commands (flask --app app <command>)
+    lib.cli.load(app)
     
     return app
 
@@ -77,11 +137,11 @@ if __name__ == '__main__':
     # Create the Flask application instance
     app = create_app()
 
-    # Initialize the database and seed data
-    print("Populating sample data (core vocabulary and study activities only)...")
+    # Apply pending schema migrations, seeding sample data only into an empty database
+    print("Preparing database (migrations and first-run seed data)...")
     with app.app_context():
-        db.init_db_and_seed_data(app)
-    print("Sample data population complete.")
+        db.initialize(app)
+    print("Database ready.")
 
     # Run the Flask application (no ngrok, listen on all interfaces for Codespaces)
     app.run(host="0.0.0.0", port=5000, debug=False)
@@ -0,0 +1,41 @@
+
+# backend/asgi.py
+import os
+
+from app import create_app
+from lib.asgi import AsgiAdapter
+from lib.db import db
+
+# --- ASGI Application Factory ---
+def create_asgi_app(test_config=None):
+    """
+    Creates the ASGI version of the API: the same Flask app, routes and JSON
+    contracts as app.py, served through lib.asgi.AsgiAdapter so connections
+    are held by the event loop and only running views occupy a thread.
+    Migrations and the first-run seed run on lifespan startup.
+    """
+    app = create_app(test_config)
+
+    def startup():
+        with app.app_context():
+            db.initialize(app)
+
+    def shutdown():
+        review_writer = app.extensions.get('review_writer')
+        if review_writer:
+            review_writer.stop() # Flush queued reviews before the pool goes away
+        db.close_all()
+
+    return AsgiAdapter(
+        app,
+        max_threads=app.config.get('ASGI_THREADS', 32),
+        on_startup=startup,
+        on_shutdown=shutdown
+    )
+
+# --- Main Execution Block ---
+if __name__ == '__main__':
+    # Equivalent to: uvicorn --factory asgi:create_asgi_app --host 0.0.0.0 --port 5000
+    import uvicorn
+    uvicorn.run(create_asgi_app, factory=True, host="0.0.0.0",
+                port=int(os.environ.get('PORT', 5000)))
@@ -0,0 +1,161 @@
+# backend/benchmarks/bench_asgi.py
+"""
+Load-tests the WSGI server (app.run's threaded Werkzeug server) against the
+ASGI app (asgi.py under uvicorn) at increasing client concurrency.
+
+Each client holds one keep-alive connection and loops over a mix of read
+endpoints; a share of the clients instead download the full review export,
+the slowest request the API serves. Reports requests/sec and latency
+percentiles for the fast requests, so the cost of slow neighbours shows up.
+
+Usage (from the backend directory; needs uvicorn):
+    python benchmarks/bench_asgi.py --concurrency 8 32 128 --duration 5
+"""
+import argparse
+import http.client
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+# Make the backend packages importable when run as a script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import uvicorn
+from werkzeug.serving import make_server
+
+from app import create_app
+from asgi import create_asgi_app
+from lib.db import db
+
+PATHS = [
+    '/api/dashboard/quick-stats',
+    '/api/words?page=1',
+    '/api/groups/1/words',
+    '/api/study_sessions',
+    '/api/words/search?q=bon',
+]
+SLOW_PATH = '/api/export/reviews'
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def seed_history(app, reviews):
+    """
+    Adds study sessions and `reviews` word reviews so reads and the export have work to do.
+    """
+    with app.app_context():
+        db.initialize(app)
+        word_ids = [row[0] for row in db.cursor().execute('SELECT id FROM words')]
+        with db.transaction() as cursor:
+            for session in range(max(1, reviews // 50)):
+                cursor.execute("INSERT INTO study_sessions (group_id, study_activity_id) VALUES (1, 1)")
+                rows = [(word_ids[(session + i) % len(word_ids)], i % 3 != 0, '2025-03-10 12:00:00')
+                        for i in range(50)]
+                db.insert_reviews(cursor, cursor.lastrowid, rows, '2025-03-10 12:00:00')
+    db.close_all()
+
+def start_wsgi(database, port):
+    app = create_app({'DATABASE': database, 'PER_PAGE': 100})
+    logging.getLogger('werkzeug').setLevel(logging.WARNING) # No per-request access log
+    server = make_server('127.0.0.1', port, app, threaded=True) # What app.run uses
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server.shutdown
+
+def start_asgi(database, port, threads):
+    app = create_asgi_app({'DATABASE': database, 'PER_PAGE': 100, 'ASGI_THREADS': threads})
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    def stop():
+        server.should_exit = True
+        thread.join()
+    return stop
+
+def load(port, concurrency, duration, slow_share):
+    """
+    Runs `concurrency` keep-alive clients for `duration` seconds.
+    Returns (fast requests/sec, fast latencies in ms, completed exports, errors).
+    """
+    deadline = time.perf_counter() + duration
+    latencies, exports, errors = [], [0], [0]
+    lock = threading.Lock()
+    slow_clients = int(concurrency * slow_share)
+
+    def client(index):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        local, done, i = [], 0, index
+        while time.perf_counter() < deadline:
+            path = SLOW_PATH if index < slow_clients else PATHS[i % len(PATHS)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    raise http.client.HTTPException(response.status)
+            except (OSError, http.client.HTTPException):
+                with lock:
+                    errors[0] += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                continue
+            if path == SLOW_PATH:
+                done += 1
+            else:
+                local.append((time.perf_counter() - started) * 1000)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            exports[0] += done
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return len(latencies) / elapsed, sorted(latencies), exports[0], errors[0]
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float('nan')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[8, 32, 128])
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per run')
+    parser.add_argument('--reviews', type=int, default=20000, help='Review history to seed')
+    parser.add_argument('--slow-share', type=float, default=0.1, help='Share of clients downloading the export')
+    parser.add_argument('--asgi-threads', type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'bench.db')
+        seed_history(create_app({'DATABASE': database, 'PER_PAGE': 100}), args.reviews)
+
+        print(f"{'server':>6} {'clients':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'exports':>8} {'errors':>7}")
+        for label in ('wsgi', 'asgi'):
+            port = free_port()
+            stop = start_wsgi(database, port) if label == 'wsgi' else start_asgi(database, port, args.asgi_threads)
+            try:
+                load(port, 4, 1.0, 0) # Warm up
+                for concurrency in args.concurrency:
+                    rps, latencies, exports, errors = load(port, concurrency, args.duration, args.slow_share)
+                    print(f"{label:>6} {concurrency:>7} {rps:9.1f} {percentile(latencies, 0.5):8.1f} "
+                          f"{percentile(latencies, 0.99):8.1f} {exports:>8} {errors:>7}")
+            finally:
+                stop()
+            db.close_all()
+
+if __name__ == '__main__':
+    main()
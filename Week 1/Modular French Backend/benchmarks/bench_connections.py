@@ -0,0 +1,73 @@
+# backend/benchmarks/bench_connections.py
+"""
+Compares requests/sec with per-request connections versus the pooled,
+WAL-configured connections in lib/db.py.
+
+Usage (from the backend directory):
+    python benchmarks/bench_connections.py --requests 2000 --threads 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Make the backend packages importable when run as a script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from lib.db import db
+
+# Cheap read endpoints, so connection setup is a visible share of each request
+PATHS = [
+    '/api/groups',
+    '/api/study_activities',
+    '/api/groups/1',
+    '/api/words/1',
+]
+
+def run(app, total_requests, threads):
+    """
+    Fires `total_requests` GETs across `threads` workers and returns requests/sec.
+    """
+    def worker(count):
+        client = app.test_client()
+        for i in range(count):
+            response = client.get(PATHS[i % len(PATHS)])
+            assert response.status_code == 200, response.status_code
+
+    per_thread = total_requests // threads
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, [per_thread] * threads))
+    elapsed = time.perf_counter() - started
+    return (per_thread * threads) / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'bench.db')
+        app = create_app({'DATABASE': database, 'PER_PAGE': 100})
+        with app.app_context():
+            db.init_db_and_seed_data(app)
+
+        results = {}
+        for label, pooled in (('per-request connect', False), ('pooled', True)):
+            app.config['DB_POOL_ENABLED'] = pooled
+            db.init_app(app)
+            run(app, args.threads * 20, args.threads) # Warm up
+            results[label] = run(app, args.requests, args.threads)
+        db.close_all()
+
+    for label, rps in results.items():
+        print(f"{label:>20}: {rps:8.1f} req/s")
+    baseline = results['per-request connect']
+    print(f"{'speedup':>20}: {results['pooled'] / baseline:8.2f}x")
+
+if __name__ == '__main__':
+    main()
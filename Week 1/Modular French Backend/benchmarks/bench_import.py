@@ -0,0 +1,93 @@
+# backend/benchmarks/bench_import.py
+"""
+Times the bulk vocabulary import (Db.bulk_import_words) on synthetic decks.
+
+Usage (from the backend directory):
+    python benchmarks/bench_import.py --sizes 10000 100000 1000000 --format ndjson
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Make the backend packages importable when run as a script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from lib.db import db
+from lib.word_import import iter_word_records, iter_word_rows
+
+def write_deck(path, size, fmt):
+    """
+    Writes a synthetic deck of `size` words in the given format.
+    """
+    def word(i):
+        return {"french_word": f"mot{i}", "quebec_pronunciation": f"mo-{i}",
+                "english": f"word {i}", "parts": {"notes": f"synthetic #{i}"}}
+
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        if fmt == 'csv':
+            writer = csv.writer(file)
+            writer.writerow(['french_word', 'quebec_pronunciation', 'english', 'notes'])
+            for i in range(size):
+                w = word(i)
+                writer.writerow([w['french_word'], w['quebec_pronunciation'], w['english'], w['parts']['notes']])
+        elif fmt == 'ndjson':
+            for i in range(size):
+                file.write(json.dumps(word(i)) + '\n')
+        else:
+            file.write('[\n')
+            for i in range(size):
+                file.write(('' if i == 0 else ',\n') + json.dumps(word(i)))
+            file.write('\n]\n')
+
+def legacy_import(path, fmt, group_name):
+    """
+    The previous row-at-a-time import: one INSERT per word and per link.
+    """
+    cursor = db.cursor()
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', (group_name,))
+    group_id = cursor.lastrowid
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        for row in iter_word_rows(iter_word_records(file, fmt)):
+            cursor.execute('INSERT INTO words (french_word, quebec_pronunciation, english, parts) VALUES (?, ?, ?, ?)', row)
+            cursor.execute('INSERT INTO words_groups (word_id, group_id) VALUES (?, ?)', (cursor.lastrowid, group_id))
+    db.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--format', dest='fmt', choices=['json', 'ndjson', 'csv'], default='ndjson')
+    parser.add_argument('--legacy', action='store_true', help='Also time the row-at-a-time import.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({'DATABASE': os.path.join(tmp, 'bench.db'), 'PER_PAGE': 100})
+        with app.app_context():
+            db.init_db_and_seed_data(app)
+            print(f"{'words':>10} {'mode':>16} {'seconds':>9} {'words/s':>10}")
+            for size in args.sizes:
+                deck = os.path.join(tmp, f'deck_{size}.{args.fmt}')
+                write_deck(deck, size, args.fmt)
+
+                modes = [('bulk', False), ('bulk+deferred', True)]
+                for label, defer in modes:
+                    started = time.perf_counter()
+                    with open(deck, 'r', encoding='utf-8', newline='') as file:
+                        db.bulk_import_words(f'{label} {size}', iter_word_rows(iter_word_records(file, args.fmt)),
+                                             defer_indexes=defer)
+                    elapsed = time.perf_counter() - started
+                    print(f"{size:>10} {label:>16} {elapsed:>9.2f} {size / elapsed:>10.0f}")
+
+                if args.legacy:
+                    started = time.perf_counter()
+                    legacy_import(deck, args.fmt, f'legacy {size}')
+                    elapsed = time.perf_counter() - started
+                    print(f"{size:>10} {'legacy':>16} {elapsed:>9.2f} {size / elapsed:>10.0f}")
+        db.close_all()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+# backend/benchmarks/bench_json.py
+"""
+Compares per-route JSON serialization cost of the stdlib and orjson providers.
+
+For each route the payload handed to jsonify is captured once, then encoded
+repeatedly with every provider; "legacy" also includes the per-row dict
+copies routes used to make before serializing. End-to-end requests/sec for
+each provider is reported as well.
+
+Usage (from the backend directory):
+    python benchmarks/bench_json.py --words 2000 --repeat 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Make the backend packages importable when run as a script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from lib.db import db
+from lib.json_provider import PROVIDERS, RowJSONProvider, orjson
+
+PATHS = [
+    '/api/words',
+    '/api/words?sort_by=correct_count&order=desc',
+    '/api/groups/1/words',
+    '/api/groups',
+    '/api/study_activities',
+    '/api/study_sessions',
+    '/api/dashboard/quick-stats',
+]
+
+def add_words(count):
+    """
+    Adds `count` synthetic words so list endpoints return full pages.
+    """
+    rows = ((f"mot{i}", f"mo-{i}", f"word {i}", '{"notes": "synthetic"}') for i in range(count))
+    db.bulk_import_words('Benchmark Words', rows)
+
+def capture_payloads(app):
+    """
+    Requests every path once and records the object each route serialized.
+    """
+    payloads = {}
+    original = app.json.response
+    client = app.test_client()
+    for path in PATHS:
+        def recording_response(*args, **kwargs):
+            payloads[path] = app.json._prepare_response_obj(args, kwargs)
+            return original(*args, **kwargs)
+        app.json.response = recording_response
+        try:
+            assert client.get(path).status_code == 200, path
+        finally:
+            app.json.response = original
+    return payloads
+
+def as_dicts(obj):
+    """
+    Recursively copies sqlite3.Row objects to dicts, like routes used to.
+    """
+    if isinstance(obj, dict):
+        return {key: as_dicts(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [as_dicts(value) for value in obj]
+    if hasattr(obj, 'keys') and not isinstance(obj, dict):
+        return {key: obj[key] for key in obj.keys()}
+    return obj
+
+def time_encoding(app, provider, payload, repeat, copy_rows=False):
+    """
+    Returns the average microseconds to turn `payload` into a response.
+    """
+    with app.app_context():
+        started = time.perf_counter()
+        for _ in range(repeat):
+            provider.response(as_dicts(payload) if copy_rows else payload)
+        return (time.perf_counter() - started) / repeat * 1e6
+
+def requests_per_second(app, total_requests):
+    """
+    Sends `total_requests` GETs round-robin over PATHS and returns req/s.
+    """
+    client = app.test_client()
+    started = time.perf_counter()
+    for i in range(total_requests):
+        client.get(PATHS[i % len(PATHS)])
+    return total_requests / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--words', type=int, default=2000, help='Synthetic words added to the seed data')
+    parser.add_argument('--repeat', type=int, default=500, help='Encodings timed per route and provider')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests for the end-to-end comparison')
+    args = parser.parse_args()
+
+    if orjson is None:
+        print("orjson is not installed; only the stdlib provider can be measured.")
+    providers = ['stdlib'] + (['orjson'] if orjson is not None else [])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'bench.db')
+        app = create_app({'DATABASE': database, 'PER_PAGE': 100, 'JSON_PROVIDER': 'stdlib'})
+        with app.app_context():
+            db.init_db_and_seed_data(app)
+            add_words(args.words)
+            # Some history so session and stats payloads are not empty
+            for session in range(20):
+                app.test_client().post('/api/study_activities', json={'group_id': 1, 'study_activity_id': 1})
+        payloads = capture_payloads(app)
+
+        print(f"{'route':<45}{'legacy':>10}" + ''.join(f"{name:>10}" for name in providers) + "   (us per response)")
+        legacy = RowJSONProvider(app)
+        for path in PATHS:
+            timings = [time_encoding(app, legacy, payloads[path], args.repeat, copy_rows=True)]
+            for name in providers:
+                timings.append(time_encoding(app, PROVIDERS[name](app), payloads[path], args.repeat))
+            print(f"{path:<45}" + ''.join(f"{us:10.1f}" for us in timings))
+
+        print()
+        for name in providers:
+            app.json = PROVIDERS[name](app)
+            requests_per_second(app, len(PATHS) * 10) # Warm up
+            print(f"{name + ' end-to-end':>20}: {requests_per_second(app, args.requests):8.1f} req/s")
+        db.close_all()
+
+if __name__ == '__main__':
+    main()
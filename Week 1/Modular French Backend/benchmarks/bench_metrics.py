@@ -0,0 +1,81 @@
+# backend/benchmarks/bench_metrics.py
+"""
+Measures the overhead of request metrics (lib/metrics.py) on the read routes.
+
+The same request mix is served by an app with METRICS_ENABLED (plus the
+Server-Timing header) and one without, in alternating rounds (swapping
+which goes first) so both see the same machine state; statement timing is
+switched off for the plain runs. Throughput is measured in CPU time of the
+serving thread, and the best round of each configuration is compared,
+since noise only ever makes a round slower.
+
+Usage (from the backend directory):
+    python benchmarks/bench_metrics.py --rounds 5 --requests 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Make the backend packages importable when run as a script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from lib.db import db
+
+PATHS = [
+    '/api/dashboard/quick-stats',
+    '/api/words?page=1',
+    '/api/words?sort_by=correct_count&order=desc',
+    '/api/groups/1/words',
+    '/api/groups',
+    '/api/study_sessions',
+    '/api/words/search?q=bon',
+    '/api/words/1',
+]
+
+def run(app, requests):
+    """
+    Serves `requests` requests cycling over PATHS; returns requests per CPU second.
+    """
+    client = app.test_client()
+    started = time.thread_time()
+    for i in range(requests):
+        response = client.get(PATHS[i % len(PATHS)])
+        assert response.status_code == 200, PATHS[i % len(PATHS)]
+    return requests / (time.thread_time() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per round and configuration')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {'DATABASE': os.path.join(tmp, 'bench.db'), 'PER_PAGE': 50}
+        plain = create_app({**config, 'METRICS_ENABLED': False})
+        instrumented = create_app({**config, 'METRICS_ENABLED': True, 'SERVER_TIMING': True})
+        with plain.app_context():
+            db.initialize(plain)
+        observers = list(db.statements.observers)
+
+        results = {'plain': [], 'metrics': []}
+        run(plain, len(PATHS) * 10) # Warm up connections and caches
+        runs = {'plain': (plain, []), 'metrics': (instrumented, observers)}
+        for round_number in range(args.rounds):
+            for label in sorted(runs, reverse=round_number % 2 == 1):
+                app, round_observers = runs[label]
+                db.statements.observers[:] = round_observers
+                results[label].append(run(app, args.requests))
+        db.close_all()
+
+    print(f"{'config':>8} {'median req/s':>13} {'best req/s':>11}")
+    for label, rates in results.items():
+        print(f"{label:>8} {statistics.median(rates):13.1f} {max(rates):11.1f}")
+    overhead = 1 - max(results['metrics']) / max(results['plain'])
+    print(f"Overhead: {overhead * 100:.1f}%")
+
+if __name__ == '__main__':
+    main()
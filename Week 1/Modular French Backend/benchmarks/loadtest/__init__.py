@@ -0,0 +1,18 @@
+# backend/benchmarks/loadtest/__init__.py
+"""
+Synthetic-load benchmark for the whole API.
+
+- synthetic.py builds a database at a chosen scale (words, groups, students,
+  study sessions, reviews) with the real schema: sql/setup plus every
+  migration, so the triggers maintain the aggregates as they do in production.
+- workload.py describes a request for every route the app registers and
+  fails when a route has none, so new routes cannot go unbenchmarked.
+- runner.py drives a concurrent, mixed read/write workload through the
+  Flask test client or over HTTP and computes throughput and p50/p95/p99
+  per endpoint.
+
+Usage (from the backend directory):
+    python -m benchmarks.loadtest build /tmp/load.db --reviews 10000000
+    python -m benchmarks.loadtest run /tmp/load.db --concurrency 8 --duration 30
+    python -m benchmarks.loadtest compare before.json after.json
+"""
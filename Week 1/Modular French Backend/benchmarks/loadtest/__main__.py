@@ -0,0 +1,252 @@
+# backend/benchmarks/loadtest/__main__.py
+"""
+Synthetic-load benchmark: build a dataset, run the mixed workload against
+every route, compare saved results.
+
+Usage (from the backend directory):
+    python -m benchmarks.loadtest build /tmp/load.db --words 50000 --reviews 20000000
+    python -m benchmarks.loadtest run /tmp/load.db --concurrency 16 --duration 60
+    python -m benchmarks.loadtest run /tmp/load.db --transport http --set REVIEW_WRITE_BEHIND=true
+    python -m benchmarks.loadtest compare benchmarks/results/load-abc1234.json benchmarks/results/load-def5678.json
+
+`run` works on a copy of the database (so every run, on every commit,
+starts from the same data), applies pending migrations to it, and saves the
+results as JSON with the commit they were measured on.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+# Make the backend packages importable when run from anywhere
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+from app import create_app
+from lib.db import db
+from benchmarks.loadtest import runner, synthetic, workload
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=BACKEND_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _config_value(text):
+    """
+    Parses a --set value as JSON (numbers, true/false, null), else a string.
+    """
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+def _copy_database(source, target):
+    """
+    Copies a database with the backup API, which is consistent even while
+    the source has an open WAL.
+    """
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+def _start_server(app):
+    """
+    Serves `app` with the threaded Werkzeug server app.run uses, on a free
+    local port. Returns (url, stop).
+    """
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.WARNING) # No per-request access log
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{port}', server.shutdown
+
+def build_command(args):
+    synthetic.build(args.database, words=args.words, groups=args.groups, students=args.students,
+                    sessions=args.sessions, reviews=args.reviews, days=args.days, seed=args.seed,
+                    batch_size=args.batch_size, defer_triggers=not args.with_triggers)
+
+def print_results(endpoints, total=None):
+    print(f"{'endpoint':<72} {'req':>7} {'err':>5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    rows = list(endpoints.items()) + ([('TOTAL', total)] if total else [])
+    for label, s in rows:
+        throughput = f"{s['throughput']:9.1f}" if s['throughput'] is not None else f"{'-':>9}"
+        print(f"{label:<72} {s['requests']:7d} {s['errors']:5d} {throughput} "
+              f"{s['p50_ms']:8.2f} {s['p95_ms']:8.2f} {s['p99_ms']:8.2f}")
+
+def run_command(args):
+    if not os.path.exists(args.database):
+        sys.exit(f"{args.database} does not exist; create it with `build` first")
+    overrides = dict(args.set)
+    headers = {'Authorization': f'Bearer {args.admin_token}'} if args.admin_token else {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = args.database
+        if not (args.in_place or args.url):
+            database = os.path.join(tmp, 'load.db')
+            _copy_database(args.database, database)
+        app = create_app({
+            'DATABASE': database,
+            'PER_PAGE': 100,
+            'ADMIN_TOKEN': args.admin_token,
+            'DB_SLOW_QUERY_MS': 100,
+            'METRICS_ENABLED': True,
+            **overrides,
+        })
+        routes = workload.check_coverage(app)
+        if not args.url:
+            with app.app_context():
+                db.initialize(app) # Migrations of this commit; the data is already there
+        data = workload.Dataset(database)
+
+        stop = None
+        if args.url:
+            transport = runner.HttpTransport(args.url, headers)
+        elif args.transport == 'http':
+            url, stop = _start_server(app)
+            transport = runner.HttpTransport(url, headers)
+        else:
+            transport = runner.ClientTransport(app, headers)
+
+        print(f"{len(routes)} routes, {args.concurrency} clients, {args.duration:g}s "
+              f"(+{args.warmup:g}s warm-up), write ratio {args.write_ratio:g}, {args.url or args.transport}")
+        results = runner.run(transport, routes, data, concurrency=args.concurrency, duration=args.duration,
+                             warmup=args.warmup, write_ratio=args.write_ratio, seed=args.seed)
+        # The resets would destroy data someone else owns
+        final = {} if (args.in_place or args.url) else runner.run_final(transport, routes, data, args.seed)
+        if stop:
+            stop()
+        db.close_all()
+
+    commit = _git('rev-parse', 'HEAD')
+    report = {
+        'commit': commit,
+        'dirty': bool(_git('status', '--porcelain', '--', '.')),
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds').replace('+00:00', 'Z'),
+        'machine': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'dataset': data.counts,
+        'options': {
+            'transport': 'url' if args.url else args.transport,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'warmup': args.warmup,
+            'write_ratio': args.write_ratio,
+            'seed': args.seed,
+            'config': overrides,
+        },
+        **results,
+        'final': final,
+    }
+
+    print_results(results['endpoints'], results['total'])
+    for label, summary in final.items():
+        print(f"{label}: {summary['statuses']} in {summary['p50_ms']:.1f} ms")
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"load-{(commit or 'unknown')[:10]}-{stamp}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {output}")
+    if results['total']['errors']:
+        sys.exit(f"{results['total']['errors']} requests failed")
+
+def compare_command(args):
+    reports = []
+    for path in (args.base, args.new):
+        with open(path, encoding='utf-8') as f:
+            reports.append(json.load(f))
+    base, new = reports
+    for report, path in ((base, args.base), (new, args.new)):
+        print(f"{path}: {(report.get('commit') or 'unknown')[:10]}{' (dirty)' if report.get('dirty') else ''}, "
+              f"{report['options']['concurrency']} clients, dataset {report['dataset']}")
+
+    def change(old, value):
+        if old in (None, 0) or value is None:
+            return f"{'-':>8}"
+        return f"{(value - old) / old * 100:+7.1f}%"
+
+    regressions = []
+    print(f"{'endpoint':<72} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    labels = sorted(base['endpoints'].keys() | new['endpoints'].keys())
+    for label, old, value in [(label, base['endpoints'].get(label), new['endpoints'].get(label)) for label in labels] \
+            + [('TOTAL', base['total'], new['total'])]:
+        if old is None or value is None:
+            print(f"{label:<72} {'only in ' + ('new' if old is None else 'base'):>35}")
+            continue
+        print(f"{label:<72} {change(old['throughput'], value['throughput'])} {change(old['p50_ms'], value['p50_ms'])} "
+              f"{change(old['p95_ms'], value['p95_ms'])} {change(old['p99_ms'], value['p99_ms'])}")
+        if args.max_regression is not None and old['p95_ms'] and value['p95_ms'] \
+                and (value['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 > args.max_regression:
+            regressions.append(label)
+    if regressions:
+        sys.exit(f"p95 regressed by more than {args.max_regression:g}%: {', '.join(regressions)}")
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.loadtest', description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help='Create a synthetic database')
+    build.add_argument('database', help='Path of the new database file')
+    for name, default in synthetic.DEFAULT_SCALE.items():
+        build.add_argument(f'--{name}', type=int, default=default, help=f'(default {default})')
+    build.add_argument('--days', type=int, default=365, help='Days of history (default 365)')
+    build.add_argument('--seed', type=int, default=1)
+    build.add_argument('--batch-size', type=int, default=50000, help='Reviews per write transaction')
+    build.add_argument('--with-triggers', action='store_true',
+                       help='Write reviews through the per-row triggers instead of rebuilding aggregates')
+    build.set_defaults(handler=build_command)
+
+    run = commands.add_parser('run', help='Run the mixed workload and save the results')
+    run.add_argument('database', help='Database made by build (copied unless --in-place)')
+    run.add_argument('--concurrency', type=int, default=8, help='Client threads (default 8)')
+    run.add_argument('--duration', type=float, default=30, help='Measured seconds (default 30)')
+    run.add_argument('--warmup', type=float, default=3, help='Unmeasured seconds first (default 3)')
+    run.add_argument('--write-ratio', type=float, default=0.1, help='Share of requests that write (default 0.1)')
+    run.add_argument('--transport', choices=('client', 'http'), default='client',
+                     help='Flask test client, or HTTP to a local threaded server')
+    run.add_argument('--url', help='Load an already running server instead (its database must be DATABASE)')
+    run.add_argument('--in-place', action='store_true', help='Run on DATABASE itself; skips the resets')
+    run.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                     type=lambda text: (text.split('=', 1)[0], _config_value(text.split('=', 1)[1])),
+                     help='App config override, e.g. REVIEW_WRITE_BEHIND=true (repeatable)')
+    run.add_argument('--admin-token', help='Sent as a bearer token (and set as ADMIN_TOKEN)')
+    run.add_argument('--seed', type=int, default=1)
+    run.add_argument('--output', help='Results file (default benchmarks/results/load-<commit>-<time>.json)')
+    run.set_defaults(handler=run_command)
+
+    compare = commands.add_parser('compare', help='Compare two saved results')
+    compare.add_argument('base')
+    compare.add_argument('new')
+    compare.add_argument('--max-regression', type=float,
+                         help='Exit with an error if an endpoint p95 grew by more than this percentage')
+    compare.set_defaults(handler=compare_command)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+# backend/benchmarks/loadtest/runner.py
+"""
+Drives a workload with concurrent clients and summarizes the latencies.
+
+Each client thread draws requests from the mix with its own seeded random
+generator and records the latency and status of every one under its
+route's label; the per-thread records are merged only at the end, so the
+measurement adds no locking to the hot loop.
+"""
+import http.client
+import json
+import math
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+class ClientTransport:
+    """
+    Sends requests through the Flask test client (one per thread): no
+    sockets, so it measures the app and the database alone.
+    """
+    def __init__(self, app, headers=None):
+        self.app = app
+        self.headers = headers or {}
+        self._local = threading.local()
+
+    def request(self, method, path, body):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        kwargs = {'json': body} if body is not None and not isinstance(body, bytes) else {'data': body}
+        response = client.open(path, method=method, headers=self.headers, **kwargs)
+        response.get_data() # Drain streamed responses (exports)
+        response.close()
+        return response.status_code
+
+class HttpTransport:
+    """
+    Sends requests over HTTP/1.1, one keep-alive connection per thread.
+    """
+    def __init__(self, url, headers=None, timeout=60):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.headers = headers or {}
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def request(self, method, path, body):
+        headers = dict(self.headers)
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        for attempt in (1, 2):
+            conn = getattr(self._local, 'conn', None)
+            if conn is None:
+                conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                return response.status
+            except (http.client.HTTPException, ConnectionError):
+                # The server closed an idle keep-alive connection; reconnect once
+                conn.close()
+                self._local.conn = None
+                if attempt == 2:
+                    raise
+
+def _cumulative(routes):
+    total, weights = 0, []
+    for route in routes:
+        total += route.weight
+        weights.append(total)
+    return weights
+
+def _client(transport, reads, writes, data, write_ratio, seed, deadline, stop_measuring, records):
+    """
+    One client: sends requests until `deadline`, recording
+    label -> ([latency seconds], {status: count}, errors).
+    """
+    rng = random.Random(seed)
+    read_weights, write_weights = _cumulative(reads), _cumulative(writes)
+    perf_counter = time.perf_counter
+    while True:
+        if writes and (not reads or rng.random() < write_ratio):
+            route = rng.choices(writes, cum_weights=write_weights)[0]
+        else:
+            route = rng.choices(reads, cum_weights=read_weights)[0]
+        path, body = route.make(rng, data)
+        started = perf_counter()
+        try:
+            status = transport.request(route.method, path, body)
+        except Exception: # A failed request must not end the client
+            status = 0
+        finished = perf_counter()
+        if finished >= deadline:
+            return
+        if finished < stop_measuring:
+            continue # Warm-up
+        record = records.get(route.label)
+        if record is None:
+            record = records[route.label] = ([], {}, [0])
+        record[0].append(finished - started)
+        record[1][status] = record[1].get(status, 0) + 1
+        if status not in route.expect:
+            record[2][0] += 1
+
+def percentile(values, p):
+    """
+    Nearest-rank percentile of a sorted list.
+    """
+    if not values:
+        return None
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+def summarize(latencies, statuses, errors, seconds):
+    """
+    Throughput and latency summary (milliseconds) of one endpoint or the total.
+    """
+    latencies = sorted(latencies)
+    ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'throughput': round(len(latencies) / seconds, 2) if seconds else None,
+        'mean_ms': ms(sum(latencies) / len(latencies)) if latencies else None,
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p95_ms': ms(percentile(latencies, 95)),
+        'p99_ms': ms(percentile(latencies, 99)),
+        'max_ms': ms(latencies[-1] if latencies else None),
+    }
+
+def run(transport, routes, data, concurrency=8, duration=30.0, warmup=3.0, write_ratio=0.1, seed=1):
+    """
+    Runs the mixed workload: `concurrency` clients for `warmup` + `duration`
+    seconds, of which only the last `duration` are measured.
+    Returns:
+      dict: {'seconds', 'total', 'endpoints': {label: summary}}
+    """
+    reads = [route for route in routes if not route.write and not route.final]
+    writes = [route for route in routes if route.write and not route.final]
+    started = time.perf_counter()
+    stop_measuring = started + warmup
+    deadline = stop_measuring + duration
+    records = [{} for _ in range(concurrency)]
+    threads = [
+        threading.Thread(target=_client, daemon=True, args=(
+            transport, reads, writes, data, write_ratio, seed * 1000 + n, deadline, stop_measuring, records[n]))
+        for n in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    merged = {}
+    for client_records in records:
+        for label, (latencies, statuses, errors) in client_records.items():
+            target = merged.setdefault(label, ([], {}, [0]))
+            target[0].extend(latencies)
+            for status, count in statuses.items():
+                target[1][status] = target[1].get(status, 0) + count
+            target[2][0] += errors[0]
+
+    all_latencies, all_statuses, all_errors = [], {}, 0
+    endpoints = {}
+    for label in sorted(merged):
+        latencies, statuses, errors = merged[label]
+        endpoints[label] = summarize(latencies, statuses, errors[0], duration)
+        all_latencies += latencies
+        all_errors += errors[0]
+        for status, count in statuses.items():
+            all_statuses[status] = all_statuses.get(status, 0) + count
+    return {
+        'seconds': duration,
+        'total': summarize(all_latencies, all_statuses, all_errors, duration),
+        'endpoints': endpoints,
+    }
+
+def run_final(transport, routes, data, seed=1):
+    """
+    Sends each destructive route once, in order. Returns {label: summary}.
+    """
+    rng = random.Random(seed)
+    results = {}
+    for route in routes:
+        if not route.final:
+            continue
+        path, body = route.make(rng, data)
+        started = time.perf_counter()
+        status = transport.request(route.method, path, body)
+        elapsed = time.perf_counter() - started
+        results[route.label] = summarize([elapsed], {status: 1}, 0 if status in route.expect else 1, None)
+    return results
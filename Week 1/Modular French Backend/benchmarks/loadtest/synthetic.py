@@ -0,0 +1,218 @@
+# backend/benchmarks/loadtest/synthetic.py
+"""
+Builds a synthetic database at a configurable scale.
+
+The schema comes from the app itself (db.migrate(): sql/setup plus the
+migrations), and history goes in through the same INSERTs the routes run,
+so every trigger-maintained table (word_stats, dashboard aggregates,
+streaks, word_schedule, per-student stats, counters) ends up exactly as if
+the sessions had been recorded through the API. Generation is seeded, so
+the same arguments give the same database (history ends at the start of
+the current UTC day, which keeps the streaks current).
+
+Per-row review triggers cap a load at roughly 15k reviews/s, so by default
+they are suspended (with the review indexes) while the history is written,
+then restored, and the tables they maintain are recomputed in bulk with the
+same rebuild helpers the maintenance commands use. That halves the build
+time (about 30k reviews/s end to end), which matters at tens of millions.
+"""
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from app import create_app
+from lib.db import db
+from lib.utils import _db_timestamp
+
+SYLLABLES = ('bon', 'jour', 'ma', 'tin', 'cha', 'peau', 'lou', 've', 'ri', 'tu', 'que', 'bec',
+             'nei', 'ge', 'pa', 'tate', 'fro', 'mage', 'su', 'cre', 'bleu', 'ets', 'pou', 'tine')
+ENGLISH = ('snow', 'maple', 'river', 'house', 'bread', 'cheese', 'winter', 'street', 'friend',
+           'morning', 'sugar', 'forest', 'hockey', 'coffee', 'market', 'window', 'shoe', 'boat')
+PARTS = ('noun', 'verb', 'adjective', 'adverb', 'expression')
+
+# Triggers fired by every review insert, and recomputed in bulk instead when
+# a build defers them. A trigger missing here just keeps running per row.
+REVIEW_TRIGGERS = (
+    'trg_word_review_items_insert_word_stats',
+    'trg_word_review_items_insert_dashboard',
+    'trg_word_review_items_insert_word_schedule',
+    'trg_word_review_items_replay_word_schedule',
+    'trg_word_review_items_insert_student',
+)
+
+# Default scale: large enough that index misses show, quick enough to build
+DEFAULT_SCALE = {
+    'words': 20000,
+    'groups': 40,
+    'students': 200,
+    'sessions': 20000,
+    'reviews': 1000000,
+}
+
+def _word_rows(rng, count, start):
+    """
+    Yields `count` (french_word, quebec_pronunciation, english, parts) rows.
+    """
+    for n in range(start, start + count):
+        syllables = rng.sample(SYLLABLES, rng.randint(2, 3))
+        yield (
+            ''.join(syllables) + f' {n}',
+            '-'.join(syllables),
+            f'{rng.choice(ENGLISH)} {rng.choice(ENGLISH)} {n}',
+            json.dumps({'type': rng.choice(PARTS), 'notes': f'Synthetic word {n}'}),
+        )
+
+def _split(total, parts):
+    """
+    Splits `total` into `parts` near-equal integers.
+    """
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+def build(path, words=DEFAULT_SCALE['words'], groups=DEFAULT_SCALE['groups'],
+          students=DEFAULT_SCALE['students'], sessions=DEFAULT_SCALE['sessions'],
+          reviews=DEFAULT_SCALE['reviews'], days=365, seed=1, batch_size=50000, defer_triggers=True,
+          log=print):
+    """
+    Creates a database at `path` (which must not exist yet).
+    Args:
+      words, groups, students, sessions, reviews (int): Rows to generate.
+        Words are spread evenly over the groups; every session reviews words
+        of its group, and about one session in ten has no student.
+      days (int): History span; sessions are spread over the `days` days
+        before today (UTC), so streaks and daily rollups have data.
+      seed (int): Random seed.
+      batch_size (int): Reviews written per transaction.
+      defer_triggers (bool): Suspend REVIEW_TRIGGERS and the review indexes
+        during the load and rebuild what they maintain at the end.
+      log (callable): Receives progress messages.
+    Returns:
+      dict: Row counts of the main tables.
+    """
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} already exists")
+    if groups < 1 or words < groups or sessions < 1:
+        raise ValueError("Need at least one session, one group and one word per group")
+    rng = random.Random(seed)
+    app = create_app({'DATABASE': path, 'METRICS_ENABLED': False, 'DB_SLOW_QUERY_MS': None})
+    started = time.perf_counter()
+
+    with app.app_context():
+        db.migrate()
+        with db.transaction() as cursor:
+            activities = db.load_json('study_activities.json')
+            cursor.executemany(
+                'INSERT INTO study_activities (name, thumbnail_url, description, launch_url) VALUES (?, ?, ?, ?)',
+                [(a['name'], a['thumbnail_url'], a['description'], a['launch_url']) for a in activities]
+            )
+            cursor.executemany('INSERT INTO students (name) VALUES (?)',
+                               [(f'Student {n:06d}',) for n in range(1, students + 1)])
+
+        # bulk_import_words gives each group a consecutive id range
+        group_words = []
+        imported = 0
+        for n, size in enumerate(_split(words, groups), start=1):
+            group_id, count = db.bulk_import_words(f'Group {n:04d}', _word_rows(rng, size, imported + 1))
+            first_word_id = db.cursor().execute(
+                'SELECT MIN(word_id) FROM words_groups WHERE group_id = ?', (group_id,)
+            ).fetchone()[0]
+            group_words.append((group_id, first_word_id, count))
+            imported += count
+        log(f"{imported} words in {groups} groups ({time.perf_counter() - started:.1f}s)")
+
+        activity_ids = [row[0] for row in db.cursor().execute('SELECT id FROM study_activities')]
+        end = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        start = end - timedelta(days=days)
+        span = int((end - start).total_seconds())
+        offsets = sorted(rng.randrange(span) for _ in range(sessions))
+
+        suspended = []
+        if defer_triggers:
+            with db.transaction() as cursor:
+                suspended = db._drop_indexes(cursor, ['word_review_items'])
+                suspended += db._drop_triggers(cursor, REVIEW_TRIGGERS)
+
+        written = pending = 0
+        session_rows, review_rows = [], []
+        for index, (offset, session_reviews) in enumerate(zip(offsets, _split(reviews, sessions)), start=1):
+            group_id, first_word_id, group_size = rng.choice(group_words)
+            student_id = rng.randint(1, students) if students and rng.random() >= 0.1 else None
+            created_at = start + timedelta(seconds=offset)
+            answered = [created_at + timedelta(seconds=5 * (i + 1), microseconds=rng.randrange(1000000))
+                        for i in range(session_reviews)]
+            session_rows.append((
+                group_id, rng.choice(activity_ids), student_id,
+                created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                _db_timestamp(answered[-1] if answered else created_at),
+            ))
+            review_rows.append((student_id, [
+                (first_word_id + rng.randrange(group_size), 1 if rng.random() < 0.7 else 0, _db_timestamp(at))
+                for at in answered
+            ]))
+            pending += session_reviews
+            if pending >= batch_size or index == sessions:
+                _write_sessions(session_rows, review_rows)
+                written += pending
+                session_rows, review_rows, pending = [], [], 0
+                log(f"{index}/{sessions} sessions, {written}/{reviews} reviews "
+                    f"({time.perf_counter() - started:.1f}s)")
+
+        if suspended:
+            with db.transaction() as cursor:
+                for create_sql in suspended:
+                    cursor.execute(create_sql)
+                _rebuild_review_aggregates(cursor)
+            db.rebuild_word_stats()
+            db.rebuild_word_schedule()
+            db.rebuild_student_stats()
+            log(f"Rebuilt indexes and review aggregates ({time.perf_counter() - started:.1f}s)")
+
+        conn = db.get_writer()
+        conn.execute('ANALYZE')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        counts = {table: db.cursor().execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                  for table in ('words', 'groups', 'students', 'study_sessions', 'word_review_items')}
+    db.close_all()
+    log(f"Built {path} in {time.perf_counter() - started:.1f}s: "
+        + ', '.join(f'{count} {table}' for table, count in counts.items()))
+    return counts
+
+def _write_sessions(session_rows, review_rows):
+    """
+    Inserts a batch of sessions and their reviews in one write transaction.
+    """
+    with db.transaction() as cursor:
+        first_id = db.next_autoincrement_id(cursor, 'study_sessions')
+        cursor.executemany('''
+            INSERT INTO study_sessions (group_id, study_activity_id, student_id, created_at, end_time)
+            VALUES (?, ?, ?, ?, ?)
+        ''', session_rows)
+        db.statements.executemany(cursor, 'reviews.insert', [
+            (word_id, session_id, student_id, correct, created_at)
+            for session_id, (student_id, rows) in enumerate(review_rows, start=first_id)
+            for word_id, correct, created_at in rows
+        ])
+
+def _rebuild_review_aggregates(cursor):
+    """
+    Recomputes the review columns of dashboard_aggregates and dashboard_daily
+    (migration 004); the session columns were kept by their triggers.
+    """
+    cursor.execute('''
+        UPDATE dashboard_aggregates
+        SET total_reviews = (SELECT COUNT(*) FROM word_review_items),
+            correct_reviews = (SELECT COUNT(*) FROM word_review_items WHERE correct = 1),
+            words_studied = (SELECT COUNT(DISTINCT word_id) FROM word_review_items)
+        WHERE id = 1
+    ''')
+    cursor.execute('''
+        INSERT INTO dashboard_daily (day, reviews, correct_reviews)
+        SELECT DATE(created_at), COUNT(*), SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END)
+        FROM word_review_items
+        WHERE created_at IS NOT NULL
+        GROUP BY DATE(created_at)
+        ON CONFLICT (day) DO UPDATE SET
+          reviews = excluded.reviews,
+          correct_reviews = excluded.correct_reviews
+    ''')
@@ -0,0 +1,219 @@
+# backend/benchmarks/loadtest/workload.py
+"""
+The request mix: one Route per (method, URL rule) the app registers, with a
+weight and a function producing a concrete request against the dataset.
+
+Weights are relative within the read and the write share of the mix (the
+run's --write-ratio picks between the two). The resets would wipe the
+dataset, so they are not part of the mix; they run once each after it.
+check_coverage() compares ROUTES with app.url_map, so a route added to
+routes/*.py without a workload entry stops the benchmark instead of going
+unmeasured.
+"""
+import json
+import sqlite3
+import uuid
+from datetime import date, timedelta
+
+from benchmarks.loadtest.synthetic import SYLLABLES
+
+class WorkloadError(Exception):
+    """
+    The workload does not match the routes the app registers.
+    """
+
+class Route:
+    """
+    One URL rule of the API and how to call it.
+    Args:
+      method (str): HTTP method.
+      rule (str): The Flask URL rule, as in app.url_map.
+      weight (float): Relative frequency within the reads or the writes.
+      make (callable): (rng, dataset) -> (path, body); body is None, a
+        JSON-serializable object, or bytes sent as they are.
+      write (bool): Part of the write share of the mix.
+      final (bool): Destructive; run once after the mix instead of in it.
+      expect (tuple): Status codes that count as success.
+    """
+    def __init__(self, method, rule, weight, make, write=False, final=False, expect=(200,)):
+        self.method = method
+        self.rule = rule
+        self.weight = weight
+        self.make = make
+        self.write = write
+        self.final = final
+        self.expect = expect
+
+    @property
+    def label(self):
+        return f'{self.method} {self.rule}'
+
+class Dataset:
+    """
+    Id ranges of the database under test, read once before the run.
+    """
+    def __init__(self, path):
+        conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        try:
+            def ids(table):
+                low, high = conn.execute(f'SELECT MIN(id), MAX(id) FROM {table}').fetchone()
+                return (low or 1, high or 1)
+            self.words = ids('words')
+            self.groups = ids('groups')
+            self.sessions = ids('study_sessions')
+            self.students = ids('students')
+            self.activities = ids('study_activities')
+            first, last = conn.execute('SELECT MIN(DATE(created_at)), MAX(DATE(created_at)) FROM study_sessions').fetchone()
+            self.counts = {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                           for table in ('words', 'groups', 'students', 'study_sessions', 'word_review_items')}
+        finally:
+            conn.close()
+        today = date.today()
+        self.first_day = date.fromisoformat(first) if first else today
+        self.last_day = date.fromisoformat(last) if last else today
+
+    def word(self, rng):
+        return rng.randint(*self.words)
+
+    def group(self, rng):
+        return rng.randint(*self.groups)
+
+    def session(self, rng):
+        return rng.randint(*self.sessions)
+
+    def student(self, rng):
+        return rng.randint(*self.students)
+
+    def activity(self, rng):
+        return rng.randint(*self.activities)
+
+    def day(self, rng):
+        return self.first_day + timedelta(days=rng.randint(0, (self.last_day - self.first_day).days))
+
+def _page(rng, pages=10):
+    return rng.randint(1, pages)
+
+def _word_listing(rng):
+    sort_by = rng.choice(('french_word', 'english', 'correct_count', 'wrong_count'))
+    return f"sort_by={sort_by}&order={rng.choice(('asc', 'desc'))}&page={_page(rng)}"
+
+def _date_range(rng, data, days=1):
+    day = data.day(rng)
+    return f'since={day.isoformat()}&until={(day + timedelta(days=days)).isoformat()}'
+
+def _review_batch(rng, data):
+    return [{'word_id': data.word(rng), 'correct': rng.random() < 0.7} for _ in range(rng.randint(5, 20))]
+
+def _import_body(rng, data):
+    rows = [{'french_word': f'import {uuid.uuid4().hex[:8]}', 'quebec_pronunciation': 'im-por',
+             'english': 'imported word', 'parts': {'notes': 'Load test import'}} for _ in range(10)]
+    return ('\n'.join(json.dumps(row) for row in rows) + '\n').encode()
+
+# Student-scoped routes take the same arguments after /api/students/<id>
+def _student(rng, data, path):
+    return f'/api/students/{data.student(rng)}{path[len("/api"):]}'
+
+ROUTES = [
+    # Reads: study screens and the dashboard dominate
+    Route('GET', '/api', 1, lambda rng, data: ('/api', None)),
+    Route('GET', '/api/dashboard/last_study_session', 4,
+          lambda rng, data: ('/api/dashboard/last_study_session', None)),
+    Route('GET', '/api/students/<int:student_id>/dashboard/last_study_session', 4,
+          lambda rng, data: (_student(rng, data, '/api/dashboard/last_study_session'), None)),
+    Route('GET', '/api/dashboard/study_progress', 3, lambda rng, data: ('/api/dashboard/study_progress', None)),
+    Route('GET', '/api/students/<int:student_id>/dashboard/study_progress', 3,
+          lambda rng, data: (_student(rng, data, '/api/dashboard/study_progress'), None)),
+    Route('GET', '/api/dashboard/quick-stats', 4, lambda rng, data: ('/api/dashboard/quick-stats', None)),
+    Route('GET', '/api/students/<int:student_id>/dashboard/quick-stats', 4,
+          lambda rng, data: (_student(rng, data, '/api/dashboard/quick-stats'), None)),
+    Route('GET', '/api/dashboard/daily', 1,
+          lambda rng, data: (f'/api/dashboard/daily?{_date_range(rng, data, 7)}', None)),
+    Route('GET', '/api/study_activities', 2, lambda rng, data: ('/api/study_activities', None)),
+    Route('GET', '/api/study_activities/<int:activity_id>', 2,
+          lambda rng, data: (f'/api/study_activities/{data.activity(rng)}', None)),
+    Route('GET', '/api/study_activities/<int:activity_id>/study_sessions', 2,
+          lambda rng, data: (f'/api/study_activities/{data.activity(rng)}/study_sessions?page={_page(rng)}', None)),
+    Route('GET', '/api/words', 8, lambda rng, data: (f'/api/words?{_word_listing(rng)}', None)),
+    Route('GET', '/api/students/<int:student_id>/words', 4,
+          lambda rng, data: (_student(rng, data, f'/api/words?{_word_listing(rng)}'), None)),
+    Route('GET', '/api/words/search', 4,
+          lambda rng, data: (f'/api/words/search?q={rng.choice(SYLLABLES)}', None)),
+    Route('GET', '/api/students/<int:student_id>/words/search', 2,
+          lambda rng, data: (_student(rng, data, f'/api/words/search?q={rng.choice(SYLLABLES)}'), None)),
+    Route('GET', '/api/words/<int:word_id>', 6, lambda rng, data: (f'/api/words/{data.word(rng)}', None)),
+    Route('GET', '/api/students/<int:student_id>/words/<int:word_id>', 3,
+          lambda rng, data: (_student(rng, data, f'/api/words/{data.word(rng)}'), None)),
+    Route('GET', '/api/groups', 3, lambda rng, data: (f'/api/groups?page={_page(rng, 2)}', None)),
+    Route('GET', '/api/groups/<int:group_id>', 3, lambda rng, data: (f'/api/groups/{data.group(rng)}', None)),
+    Route('GET', '/api/groups/<int:group_id>/words', 6,
+          lambda rng, data: (f'/api/groups/{data.group(rng)}/words?{_word_listing(rng)}', None)),
+    Route('GET', '/api/students/<int:student_id>/groups/<int:group_id>/words', 3,
+          lambda rng, data: (_student(rng, data, f'/api/groups/{data.group(rng)}/words?{_word_listing(rng)}'), None)),
+    Route('GET', '/api/groups/<int:group_id>/study_sessions', 2,
+          lambda rng, data: (f'/api/groups/{data.group(rng)}/study_sessions?page={_page(rng)}', None)),
+    Route('GET', '/api/study_sessions', 3, lambda rng, data: (f'/api/study_sessions?page={_page(rng)}', None)),
+    Route('GET', '/api/study_sessions/<int:session_id>', 4,
+          lambda rng, data: (f'/api/study_sessions/{data.session(rng)}', None)),
+    Route('GET', '/api/study_sessions/<int:session_id>/words', 4,
+          lambda rng, data: (f'/api/study_sessions/{data.session(rng)}/words', None)),
+    Route('GET', '/api/study_sessions/<int:session_id>/next_words', 6,
+          lambda rng, data: (f'/api/study_sessions/{data.session(rng)}/next_words?n=10', None)),
+    Route('GET', '/api/students', 1, lambda rng, data: (f'/api/students?page={_page(rng, 2)}', None)),
+    Route('GET', '/api/students/<int:student_id>', 2,
+          lambda rng, data: (f'/api/students/{data.student(rng)}', None)),
+    # One day of history per export, as an incremental sync would ask for
+    Route('GET', '/api/export/reviews', 0.2,
+          lambda rng, data: (f'/api/export/reviews?{_date_range(rng, data)}', None)),
+    Route('GET', '/api/export/sessions', 0.2,
+          lambda rng, data: (f'/api/export/sessions?{_date_range(rng, data)}', None)),
+    # Monitoring, polled now and then
+    Route('GET', '/api/_metrics', 0.2, lambda rng, data: ('/api/_metrics', None)),
+    Route('GET', '/api/admin/review_writer', 0.1, lambda rng, data: ('/api/admin/review_writer', None)),
+    Route('GET', '/api/admin/slow_queries', 0.1, lambda rng, data: ('/api/admin/slow_queries', None)),
+
+    # Writes: answering words is the bulk of them
+    Route('POST', '/api/study_sessions/<int:session_id>/words/<int:word_id>/review', 10,
+          lambda rng, data: (f'/api/study_sessions/{data.session(rng)}/words/{data.word(rng)}/review',
+                             {'correct': rng.random() < 0.7}), write=True, expect=(201,)),
+    Route('POST', '/api/study_sessions/<int:session_id>/reviews', 5,
+          lambda rng, data: (f'/api/study_sessions/{data.session(rng)}/reviews', _review_batch(rng, data)),
+          write=True, expect=(201,)),
+    Route('POST', '/api/study_activities', 2,
+          lambda rng, data: ('/api/study_activities', {
+              'group_id': data.group(rng), 'study_activity_id': data.activity(rng), 'student_id': data.student(rng),
+          }), write=True, expect=(201,)),
+    Route('POST', '/api/students', 0.5,
+          lambda rng, data: ('/api/students', {'name': f'Load {uuid.uuid4().hex}'}), write=True, expect=(201,)),
+    Route('POST', '/api/admin/import_words', 0.2,
+          lambda rng, data: ('/api/admin/import_words?group_name=Load+test+imports&format=ndjson',
+                             _import_body(rng, data)), write=True, expect=(201,)),
+    Route('DELETE', '/api/admin/slow_queries', 0.05,
+          lambda rng, data: ('/api/admin/slow_queries', None), write=True),
+
+    # Destructive: once each, after the mix, in this order
+    Route('POST', '/api/reset_history', 0, lambda rng, data: ('/api/reset_history', None), final=True),
+    Route('POST', '/api/full_reset', 0, lambda rng, data: ('/api/full_reset', None), final=True),
+]
+
+def registered_rules(app):
+    """
+    Returns the (method, rule) pairs the app serves, without Flask's own
+    static route and the automatic HEAD/OPTIONS methods.
+    """
+    return {
+        (method, rule.rule)
+        for rule in app.url_map.iter_rules() if rule.endpoint != 'static'
+        for method in rule.methods - {'HEAD', 'OPTIONS'}
+    }
+
+def check_coverage(app, routes=ROUTES):
+    """
+    Returns the routes the app registers. Raises WorkloadError naming the
+    registered rules without a Route; Routes for rules the app does not have
+    (benchmarking an older commit) are left out.
+    """
+    registered = registered_rules(app)
+    missing = registered - {(route.method, route.rule) for route in routes}
+    if missing:
+        raise WorkloadError("No workload for: " + ', '.join(f'{m} {r}' for m, r in sorted(missing, key=lambda x: x[1])))
+    return [route for route in routes if (route.method, route.rule) in registered]
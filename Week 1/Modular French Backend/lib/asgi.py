@@ -0,0 +1,225 @@
+
+# backend/lib/asgi.py
+import asyncio
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.exceptions import ClientDisconnected
+
+# Response bodies are handed to the event loop in chunks of at most this size
+RESPONSE_CHUNK_SIZE = 64 * 1024
+
+class _Receiver:
+  """
+  One request's `receive`, shared by the body reader and the disconnect
+  watcher. They take turns (ASGI allows one receive at a time): the watcher
+  starts once the view has returned, and from then on the body reads as
+  ended.
+  """
+  def __init__(self, receive):
+    self.receive = receive
+    self.body_complete = False
+    self.watching = False
+    self.disconnected = threading.Event()
+
+  async def next_body_chunk(self):
+    """
+    Returns the next piece of the request body, or None at its end. Raises
+    ClientDisconnected if the client goes away mid-upload, so a half-read
+    import fails (and rolls back) instead of seeing a short body.
+    """
+    if self.body_complete or self.watching:
+      return None
+    message = await self.receive()
+    if message['type'] == 'http.disconnect':
+      self.disconnected.set()
+      raise ClientDisconnected()
+    self.body_complete = not message.get('more_body')
+    return message.get('body', b'')
+
+  async def watch_disconnect(self):
+    """
+    Waits for http.disconnect, dropping any body the view didn't read.
+    """
+    self.watching = True
+    while True:
+      message = await self.receive()
+      if message['type'] == 'http.disconnect':
+        self.disconnected.set()
+        return
+
+class _RequestBody(io.RawIOBase):
+  """
+  The request body as a file (wsgi.input) read on the WSGI thread. Each read
+  fetches the next http.request message from the event loop, so an upload
+  is consumed as fast as the view reads it and never held whole in memory.
+  """
+  def __init__(self, receiver, loop):
+    self.receiver = receiver
+    self.loop = loop
+    self.pending = memoryview(b'')
+
+  def readable(self):
+    return True
+
+  def readinto(self, buffer):
+    while not self.pending:
+      chunk = asyncio.run_coroutine_threadsafe(self.receiver.next_body_chunk(), self.loop).result()
+      if chunk is None:
+        return 0
+      self.pending = memoryview(chunk)
+    size = min(len(buffer), len(self.pending))
+    buffer[:size] = self.pending[:size]
+    self.pending = self.pending[size:]
+    return size
+
+class AsgiAdapter:
+  """
+  Serves a Flask (WSGI) application over ASGI.
+
+  The event loop owns the sockets: keep-alive connections and slow
+  downloads cost no thread while they wait. Only the view itself runs on a
+  bounded thread pool, one request per thread, so each pool thread keeps its
+  pooled SQLite connections across requests and the pool size is the most
+  connections the process ever opens. Request bodies are streamed to the
+  view as it reads them (wsgi.input), so an import is never buffered whole;
+  the view's thread waits on a slow upload instead. Streaming responses (the exports) are sent chunk by chunk with
+  backpressure; a client that disconnects stops the generator, which closes
+  its connection.
+
+  Lifespan events run `on_startup` / `on_shutdown` (plain callables) on the
+  pool, e.g. migrations before the first request.
+  """
+  def __init__(self, wsgi_app, max_threads=32, on_startup=None, on_shutdown=None):
+    self.wsgi_app = wsgi_app
+    self.max_threads = max_threads
+    self.executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='asgi')
+    self.on_startup = on_startup
+    self.on_shutdown = on_shutdown
+
+  async def __call__(self, scope, receive, send):
+    if scope['type'] == 'http':
+      await self._http(scope, receive, send)
+    elif scope['type'] == 'lifespan':
+      await self._lifespan(receive, send)
+    else:
+      raise NotImplementedError(f"Unsupported ASGI scope type: {scope['type']}")
+
+  async def _lifespan(self, receive, send):
+    """
+    Handles the startup/shutdown handshake with the server.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+      message = await receive()
+      phase = message['type'].rsplit('.', 1)[-1] # 'startup' or 'shutdown'
+      hook = self.on_startup if phase == 'startup' else self.on_shutdown
+      try:
+        if hook:
+          await loop.run_in_executor(self.executor, hook)
+      except Exception as e:
+        await send({'type': f'lifespan.{phase}.failed', 'message': str(e)})
+        return
+      await send({'type': f'lifespan.{phase}.complete'})
+      if phase == 'shutdown':
+        self.executor.shutdown(wait=True)
+        return
+
+  def build_environ(self, scope, body):
+    """
+    Translates an ASGI HTTP scope into a WSGI environ (PEP 3333). `body` is
+    the request body as a readable file; it ends where the client's does
+    (wsgi.input_terminated), chunked uploads included.
+    """
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+      path = path[len(root_path):]
+    environ = {
+      'REQUEST_METHOD': scope['method'],
+      # WSGI carries the UTF-8 bytes of the path as latin-1 text
+      'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+      'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+      'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+      'SERVER_NAME': server_name,
+      'SERVER_PORT': str(server_port),
+      'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+      'REMOTE_ADDR': client[0],
+      'REMOTE_PORT': str(client[1]),
+      'wsgi.version': (1, 0),
+      'wsgi.url_scheme': scope.get('scheme', 'http'),
+      'wsgi.input': body,
+      'wsgi.input_terminated': True,
+      'wsgi.errors': sys.stderr,
+      'wsgi.multithread': True,
+      'wsgi.multiprocess': False,
+      'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope.get('headers', []):
+      name = raw_name.decode('latin-1').upper().replace('-', '_')
+      value = raw_value.decode('latin-1')
+      if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+        environ[name] = value
+        continue
+      key = f'HTTP_{name}'
+      environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+  async def _http(self, scope, receive, send):
+    """
+    Runs one request through the WSGI application on the thread pool.
+    """
+    loop = asyncio.get_running_loop()
+    receiver = _Receiver(receive)
+    environ = self.build_environ(scope, io.BufferedReader(_RequestBody(receiver, loop)))
+    await loop.run_in_executor(self.executor, self._run_wsgi, environ, receiver, send, loop)
+
+  def _run_wsgi(self, environ, receiver, send, loop):
+    """
+    Calls the WSGI application on a pool thread and relays its response.
+    Each send is awaited before the next chunk is produced, so a slow client
+    slows the generator down instead of buffering the whole body in memory.
+    A task on the loop watches for the client going away; the generator is
+    then closed between chunks rather than run to the end for nobody (the
+    server drops sends to a closed connection without an error).
+    """
+    def send_message(message):
+      asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+    response = {}
+    def start_response(status, headers, exc_info=None):
+      if exc_info and response.get('sent'):
+        raise exc_info[1].with_traceback(exc_info[2])
+      response['status'] = int(status.split(' ', 1)[0])
+      response['headers'] = [
+        (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers
+      ]
+
+    def send_start():
+      if not response.get('sent'):
+        send_message({'type': 'http.response.start', 'status': response['status'],
+                      'headers': response['headers']})
+        response['sent'] = True
+
+    result = self.wsgi_app(environ, start_response)
+    watcher = asyncio.run_coroutine_threadsafe(receiver.watch_disconnect(), loop)
+    try:
+      for data in result:
+        if receiver.disconnected.is_set():
+          break
+        for offset in range(0, len(data), RESPONSE_CHUNK_SIZE):
+          send_start()
+          send_message({'type': 'http.response.body',
+                        'body': bytes(data[offset:offset + RESPONSE_CHUNK_SIZE]),
+                        'more_body': True})
+      else:
+        if not receiver.disconnected.is_set():
+          send_start()
+          send_message({'type': 'http.response.body', 'body': b'', 'more_body': False})
+    finally:
+      watcher.cancel()
+      if hasattr(result, 'close'):
+        result.close()
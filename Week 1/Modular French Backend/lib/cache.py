@@ -0,0 +1,58 @@
+
+# backend/lib/cache.py
+import threading
+from collections import OrderedDict
+
+class WriteInvalidatedCache:
+  """
+  Small in-process cache for computed API payloads.
+  Each entry remembers the global data version it was computed at and is
+  recomputed as soon as any write has been committed since, so readers
+  never see results older than the last write, whichever process made it.
+  At most max_entries are kept; the least recently used one is evicted
+  first, so keys that stop being asked for (a past day, an idle student)
+  don't accumulate.
+  """
+  def __init__(self, db, max_entries=1024):
+    """
+    Initializes an empty cache bound to a Db instance.
+    """
+    self.db = db
+    self.max_entries = max_entries
+    self._entries = OrderedDict()
+    self._lock = threading.Lock()
+
+  def get_or_compute(self, key, compute):
+    """
+    Returns the cached value for `key`, calling `compute()` if it is
+    missing or a write happened since it was stored.
+    """
+    # Read the version before computing: if a write lands mid-compute the
+    # entry is stored under the older version and recomputed next time.
+    version = self.db.data_version()
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is not None and entry[0] == version:
+        self._entries.move_to_end(key)
+        return entry[1]
+    value = compute()
+    with self._lock:
+      self._entries[key] = (version, value)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+    return value
+
+  def __len__(self):
+    """
+    Returns the number of entries currently held.
+    """
+    with self._lock:
+      return len(self._entries)
+
+  def clear(self):
+    """
+    Drops every entry.
+    """
+    with self._lock:
+      self._entries.clear()
@@ -0,0 +1,158 @@
+
+# backend/lib/cli.py
+import click
+import gzip
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from lib.db import db
+from lib.server import PreforkServer
+from lib.statements import StatementError
+from lib.word_import import FORMATS, WordImportError, detect_format, iter_word_records, iter_word_rows
+
+def load(app):
+  """
+  Registers maintenance commands with the Flask CLI.
+  Run them with `flask --app app <command>` from the backend directory.
+  """
+
+  @app.cli.command('migrate')
+  def migrate_command():
+    """
+    Applies pending schema migrations without touching existing data.
+    """
+    applied = db.migrate()
+    click.echo(f"Schema at version {db.schema_version()} ({len(applied)} migration(s) applied).")
+
+  @app.cli.command('build-seed-template')
+  def build_seed_template_command():
+    """
+    Builds the seeded template database that full resets restore.
+    """
+    path = db.build_seed_template(app)
+    if path is None:
+      raise click.ClickException("In-memory databases have no seed template.")
+    click.echo(f"Seed template ready at {path}.")
+
+  @app.cli.command('check-sql')
+  def check_sql_command():
+    """
+    Compiles every registered SQL statement against the current schema.
+    """
+    try:
+      checked = db.check_statements()
+    except StatementError as e:
+      raise click.ClickException(str(e))
+    click.echo(f"All {checked} SQL statement(s) match schema version {db.schema_version()}.")
+
+  @app.cli.command('serve')
+  @click.option('--host', default='0.0.0.0', show_default=True)
+  @click.option('--port', default=5000, show_default=True)
+  @click.option('--workers', type=int, help='Worker processes (default: SERVER_WORKERS).')
+  @click.option('--threads', type=int, help='Request threads per worker (default: SERVER_THREADS).')
+  @click.option('--graceful-timeout', default=30.0, show_default=True, help='Seconds to finish in-flight requests on shutdown.')
+  def serve_command(host, port, workers, threads, graceful_timeout):
+    """
+    Runs the pre-forking production server (migrates and seeds first).
+    """
+    if not hasattr(os, 'fork'):
+      raise click.ClickException("serve needs os.fork; use `python app.py` or asgi.py on this platform.")
+    PreforkServer(
+      app, host=host, port=port,
+      workers=workers or app.config.get('SERVER_WORKERS', 2),
+      threads=threads or app.config.get('SERVER_THREADS', 8),
+      graceful_timeout=graceful_timeout
+    ).run()
+
+  @app.cli.command('rebuild-word-stats')
+  def rebuild_word_stats_command():
+    """
+    Recomputes the per-word review counters from the review history.
+    """
+    rebuilt = db.rebuild_word_stats()
+    click.echo(f"Rebuilt review counters for {rebuilt} words.")
+
+  @app.cli.command('rebuild-study-streak')
+  def rebuild_study_streak_command():
+    """
+    Recomputes the persisted study streak from the session history.
+    """
+    streak, last_study_date = db.rebuild_study_streak()
+    click.echo(f"Study streak: {streak} day(s), last study date {last_study_date or 'none'}.")
+
+  @app.cli.command('rebuild-word-schedule')
+  def rebuild_word_schedule_command():
+    """
+    Recomputes the spaced-repetition schedule from the review history.
+    """
+    rebuilt = db.rebuild_word_schedule()
+    click.echo(f"Rebuilt review schedules for {rebuilt} words.")
+
+  @app.cli.command('rebuild-student-stats')
+  def rebuild_student_stats_command():
+    """
+    Recomputes every student's review counters, totals and streak.
+    """
+    rebuilt = db.rebuild_student_stats()
+    click.echo(f"Rebuilt statistics for {rebuilt} students.")
+
+  @app.cli.command('compact-reviews')
+  @click.option('--older-than', 'days', type=int, help='Retention in days (default: REVIEW_RETENTION_DAYS).')
+  @click.option('--archive', type=click.Path(dir_okay=False), help='Append the compacted reviews to this NDJSON file (.gz: gzip).')
+  def compact_reviews_command(days, archive):
+    """
+    Folds old reviews into daily rollups and removes them from the review log.
+    """
+    days = days if days is not None else app.config.get('REVIEW_RETENTION_DAYS', 90)
+    if days < 1:
+      raise click.ClickException("--older-than must be at least 1 day.")
+    # Whole UTC days, so every rollup day is complete
+    before = (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d')
+    started = time.perf_counter()
+    if archive:
+      opener = gzip.open if archive.endswith('.gz') else open
+      with opener(archive, 'at', encoding='utf-8') as file:
+        result = db.compact_reviews(before, archive=file)
+    else:
+      result = db.compact_reviews(before)
+    elapsed = time.perf_counter() - started
+    click.echo(f"Compacted {result['reviews']} reviews from before {before} ({result['days']} day(s)) in {elapsed:.2f}s.")
+
+  @app.cli.command('check-counters')
+  @click.option('--repair', is_flag=True, help='Overwrite drifted counters with the recomputed values.')
+  def check_counters_command(repair):
+    """
+    Verifies the trigger-maintained row counters against COUNT(*).
+    """
+    drift = db.check_counters(repair=repair)
+    for name, scope_id, stored, actual in drift:
+      scope = f"[{scope_id}]" if scope_id else ""
+      click.echo(f"{name}{scope}: stored {stored}, actual {actual}")
+    if not drift:
+      click.echo("All counters are consistent.")
+    elif repair:
+      click.echo(f"Repaired {len(drift)} counter(s).")
+    else:
+      raise click.ClickException(f"{len(drift)} counter(s) drifted; rerun with --repair to fix them.")
+
+  @app.cli.command('import-words')
+  @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+  @click.option('--group', 'group_name', required=True, help='Group to add the words to (created if missing).')
+  @click.option('--format', 'fmt', type=click.Choice(sorted(set(FORMATS.values()))), help='Defaults to the file extension.')
+  @click.option('--defer-indexes/--no-defer-indexes', default=True, help='Rebuild indexes once after loading.')
+  @click.option('--batch-size', default=5000, show_default=True)
+  def import_words_command(path, group_name, fmt, defer_indexes, batch_size):
+    """
+    Bulk-imports a JSON, NDJSON or CSV vocabulary file in one transaction.
+    """
+    fmt = fmt or detect_format(path)
+    started = time.perf_counter()
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+      try:
+        group_id, imported = db.bulk_import_words(
+          group_name, iter_word_rows(iter_word_records(file, fmt)),
+          batch_size=batch_size, defer_indexes=defer_indexes)
+      except WordImportError as e:
+        raise click.ClickException(f"Import failed, nothing was written: {e}")
+    elapsed = time.perf_counter() - started
+    click.echo(f"Imported {imported} words into '{group_name}' (group {group_id}) in {elapsed:.2f}s.")
@@ -1,37 +1,299 @@
 
 # backend/lib/db.py
 import sqlite3
+import glob
+import hashlib
 import json
 import os
-from flask import g # Flask's 'g' object for request-specific global variables
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.request import pathname2url
+from flask import g, has_app_context, has_request_context, request # Flask's 'g' object for request-specific global variables
+from lib.slow_queries import SlowQueryLog
+from lib.statements import StatementCatalog
+from lib.word_import import iter_word_rows
+
+# Per-connection settings applied once when a pooled connection is opened.
+# WAL lets readers keep going while the single writer commits, and NORMAL
+# synchronous is durable under WAL except for power loss on the last commit.
+DEFAULT_PRAGMAS = {
+  'journal_mode': 'WAL',
+  'synchronous': 'NORMAL',
+  'busy_timeout': 5000,        # Milliseconds to wait on a locked database
+  'cache_size': -16000,        # Negative values are KiB (16 MB page cache)
+  'mmap_size': 64 * 1024 * 1024,
+  'temp_store': 'MEMORY',
+}
+
+# Every review as (word_id, student_id, correct_count, wrong_count): one row
+# per raw review plus the compacted history (see Db.compact_reviews)
+REVIEW_HISTORY = '''
+  SELECT word_id, student_id,
+         CASE WHEN correct = 1 THEN 1 ELSE 0 END AS correct_count,
+         CASE WHEN correct = 0 THEN 1 ELSE 0 END AS wrong_count
+  FROM word_review_items
+  UNION ALL
+  SELECT word_id, NULLIF(student_id, 0), correct_count, wrong_count FROM review_rollups
+'''
+
+# Triggers that would take compacted reviews out of the statistics
+REVIEW_DELETE_TRIGGERS = (
+  'trg_word_review_items_delete_word_stats',
+  'trg_word_review_items_delete_dashboard',
+  'trg_word_review_items_delete_student',
+)
+
+# Per-row triggers Db.bulk_import_words replaces with one statement each
+BULK_IMPORT_TRIGGERS = (
+  'trg_words_insert_fts',
+  'trg_words_insert_counters',
+  'trg_words_groups_insert_word_count',
+)
+
+# Request methods served from read-only snapshot connections
+READ_ONLY_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+
+# Numbered migration scripts live in sql/migrations, e.g. 001_hot_path_indexes.sql
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d+)_(\w+)\.sql$')
 
 class Db:
   """
   Database helper class for managing SQLite connections and operations.
   Uses Flask's `g` object to ensure a single database connection per request.
+  Connections are pooled per thread (and per worker process) so the connect
+  and PRAGMA setup cost is paid once instead of on every request.
+  Each thread has a writer connection and, for GET requests, a separate
+  read-only connection that serves the whole request from one WAL snapshot.
   """
-  def __init__(self, database='lang_portal.db'):
+  def __init__(self, database='lang_portal.db', pragmas=None, pool_enabled=True,
+               health_check_interval=30.0, read_connections=True, statement_cache_size=512,
+               seed_template=True):
     """
     Initializes the Db instance with the database file path.
     """
     self.database = database
     self.connection = None # Connection will be managed by Flask's g
+    self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+    self.pool_enabled = pool_enabled
+    self.read_connections = read_connections # Serve GET requests from read-only connections
+    self.health_check_interval = health_check_interval # Seconds idle before a ping
+    self._local = threading.local() # Holds each thread's pooled connection
+    self._pool_lock = threading.Lock()
+    self._connections = set() # Every open pooled connection, for close_all()
+    self._pid = os.getpid()
+    self._sql_text = {} # SQL file contents by path under sql/, filled by preload_sql()
+    # Named statements run by the routes (and the hot helpers below), checked
+    # against the schema on startup; see lib/statements.py
+    self.statements = StatementCatalog()
+    self.statement_cache_size = statement_cache_size # Prepared statements kept per connection
+    self.seed_template = seed_template # Full resets restore a prebuilt seeded copy
+    self._seed_fingerprint = None # Hash of sql/ and seed/, see seed_template_path()
+    self.statements.register('data_version.get', 'SELECT version FROM data_version WHERE id = 1')
+    self.statements.register('data_version.bump', 'UPDATE data_version SET version = version + 1 WHERE id = 1')
+    self.statements.register('data_version.with_schema',
+                             'SELECT (SELECT user_version FROM pragma_user_version), version FROM data_version WHERE id = 1')
+    self.statements.register('table_counters.get',
+                             'SELECT count FROM table_counters WHERE name = ? AND scope_id = ?')
+    self.statements.register('reviews.session_student', 'SELECT student_id FROM study_sessions WHERE id = ?')
+    self.statements.register('reviews.insert', 'INSERT INTO word_review_items '
+                             '(word_id, study_session_id, student_id, correct, created_at) VALUES (?, ?, ?, ?, ?)')
+    self.statements.register('reviews.session_end_time', 'UPDATE study_sessions SET end_time = ? WHERE id = ?')
+    # Statements slower than the threshold, with their plans (off until set)
+    self.slow_queries = SlowQueryLog()
+
+  def init_app(self, app):
+    """
+    Applies connection settings from the Flask config.
+    Recognized keys: DATABASE, DB_POOL_ENABLED, DB_READ_CONNECTIONS,
+    DB_BUSY_TIMEOUT_MS, DB_CACHE_SIZE_KB, DB_MMAP_SIZE,
+    DB_STATEMENT_CACHE_SIZE, DB_HEALTH_CHECK_INTERVAL, DB_SLOW_QUERY_MS,
+    DB_SLOW_QUERY_LOG_SIZE and DB_SEED_TEMPLATE.
+    """
+    config = app.config
+    self.database = config.get('DATABASE', self.database)
+    self.pool_enabled = config.get('DB_POOL_ENABLED', self.pool_enabled)
+    self.read_connections = config.get('DB_READ_CONNECTIONS', self.read_connections)
+    self.health_check_interval = config.get('DB_HEALTH_CHECK_INTERVAL', self.health_check_interval)
+    self.statement_cache_size = config.get('DB_STATEMENT_CACHE_SIZE', self.statement_cache_size)
+    self.seed_template = config.get('DB_SEED_TEMPLATE', self.seed_template)
+    if 'DB_BUSY_TIMEOUT_MS' in config:
+      self.pragmas['busy_timeout'] = int(config['DB_BUSY_TIMEOUT_MS'])
+    if 'DB_CACHE_SIZE_KB' in config:
+      self.pragmas['cache_size'] = -int(config['DB_CACHE_SIZE_KB'])
+    if 'DB_MMAP_SIZE' in config:
+      self.pragmas['mmap_size'] = int(config['DB_MMAP_SIZE'])
+    if 'DB_SLOW_QUERY_LOG_SIZE' in config:
+      self.slow_queries.capacity = int(config['DB_SLOW_QUERY_LOG_SIZE'])
+    self.set_slow_query_threshold(config.get('DB_SLOW_QUERY_MS', self.slow_queries.threshold_ms))
+    # Settings (or the database path) may have changed, so drop old connections
+    self.close_all()
+
+  def connect(self, read_only=False):
+    """
+    Opens a new, fully configured connection to the database.
+    A read_only connection is opened with mode=ro and query_only, so it can
+    never take the write lock; under WAL its reads don't block the writer
+    and aren't blocked by it.
+    """
+    # check_same_thread=False only so close_all() can close connections owned
+    # by other threads; each pooled connection is still used by a single thread.
+    # The statement cache holds every catalog statement a connection runs.
+    cached_statements = max(self.statement_cache_size, len(self.statements))
+    if read_only:
+      uri = f"file:{pathname2url(os.path.abspath(self.database))}?mode=ro"
+      conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=cached_statements)
+    else:
+      conn = sqlite3.connect(self.database, check_same_thread=False, cached_statements=cached_statements)
+    conn.row_factory = sqlite3.Row  # Return rows as dictionary-like objects
+    for name, value in self.pragmas.items():
+      if read_only and name == 'journal_mode':
+        continue # Persistent in the file and set by the writer; changing it needs write access
+      conn.execute(f'PRAGMA {name} = {value}')
+    if read_only:
+      conn.execute('PRAGMA query_only = ON')
+    return conn
+
+  def _is_healthy(self, conn):
+    """
+    Runs a trivial query to make sure a pooled connection is still usable.
+    """
+    try:
+      conn.execute('SELECT 1').fetchone()
+      return True
+    except sqlite3.Error:
+      return False
+
+  def _discard(self, conn):
+    """
+    Closes a pooled connection and forgets about it.
+    """
+    with self._pool_lock:
+      self._connections.discard(conn)
+    try:
+      conn.close()
+    except sqlite3.Error:
+      pass
+
+  def _checkout(self, read_only=False):
+    """
+    Returns this thread's pooled writer (or read-only) connection, opening
+    one if needed.
+    """
+    if os.getpid() != self._pid:
+      # Forked worker: connections inherited from the parent must not be reused
+      with self._pool_lock:
+        self._connections = set()
+      self._local = threading.local()
+      self._pid = os.getpid()
+
+    slot = 'read_conn' if read_only else 'conn'
+    conn = getattr(self._local, slot, None)
+    if conn is not None:
+      idle = time.monotonic() - getattr(self._local, f'{slot}_last_used')
+      if idle > self.health_check_interval and not self._is_healthy(conn):
+        self._discard(conn)
+        conn = None
+
+    if conn is None:
+      conn = self.connect(read_only=read_only)
+      with self._pool_lock:
+        self._connections.add(conn)
+      setattr(self._local, slot, conn)
+      setattr(self._local, f'{slot}_last_used', time.monotonic())
+    return conn
+
+  def _checkin(self, conn, read_only=False):
+    """
+    Returns a connection to the pool, rolling back any unfinished transaction
+    (for a read-only connection, releasing its snapshot).
+    """
+    slot = 'read_conn' if read_only else 'conn'
+    try:
+      if conn.in_transaction:
+        conn.rollback()
+    except sqlite3.Error:
+      self._discard(conn)
+      setattr(self._local, slot, None)
+      return
+    setattr(self._local, f'{slot}_last_used', time.monotonic())
 
   def get(self):
     """
-    Gets the database connection for the current request context.
-    If a connection doesn't exist in `g`, it creates one.
+    Gets the database connection for the current request context: a
+    read-only snapshot connection for GET requests, the writer otherwise.
+    """
+    if (self.read_connections and has_request_context()
+        and request.method in READ_ONLY_METHODS):
+      return self.get_reader()
+    return self.get_writer()
+
+  def get_reader(self):
     """
+    Gets the read-only connection for the current request context. The
+    first call opens a read transaction, so every query of the request sees
+    the same WAL snapshot (data version, rows and totals all agree); it
+    ends when the request is torn down.
+    """
+    if not has_app_context():
+      return self._checkout(read_only=True)
+    if 'db_reader' not in g:
+      conn = self._checkout(read_only=True) if self.pool_enabled else self.connect(read_only=True)
+      conn.execute('BEGIN') # Deferred: the snapshot is taken by the first read
+      g.db_reader = conn
+    return g.db_reader
+
+  def get_writer(self):
+    """
+    Gets the writer connection for the current request context.
+    If a connection doesn't exist in `g`, it checks one out of the pool.
+    Outside an app context (e.g. background threads) the calling thread's
+    pooled connection is used directly.
+    """
+    if not has_app_context():
+      return self._checkout()
     if 'db' not in g:
-      g.db = sqlite3.connect(self.database)
-      g.db.row_factory = sqlite3.Row  # Return rows as dictionary-like objects
+      g.db = self._checkout() if self.pool_enabled else self.connect()
     return g.db
 
   def commit(self):
     """
     Commits any pending transactions to the database.
+    A commit that wrote something also bumps the persisted data version in
+    the same transaction, so readers in any process see the new data and the
+    new version together.
+    """
+    conn = self.get_writer()
+    if conn.in_transaction:
+      try:
+        self.statements.execute(conn, 'data_version.bump')
+      except sqlite3.OperationalError:
+        pass # Schema not migrated yet (or being rebuilt by a full reset)
+    conn.commit()
+
+  def data_version(self):
+    """
+    Returns the current global data version (0 before the schema exists).
+    Any committed write moves it forward.
     """
-    self.get().commit()
+    try:
+      row = self.statements.execute(self.get(), 'data_version.get').fetchone()
+    except sqlite3.OperationalError:
+      return 0
+    return row[0] if row else 0
+
+  def data_versions(self):
+    """
+    Returns (schema version, data version) with one query on the request's
+    connection; (0, 0) before the schema exists. Together they identify the
+    stored data and the schema it was read with.
+    """
+    try:
+      row = self.statements.execute(self.get(), 'data_version.with_schema').fetchone()
+    except sqlite3.OperationalError:
+      return 0, 0
+    return tuple(row) if row else (0, 0)
 
   def cursor(self):
     """
@@ -39,20 +301,90 @@ class Db:
     """
     return self.get().cursor()
 
+  def query(self, name, params=(), **parts):
+    """
+    Executes a statement from the catalog on the request's connection and
+    returns the cursor, e.g. db.query('groups.by_id', (group_id,)).fetchone().
+    """
+    return self.statements.execute(self.cursor(), name, params, **parts)
+
+  def set_slow_query_threshold(self, threshold_ms):
+    """
+    Logs catalog statements running for at least `threshold_ms` milliseconds
+    (see lib/slow_queries.py); None turns the slow-query log off.
+    """
+    self.slow_queries.threshold_ms = threshold_ms
+    observing = self.slow_queries.observe in self.statements.observers
+    if threshold_ms is None and observing:
+      self.statements.observers.remove(self.slow_queries.observe)
+    elif threshold_ms is not None and not observing:
+      self.statements.observers.append(self.slow_queries.observe)
+
+  def check_statements(self):
+    """
+    Compiles every catalog statement against the current schema.
+    Raises StatementError naming each statement that no longer matches it.
+    """
+    return self.statements.check(self.get_writer())
+
+  @contextmanager
+  def transaction(self):
+    """
+    Runs a block in a single write transaction and yields its cursor.
+    BEGIN IMMEDIATE takes the write lock up front, so the block never fails
+    halfway with a lock upgrade error. Commits on success, rolls back on error.
+    Always runs on the writer connection, also when called from a GET request.
+    """
+    conn = self.get_writer()
+    if conn.in_transaction:
+      self.commit() # Don't fold unrelated pending work into this transaction
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+      yield cursor
+    except BaseException:
+      conn.rollback()
+      raise
+    else:
+      self.commit()
+
   def close(self):
     """
-    Closes the database connection for the current request context.
-    Called automatically by Flask's teardown_appcontext.
+    Releases the database connections of the current request context.
+    Called automatically by Flask's teardown_appcontext. Pooled connections
+    stay open for the next request handled by this thread.
     """
-    db_conn = g.pop('db', None)
-    if db_conn is not None:
-      db_conn.close()
+    for key, read_only in (('db', False), ('db_reader', True)):
+      db_conn = g.pop(key, None)
+      if db_conn is None:
+        continue
+      if self.pool_enabled:
+        self._checkin(db_conn, read_only=read_only)
+      else:
+        db_conn.close()
+
+  def close_all(self):
+    """
+    Closes every pooled connection (e.g. on shutdown or config changes).
+    """
+    with self._pool_lock:
+      connections, self._connections = self._connections, set()
+    for conn in connections:
+      try:
+        conn.close()
+      except sqlite3.Error:
+        pass
+    self._local = threading.local()
 
   def sql(self, filepath):
     """
     Reads and returns the content of an SQL file.
     Assumes SQL files are in the 'sql/' directory relative to the project root.
+    Each file is read once and then served from memory.
     """
+    if filepath in self._sql_text:
+      return self._sql_text[filepath]
+
     # Construct the absolute path to the SQL file
     # Assuming 'backend' is the root, and 'lib' is inside 'backend'
     current_dir = os.path.dirname(__file__)
@@ -60,7 +392,23 @@ class Db:
     sql_file_path = os.path.join(project_root, 'sql', filepath)
     
     with open(sql_file_path, 'r') as file:
-      return file.read()
+      text = file.read()
+    self._sql_text[filepath] = text # Read each file from disk once
+    return text
+
+  def preload_sql(self):
+    """
+    Reads every SQL file under sql/ into memory, so a pre-forking server
+    loads them once in the master and workers share the text.
+    Returns the number of files loaded.
+    """
+    sql_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'sql'))
+    for directory, _, filenames in os.walk(sql_root):
+      for filename in filenames:
+        if filename.endswith('.sql'):
+          relative = os.path.relpath(os.path.join(directory, filename), sql_root).replace(os.sep, '/')
+          self._sql_text[relative] = self.sql(relative)
+    return len(self._sql_text)
 
   def load_json(self, filepath):
     """
@@ -92,48 +440,510 @@ class Db:
     cursor.execute(self.sql('setup/create_table_word_review_items.sql'))
     self.commit()
 
-  def import_words_data(self, cursor, group_name, data_json_path):
+  def migrations(self):
     """
-    Imports words from a JSON file and links them to a group.
+    Returns every numbered migration as (version, name, filepath), in order.
     """
-    # Insert a new group
-    cursor.execute('INSERT INTO groups (name) VALUES (?)', (group_name,))
-    self.commit()
+    current_dir = os.path.dirname(__file__)
+    migrations_dir = os.path.abspath(os.path.join(current_dir, '..', 'sql', 'migrations'))
+    found = []
+    for filename in os.listdir(migrations_dir):
+      match = MIGRATION_FILE_PATTERN.match(filename)
+      if match:
+        found.append((int(match.group(1)), match.group(2), f'migrations/{filename}'))
+    return sorted(found)
 
-    # Get the ID of the newly inserted group
-    cursor.execute('SELECT id FROM groups WHERE name = ?', (group_name,))
-    group_id = cursor.fetchone()[0]
+  def schema_version(self):
+    """
+    Returns the migration version recorded in the database header.
+    """
+    return self.get_writer().execute('PRAGMA user_version').fetchone()[0]
 
-    # Load words from the specified JSON file
-    words = self.load_json(data_json_path)
+  def _split_statements(self, script):
+    """
+    Splits an SQL script into complete statements (trigger bodies included).
+    """
+    statements = []
+    pending = ''
+    for line in script.splitlines(keepends=True):
+      pending += line
+      if sqlite3.complete_statement(pending):
+        statements.append(pending.strip())
+        pending = ''
+    if pending.strip():
+      statements.append(pending.strip())
+    return statements
 
-    for word in words:
-      # Insert the word into the words table
+  def migrate(self):
+    """
+    Creates any missing base tables, then applies pending numbered migrations
+    in place. Each migration runs in its own write transaction together with
+    the PRAGMA user_version bump, so a failed migration leaves no trace and
+    concurrent workers never apply the same migration twice.
+    """
+    conn = self.get_writer()
+    self.setup_tables(conn.cursor())
+
+    applied = []
+    for version, name, filepath in self.migrations():
+      if version <= self.schema_version():
+        continue
+      statements = self._split_statements(self.sql(filepath))
+      conn.execute('BEGIN IMMEDIATE')
+      try:
+        # Re-check under the write lock in case another worker got here first
+        if version <= self.schema_version():
+          conn.rollback()
+          continue
+        for statement in statements:
+          conn.execute(statement)
+        conn.execute(f'PRAGMA user_version = {version}')
+        conn.commit()
+      except sqlite3.Error:
+        conn.rollback()
+        raise
+      applied.append(f'{version:03d}_{name}')
+
+    if applied:
+      conn.execute('PRAGMA optimize') # Refresh planner statistics for the new indexes
+      print(f"Applied migrations: {', '.join(applied)}")
+    return applied
+
+  def rebuild_word_stats(self):
+    """
+    Recomputes the trigger-maintained word_stats table from the full review
+    history (raw and compacted), repairing any drift. Returns the number of
+    words rebuilt.
+    """
+    with self.transaction() as cursor:
+      cursor.execute('DELETE FROM word_stats;')
+      cursor.execute(f'''
+        INSERT INTO word_stats (word_id, correct_count, wrong_count)
+        SELECT w.id, COALESCE(h.correct_count, 0), COALESCE(h.wrong_count, 0)
+        FROM words w
+        LEFT JOIN (
+          SELECT word_id, SUM(correct_count) AS correct_count, SUM(wrong_count) AS wrong_count
+          FROM ({REVIEW_HISTORY})
+          GROUP BY word_id
+        ) h ON w.id = h.word_id;
+      ''')
+      return cursor.rowcount
+
+  def rebuild_study_streak(self):
+    """
+    Recomputes the persisted streak state from all session dates with a
+    gaps-and-islands query. Returns (current_streak, last_study_date).
+    """
+    with self.transaction() as cursor:
       cursor.execute('''
-        INSERT INTO words (french_word, quebec_pronunciation, english, parts)
-        VALUES (?, ?, ?, ?)
-      ''', (word['french_word'], word['quebec_pronunciation'], word['english'], json.dumps(word['parts'])))
-      
-      # Get the last inserted word's ID
-      word_id = cursor.lastrowid
-
-      # Insert the word-group relationship into word_groups table
+        UPDATE dashboard_aggregates
+        SET last_study_date = (SELECT MAX(DATE(created_at)) FROM study_sessions),
+            current_streak = COALESCE((
+              SELECT COUNT(*) FROM (
+                SELECT julianday(day) - ROW_NUMBER() OVER (ORDER BY day) AS island
+                FROM (SELECT DISTINCT DATE(created_at) AS day FROM study_sessions WHERE created_at IS NOT NULL)
+              )
+              GROUP BY island ORDER BY island DESC LIMIT 1
+            ), 0)
+        WHERE id = 1;
+      ''')
+      row = cursor.execute('SELECT current_streak, last_study_date FROM dashboard_aggregates WHERE id = 1').fetchone()
+    return row[0], row[1]
+
+  def _schedule_replay(self, reviews, words):
+    """
+    Returns the recursive CTE (`replay`) that applies the SM-2 step of
+    migration 010 to `reviews` (a query over word_review_items) in time
+    order, for the word ids `words` selects. Each word starts from its
+    word_schedule_base state, i.e. after its compacted reviews. The
+    word_schedule_replay view (migration 015) is the same replay over all
+    of a word's reviews.
+    """
+    return f'''
+        WITH RECURSIVE ordered AS MATERIALIZED (
+          SELECT word_id, correct, created_at,
+                 ROW_NUMBER() OVER (PARTITION BY word_id ORDER BY created_at, id) AS n
+          FROM ({reviews})
+        ),
+        replay (word_id, n, ease, interval_days, repetitions, reviewed_at) AS (
+          SELECT ids.word_id, 0, COALESCE(b.ease, 2.5), COALESCE(b.interval_days, 0),
+                 COALESCE(b.repetitions, 0), b.reviewed_at
+          FROM ({words}) ids
+          LEFT JOIN word_schedule_base b ON b.word_id = ids.word_id
+          UNION ALL
+          SELECT r.word_id, o.n,
+                 CASE WHEN o.correct = 1 THEN r.ease ELSE MAX(1.3, r.ease - 0.2) END,
+                 CASE WHEN o.correct = 0 THEN 0
+                      WHEN r.repetitions = 0 THEN 1
+                      WHEN r.repetitions = 1 THEN 6
+                      ELSE CAST(ROUND(r.interval_days * r.ease) AS INTEGER) END,
+                 CASE WHEN o.correct = 1 THEN r.repetitions + 1 ELSE 0 END,
+                 o.created_at
+          FROM replay r
+          JOIN ordered o ON o.word_id = r.word_id AND o.n = r.n + 1
+        )
+    '''
+
+  def rebuild_word_schedule(self):
+    """
+    Recomputes the spaced-repetition state of every word by replaying its
+    review history in order, starting after its compacted reviews, with
+    the word_schedule_replay view the review trigger uses for out-of-order
+    reviews (migration 015). Refreshes the per-group due queue and returns
+    the number of words rebuilt.
+    """
+    with self.transaction() as cursor:
+      cursor.execute('DELETE FROM word_schedule;')
+      cursor.execute('INSERT INTO word_schedule_replay_words (word_id) SELECT id FROM words;')
       cursor.execute('''
-        INSERT INTO words_groups (word_id, group_id) VALUES (?, ?)
-      ''', (word_id, group_id))
-    self.commit()
+        INSERT INTO word_schedule (word_id, ease, interval_days, repetitions, next_due, last_reviewed_at)
+        SELECT word_id, ease, interval_days, repetitions, next_due, last_reviewed_at
+        FROM word_schedule_replay;
+      ''')
+      cursor.execute('DELETE FROM word_schedule_replay_words;')
+      # The rows were reinserted, so the per-group queue (migration 013)
+      # isn't updated by its trigger
+      cursor.execute('''
+        UPDATE words_groups
+        SET next_due = s.next_due
+        FROM word_schedule s
+        WHERE s.word_id = words_groups.word_id AND words_groups.next_due IS NOT s.next_due;
+      ''')
+      return cursor.execute('SELECT COUNT(*) FROM word_schedule').fetchone()[0]
+
+  def rebuild_student_stats(self):
+    """
+    Recomputes every student's review counters and dashboard totals
+    (student_word_stats and student_aggregates) from their history.
+    Returns the number of students rebuilt.
+    """
+    with self.transaction() as cursor:
+      cursor.execute('DELETE FROM student_word_stats;')
+      cursor.execute(f'''
+        INSERT INTO student_word_stats (student_id, word_id, correct_count, wrong_count)
+        SELECT student_id, word_id, SUM(correct_count), SUM(wrong_count)
+        FROM ({REVIEW_HISTORY})
+        WHERE student_id IS NOT NULL
+        GROUP BY student_id, word_id;
+      ''')
+      cursor.execute('DELETE FROM student_aggregates;')
+      cursor.execute('''
+        INSERT INTO student_aggregates
+          (student_id, total_reviews, correct_reviews, total_study_sessions, active_groups,
+           words_studied, current_streak, last_study_date)
+        SELECT s.id,
+               (SELECT COALESCE(SUM(correct_count + wrong_count), 0) FROM student_word_stats WHERE student_id = s.id),
+               (SELECT COALESCE(SUM(correct_count), 0) FROM student_word_stats WHERE student_id = s.id),
+               (SELECT COUNT(*) FROM study_sessions WHERE student_id = s.id),
+               (SELECT COUNT(DISTINCT group_id) FROM study_sessions WHERE student_id = s.id),
+               (SELECT COUNT(*) FROM student_word_stats WHERE student_id = s.id),
+               COALESCE((
+                 SELECT COUNT(*) FROM (
+                   SELECT julianday(day) - ROW_NUMBER() OVER (ORDER BY day) AS island
+                   FROM (
+                     SELECT DISTINCT DATE(created_at) AS day FROM study_sessions
+                     WHERE student_id = s.id AND created_at IS NOT NULL
+                   )
+                 )
+                 GROUP BY island ORDER BY island DESC LIMIT 1
+               ), 0),
+               (SELECT MAX(DATE(created_at)) FROM study_sessions WHERE student_id = s.id)
+        FROM students s;
+      ''')
+      return cursor.rowcount
+
+  def compact_reviews(self, before, archive=None):
+    """
+    Folds the reviews created before `before` into daily rollups and
+    deletes them from word_review_items. Reads of the statistics and of
+    session review counts combine raw rows with review_rollups and the
+    sessions' compacted_* counters, so they return the same results after
+    compaction; only the individual review items of compacted sessions
+    (session word lists, the review export) are gone.
+
+    Works through the history one UTC day per write transaction, oldest
+    first, so the app keeps serving writes in between. In each one the
+    raw delete triggers are suspended: the reviews are moved, not
+    removed, so the trigger-maintained statistics stay as they are.
+    Args:
+      before (str): Exclusive upper bound in the stored UTC text format,
+        e.g. '2025-01-01' for everything up to the end of 2024-12-31.
+      archive (file): Optional text file; each compacted review is written
+        to it as an NDJSON line before it is deleted.
+    Returns:
+      dict: Numbers of reviews compacted and days processed.
+    """
+    compacted = days = 0
+    while True:
+      oldest = self.get_writer().execute('SELECT MIN(created_at) FROM word_review_items').fetchone()[0]
+      if oldest is None or oldest >= before:
+        break
+      # Up to the end of the oldest day (or `before`, if that comes first)
+      until = min(before, self.get_writer().execute("SELECT DATE(?, '+1 day')", (oldest,)).fetchone()[0])
+      with self.transaction() as cursor:
+        suspended = self._drop_triggers(cursor, REVIEW_DELETE_TRIGGERS)
+        reviews = 'SELECT * FROM word_review_items WHERE created_at < ?'
+        if archive is not None:
+          rows = cursor.execute(f'''
+            SELECT id, study_session_id, word_id, student_id, correct, created_at
+            FROM ({reviews}) ORDER BY created_at, id
+          ''', (until,))
+          for row in rows:
+            archive.write(json.dumps(dict(zip(
+              ('id', 'study_session_id', 'word_id', 'student_id', 'correct', 'created_at'), row
+            ))) + '\n')
+
+        # Snapshot of the SM-2 state after these reviews, for rebuild_word_schedule
+        cursor.execute(self._schedule_replay(reviews, 'SELECT DISTINCT word_id FROM ordered') + '''
+          INSERT OR REPLACE INTO word_schedule_base (word_id, ease, interval_days, repetitions, reviewed_at)
+          SELECT word_id, ease, interval_days, repetitions, reviewed_at
+          FROM (
+            SELECT word_id, MAX(n), ease, interval_days, repetitions, reviewed_at
+            FROM replay
+            GROUP BY word_id
+          );
+        ''', (until,))
+        cursor.execute('''
+          INSERT INTO review_rollups (word_id, day, student_id, correct_count, wrong_count)
+          SELECT word_id, DATE(created_at), COALESCE(student_id, 0),
+                 SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END),
+                 SUM(CASE WHEN correct = 0 THEN 1 ELSE 0 END)
+          FROM word_review_items
+          WHERE created_at < ?
+          GROUP BY word_id, DATE(created_at), COALESCE(student_id, 0)
+          ON CONFLICT (word_id, day, student_id) DO UPDATE SET
+            correct_count = correct_count + excluded.correct_count,
+            wrong_count = wrong_count + excluded.wrong_count;
+        ''', (until,))
+        cursor.execute('''
+          UPDATE study_sessions
+          SET compacted_reviews = compacted_reviews + r.reviews,
+              compacted_correct = compacted_correct + r.correct
+          FROM (
+            SELECT study_session_id, COUNT(*) AS reviews,
+                   SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) AS correct
+            FROM word_review_items
+            WHERE created_at < ?
+            GROUP BY study_session_id
+          ) r
+          WHERE study_sessions.id = r.study_session_id;
+        ''', (until,))
+        cursor.execute('DELETE FROM word_review_items WHERE created_at < ?', (until,))
+        compacted += cursor.rowcount
+        days += 1
+        for create_sql in suspended:
+          cursor.execute(create_sql)
+    return {"reviews": compacted, "days": days}
+
+  # Expected values of every counter, computed from the base tables
+  COUNTER_SOURCES = {
+    'words': "SELECT 0, COUNT(*) FROM words",
+    'groups': "SELECT 0, COUNT(*) FROM groups",
+    'study_activities': "SELECT 0, COUNT(*) FROM study_activities",
+    'study_sessions': "SELECT 0, COUNT(*) FROM study_sessions",
+    'group_study_sessions': "SELECT group_id, COUNT(*) FROM study_sessions GROUP BY group_id",
+    'activity_study_sessions': "SELECT study_activity_id, COUNT(*) FROM study_sessions GROUP BY study_activity_id",
+    'students': "SELECT 0, COUNT(*) FROM students",
+  }
+
+  def count(self, name, scope_id=0):
+    """
+    Returns a trigger-maintained row count from table_counters, e.g.
+    count('words') or count('group_study_sessions', group_id).
+    """
+    row = self.statements.execute(self.get(), 'table_counters.get', (name, scope_id)).fetchone()
+    return row[0] if row else 0
+
+  def check_counters(self, repair=False):
+    """
+    Compares table_counters and groups.word_count with real COUNT(*) results.
+    Returns a list of (counter, scope_id, stored, actual) for every drifted
+    value. With repair=True the drifted values are corrected in the same
+    write transaction, so no write can slip in between check and fix.
+    """
+    drift = []
+    with self.transaction() as cursor:
+      for name, query in self.COUNTER_SOURCES.items():
+        actual = dict(cursor.execute(query).fetchall())
+        stored = dict(cursor.execute(
+          'SELECT scope_id, count FROM table_counters WHERE name = ?', (name,)
+        ).fetchall())
+        for scope_id in sorted(actual.keys() | stored.keys()):
+          if stored.get(scope_id, 0) != actual.get(scope_id, 0):
+            drift.append((name, scope_id, stored.get(scope_id), actual.get(scope_id, 0)))
+            if repair:
+              cursor.execute('''
+                INSERT INTO table_counters (name, scope_id, count) VALUES (?, ?, ?)
+                ON CONFLICT (name, scope_id) DO UPDATE SET count = excluded.count
+              ''', (name, scope_id, actual.get(scope_id, 0)))
+
+      word_counts = cursor.execute('''
+        SELECT g.id, g.word_count, (SELECT COUNT(*) FROM words_groups wg WHERE wg.group_id = g.id)
+        FROM groups g
+      ''').fetchall()
+      for group_id, stored, actual in word_counts:
+        if stored != actual:
+          drift.append(('groups.word_count', group_id, stored, actual))
+          if repair:
+            cursor.execute('UPDATE groups SET word_count = ? WHERE id = ?', (actual, group_id))
+    return drift
 
-    # Update the words_count in the groups table by counting all words in the group
-    cursor.execute('''
-      UPDATE groups
-      SET word_count = (
-        SELECT COUNT(*) FROM words_groups WHERE group_id = ?
-      )
-      WHERE id = ?
-    ''', (group_id, group_id))
+  def drop_all_tables(self, cursor):
+    """
+    Drops every application table (and with them their indexes and triggers)
+    and resets the schema version.
+    """
+    tables = cursor.execute('''
+      SELECT name FROM sqlite_master
+      WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+      ORDER BY sql LIKE 'CREATE VIRTUAL TABLE%' DESC
+    ''').fetchall()
+    for table in tables:
+      # Shadow tables of a virtual table disappear with it, hence IF EXISTS
+      cursor.execute(f'DROP TABLE IF EXISTS "{table[0]}";')
+    cursor.execute('PRAGMA user_version = 0')
     self.commit()
 
-    print(f"Successfully added {len(words)} words to the '{group_name}' group.")
+  def next_autoincrement_id(self, cursor, table):
+    """
+    Returns the id the next INSERT into an AUTOINCREMENT table will receive.
+    Only stable while the caller holds the write lock (see transaction()),
+    which lets batched inserts know their ids without a SELECT per row.
+    """
+    row = cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table,)).fetchone()
+    if row is None:
+      row = cursor.execute(f'SELECT MAX(id) FROM {table}').fetchone()
+    return (row[0] or 0) + 1
+
+  def _drop_indexes(self, cursor, tables):
+    """
+    Drops the secondary indexes of the given tables and returns their
+    CREATE statements so they can be rebuilt once after a bulk load.
+    """
+    placeholders = ', '.join('?' for _ in tables)
+    indexes = cursor.execute(f'''
+      SELECT name, sql FROM sqlite_master
+      WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders})
+    ''', tuple(tables)).fetchall()
+    for index in indexes:
+      cursor.execute(f'DROP INDEX "{index[0]}"')
+    return [index[1] for index in indexes]
+
+  def _drop_triggers(self, cursor, names):
+    """
+    Drops the named triggers (if present) and returns their CREATE
+    statements so they can be restored after a bulk load.
+    """
+    placeholders = ', '.join('?' for _ in names)
+    triggers = cursor.execute(f'''
+      SELECT name, sql FROM sqlite_master
+      WHERE type = 'trigger' AND name IN ({placeholders})
+    ''', tuple(names)).fetchall()
+    for trigger in triggers:
+      cursor.execute(f'DROP TRIGGER "{trigger[0]}"')
+    return [trigger[1] for trigger in triggers]
+
+  def bulk_import_words(self, group_name, rows, batch_size=5000, defer_indexes=False):
+    """
+    Imports word rows into a group in a single write transaction.
+    Args:
+      group_name (str): Group to add the words to; created if it doesn't exist.
+      rows (iterable): (french_word, quebec_pronunciation, english, parts_json)
+        tuples, e.g. from lib.word_import.iter_word_rows. Consumed lazily in
+        batches, so arbitrarily large sources stream through in constant memory.
+      batch_size (int): Rows passed to each executemany call.
+      defer_indexes (bool): Drop the words/words_groups indexes during the
+        load and rebuild them once at the end. Worth it for large imports.
+    Returns:
+      tuple: (group_id, number of words imported)
+    """
+    insert_word = '''
+      INSERT INTO words (french_word, quebec_pronunciation, english, parts)
+      VALUES (?, ?, ?, ?)
+    '''
+    with self.transaction() as cursor:
+      group = cursor.execute('SELECT id FROM groups WHERE name = ?', (group_name,)).fetchone()
+      if group:
+        group_id = group[0]
+      else:
+        cursor.execute('INSERT INTO groups (name) VALUES (?)', (group_name,))
+        group_id = cursor.lastrowid
+
+      # We hold the write lock, so the new words get consecutive ids from here
+      first_word_id = self.next_autoincrement_id(cursor, 'words')
+      deferred_indexes = self._drop_indexes(cursor, ['words', 'words_groups']) if defer_indexes else []
+      # Indexing and counting the new words in one statement each is several
+      # times faster than the per-row triggers, which are restored before commit
+      suspended_triggers = self._drop_triggers(cursor, BULK_IMPORT_TRIGGERS)
+
+      imported = 0
+      batch = []
+      for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+          cursor.executemany(insert_word, batch)
+          imported += len(batch)
+          batch = []
+      if batch:
+        cursor.executemany(insert_word, batch)
+        imported += len(batch)
+
+      # Link every new word to the group with one set-based insert
+      linked = cursor.execute('''
+        INSERT INTO words_groups (word_id, group_id)
+        SELECT id, ? FROM words WHERE id >= ? ORDER BY id
+      ''', (group_id, first_word_id)).rowcount
+
+      if suspended_triggers:
+        cursor.execute('''
+          INSERT INTO words_fts (rowid, french_word, english, quebec_pronunciation, notes)
+          SELECT id, french_word, english, quebec_pronunciation,
+                 CASE WHEN json_valid(parts) THEN json_extract(parts, '$.notes') END
+          FROM words WHERE id >= ?
+        ''', (first_word_id,))
+        # What trg_words_insert_counters and trg_words_groups_insert_word_count
+        # would have added, row by row
+        cursor.execute("UPDATE table_counters SET count = count + ? WHERE name = 'words' AND scope_id = 0",
+                       (imported,))
+        cursor.execute('UPDATE groups SET word_count = word_count + ? WHERE id = ?', (linked, group_id))
+      for create_sql in deferred_indexes + suspended_triggers:
+        cursor.execute(create_sql)
+
+    return group_id, imported
+
+  def insert_reviews(self, cursor, session_id, reviews, end_time):
+    """
+    Inserts review items for one study session and moves its end_time.
+    Must run inside transaction(): the ids are derived from the AUTOINCREMENT
+    sequence under the write lock instead of being read back row by row.
+    The reviews are attributed to the session's student, if it has one.
+    Args:
+      cursor: Cursor of the open write transaction.
+      session_id (int): The study session the reviews belong to.
+      reviews (list): (word_id, correct, created_at) tuples.
+      end_time (str): New end_time of the session.
+    Returns:
+      list: The new review item ids, in the order of `reviews`.
+    """
+    first_id = self.next_autoincrement_id(cursor, 'word_review_items')
+    session = self.statements.execute(cursor, 'reviews.session_student', (session_id,)).fetchone()
+    student_id = session[0] if session else None
+    self.statements.executemany(
+      cursor, 'reviews.insert',
+      [(word_id, session_id, student_id, 1 if correct else 0, created_at) for word_id, correct, created_at in reviews]
+    )
+    self.statements.execute(cursor, 'reviews.session_end_time', (end_time, session_id))
+    return list(range(first_id, first_id + len(reviews)))
+
+  def import_words_data(self, cursor, group_name, data_json_path):
+    """
+    Imports words from a seed JSON file and links them to a group.
+    """
+    # Load words from the specified JSON file
+    words = self.load_json(data_json_path)
+    group_id, imported = self.bulk_import_words(group_name, iter_word_rows(words))
+
+    print(f"Successfully added {imported} words to the '{group_name}' group.")
     return group_id
 
   def import_study_activities_data(self, cursor, data_json_path):
@@ -149,24 +959,140 @@ class Db:
     self.commit()
     print(f"Successfully added {len(activities_list)} study activities.")
 
+  def initialize(self, app_instance):
+    """
+    Brings the database schema up to date without touching existing data,
+    seeding vocabulary and study activities only when the database is empty.
+    This method is called from the main app.py on startup. Fails fast
+    (StatementError) if a catalog statement no longer matches the schema.
+    Also builds the seed template full resets restore (if not built yet).
+    """
+    self.migrate()
+    self.check_statements()
+    if self.seed_template:
+      self.build_seed_template(app_instance)
+    if self.cursor().execute('SELECT 1 FROM words LIMIT 1').fetchone():
+      print("Existing data found; skipping seed.")
+      return
+    self.seed_data(app_instance)
+
   def init_db_and_seed_data(self, app_instance):
     """
-    Initializes the database by setting up tables and populating sample data.
-    This method is called from the main app.py.
+    Re-initializes the database to its freshly seeded state. Used by the
+    full reset endpoint. With the seed template enabled (the default) this
+    restores the template in one write transaction; otherwise it drops every
+    table, recreates the schema through the migrations and seeds again.
     """
+    if self.seed_template:
+      template = self.build_seed_template(app_instance)
+      if template is not None:
+        self.restore_seed_template(template)
+        return
+
     cursor = self.cursor()
 
+    # Keep the data version moving forward across the reset, otherwise
+    # clients holding an old ETag could be told the fresh data is unchanged
+    previous_version = self.data_version()
+
     # Drop all tables for a clean re-initialization (useful for development)
-    cursor.execute("DROP TABLE IF EXISTS word_review_items;")
-    cursor.execute("DROP TABLE IF EXISTS study_sessions;")
-    cursor.execute("DROP TABLE IF EXISTS study_activities;")
-    cursor.execute("DROP TABLE IF EXISTS words_groups;")
-    cursor.execute("DROP TABLE IF EXISTS groups;")
-    cursor.execute("DROP TABLE IF EXISTS words;")
-    self.commit() # Commit after dropping tables
-
-    # Setup new tables
-    self.setup_tables(cursor)
+    self.drop_all_tables(cursor)
+
+    # Setup new tables and indexes
+    self.migrate()
+
+    self.seed_data(app_instance)
+
+    with self.transaction() as cursor:
+      cursor.execute('UPDATE data_version SET version = version + ? WHERE id = 1', (previous_version,))
+
+  def seed_template_path(self):
+    """
+    Returns the path of the seed template for this database: a copy of the
+    freshly migrated and seeded database, stored next to it. The name
+    carries a fingerprint of sql/ and seed/, so a changed migration or seed
+    file never restores a stale template. None for in-memory databases.
+    """
+    if self.database == ':memory:' or self.database.startswith('file:'):
+      return None
+    if self._seed_fingerprint is None:
+      project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+      digest = hashlib.sha1()
+      paths = glob.glob(os.path.join(project_root, 'sql', '**', '*.sql'), recursive=True)
+      paths += glob.glob(os.path.join(project_root, 'seed', '*.json'))
+      for path in sorted(paths):
+        digest.update(os.path.relpath(path, project_root).replace(os.sep, '/').encode())
+        with open(path, 'rb') as file:
+          digest.update(file.read())
+      self._seed_fingerprint = digest.hexdigest()[:12]
+    return f'{self.database}.seed-{self._seed_fingerprint}'
+
+  def build_seed_template(self, app_instance):
+    """
+    Builds the seed template unless it already exists, and removes templates
+    of older schemas or seed files. The template is built under a temporary
+    name and renamed into place, so concurrent builders (e.g. several
+    workers) and restores only ever see a complete file.
+    Returns the template path (None for in-memory databases).
+    """
+    path = self.seed_template_path()
+    if path is None or os.path.exists(path):
+      return path
+    building = f'{path}.{os.getpid()}-{threading.get_ident()}.tmp'
+    template = Db(building, pragmas={**self.pragmas, 'journal_mode': 'DELETE'}, pool_enabled=False,
+                  read_connections=False, seed_template=False)
+    try:
+      # A fresh application context gives the template its own connection in `g`
+      with app_instance.app_context():
+        try:
+          template.migrate()
+          template.seed_data(app_instance)
+        finally:
+          template.close()
+      os.replace(building, path)
+    finally:
+      if os.path.exists(building):
+        os.remove(building)
+    for stale in glob.glob(f'{glob.escape(self.database)}.seed-*'):
+      if stale != path and not stale.endswith('.tmp'):
+        try:
+          os.remove(stale)
+        except OSError:
+          pass # Another worker got there first
+    return path
+
+  def restore_seed_template(self, path):
+    """
+    Replaces the whole database with the seed template through the SQLite
+    online backup API. The copy is written to the live database as a
+    single write transaction, so readers (in any thread or process) see the
+    old database or the new one, never a mix; open read snapshots keep
+    the old data until they end.
+    """
+    conn = self.get_writer()
+    if conn.in_transaction:
+      self.commit() # The backup needs the writer without an open transaction
+
+    # Keep the data version moving forward across the reset (see
+    # init_db_and_seed_data). The template is staged in memory so the new
+    # version is part of the same atomic copy.
+    previous_version = self.data_version()
+    template = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro", uri=True)
+    staged = sqlite3.connect(':memory:')
+    try:
+      template.backup(staged)
+      staged.execute('UPDATE data_version SET version = version + ? WHERE id = 1', (previous_version,))
+      staged.commit()
+      staged.backup(conn)
+    finally:
+      template.close()
+      staged.close()
+
+  def seed_data(self, app_instance):
+    """
+    Populates core vocabulary and study activities from the seed JSON files.
+    """
+    cursor = self.cursor()
 
     # Import words and groups from embedded data (now from JSON files)
     groups_map = {}
@@ -0,0 +1,49 @@
+# backend/lib/etag.py
+from functools import wraps
+from flask import request, make_response
+from lib.db import db
+
+# Version of the response formats. Bump it when a release changes what a read
+# endpoint returns for the same data, so clients don't revalidate old bodies.
+RESPONSE_VERSION = 1
+
+def etag_for(extra=None):
+  """
+  Returns the current ETag: the response format version, the schema version
+  (PRAGMA user_version, moved by migrations) and the global data version.
+  """
+  schema_version, data_version = db.data_versions()
+  etag = f"v{RESPONSE_VERSION}.{schema_version}.{data_version}"
+  if extra is not None:
+    etag = f"{etag}-{extra()}"
+  return etag
+
+def conditional_get(extra=None):
+  """
+  Decorator for read endpoints: tags responses with an ETag derived from the
+  response format, schema and global data versions (see etag_for) and
+  answers 304 Not Modified, without running the route, when the client's
+  If-None-Match still matches.
+
+  `extra` is an optional callable returning a string for inputs other than
+  the stored data that the response depends on (e.g. today's date).
+  """
+  def decorator(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+      etag = etag_for(extra)
+
+      # If-None-Match compares weakly: a proxy that compresses the body
+      # (e.g. gzip) hands clients the tag back as W/"..."
+      if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+      else:
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200:
+          return response # Errors are never cached
+      response.set_etag(etag)
+      # Let browsers keep the body but revalidate it on every use
+      response.headers['Cache-Control'] = 'no-cache'
+      return response
+    return wrapper
+  return decorator
@@ -0,0 +1,219 @@
+
+# backend/lib/metrics.py
+import bisect
+import logging
+import threading
+import time
+from flask import request
+from lib.db import db
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the request latency histogram buckets, the
+# Prometheus client defaults
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+class _Histogram:
+  """
+  Latency histogram with fixed buckets; counts are per bucket and made
+  cumulative only when rendered.
+  """
+  __slots__ = ('buckets', 'sum', 'count')
+
+  def __init__(self):
+    self.buckets = [0] * (len(LATENCY_BUCKETS) + 1) # The last one is +Inf
+    self.sum = 0.0
+    self.count = 0
+
+  def observe(self, value):
+    self.buckets[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+    self.sum += value
+    self.count += 1
+
+class _RequestStats:
+  """
+  SQL work done while serving the current request.
+  """
+  __slots__ = ('started', 'queries', 'sql_seconds', 'statements')
+
+  def __init__(self):
+    self.started = time.perf_counter()
+    self.queries = 0
+    self.sql_seconds = 0.0
+    self.statements = {} # Statement name -> [executions, seconds]
+
+def _labels(**labels):
+  """
+  Formats Prometheus labels, escaping backslashes, quotes and newlines.
+  """
+  escaped = (
+    f'{name}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+    for name, value in labels.items()
+  )
+  return '{' + ','.join(escaped) + '}'
+
+class RequestMetrics:
+  """
+  Per-endpoint request latency and SQL counters for the running process.
+
+  Every statement executed through the statement catalog (db.statements)
+  is timed; while a request is being served its queries are tallied on a
+  thread-local record, merged into the process totals under one lock when
+  the response is ready. A request that runs the same statement
+  `n_plus_one_threshold` times or more is flagged as an N+1 pattern.
+
+  Counters live in process memory: under the pre-forking server each
+  worker reports its own.
+  """
+  def __init__(self, statements, n_plus_one_threshold=10):
+    self.statements = statements
+    self.n_plus_one_threshold = n_plus_one_threshold
+    self._lock = threading.Lock()
+    self._local = threading.local()
+    self.reset()
+
+  def reset(self):
+    """
+    Clears every counter.
+    """
+    with self._lock:
+      self._latency = {}      # (endpoint, method) -> _Histogram
+      self._responses = {}    # (endpoint, method, status) -> count
+      self._request_sql = {}  # endpoint -> [queries, seconds]
+      self._statement_sql = {} # statement -> [executions, seconds]
+      self._n_plus_one = {}   # (endpoint, statement) -> flagged requests
+
+  def init_app(self, app):
+    """
+    Times every request of `app`. Adds a Server-Timing header to responses
+    when SERVER_TIMING is set; N_PLUS_ONE_THRESHOLD tunes the N+1 check.
+    """
+    self.n_plus_one_threshold = app.config.get('N_PLUS_ONE_THRESHOLD', self.n_plus_one_threshold)
+    server_timing = app.config.get('SERVER_TIMING', False)
+    if self._record_query not in self.statements.observers:
+      self.statements.observers.append(self._record_query)
+    app.extensions['metrics'] = self
+
+    @app.before_request
+    def start_request_timer():
+      self._local.stats = _RequestStats()
+
+    @app.after_request
+    def record_request(response):
+      stats = getattr(self._local, 'stats', None)
+      if stats is None:
+        return response
+      self._local.stats = None
+      elapsed = time.perf_counter() - stats.started
+      self._record_request(request.endpoint or 'unmatched', request.method, response.status_code, elapsed, stats)
+      if server_timing:
+        response.headers['Server-Timing'] = (
+          f'app;dur={elapsed * 1000:.2f}, '
+          f'db;dur={stats.sql_seconds * 1000:.2f};desc="{stats.queries} queries"'
+        )
+      return response
+
+    @app.teardown_request
+    def clear_request_timer(exception):
+      self._local.stats = None # Requests that never reached after_request
+
+  def _record_query(self, name, sql, params, seconds, cursor):
+    """
+    Statement catalog observer.
+    """
+    stats = getattr(self._local, 'stats', None)
+    if stats is None:
+      # Outside a request (background review writer, streamed exports)
+      with self._lock:
+        totals = self._statement_sql.setdefault(name, [0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+      return
+    stats.queries += 1
+    stats.sql_seconds += seconds
+    totals = stats.statements.get(name)
+    if totals is None:
+      stats.statements[name] = [1, seconds]
+    else:
+      totals[0] += 1
+      totals[1] += seconds
+
+  def _record_request(self, endpoint, method, status, elapsed, stats):
+    repeated = [name for name, (executions, _) in stats.statements.items()
+                if executions >= self.n_plus_one_threshold]
+    with self._lock:
+      histogram = self._latency.get((endpoint, method))
+      if histogram is None:
+        histogram = self._latency[(endpoint, method)] = _Histogram()
+      histogram.observe(elapsed)
+      key = (endpoint, method, status)
+      self._responses[key] = self._responses.get(key, 0) + 1
+      request_sql = self._request_sql.setdefault(endpoint, [0, 0.0])
+      request_sql[0] += stats.queries
+      request_sql[1] += stats.sql_seconds
+      for name, (executions, seconds) in stats.statements.items():
+        totals = self._statement_sql.setdefault(name, [0, 0.0])
+        totals[0] += executions
+        totals[1] += seconds
+      for name in repeated:
+        self._n_plus_one[(endpoint, name)] = self._n_plus_one.get((endpoint, name), 0) + 1
+    for name in repeated:
+      logger.warning("Possible N+1 query: %s ran %r %d times in one request",
+                     endpoint, name, stats.statements[name][0])
+
+  def render(self):
+    """
+    Returns every metric in the Prometheus text exposition format.
+    """
+    with self._lock:
+      latency = {key: (list(h.buckets), h.sum, h.count) for key, h in self._latency.items()}
+      responses = dict(self._responses)
+      request_sql = {key: tuple(value) for key, value in self._request_sql.items()}
+      statement_sql = {key: tuple(value) for key, value in self._statement_sql.items()}
+      n_plus_one = dict(self._n_plus_one)
+
+    lines = [
+      '# HELP portal_request_duration_seconds Time to produce a response, by endpoint.',
+      '# TYPE portal_request_duration_seconds histogram',
+    ]
+    for (endpoint, method), (buckets, total, count) in sorted(latency.items()):
+      cumulative = 0
+      for bound, bucket in zip(LATENCY_BUCKETS + ('+Inf',), buckets):
+        cumulative += bucket
+        lines.append(f'portal_request_duration_seconds_bucket{_labels(endpoint=endpoint, method=method, le=bound)} {cumulative}')
+      lines.append(f'portal_request_duration_seconds_sum{_labels(endpoint=endpoint, method=method)} {total}')
+      lines.append(f'portal_request_duration_seconds_count{_labels(endpoint=endpoint, method=method)} {count}')
+
+    lines += ['# HELP portal_requests_total Responses sent, by endpoint and status.',
+              '# TYPE portal_requests_total counter']
+    for (endpoint, method, status), count in sorted(responses.items()):
+      lines.append(f'portal_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}')
+
+    lines += ['# HELP portal_request_sql_queries_total SQL statements executed while serving each endpoint.',
+              '# TYPE portal_request_sql_queries_total counter']
+    lines += [f'portal_request_sql_queries_total{_labels(endpoint=endpoint)} {queries}'
+              for endpoint, (queries, _) in sorted(request_sql.items())]
+    lines += ['# HELP portal_request_sql_seconds_total Time spent in SQL while serving each endpoint.',
+              '# TYPE portal_request_sql_seconds_total counter']
+    lines += [f'portal_request_sql_seconds_total{_labels(endpoint=endpoint)} {seconds}'
+              for endpoint, (_, seconds) in sorted(request_sql.items())]
+
+    lines += ['# HELP portal_sql_statement_executions_total Executions of each catalog statement.',
+              '# TYPE portal_sql_statement_executions_total counter']
+    lines += [f'portal_sql_statement_executions_total{_labels(statement=name)} {executions}'
+              for name, (executions, _) in sorted(statement_sql.items())]
+    lines += ['# HELP portal_sql_statement_seconds_total Time spent executing each catalog statement.',
+              '# TYPE portal_sql_statement_seconds_total counter']
+    lines += [f'portal_sql_statement_seconds_total{_labels(statement=name)} {seconds}'
+              for name, (_, seconds) in sorted(statement_sql.items())]
+
+    lines += ['# HELP portal_n_plus_one_requests_total Requests that ran one statement N_PLUS_ONE_THRESHOLD times or more.',
+              '# TYPE portal_n_plus_one_requests_total counter']
+    lines += [f'portal_n_plus_one_requests_total{_labels(endpoint=endpoint, statement=name)} {count}'
+              for (endpoint, name), count in sorted(n_plus_one.items())]
+    return '\n'.join(lines) + '\n'
+
+# Process-wide metrics, shared by every app like the `db` helper
+metrics = RequestMetrics(db.statements)
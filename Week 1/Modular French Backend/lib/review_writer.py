@@ -0,0 +1,226 @@
+
+# backend/lib/review_writer.py
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+class ReviewQueueFull(Exception):
+  """
+  Raised when the write-behind queue is full, so callers can apply backpressure.
+  """
+
+class ReviewWriterStopped(RuntimeError):
+  """
+  Raised when reviews are submitted while the writer is shutting down.
+  """
+
+class _ReviewRequest:
+  """
+  One caller's reviews for a study session, waiting to be group-committed.
+  """
+  __slots__ = ('session_id', 'reviews', 'end_time', 'future')
+
+  def __init__(self, session_id, reviews, end_time):
+    self.session_id = session_id
+    self.reviews = reviews
+    self.end_time = end_time
+    self.future = Future()
+
+_STOP = object() # Queue sentinel asking the writer thread to drain and exit
+
+class ReviewWriter:
+  """
+  Write-behind queue for review logging.
+  Request threads enqueue reviews and wait on a Future; a single background
+  thread drains the queue and writes everything collected within
+  `flush_interval_ms` (or up to `max_batch_items` reviews) in one transaction,
+  so concurrent submissions share one write lock and one commit. A Future is
+  resolved with the new review ids only after its batch has committed.
+  """
+  def __init__(self, db, max_batch_items=200, flush_interval_ms=5, queue_size=10000, submit_timeout=0.5):
+    """
+    Initializes the writer; the background thread starts on first use.
+    """
+    self.db = db
+    self.max_batch_items = max_batch_items
+    self.flush_interval = flush_interval_ms / 1000.0
+    self.submit_timeout = submit_timeout # Seconds to wait for queue space before rejecting
+    self._queue = queue.Queue(maxsize=queue_size)
+    self._thread = None
+    self._lock = threading.Lock()
+    self._stopping = False
+    self._counters = {
+      'submitted_requests': 0,
+      'rejected_requests': 0,
+      'cancelled_requests': 0,
+      'failed_requests': 0,
+      'committed_reviews': 0,
+      'batches': 0,
+      'last_batch_size': 0,
+      'max_batch_size': 0,
+      'commit_seconds_total': 0.0,
+      'commit_seconds_max': 0.0,
+    }
+
+  def start(self):
+    """
+    Starts the background writer thread if it isn't running.
+    Started lazily so pre-forking servers don't fork a running thread.
+    Raises ReviewWriterStopped once stop() has been called.
+    """
+    with self._lock:
+      self._start()
+
+  def _start(self):
+    """
+    start() for callers holding self._lock. A stopped writer stays stopped:
+    checking and starting under one lock means a concurrent stop() either
+    sees the new thread (and stops it) or refuses this caller.
+    """
+    if self._stopping:
+      raise ReviewWriterStopped("Review writer is shutting down")
+    if self._thread is None or not self._thread.is_alive():
+      self._thread = threading.Thread(target=self._run, name='review-writer', daemon=True)
+      self._thread.start()
+
+  def stop(self, timeout=10.0):
+    """
+    Flushes everything already queued, then stops the writer thread.
+    """
+    with self._lock:
+      thread = self._thread
+      if self._stopping:
+        return
+      self._stopping = True # Also refuses submissions if it never started
+      if thread is None:
+        return
+    self._queue.put(_STOP) # Blocks until there is room; the writer keeps draining
+    thread.join(timeout)
+
+  def submit(self, session_id, reviews, end_time):
+    """
+    Queues (word_id, correct, created_at) reviews for a session.
+    Returns a Future that resolves to the list of new review ids once the
+    batch containing them has committed.
+    Raises ReviewQueueFull if no queue space frees up within submit_timeout,
+    and ReviewWriterStopped once stop() has been called.
+    """
+    with self._lock:
+      self._start()
+    request = _ReviewRequest(session_id, reviews, end_time)
+    try:
+      self._queue.put(request, timeout=self.submit_timeout)
+    except queue.Full:
+      self._count('rejected_requests')
+      raise ReviewQueueFull("Review write queue is full")
+    self._count('submitted_requests')
+    return request.future
+
+  def stats(self):
+    """
+    Returns a snapshot of the writer's counters (batch sizes, commit latency).
+    """
+    with self._lock:
+      stats = dict(self._counters)
+    stats['queue_depth'] = self._queue.qsize()
+    stats['avg_batch_size'] = stats['committed_reviews'] / stats['batches'] if stats['batches'] else 0.0
+    stats['commit_seconds_avg'] = stats['commit_seconds_total'] / stats['batches'] if stats['batches'] else 0.0
+    return stats
+
+  def _count(self, name, amount=1):
+    with self._lock:
+      self._counters[name] += amount
+
+  def _run(self):
+    """
+    Writer loop: collect a batch, commit it, resolve its futures.
+    """
+    stop_seen = False
+    while not stop_seen:
+      first = self._queue.get()
+      if first is _STOP:
+        break
+      batch = [first]
+      items = len(first.reviews)
+      deadline = time.monotonic() + self.flush_interval
+      while items < self.max_batch_items:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+          break
+        try:
+          request = self._queue.get(timeout=remaining)
+        except queue.Empty:
+          break
+        if request is _STOP:
+          stop_seen = True
+          break
+        batch.append(request)
+        items += len(request.reviews)
+      self._commit(batch)
+
+    # Anything that slipped in behind the stop sentinel still gets written
+    leftovers = []
+    while True:
+      try:
+        request = self._queue.get_nowait()
+      except queue.Empty:
+        break
+      if request is not _STOP:
+        leftovers.append(request)
+    if leftovers:
+      self._commit(leftovers)
+
+  def _commit(self, batch):
+    """
+    Writes a batch in one transaction. Each request gets its own savepoint,
+    so a request that fails is rolled back without failing the others.
+    Requests whose caller gave up (cancelled the Future) are skipped; the
+    rest are marked running first, so from here on they can't be cancelled
+    and their caller always learns the outcome.
+    """
+    pending = [request for request in batch if request.future.set_running_or_notify_cancel()]
+    if len(pending) < len(batch):
+      self._count('cancelled_requests', len(batch) - len(pending))
+    batch = pending
+    if not batch:
+      return
+    started = time.perf_counter()
+    results = []
+    try:
+      with self.db.transaction() as cursor:
+        for request in batch:
+          cursor.execute('SAVEPOINT review_request')
+          try:
+            review_ids = self.db.insert_reviews(cursor, request.session_id, request.reviews, request.end_time)
+          except sqlite3.Error as e:
+            cursor.execute('ROLLBACK TO review_request')
+            cursor.execute('RELEASE review_request')
+            results.append((request, None, e))
+          else:
+            cursor.execute('RELEASE review_request')
+            results.append((request, review_ids, None))
+    except Exception as e:
+      self._count('failed_requests', len(batch))
+      for request in batch:
+        request.future.set_exception(e)
+      return
+
+    elapsed = time.perf_counter() - started
+    committed = sum(len(request.reviews) for request, review_ids, error in results if error is None)
+    with self._lock:
+      counters = self._counters
+      counters['batches'] += 1
+      counters['committed_reviews'] += committed
+      counters['last_batch_size'] = committed
+      counters['max_batch_size'] = max(counters['max_batch_size'], committed)
+      counters['commit_seconds_total'] += elapsed
+      counters['commit_seconds_max'] = max(counters['commit_seconds_max'], elapsed)
+      counters['failed_requests'] += sum(1 for result in results if result[2] is not None)
+
+    for request, review_ids, error in results:
+      if error is None:
+        request.future.set_result(review_ids)
+      else:
+        request.future.set_exception(error)
@@ -0,0 +1,262 @@
+
+# backend/lib/server.py
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+from lib.db import db
+
+# A worker that exits sooner than this after being forked is crash-looping,
+# so its replacement is delayed (doubling up to MAX_RESPAWN_DELAY seconds)
+MIN_WORKER_UPTIME = 5.0
+MAX_RESPAWN_DELAY = 30.0
+
+# Read endpoints each worker thread requests before the worker takes
+# traffic: opens its pooled connections and fills the payload caches
+DEFAULT_WARMUP_PATHS = (
+  '/api/dashboard/quick-stats',
+  '/api/dashboard/study_progress',
+  '/api/groups',
+  '/api/words',
+  '/api/study_activities',
+)
+
+class _RequestHandler(WSGIRequestHandler):
+  """
+  Werkzeug's request handler with keep-alive enabled; `timeout` closes idle
+  keep-alive connections so they don't pin a pool thread.
+  """
+  protocol_version = 'HTTP/1.1'
+  timeout = 5
+
+class PoolWSGIServer(BaseWSGIServer):
+  """
+  Werkzeug's WSGI server on an inherited listening socket, handling
+  connections on a fixed pool of threads. A worker stops accepting while
+  every thread is busy, so the kernel hands new connections to an idle
+  sibling process instead of queueing them here.
+  """
+  multithread = True
+
+  def __init__(self, host, app, fd, threads=8, keepalive_timeout=5):
+    handler = type('RequestHandler', (_RequestHandler,), {'timeout': keepalive_timeout})
+    super().__init__(host, 0, app, handler=handler, fd=fd)
+    self.socket.setblocking(False) # Siblings race for each connection; losers move on
+    self.threads = threads
+    self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='request')
+    self._slots = threading.BoundedSemaphore(threads)
+
+  def get_request(self):
+    """
+    Waits for a free thread, then accepts a connection.
+    """
+    self._slots.acquire()
+    try:
+      connection, address = self.socket.accept()
+    except BaseException:
+      self._slots.release()
+      raise
+    connection.setblocking(True)
+    return connection, address
+
+  def process_request(self, request, client_address):
+    """
+    Handles the connection on the pool; its slot is freed when it closes.
+    """
+    def handle():
+      try:
+        self.finish_request(request, client_address)
+      except Exception:
+        self.handle_error(request, client_address)
+      finally:
+        self.shutdown_request(request)
+        self._slots.release()
+    self.executor.submit(handle)
+
+class PreforkServer:
+  """
+  Pre-forking production server for the Flask app.
+
+  The master process applies migrations, loads the SQL files and binds the
+  listening socket once, then forks `workers` processes that all accept on
+  that socket. Each worker serves requests on `threads` threads
+  (PoolWSGIServer) and only starts accepting after every thread has opened
+  its database connections and warmed the caches (warmup_paths).
+
+  The master restarts workers that die (backing off when they crash right
+  after starting) and shuts down gracefully on SIGTERM/SIGINT: workers stop
+  accepting, finish in-flight requests and flush queued reviews; any left
+  after graceful_timeout seconds are killed. POSIX only (os.fork).
+  """
+  def __init__(self, app, host='0.0.0.0', port=5000, workers=2, threads=8,
+               warmup_paths=DEFAULT_WARMUP_PATHS, graceful_timeout=30.0,
+               keepalive_timeout=5, backlog=1024):
+    self.app = app
+    self.host = host
+    self.port = port
+    self.workers = workers
+    self.threads = threads
+    self.warmup_paths = warmup_paths
+    self.graceful_timeout = graceful_timeout
+    self.keepalive_timeout = keepalive_timeout
+    self.backlog = backlog
+    self.socket = None
+    self._children = {} # Worker pid -> start time
+    self._stopping = False
+    self._respawn_delay = 0.0
+    self._next_spawn_at = 0.0
+
+  def log(self, message):
+    print(f"[{os.getpid()}] {message}", flush=True)
+
+  def preload(self):
+    """
+    Prepares everything workers share before forking: schema, seed data
+    and SQL text. Connections are closed so no worker inherits one.
+    """
+    with self.app.app_context():
+      db.initialize(self.app)
+    db.preload_sql()
+    db.close_all()
+
+  def bind(self):
+    """
+    Creates the listening socket every worker accepts on.
+    """
+    family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((self.host, self.port))
+    sock.listen(self.backlog)
+    sock.set_inheritable(True)
+    self.socket = sock
+    self.port = sock.getsockname()[1] # Resolves port 0
+    return sock
+
+  def run(self):
+    """
+    Runs the master loop until SIGTERM/SIGINT, then shuts down gracefully.
+    """
+    if not hasattr(os, 'fork'):
+      raise RuntimeError("The pre-forking server needs os.fork (POSIX)")
+    self.preload()
+    if self.socket is None:
+      self.bind()
+    signal.signal(signal.SIGTERM, self._request_stop)
+    signal.signal(signal.SIGINT, self._request_stop)
+    self.log(f"Serving on {self.host}:{self.port} with {self.workers} worker(s) x {self.threads} thread(s)")
+
+    while not self._stopping:
+      self._reap()
+      while len(self._children) < self.workers and time.monotonic() >= self._next_spawn_at:
+        self._spawn()
+      time.sleep(0.1)
+    self._shutdown()
+
+  def _request_stop(self, signum, frame):
+    self._stopping = True
+
+  def _spawn(self):
+    """
+    Forks one worker; in the child this never returns.
+    """
+    pid = os.fork()
+    if pid:
+      self._children[pid] = time.monotonic()
+      return pid
+    exit_code = 0
+    try:
+      self._worker()
+    except BaseException as e:
+      self.log(f"Worker failed: {e!r}")
+      exit_code = 1
+    finally:
+      os._exit(exit_code) # Never fall back into the master's loop
+
+  def _reap(self):
+    """
+    Collects exited workers, backing off if they die right after starting.
+    """
+    while self._children:
+      try:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+      except ChildProcessError:
+        self._children.clear()
+        return
+      if pid == 0:
+        return
+      started = self._children.pop(pid, None)
+      if started is None or self._stopping:
+        continue
+      self.log(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}; restarting it")
+      if time.monotonic() - started < MIN_WORKER_UPTIME:
+        self._respawn_delay = min(max(self._respawn_delay * 2, 0.5), MAX_RESPAWN_DELAY)
+        self._next_spawn_at = time.monotonic() + self._respawn_delay
+      else:
+        self._respawn_delay = 0.0
+
+  def _shutdown(self):
+    """
+    Asks every worker to finish up, killing stragglers after the timeout.
+    """
+    self.log("Shutting down; waiting for in-flight requests")
+    for pid in list(self._children):
+      try:
+        os.kill(pid, signal.SIGTERM)
+      except ProcessLookupError:
+        pass
+    deadline = time.monotonic() + self.graceful_timeout
+    while self._children and time.monotonic() < deadline:
+      self._reap()
+      time.sleep(0.05)
+    for pid in list(self._children):
+      self.log(f"Worker {pid} did not stop in time; killing it")
+      try:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+      except (ProcessLookupError, ChildProcessError):
+        pass
+    self._children.clear()
+    self.socket.close()
+
+  def _worker(self):
+    """
+    Body of a worker process: warm up, then serve until asked to stop.
+    """
+    server = PoolWSGIServer(self.host, self.app, self.socket.fileno(),
+                            threads=self.threads, keepalive_timeout=self.keepalive_timeout)
+
+    def stop(signum, frame):
+      # shutdown() waits for serve_forever to return, so not on this thread
+      threading.Thread(target=server.shutdown, daemon=True).start()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    self._warm_up(server)
+    self.log("Worker ready")
+    server.serve_forever(poll_interval=0.5) # Closes the socket on exit
+    server.executor.shutdown(wait=True) # Let in-flight requests finish
+
+    review_writer = self.app.extensions.get('review_writer')
+    if review_writer:
+      review_writer.stop()
+    db.close_all()
+
+  def _warm_up(self, server):
+    """
+    Runs the warmup requests once on every pool thread, so each thread has
+    its writer and read-only connections open before the first real request.
+    """
+    barrier = threading.Barrier(server.threads, timeout=30)
+    def warm():
+      barrier.wait() # Hold this thread until every pool thread has a task
+      with self.app.app_context():
+        db.get_writer()
+      client = self.app.test_client()
+      for path in self.warmup_paths:
+        client.get(path)
+    for future in [server.executor.submit(warm) for _ in range(server.threads)]:
+      future.result()
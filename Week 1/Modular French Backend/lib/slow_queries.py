@@ -0,0 +1,178 @@
+
+# backend/lib/slow_queries.py
+import collections
+import logging
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Tables that must never be read end to end on a request path: a full scan
+# of one is reported the first time each statement runs, however fast it was
+WATCHED_TABLES = ('word_review_items',)
+
+# Words that can follow a table name but are not an alias
+_NOT_AN_ALIAS = {
+  'where', 'join', 'left', 'inner', 'cross', 'on', 'using', 'order', 'group', 'limit',
+  'set', 'values', 'indexed', 'not', 'natural', 'union', 'having', 'window', 'returning',
+}
+
+# Largest number of bound parameters kept per log entry
+MAX_LOGGED_PARAMS = 20
+
+# Most statement texts whose full-scan check is remembered; variants (IN
+# lists of every length, for one) can make the set of texts open-ended
+MAX_PLANNED_STATEMENTS = 1024
+
+def _table_names(sql, table):
+  """
+  Returns the names `table` goes by in a statement: itself and any alias,
+  as they appear in EXPLAIN QUERY PLAN output.
+  """
+  names = {table}
+  for match in re.finditer(rf'\b{table}\b(?:\s+AS)?\s+(\w+)', sql, re.IGNORECASE):
+    if match.group(1).lower() not in _NOT_AN_ALIAS:
+      names.add(match.group(1))
+  return names
+
+def _loggable_params(params):
+  """
+  Returns a JSON-friendly, bounded copy of a statement's parameters (the
+  first row only for executemany).
+  """
+  params = list(params)
+  if params and isinstance(params[0], (list, tuple)):
+    return {"rows": len(params), "first": _loggable_params(params[0])}
+  return [p if isinstance(p, (int, float, str)) or p is None else repr(p) for p in params[:MAX_LOGGED_PARAMS]]
+
+class SlowQueryLog:
+  """
+  Ring buffer of catalog statements that ran for at least `threshold_ms`,
+  each with its parameters, duration and EXPLAIN QUERY PLAN output.
+
+  Installed as a statement catalog observer by Db.set_slow_query_threshold.
+  The first execution of every distinct statement text is also planned
+  once to find full scans of WATCHED_TABLES, which are kept (and logged)
+  separately so they show up before the table grows large enough to make
+  them slow.
+  """
+  def __init__(self, threshold_ms=None, capacity=100, watched_tables=WATCHED_TABLES,
+               max_plans=MAX_PLANNED_STATEMENTS):
+    self.threshold_ms = threshold_ms
+    self.watched_tables = watched_tables
+    self.max_plans = max_plans
+    self._entries = collections.deque(maxlen=capacity)
+    self._plans = collections.OrderedDict() # Statement text -> full scans found in its plan, least recent first
+    self._full_scans = {} # Statement name -> report
+    self._lock = threading.Lock()
+
+  @property
+  def capacity(self):
+    return self._entries.maxlen
+
+  @capacity.setter
+  def capacity(self, capacity):
+    with self._lock:
+      self._entries = collections.deque(self._entries, maxlen=capacity)
+
+  def clear(self):
+    """
+    Empties the log and forgets the full-scan reports.
+    """
+    with self._lock:
+      self._entries.clear()
+      self._plans.clear()
+      self._full_scans.clear()
+
+  def _explain(self, cursor, sql, params):
+    """
+    Returns the EXPLAIN QUERY PLAN rows of a statement as text lines.
+    """
+    if params and isinstance(params[0], (list, tuple)):
+      params = params[0] # executemany: any row has the same plan
+    try:
+      rows = cursor.connection.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+    except sqlite3.Error as e:
+      return [f"(plan unavailable: {e})"]
+    return [row[3] for row in rows]
+
+  def _find_full_scans(self, sql, plan):
+    """
+    Returns the plan lines that read a watched table without a search key.
+    """
+    scans = []
+    for table in self.watched_tables:
+      if table not in sql:
+        continue
+      names = _table_names(sql, table)
+      scans += [line for line in plan if line.startswith('SCAN ') and line.split()[1] in names]
+    return scans
+
+  def observe(self, name, sql, params, seconds, cursor):
+    """
+    Statement catalog observer.
+    """
+    threshold_ms = self.threshold_ms
+    if threshold_ms is None:
+      return
+    plan = None
+    with self._lock:
+      full_scans = self._plans.get(sql)
+      if full_scans is not None:
+        self._plans.move_to_end(sql)
+    if full_scans is None:
+      # Planned outside the lock; if another thread planned the statement
+      # meanwhile, only the first one to finish reports it
+      full_scans = []
+      if any(table in sql for table in self.watched_tables):
+        plan = self._explain(cursor, sql, params)
+        full_scans = self._find_full_scans(sql, plan)
+      with self._lock:
+        first = sql not in self._plans
+        if first:
+          self._plans[sql] = full_scans
+          while len(self._plans) > self.max_plans:
+            self._plans.popitem(last=False)
+          if full_scans: # Re-planned after eviction: keep the first report
+            self._full_scans.setdefault(name, {
+              "statement": name, "sql": sql.strip(), "plan": plan, "full_scans": full_scans,
+              "first_seen": datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+            })
+      if first and full_scans:
+        logger.warning("Full scan of %s in statement %r: %s",
+                       ', '.join(self.watched_tables), name, '; '.join(full_scans))
+
+    duration_ms = seconds * 1000
+    if duration_ms < threshold_ms:
+      return
+    if plan is None:
+      plan = self._explain(cursor, sql, params)
+    entry = {
+      "statement": name,
+      "sql": sql.strip(),
+      "params": _loggable_params(params),
+      "duration_ms": round(duration_ms, 3),
+      "plan": plan,
+      "full_scans": full_scans,
+      "at": datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+    }
+    with self._lock:
+      self._entries.append(entry)
+    logger.warning("Slow query %r took %.1f ms (params %s); plan: %s",
+                   name, duration_ms, entry["params"], '; '.join(plan))
+
+  def snapshot(self):
+    """
+    Returns the logged slow queries (newest first) and full-scan reports.
+    """
+    with self._lock:
+      entries = list(reversed(self._entries))
+      full_scans = list(self._full_scans.values())
+    return {
+      "threshold_ms": self.threshold_ms,
+      "capacity": self.capacity,
+      "slow_queries": entries,
+      "full_scans": full_scans,
+    }
@@ -0,0 +1,135 @@
+
+# backend/lib/statements.py
+import re
+import sqlite3
+import time
+
+# Tokens that matter when counting bind parameters: string literals, quoted
+# identifiers and comments are matched (and skipped) so a '?' inside them
+# isn't mistaken for a placeholder
+_SQL_TOKEN = re.compile(r"""
+    '(?:[^']|'')*'            # String literal
+  | "(?:[^"]|"")*"            # Quoted identifier
+  | `[^`]*` | \[[^\]]*\]      # Other identifier quoting
+  | --[^\n]*                  # Line comment
+  | /\*.*?\*/                 # Block comment
+  | \?(\d*)                   # Positional parameter (?, ?NNN)
+""", re.VERBOSE | re.DOTALL)
+
+class StatementError(Exception):
+  """
+  Raised when registered statements no longer compile against the schema.
+  """
+
+def _parameter_count(sql):
+  """
+  Returns how many positional parameters a statement binds.
+  """
+  count = 0
+  for match in _SQL_TOKEN.finditer(sql):
+    if match.group(0).startswith('?'):
+      # A bare ? takes the next number after the largest one used so far
+      count = max(count, int(match.group(1))) if match.group(1) else count + 1
+  return count
+
+def _variant_key(name, parts):
+  return (name, tuple(sorted(parts.items())))
+
+class StatementCatalog:
+  """
+  Registry of the application's SQL statements, by name.
+
+  Every statement is registered once, at import time, with the complete
+  list of its variants: a template's {placeholders} (a sort column, a
+  keyset predicate, a join) may only take the combinations declared at
+  registration, each rendered once. Requests look the text up instead of
+  formatting SQL, so the same variant is always the same string and hits
+  sqlite3's per-connection statement cache, and check() can compile every
+  statement that will ever run against the live schema at startup.
+  """
+  def __init__(self):
+    self._templates = {}
+    self._rendered = {} # (name, sorted parts) -> SQL text
+    # Callables run after each execute() as observer(name, sql, params,
+    # seconds, cursor); timing is skipped entirely while there are none
+    self.observers = []
+
+  def register(self, name, template, variants=None):
+    """
+    Registers a statement. Without `variants` the template is used as-is;
+    otherwise it is rendered with str.format for each dict of parts.
+    Raises ValueError if the name is taken.
+    """
+    if name in self._templates:
+      raise ValueError(f"Statement {name!r} is already registered")
+    self._templates[name] = template
+    for parts in variants or [{}]:
+      self._rendered[_variant_key(name, parts)] = template.format(**parts) if parts else template
+
+  def sql(self, name, **parts):
+    """
+    Returns the text of a registered statement variant.
+    Raises KeyError for an unknown statement or undeclared variant.
+    """
+    try:
+      return self._rendered[_variant_key(name, parts)]
+    except KeyError:
+      if name not in self._templates:
+        raise KeyError(f"Unknown statement {name!r}") from None
+      raise KeyError(f"Statement {name!r} has no registered variant {parts!r}") from None
+
+  def execute(self, cursor, name, params=(), **parts):
+    """
+    Executes a registered statement on a cursor or connection.
+    Observers see the time sqlite3 took to run it up to its first row.
+    """
+    sql = self.sql(name, **parts)
+    if not self.observers:
+      return cursor.execute(sql, params)
+    started = time.perf_counter()
+    result = cursor.execute(sql, params)
+    elapsed = time.perf_counter() - started
+    for observer in self.observers:
+      observer(name, sql, params, elapsed, result)
+    return result
+
+  def executemany(self, cursor, name, seq_of_params, **parts):
+    """
+    Executes a registered statement once per parameter tuple; observers see
+    one call with the parameter list.
+    """
+    sql = self.sql(name, **parts)
+    if not self.observers:
+      return cursor.executemany(sql, seq_of_params)
+    seq_of_params = list(seq_of_params)
+    started = time.perf_counter()
+    result = cursor.executemany(sql, seq_of_params)
+    elapsed = time.perf_counter() - started
+    for observer in self.observers:
+      observer(name, sql, seq_of_params, elapsed, result)
+    return result
+
+  def __len__(self):
+    return len(self._rendered)
+
+  def __contains__(self, name):
+    return name in self._templates
+
+  def check(self, conn):
+    """
+    Compiles every registered variant with EXPLAIN (nothing is executed)
+    and raises StatementError listing each one that no longer matches the
+    schema. Returns the number of statements checked.
+    """
+    failures = {} # (name, error) -> failing variants
+    for (name, parts), sql in self._rendered.items():
+      try:
+        conn.execute(f'EXPLAIN {sql}', (None,) * _parameter_count(sql))
+      except sqlite3.Error as e:
+        failures[(name, str(e))] = failures.get((name, str(e)), 0) + 1
+    if failures:
+      lines = [f"{name}: {error}" + (f" ({count} variants)" if count > 1 else '')
+               for (name, error), count in failures.items()]
+      raise StatementError(
+        f"{len(lines)} SQL statement(s) do not match the schema:\n  " + '\n  '.join(lines))
+    return len(self._rendered)
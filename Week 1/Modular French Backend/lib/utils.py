@@ -1,7 +1,14 @@
 
 # backend/lib/utils.py
+import base64
+import binascii
+import functools
+import json
 from datetime import datetime, timedelta, timezone
-from flask import url_for # Used to generate URLs for pagination links
+from flask import jsonify, url_for # url_for generates URLs for pagination links
+from lib.db import db
+
+db.statements.register('students.exists', "SELECT 1 FROM students WHERE id = ?")
 
 def _format_datetime(dt_str):
     """
@@ -21,18 +28,63 @@ def _format_datetime(dt_str):
     return dt_obj.replace(tzinfo=timezone.utc).isoformat().replace('+00:00', 'Z')
 
 
-def _get_pagination_metadata(endpoint_name, total_items, current_page, per_page, **kwargs):
+def _db_timestamp(dt):
+    """
+    Formats an aware datetime as the UTC text stored in DATETIME columns
+    (microsecond precision, the format _format_datetime parses).
+    """
+    return dt.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S.%f')
+
+
+def _parse_client_timestamp(value, now):
+    """
+    Parses an ISO 8601 timestamp sent by a client into the stored UTC format.
+    Naive values are taken as UTC, and times in the future are clamped to
+    `now` so a skewed client clock can't post-date history.
+    Raises ValueError if the value is not a valid timestamp.
+    """
+    if not isinstance(value, str):
+        raise ValueError("Timestamp must be a string")
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return _db_timestamp(min(dt, now))
+
+
+def _current_streak(current_streak, last_study_date, today):
+    """
+    Returns the live study streak from the persisted streak state.
+    Args:
+        current_streak (int): Length of the latest run of consecutive study days.
+        last_study_date (str): Last day of that run ('YYYY-MM-DD', UTC) or None.
+        today (date): The current UTC date.
+    Returns:
+        int: The streak, or 0 if the run ended before yesterday.
+    """
+    if not last_study_date:
+        return 0
+    last_day = datetime.strptime(last_study_date, '%Y-%m-%d').date()
+    if last_day < today - timedelta(days=1):
+        return 0 # A whole day without a session breaks the streak
+    return current_streak
+
+
+def _get_pagination_metadata(endpoint_name, total_items, current_page, per_page, counter=None, **kwargs):
     """
     Helper to generate pagination metadata, including next/prev page URLs.
     Args:
         endpoint_name (str): The name of the Flask endpoint for URL generation.
-        total_items (int): Total number of items available.
+        total_items (int): Total number of items available, or None to read it from `counter`.
         current_page (int): The current page number (1-indexed).
         per_page (int): Number of items per page.
+        counter (str or tuple): Trigger-maintained counter holding the total,
+            as a name ('words') or a (name, scope_id) pair; see Db.count.
         **kwargs: Additional keyword arguments to pass to url_for (e.g., group_id).
     Returns:
         dict: A dictionary containing pagination details.
     """
+    if total_items is None and counter is not None:
+        total_items = db.count(*counter) if isinstance(counter, tuple) else db.count(counter)
     total_pages = (total_items + per_page - 1) // per_page # Calculate total pages, rounding up
     next_page = None
     prev_page = None
@@ -53,3 +105,184 @@ def _get_pagination_metadata(endpoint_name, total_items, current_page, per_page,
         "next_page": next_page,
         "prev_page": prev_page
     }
+
+
+def _encode_cursor(sort_by, direction, sort_value, row_id):
+    """
+    Encodes an opaque keyset-pagination cursor.
+    The cursor carries the sort field it was issued for, the direction to seek
+    in ('next' or 'prev') and the sort key and id of the boundary row.
+    """
+    payload = json.dumps([sort_by, direction, sort_value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(token, sort_by):
+    """
+    Decodes a cursor produced by _encode_cursor.
+    Raises ValueError if the cursor is malformed or was issued for another sort field.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        cursor_sort_by, direction, sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError("Malformed cursor")
+    if cursor_sort_by != sort_by or direction not in ('next', 'prev'):
+        raise ValueError("Cursor does not match this listing")
+    # Both values are bound as query parameters: only what SQLite can bind
+    if not _is_sql_integer(row_id) or not (sort_value is None or _is_sql_integer(sort_value)
+                                           or isinstance(sort_value, (str, float))):
+        raise ValueError("Malformed cursor")
+    return direction, sort_value, row_id
+
+
+def _is_sql_integer(value):
+    """
+    True if value is an int that fits a SQLite INTEGER (bools are rejected).
+    """
+    return isinstance(value, int) and not isinstance(value, bool) and -2**63 <= value < 2**63
+
+
+@functools.lru_cache(maxsize=None)
+def _keyset_parts(sort_column, id_column, order, direction, paged_by_offset, prefix='WHERE'):
+    """
+    Renders the keyset-pagination fragments of a listing query, as template
+    parts for a catalog statement (see lib/statements.py).
+    Args:
+        sort_column (str): SQL expression of the sort key (may equal id_column).
+        id_column (str): SQL expression of the unique id used as tie-breaker.
+        order (str): 'ASC' or 'DESC'.
+        direction (str): None for the first page, or the cursor's 'next' / 'prev'.
+        paged_by_offset (bool): True for page-number pagination (no cursor).
+        prefix (str): 'WHERE', or 'AND' when the query already filters.
+    Returns:
+        dict: {'seek': predicate or '', 'order_by': ..., 'limit': ...}. The
+        seek predicate binds the cursor's sort value and id (just the id when
+        sorting by id); the limit binds LIMIT (and OFFSET) values.
+    """
+    limit = "LIMIT ? OFFSET ?" if paged_by_offset else "LIMIT ?"
+    if direction is None:
+        return {'seek': '', 'order_by': f"{sort_column} {order}, {id_column} {order}", 'limit': limit}
+
+    # Seeking forward in ascending order means "after the boundary row";
+    # paging backwards flips both the comparison and the scan direction.
+    ascending = (order == 'ASC') != (direction == 'prev')
+    operator = '>' if ascending else '<'
+    scan = 'ASC' if ascending else 'DESC'
+
+    if sort_column == id_column:
+        return {'seek': f"{prefix} {id_column} {operator} ?", 'order_by': f"{id_column} {scan}", 'limit': limit}
+    return {
+        'seek': f"{prefix} ({sort_column}, {id_column}) {operator} (?, ?)",
+        'order_by': f"{sort_column} {scan}, {id_column} {scan}",
+        'limit': limit
+    }
+
+
+def _keyset_variants(sort_column, id_column, prefix='WHERE', orders=('ASC', 'DESC')):
+    """
+    Lists every keyset part combination _get_keyset_clause can pick for one
+    sort key: both orders, in page-number mode and for each cursor direction.
+    Passed as the variants of a catalog statement.
+    """
+    return [
+        _keyset_parts(sort_column, id_column, order, direction, paged_by_offset, prefix)
+        for order in orders
+        for direction, paged_by_offset in ((None, True), (None, False), ('next', False), ('prev', False))
+    ]
+
+
+def _get_keyset_clause(cursor_token, sort_by, sort_column, id_column, order, prefix='WHERE'):
+    """
+    Picks the keyset-pagination parts of a listing query for a request.
+    Args:
+        cursor_token (str): The `cursor` query parameter: None for page-number
+            pagination, '' for the first cursor page.
+        sort_by (str): The public sort field name, checked against the cursor.
+        sort_column (str): SQL expression of the sort key (may equal id_column).
+        id_column (str): SQL expression of the unique id used as tie-breaker.
+        order (str): 'ASC' or 'DESC'.
+        prefix (str): 'WHERE', or 'AND' when the query already filters.
+    Returns:
+        tuple: (template parts, seek params, backwards flag); see _keyset_parts.
+        When backwards is True the rows come back in reverse and must be flipped.
+    Raises:
+        ValueError: If the cursor is invalid.
+    """
+    if not cursor_token:
+        return _keyset_parts(sort_column, id_column, order, None, cursor_token is None, prefix), [], False
+
+    direction, sort_value, row_id = _decode_cursor(cursor_token, sort_by)
+    parts = _keyset_parts(sort_column, id_column, order, direction, False, prefix)
+    params = [row_id] if sort_column == id_column else [sort_value, row_id]
+    return parts, params, direction == 'prev'
+
+
+def _get_cursor_pagination_metadata(endpoint_name, rows, per_page, cursor_token, backwards,
+                                    cursor_field, sort_key, id_key='id', total_items=None, **kwargs):
+    """
+    Helper to trim a keyset-paginated result and build its pagination metadata.
+    The query must have fetched up to per_page + 1 rows so the extra row
+    tells whether another page exists in the scan direction.
+    Args:
+        endpoint_name (str): The name of the Flask endpoint for URL generation.
+        rows (list): Rows returned by the query (sqlite3.Row or dict).
+        per_page (int): Number of items per page.
+        cursor_token (str): The cursor this page was requested with.
+        backwards (bool): Whether the query scanned backwards (prev cursor).
+        cursor_field (str): The public sort field name, embedded in new cursors.
+        sort_key (str): Row key holding the sort value.
+        id_key (str): Row key holding the unique id.
+        total_items (int): Optional total count; omitted from the metadata when None.
+        **kwargs: Additional keyword arguments to pass to url_for (e.g., group_id, sort_by).
+    Returns:
+        tuple: (rows of the page in display order, pagination dict).
+    """
+    has_more = len(rows) > per_page
+    rows = list(rows[:per_page])
+    if backwards:
+        rows.reverse()
+
+    # A page reached by seeking forward always has something before it, and
+    # vice versa; the extra row answers the question for the scan direction.
+    has_next = True if backwards else has_more
+    has_prev = has_more if backwards else bool(cursor_token)
+
+    next_cursor = None
+    prev_cursor = None
+    if rows and has_next:
+        next_cursor = _encode_cursor(cursor_field, 'next', rows[-1][sort_key], rows[-1][id_key])
+    if rows and has_prev:
+        prev_cursor = _encode_cursor(cursor_field, 'prev', rows[0][sort_key], rows[0][id_key])
+
+    pagination = {
+        "items_per_page": per_page,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+        "next_page": url_for(endpoint_name, cursor=next_cursor, limit=per_page, _external=True, **kwargs) if next_cursor else None,
+        "prev_page": url_for(endpoint_name, cursor=prev_cursor, limit=per_page, _external=True, **kwargs) if prev_cursor else None
+    }
+    if total_items is not None:
+        pagination["total_items"] = total_items
+    return rows, pagination
+
+
+def _wants_total(args):
+    """
+    Returns True if a cursor-mode request asked for the total item count
+    (include_total=true), which costs an extra COUNT query.
+    """
+    return args.get('include_total', 'false').lower() in ('1', 'true', 'yes')
+
+
+def _check_student(student_id):
+    """
+    Returns a 404 response if `student_id` is given but no such student
+    exists, otherwise None. Per-student routes share their view with the
+    global one, which passes student_id=None.
+    """
+    if student_id is None:
+        return None
+    if db.query('students.exists', (student_id,)).fetchone() is None:
+        return jsonify({"error": "Student not found"}), 404
+    return None
@@ -0,0 +1,129 @@
+
+# backend/lib/word_import.py
+import csv
+import json
+import os
+
+# Formats accepted by the bulk vocabulary import, keyed by file extension
+FORMATS = {
+  '.json': 'json',
+  '.ndjson': 'ndjson',
+  '.jsonl': 'ndjson',
+  '.csv': 'csv',
+}
+
+REQUIRED_FIELDS = ('french_word', 'quebec_pronunciation', 'english')
+
+# Longest accepted value of a required field, in characters
+MAX_FIELD_LENGTH = 1000
+
+class WordImportError(ValueError):
+  """
+  Raised when an import source is malformed or a record is missing fields.
+  """
+
+def detect_format(filename, default='json'):
+  """
+  Guesses the import format from a file name's extension.
+  """
+  extension = os.path.splitext(filename or '')[1].lower()
+  return FORMATS.get(extension, default)
+
+def _iter_json_array(fileobj, chunk_size=64 * 1024):
+  """
+  Yields the elements of a top-level JSON array one at a time, reading the
+  file in chunks so the whole document is never held in memory.
+  """
+  decoder = json.JSONDecoder()
+  buffer = ''
+  eof = False
+  started = False
+
+  while True:
+    buffer = buffer.lstrip()
+    if not started:
+      if buffer:
+        if buffer[0] != '[':
+          raise WordImportError("Expected a JSON array of word objects")
+        buffer = buffer[1:]
+        started = True
+        continue
+    else:
+      buffer = buffer.lstrip(', \t\r\n')
+      if buffer.startswith(']'):
+        return
+      if buffer:
+        try:
+          item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+          if eof:
+            raise WordImportError("Malformed JSON array")
+        else:
+          # Objects are self-delimiting, so a decoded object is complete even
+          # when it ends exactly at the chunk boundary
+          buffer = buffer[end:]
+          yield item
+          continue
+    if eof:
+      raise WordImportError("Unexpected end of JSON input")
+    chunk = fileobj.read(chunk_size)
+    if not chunk:
+      eof = True
+    buffer += chunk
+
+def _iter_ndjson(fileobj):
+  """
+  Yields one JSON object per non-blank line.
+  """
+  for line_number, line in enumerate(fileobj, start=1):
+    if line.strip():
+      try:
+        yield json.loads(line)
+      except json.JSONDecodeError as e:
+        raise WordImportError(f"Line {line_number}: {e}")
+
+def _iter_csv(fileobj):
+  """
+  Yields one record per CSV row. The header must name the word fields; parts
+  may be given as a JSON `parts` column or as a plain `notes` column.
+  """
+  for row in csv.DictReader(fileobj):
+    if row.get('parts'):
+      try:
+        row['parts'] = json.loads(row['parts'])
+      except json.JSONDecodeError:
+        raise WordImportError(f"Invalid parts JSON for '{row.get('french_word')}'")
+    else:
+      row['parts'] = {'notes': row.pop('notes', '') or ''}
+    yield row
+
+def iter_word_records(fileobj, fmt):
+  """
+  Streams word records (dicts) from a text file object in the given format.
+  """
+  readers = {'json': _iter_json_array, 'ndjson': _iter_ndjson, 'csv': _iter_csv}
+  if fmt not in readers:
+    raise WordImportError(f"Unsupported format '{fmt}'. Must be one of: {', '.join(readers)}")
+  return readers[fmt](fileobj)
+
+def iter_word_rows(records):
+  """
+  Validates word records and converts them to `words` insert tuples
+  (french_word, quebec_pronunciation, english, parts JSON). A bad record
+  raises WordImportError naming its number, before it reaches the database.
+  """
+  for index, word in enumerate(records, start=1):
+    if not isinstance(word, dict):
+      raise WordImportError(f"Record {index} is not an object")
+    missing = [field for field in REQUIRED_FIELDS if word.get(field) in (None, '')]
+    if missing:
+      raise WordImportError(f"Record {index} is missing: {', '.join(missing)}")
+    for field in REQUIRED_FIELDS:
+      if not isinstance(word[field], str):
+        raise WordImportError(f"Record {index}: {field} must be a string")
+      if len(word[field]) > MAX_FIELD_LENGTH:
+        raise WordImportError(f"Record {index}: {field} is longer than {MAX_FIELD_LENGTH} characters")
+    if not isinstance(word.get('parts') or {}, dict):
+      raise WordImportError(f"Record {index}: parts must be an object")
+    yield (word['french_word'], word['quebec_pronunciation'], word['english'],
+           json.dumps(word.get('parts') or {}))
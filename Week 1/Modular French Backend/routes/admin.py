@@ -0,0 +1,115 @@
+
+# backend/routes/admin.py
+import io
+import sqlite3
+from flask import request, jsonify, Response
+from flask_cors import cross_origin
+from lib.db import db
+from lib.metrics import PROMETHEUS_CONTENT_TYPE
+from lib.word_import import WordImportError, detect_format, iter_word_records, iter_word_rows
+
+def _check_admin(app):
+  """
+  Returns an error response if the request lacks the configured admin token.
+  When ADMIN_TOKEN is not set (local development), admin routes are open,
+  like the reset endpoints.
+  """
+  token = app.config.get('ADMIN_TOKEN')
+  if token and request.headers.get('Authorization') != f"Bearer {token}":
+    return jsonify({"error": "Admin token required"}), 403
+  return None
+
+def load(app):
+  """
+  Registers administrative API routes with the Flask application.
+  """
+
+  @app.route('/api/admin/import_words', methods=['POST'])
+  @cross_origin()
+  def import_words():
+    """
+    Bulk-imports vocabulary into a group from an uploaded file.
+    Accepts a multipart upload (field 'file') or a raw request body in JSON
+    (array), NDJSON or CSV. The body is streamed into a single transaction.
+    Query parameters: group_name (required), format (json/ndjson/csv, guessed
+    from the file name when omitted) and defer_indexes (true/false).
+    """
+    denied = _check_admin(app)
+    if denied:
+      return denied
+
+    group_name = request.args.get('group_name')
+    if not group_name:
+      return jsonify({"error": "group_name is required"}), 400
+
+    upload = request.files.get('file')
+    if upload is not None:
+      stream, filename = upload.stream, upload.filename
+    else:
+      stream, filename = request.stream, None
+    fmt = request.args.get('format') or detect_format(filename)
+    defer_indexes = request.args.get('defer_indexes', 'false').lower() in ('1', 'true', 'yes')
+
+    try:
+      records = iter_word_records(io.TextIOWrapper(stream, encoding='utf-8', newline=''), fmt)
+      group_id, imported = db.bulk_import_words(group_name, iter_word_rows(records), defer_indexes=defer_indexes)
+    except WordImportError as e:
+      # The transaction was rolled back, so nothing from this file was kept
+      return jsonify({"error": f"Import failed: {str(e)}"}), 400
+    except sqlite3.Error as e:
+      return jsonify({"error": f"Database error: {str(e)}"}), 500
+
+    return jsonify({
+      "message": "Words imported successfully.",
+      "group_id": group_id,
+      "group_name": group_name,
+      "words_imported": imported
+    }), 201
+
+  @app.route('/api/admin/review_writer', methods=['GET'])
+  @cross_origin()
+  def get_review_writer_stats():
+    """
+    Returns the write-behind review queue counters: batch sizes, commit
+    latency, queue depth and rejected (backpressured) requests.
+    """
+    denied = _check_admin(app)
+    if denied:
+      return denied
+
+    review_writer = app.extensions.get('review_writer')
+    if review_writer is None:
+      return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **review_writer.stats()})
+
+  @app.route('/api/admin/slow_queries', methods=['GET', 'DELETE'])
+  @cross_origin()
+  def slow_queries():
+    """
+    Returns the slow-query log (newest first), each entry with its
+    parameters, duration and EXPLAIN QUERY PLAN, plus the statements found
+    scanning a whole watched table. DELETE empties the log.
+    """
+    denied = _check_admin(app)
+    if denied:
+      return denied
+
+    if request.method == 'DELETE':
+      db.slow_queries.clear()
+      return jsonify({"message": "Slow-query log cleared."})
+    return jsonify({"enabled": db.slow_queries.threshold_ms is not None, **db.slow_queries.snapshot()})
+
+  @app.route('/api/_metrics', methods=['GET'])
+  def get_metrics():
+    """
+    Returns per-endpoint latency histograms and SQL counters in the
+    Prometheus text format (this process only).
+    """
+    denied = _check_admin(app)
+    if denied:
+      return denied
+
+    metrics = app.extensions.get('metrics')
+    if metrics is None:
+      return jsonify({"error": "Metrics are disabled (METRICS_ENABLED=0)"}), 404
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
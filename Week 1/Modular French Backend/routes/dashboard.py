@@ -2,119 +2,223 @@
 # backend/routes/dashboard.py
 from flask import jsonify, request
 from flask_cors import cross_origin
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timezone
+from lib.cache import WriteInvalidatedCache
 from lib.db import db
-from lib.utils import _format_datetime
+from lib.etag import conditional_get
+from lib.utils import _format_datetime, _current_streak, _check_student
+
+# Overall figures, or one student's (the student id is the only parameter)
+GLOBAL_SCOPE = {
+    'latest': "SELECT * FROM study_sessions",
+    'aggregates': "dashboard_aggregates WHERE id = 1",
+}
+STUDENT_SCOPE = {
+    'latest': "SELECT * FROM study_sessions WHERE student_id = ?",
+    'aggregates': "student_aggregates WHERE student_id = ?",
+}
+
+def _scope(student_id):
+    """
+    Returns (template parts, params) for the overall or a student's dashboard.
+    """
+    if student_id is None:
+        return GLOBAL_SCOPE, ()
+    return STUDENT_SCOPE, (student_id,)
+
+# Pick the latest session through the created_at index (or the student's
+# (student_id, created_at) index), then count only its reviews, instead of
+# aggregating every session first.
+db.statements.register('dashboard.last_study_session', """
+    SELECT ss.id, g.name AS group_name, ss.created_at, ss.end_time,
+           ss.compacted_correct + SUM(CASE WHEN wri.correct = 1 THEN 1 ELSE 0 END) AS correct_count,
+           ss.compacted_reviews - ss.compacted_correct
+             + SUM(CASE WHEN wri.correct = 0 THEN 1 ELSE 0 END) AS incorrect_count,
+           ss.compacted_reviews + COUNT(wri.id) AS total_words_reviewed
+    FROM ({latest} ORDER BY created_at DESC, id DESC LIMIT 1) ss
+    JOIN groups g ON ss.group_id = g.id
+    LEFT JOIN word_review_items wri ON ss.id = wri.study_session_id
+    GROUP BY ss.id, g.name, ss.created_at, ss.end_time, ss.compacted_reviews, ss.compacted_correct;
+""", [GLOBAL_SCOPE, STUDENT_SCOPE])
+db.statements.register(
+    'dashboard.words_studied', "SELECT words_studied FROM {aggregates};", [GLOBAL_SCOPE, STUDENT_SCOPE]
+)
+db.statements.register('dashboard.quick_stats', """
+    SELECT total_reviews, correct_reviews, total_study_sessions, active_groups, current_streak, last_study_date
+    FROM {aggregates};
+""", [GLOBAL_SCOPE, STUDENT_SCOPE])
+
+# Day-by-day activity from the trigger-maintained daily rollup (migration
+# 004), read through its primary key; days whose history was all deleted
+# are left out. Bounds are 'YYYY-MM-DD' strings, [since, until).
+db.statements.register('dashboard.daily', """
+    SELECT day, study_sessions, reviews, correct_reviews
+    FROM dashboard_daily
+    WHERE day >= ? AND day < ? AND (study_sessions > 0 OR reviews > 0)
+    ORDER BY day;
+""")
+
+def _success_rate(correct_reviews, reviews):
+    """
+    Percentage of correct reviews, rounded to 2 decimal places (0.0 without reviews).
+    """
+    return round(correct_reviews / reviews * 100, 2) if reviews > 0 else 0.0
 
 def load(app):
     """
     Registers dashboard-related API routes with the Flask application.
     """
+    # Dashboard payloads are cached in-process until the next committed
+    # write. One cache per app: its keys don't say which database they are from
+    dashboard_cache = WriteInvalidatedCache(db, max_entries=app.config.get('DASHBOARD_CACHE_SIZE', 1024))
+    app.extensions['dashboard_cache'] = dashboard_cache
 
     @app.route('/api/dashboard/last_study_session', methods=['GET'])
+    @app.route('/api/students/<int:student_id>/dashboard/last_study_session', methods=['GET'])
     @cross_origin()
-    def get_last_study_session():
+    @conditional_get()
+    def get_last_study_session(student_id=None):
         """
-        Retrieves details of the most recent study session.
+        Retrieves details of the most recent study session (of one student,
+        under /api/students/<id>/).
         Includes group name, start/end times, and review counts.
         """
-        cursor = db.cursor()
-        query = """
-            SELECT ss.id, g.name AS group_name, ss.created_at, ss.end_time,
-                   SUM(CASE WHEN wri.correct = 1 THEN 1 ELSE 0 END) AS correct_count,
-                   SUM(CASE WHEN wri.correct = 0 THEN 1 ELSE 0 END) AS incorrect_count,
-                   COUNT(wri.id) AS total_words_reviewed
-            FROM study_sessions ss
-            JOIN groups g ON ss.group_id = g.id
-            LEFT JOIN word_review_items wri ON ss.id = wri.study_session_id
-            GROUP BY ss.id, g.name, ss.created_at, ss.end_time
-            ORDER BY ss.created_at DESC LIMIT 1;
-        """
-        last_session = cursor.execute(query).fetchone()
-        
-        if not last_session:
+        not_found = _check_student(student_id)
+        if not_found:
+            return not_found
+
+        def compute():
+            scope, params = _scope(student_id)
+            last_session = db.query('dashboard.last_study_session', params, **scope).fetchone()
+            if not last_session:
+                return None
+            
+            result = dict(last_session)
+            # Ensure counts are integers, defaulting to 0 if NULL
+            result['correct_count'] = int(result['correct_count'] or 0)
+            result['incorrect_count'] = int(result['incorrect_count'] or 0)
+            result['total_words_reviewed'] = int(result['total_words_reviewed'] or 0)
+            # Format datetime strings
+            result['created_at'] = _format_datetime(result['created_at'])
+            result['end_time'] = _format_datetime(result['end_time'])
+            return result
+
+        result = dashboard_cache.get_or_compute(('last_study_session', student_id), compute)
+        if result is None:
             return jsonify({"message": "No study sessions found."}), 404
         
-        result = dict(last_session)
-        # Ensure counts are integers, defaulting to 0 if NULL
-        result['correct_count'] = int(result['correct_count'] or 0)
-        result['incorrect_count'] = int(result['incorrect_count'] or 0)
-        result['total_words_reviewed'] = int(result['total_words_reviewed'] or 0)
-        # Format datetime strings
-        result['created_at'] = _format_datetime(result['created_at'])
-        result['end_time'] = _format_datetime(result['end_time'])
-        
         return jsonify(result)
 
     @app.route('/api/dashboard/study_progress', methods=['GET'])
+    @app.route('/api/students/<int:student_id>/dashboard/study_progress', methods=['GET'])
     @cross_origin()
-    def get_study_progress():
+    @conditional_get()
+    def get_study_progress(student_id=None):
         """
-        Provides overall study progress statistics, including total words studied
-        and mastery percentage.
+        Provides overall (or one student's) study progress statistics,
+        including total words studied and mastery percentage.
         """
-        cursor = db.cursor()
-        
-        # Get count of unique words that have been reviewed
-        total_words_studied = cursor.execute("SELECT COUNT(DISTINCT word_id) FROM word_review_items;").fetchone()[0]
-        
-        # Get total number of words in the database
-        total_vocabulary_in_db = cursor.execute("SELECT COUNT(*) FROM words;").fetchone()[0]
-        
-        # Calculate mastery percentage
-        mastery_percentage = (total_words_studied / total_vocabulary_in_db) * 100 if total_vocabulary_in_db > 0 else 0.0
-        
-        return jsonify({
-            "total_words_studied": total_words_studied,
-            "total_vocabulary_in_db": total_vocabulary_in_db,
-            "mastery_percentage": round(mastery_percentage, 2) # Round to 2 decimal places
-        })
+        not_found = _check_student(student_id)
+        if not_found:
+            return not_found
+
+        def compute():
+            # Count of unique words that have been reviewed, kept by triggers
+            scope, params = _scope(student_id)
+            total_words_studied = db.query('dashboard.words_studied', params, **scope).fetchone()[0]
+            
+            # Get total number of words in the database (trigger-maintained counter)
+            total_vocabulary_in_db = db.count('words')
+            
+            # Calculate mastery percentage
+            mastery_percentage = (total_words_studied / total_vocabulary_in_db) * 100 if total_vocabulary_in_db > 0 else 0.0
+            
+            return {
+                "total_words_studied": total_words_studied,
+                "total_vocabulary_in_db": total_vocabulary_in_db,
+                "mastery_percentage": round(mastery_percentage, 2) # Round to 2 decimal places
+            }
+
+        return jsonify(dashboard_cache.get_or_compute(('study_progress', student_id), compute))
 
     @app.route('/api/dashboard/quick-stats', methods=['GET'])
+    @app.route('/api/students/<int:student_id>/dashboard/quick-stats', methods=['GET'])
     @cross_origin()
-    def get_quick_stats():
+    @conditional_get(extra=lambda: datetime.now(timezone.utc).date().isoformat())
+    def get_quick_stats(student_id=None):
         """
-        Returns quick statistics like overall success rate, total sessions,
-        active groups, and current study streak.
+        Returns quick statistics (overall or for one student) like success
+        rate, total sessions, active groups, and current study streak.
         """
-        cursor = db.cursor()
-        
-        # Calculate overall success rate
-        total_correct_reviews = cursor.execute("SELECT COUNT(*) FROM word_review_items WHERE correct = 1;").fetchone()[0]
-        total_reviews = cursor.execute("SELECT COUNT(*) FROM word_review_items;").fetchone()[0]
-        success_rate_percentage = (total_correct_reviews / total_reviews) * 100 if total_reviews > 0 else 0.0
-        
-        # Get total number of study sessions
-        total_study_sessions = cursor.execute("SELECT COUNT(*) FROM study_sessions;").fetchone()[0]
+        not_found = _check_student(student_id)
+        if not_found:
+            return not_found
+        today = datetime.now(timezone.utc).date()
+
+        def compute():
+            # Running totals and the streak state are maintained by triggers
+            # in dashboard_aggregates (student_aggregates per student), so
+            # this is a single-row read
+            scope, params = _scope(student_id)
+            aggregates = db.query('dashboard.quick_stats', params, **scope).fetchone()
+
+            # Calculate overall success rate
+            success_rate_percentage = _success_rate(aggregates['correct_reviews'], aggregates['total_reviews'])
         
-        # Get number of unique groups that have had study sessions
-        total_active_groups = cursor.execute("SELECT COUNT(DISTINCT group_id) FROM study_sessions;").fetchone()[0]
-
-        # Calculate study streak (consecutive days with at least one session)
-        study_streak_days = 0
-        # Fetch distinct dates of study sessions, ordered descending
-        session_dates_raw = cursor.execute("SELECT DISTINCT DATE(created_at) FROM study_sessions ORDER BY created_at DESC;").fetchall()
-        # Convert raw dates to datetime.date objects and sort them
-        session_dates = sorted([datetime.strptime(d[0], '%Y-%m-%d').date() for d in session_dates_raw], reverse=True)
+            # Get total number of study sessions
+            total_study_sessions = aggregates['total_study_sessions']
         
-        if session_dates:
-            today = datetime.now(timezone.utc).date()
-            # Determine the starting point for streak calculation: today or yesterday if today has no sessions
-            current_day_for_streak = today
-            if session_dates and session_dates[0] == today - timedelta(days=1):
-                current_day_for_streak = today - timedelta(days=1)
-
-            for date in session_dates:
-                if date == current_day_for_streak:
-                    study_streak_days += 1
-                    current_day_for_streak -= timedelta(days=1) # Move to the previous day
-                elif date < current_day_for_streak:
-                    # If there's a gap, the streak is broken
-                    break
+            # Get number of unique groups that have had study sessions
+            total_active_groups = aggregates['active_groups']
+
+            # Study streak (consecutive days with at least one session), alive
+            # only while the last study day is today or yesterday
+            study_streak_days = _current_streak(aggregates['current_streak'], aggregates['last_study_date'], today)
         
-        return jsonify({
-            "success_rate_percentage": round(success_rate_percentage, 2),
-            "total_study_sessions": total_study_sessions,
-            "total_active_groups": total_active_groups,
-            "study_streak_days": study_streak_days
-        })
+            return {
+                "success_rate_percentage": success_rate_percentage,
+                "total_study_sessions": total_study_sessions,
+                "total_active_groups": total_active_groups,
+                "study_streak_days": study_streak_days
+            }
+
+        # The streak depends on the current (UTC) day, so it is part of the cache key
+        return jsonify(dashboard_cache.get_or_compute(('quick_stats', student_id, today), compute))
+
+    @app.route('/api/dashboard/daily', methods=['GET'])
+    @cross_origin()
+    @conditional_get()
+    def get_daily_activity():
+        """
+        Returns study activity per UTC day (sessions started, reviews and
+        success rate) and its totals, optionally limited to ?since=
+        (inclusive) and ?until= (exclusive) dates. Reads the daily rollup,
+        so the cost depends on the number of days, not of reviews, and
+        compacted history is included. Overall figures only: the rollup is
+        not kept per student.
+        """
+        bounds = {}
+        for param, default in (('since', date.min), ('until', date.max)):
+            value = request.args.get(param)
+            try:
+                bounds[param] = date.fromisoformat(value) if value else default
+            except ValueError:
+                return jsonify({"error": f"'{param}' must be a date (YYYY-MM-DD)"}), 400
+
+        rows = db.query('dashboard.daily', (bounds['since'].isoformat(), bounds['until'].isoformat())).fetchall()
+        days = [{
+            "day": row['day'],
+            "study_sessions": row['study_sessions'],
+            "reviews": row['reviews'],
+            "correct_reviews": row['correct_reviews'],
+            "success_rate_percentage": _success_rate(row['correct_reviews'], row['reviews'])
+        } for row in rows]
+
+        totals = {
+            "study_sessions": sum(day['study_sessions'] for day in days),
+            "reviews": sum(day['reviews'] for day in days),
+            "correct_reviews": sum(day['correct_reviews'] for day in days),
+            "active_days": len(days)
+        }
+        totals["success_rate_percentage"] = _success_rate(totals['correct_reviews'], totals['reviews'])
+        return jsonify({"days": days, "totals": totals})
@@ -0,0 +1,195 @@
+
+# backend/routes/export.py
+import csv
+import io
+import sqlite3
+from datetime import datetime, timezone
+from flask import request, jsonify
+from flask_cors import cross_origin
+from lib.db import db
+from lib.utils import _format_datetime
+
+# Response formats of the export endpoints: (mimetype, file extension)
+EXPORT_FORMATS = {
+  'ndjson': ('application/x-ndjson', 'ndjson'),
+  'csv': ('text/csv', 'csv'),
+}
+
+REVIEW_FIELDS = ('id', 'study_session_id', 'word_id', 'french_word', 'english', 'correct', 'created_at')
+
+SESSION_FIELDS = ('id', 'group_id', 'group_name', 'study_activity_id', 'activity_name',
+                  'start_time', 'end_time', 'number_of_review_items')
+
+def _parse_range_bound(value):
+  """
+  Parses an ISO 8601 date or timestamp into the stored UTC text format, for
+  comparison against DATETIME columns. Naive values are taken as UTC.
+  Raises ValueError if the value is not a valid date or timestamp.
+  """
+  dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+  if dt.tzinfo is None:
+    dt = dt.replace(tzinfo=timezone.utc)
+  dt = dt.astimezone(timezone.utc)
+  # Rows written by CURRENT_TIMESTAMP have no fractional part; a bound
+  # without one compares correctly against both stored forms
+  if dt.microsecond:
+    return dt.strftime('%Y-%m-%d %H:%M:%S.%f')
+  return dt.strftime('%Y-%m-%d %H:%M:%S')
+
+def _range_clause(column, since, until):
+  """
+  Builds the WHERE clause for a half-open [since, until) time range.
+  """
+  conditions, params = [], []
+  if since:
+    conditions.append(f"{column} >= ?")
+    params.append(since)
+  if until:
+    conditions.append(f"{column} < ?")
+    params.append(until)
+  return ('WHERE ' + ' AND '.join(conditions) if conditions else ''), params
+
+def _range_variants(column):
+  """
+  Lists the {range} parts _range_clause can produce, with and without
+  each bound, for registering an export statement.
+  """
+  return [{'range': _range_clause(column, since, until)[0]} for since in ('', 'x') for until in ('', 'x')]
+
+db.statements.register('export.reviews', """
+    SELECT wri.id, wri.study_session_id, wri.word_id, w.french_word, w.english,
+           wri.correct, wri.created_at
+    FROM word_review_items wri
+    JOIN words w ON w.id = wri.word_id
+    {range}
+    ORDER BY wri.created_at, wri.id;
+""", _range_variants('wri.created_at'))
+
+# Review counts are looked up per session through the study_session_id
+# index, so the export never aggregates the whole review table at once
+db.statements.register('export.sessions', """
+    SELECT ss.id, ss.group_id, g.name AS group_name,
+           ss.study_activity_id, sa.name AS activity_name,
+           ss.created_at AS start_time, ss.end_time,
+           ss.compacted_reviews + (SELECT COUNT(*) FROM word_review_items wri
+            WHERE wri.study_session_id = ss.id) AS number_of_review_items
+    FROM study_sessions ss
+    JOIN groups g ON g.id = ss.group_id
+    JOIN study_activities sa ON sa.id = ss.study_activity_id
+    {range}
+    ORDER BY ss.created_at, ss.id;
+""", _range_variants('ss.created_at'))
+
+def load(app):
+  """
+  Registers study history export routes with the Flask application.
+  """
+
+  def _encode_batch(rows, fields, fmt, row_formatter):
+    """
+    Encodes a batch of rows as NDJSON lines or CSV records.
+    """
+    records = [row_formatter(row) for row in rows]
+    if fmt == 'ndjson':
+      return ''.join(app.json.dumps(record) + '\n' for record in records)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    writer.writerows(records)
+    return buffer.getvalue()
+
+  def _stream_export(name, statement, params, where, fields, row_formatter):
+    """
+    Streams the result of an export statement (filtered by `where`, one of
+    its {range} variants) as NDJSON or CSV (?format=).
+    The query runs on a dedicated connection inside one read transaction, so
+    the export is a consistent snapshot, and rows are pulled from the cursor
+    in batches of EXPORT_BATCH_SIZE: memory use does not grow with the table.
+    """
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in EXPORT_FORMATS:
+      return jsonify({"error": f"Invalid format. Must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    batch_size = app.config.get('EXPORT_BATCH_SIZE', 1000)
+
+    # Not the pooled request connection: the response body is produced after
+    # the request context (and its connection) has been torn down. Read-only,
+    # so a long export never holds up review logging.
+    conn = db.connect(read_only=True)
+    try:
+      conn.execute('BEGIN')
+      cursor = db.statements.execute(conn, statement, params, range=where)
+    except sqlite3.Error as e:
+      conn.close()
+      return jsonify({"error": f"Database error: {str(e)}"}), 500
+
+    def generate():
+      try:
+        if fmt == 'csv':
+          yield ','.join(fields) + '\r\n'
+        while True:
+          rows = cursor.fetchmany(batch_size)
+          if not rows:
+            break
+          yield _encode_batch(rows, fields, fmt, row_formatter)
+      finally:
+        # Also runs when the client disconnects mid-download
+        conn.close()
+
+    response = app.response_class(generate(), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{name}.{extension}"'
+    return response
+
+  def _requested_range(column):
+    """
+    Reads the optional ?since= (inclusive) and ?until= (exclusive) filters.
+    Returns (where clause, params), or raises ValueError naming the bad one.
+    """
+    bounds = {}
+    for param in ('since', 'until'):
+      value = request.args.get(param)
+      try:
+        bounds[param] = _parse_range_bound(value) if value else None
+      except ValueError:
+        raise ValueError(f"'{param}' must be an ISO 8601 date or timestamp")
+    return _range_clause(column, bounds['since'], bounds['until'])
+
+  @app.route('/api/export/reviews', methods=['GET'])
+  @cross_origin()
+  def export_reviews():
+    """
+    Streams every word review (optionally within ?since=/?until=) in
+    created_at order, as NDJSON (default) or CSV (?format=csv).
+    """
+    try:
+      where, params = _requested_range('wri.created_at')
+    except ValueError as e:
+      return jsonify({"error": str(e)}), 400
+
+    def format_review(row):
+      review = dict(row)
+      review['correct'] = bool(review['correct'])
+      review['created_at'] = _format_datetime(review['created_at'])
+      return review
+
+    return _stream_export('reviews', 'export.reviews', params, where, REVIEW_FIELDS, format_review)
+
+  @app.route('/api/export/sessions', methods=['GET'])
+  @cross_origin()
+  def export_sessions():
+    """
+    Streams every study session (optionally started within ?since=/?until=)
+    in start order with its group, activity and review count, as NDJSON
+    (default) or CSV (?format=csv).
+    """
+    try:
+      where, params = _requested_range('ss.created_at')
+    except ValueError as e:
+      return jsonify({"error": str(e)}), 400
+
+    def format_session(row):
+      session = dict(row)
+      session['start_time'] = _format_datetime(session['start_time'])
+      session['end_time'] = _format_datetime(session['end_time'])
+      return session
+
+    return _stream_export('sessions', 'export.sessions', params, where, SESSION_FIELDS, format_session)
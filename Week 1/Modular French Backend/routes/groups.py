@@ -4,7 +4,54 @@ from flask import request, jsonify, url_for
 from flask_cors import cross_origin
 import json
 from lib.db import db
-from lib.utils import _get_pagination_metadata, _format_datetime
+from lib.etag import conditional_get
+from lib.utils import _get_pagination_metadata, _get_cursor_pagination_metadata, _get_keyset_clause, _keyset_variants, _wants_total, _check_student, _format_datetime
+from routes.words import _word_stats_join, _word_list_variants
+
+db.statements.register('groups.list', '''
+  SELECT id, name, word_count FROM groups
+  {seek}
+  ORDER BY {order_by}
+  {limit};
+''', _keyset_variants('name', 'id') + _keyset_variants('word_count', 'id'))
+
+db.statements.register('groups.by_id', '''
+  SELECT id, name, word_count AS total_word_count
+  FROM groups
+  WHERE id = ?;
+''')
+db.statements.register('groups.name', "SELECT id, name FROM groups WHERE id = ?")
+db.statements.register('groups.word_count', "SELECT word_count FROM groups WHERE id = ?;")
+
+# Review counts come from the trigger-maintained word_stats table
+# (student_word_stats for one student)
+db.statements.register('groups.words', '''
+  SELECT w.id, w.french_word, w.quebec_pronunciation, w.english,
+         {correct_count} AS correct_count,
+         {wrong_count} AS wrong_count
+  FROM words_groups wg
+  JOIN words w ON w.id = wg.word_id
+  {stats_join}
+  WHERE wg.group_id = ? {seek}
+  ORDER BY {order_by}
+  {limit};
+''', _word_list_variants(prefix='AND'))
+
+# Review counts are looked up per returned session (index on
+# word_review_items.study_session_id) rather than aggregated via GROUP BY,
+# so only one page of sessions is ever touched.
+db.statements.register('groups.study_sessions', """
+    SELECT ss.id, sa.name AS activity_name, g.name AS group_name,
+           ss.created_at AS start_time, ss.end_time,
+           ss.compacted_reviews + (SELECT COUNT(*) FROM word_review_items wri
+            WHERE wri.study_session_id = ss.id) AS number_of_review_items
+    FROM study_sessions ss
+    JOIN study_activities sa ON ss.study_activity_id = sa.id
+    JOIN groups g ON ss.group_id = g.id
+    WHERE ss.group_id = ? {seek}
+    ORDER BY {order_by}
+    {limit};
+""", _keyset_variants('ss.created_at', 'ss.id', prefix='AND', orders=('DESC',)))
 
 def load(app):
   """
@@ -13,12 +60,12 @@ def load(app):
 
   @app.route('/api/groups', methods=['GET'])
   @cross_origin()
+  @conditional_get()
   def get_groups():
     """
     Retrieves a paginated and sortable list of all word groups.
     Includes the cached word count for each group.
     """
-    cursor = db.cursor()
 
     # Get pagination parameters
     page = int(request.args.get('page', 1))
@@ -36,46 +83,59 @@ def load(app):
     if order not in ['ASC', 'DESC']:
       return jsonify({"error": "Invalid order. Must be 'asc' or 'desc'"}), 400
 
-    # Query to fetch groups with sorting and the cached word count
-    query = f'''
-      SELECT id, name, word_count FROM groups
-      ORDER BY {sort_by} {order}
-      LIMIT ? OFFSET ?;
-    '''
-    groups = cursor.execute(query, (per_page, offset)).fetchall()
+    # Opt-in keyset mode: ?cursor= (empty for the first page) seeks past the
+    # previous page through the sort index instead of skipping OFFSET rows
+    cursor_token = request.args.get('cursor')
+    try:
+      keyset, seek_params, backwards = _get_keyset_clause(
+          cursor_token, sort_by, sort_by, 'id', order)
+    except ValueError as e:
+      return jsonify({"error": f"Invalid cursor: {e}"}), 400
+    if cursor_token is None:
+      limit_params = [per_page, offset]
+    else:
+      limit_params = [per_page + 1] # One extra row tells if there is more
 
-    # Query the total number of groups for pagination metadata
-    total_groups = cursor.execute('SELECT COUNT(*) FROM groups;').fetchone()[0]
-    
-    # Generate pagination metadata
-    pagination = _get_pagination_metadata(
-        endpoint_name='get_groups', 
-        total_items=total_groups, 
-        current_page=page, 
-        per_page=per_page,
-        sort_by=sort_by, 
-        order=order
-    )
+    # Fetch groups with sorting and the cached word count
+    groups = db.query('groups.list', seek_params + limit_params, **keyset).fetchall()
 
-    # Format the response
-    result = [dict(group) for group in groups]
+    if cursor_token is None:
+      # Generate pagination metadata (the total comes from the trigger-maintained counter)
+      pagination = _get_pagination_metadata(
+          endpoint_name='get_groups', 
+          total_items=None, 
+          counter='groups',
+          current_page=page, 
+          per_page=per_page,
+          sort_by=sort_by, 
+          order=order
+      )
+    else:
+      total_groups = db.count('groups') if _wants_total(request.args) else None
+      groups, pagination = _get_cursor_pagination_metadata(
+          endpoint_name='get_groups',
+          rows=groups,
+          per_page=per_page,
+          cursor_token=cursor_token,
+          backwards=backwards,
+          cursor_field=sort_by,
+          sort_key=sort_by,
+          sort_by=sort_by,
+          total_items=total_groups,
+          order=order
+      )
 
-    return jsonify({"groups": result, "pagination": pagination})
+    return jsonify({"groups": groups, "pagination": pagination})
 
   @app.route('/api/groups/<int:group_id>', methods=['GET'])
   @cross_origin()
+  @conditional_get()
   def get_group_by_id(group_id):
     """
     Retrieves details for a specific group by its ID.
     """
-    cursor = db.cursor()
-
     # Get group details
-    group = cursor.execute('''
-      SELECT id, name, word_count AS total_word_count
-      FROM groups
-      WHERE id = ?;
-    ''', (group_id,)).fetchone()
+    group = db.query('groups.by_id', (group_id,)).fetchone()
     
     if not group:
       return jsonify({"error": "Group not found"}), 404
@@ -83,16 +143,21 @@ def load(app):
     return jsonify(dict(group))
 
   @app.route('/api/groups/<int:group_id>/words', methods=['GET'])
+  @app.route('/api/students/<int:student_id>/groups/<int:group_id>/words', methods=['GET'])
   @cross_origin()
-  def get_words_from_group(group_id):
+  @conditional_get()
+  def get_words_from_group(group_id, student_id=None):
     """
     Retrieves a paginated and sortable list of words belonging to a specific group.
-    Includes review counts for each word.
+    Includes review counts for each word (one student's counts under
+    /api/students/<id>/).
     """
-    cursor = db.cursor()
+    not_found = _check_student(student_id)
+    if not_found:
+      return not_found
     
     # First, check if the group exists
-    group = cursor.execute("SELECT id, name FROM groups WHERE id = ?", (group_id,)).fetchone()
+    group = db.query('groups.name', (group_id,)).fetchone()
     if not group:
       return jsonify({"error": "Group not found"}), 404
 
@@ -112,60 +177,72 @@ def load(app):
     if order not in ['ASC', 'DESC']:
       return jsonify({"error": "Invalid order. Must be 'asc' or 'desc'"}), 400
 
-    # Query to fetch words from the group with pagination and sorting
-    query = f'''
-      SELECT w.id, w.french_word, w.quebec_pronunciation, w.english,
-             SUM(CASE WHEN wri.correct = 1 THEN 1 ELSE 0 END) AS correct_count,
-             SUM(CASE WHEN wri.correct = 0 THEN 1 ELSE 0 END) AS wrong_count
-      FROM words w
-      JOIN words_groups wg ON w.id = wg.word_id
-      LEFT JOIN word_review_items wri ON w.id = wri.word_id
-      WHERE wg.group_id = ?
-      GROUP BY w.id, w.french_word, w.quebec_pronunciation, w.english
-      ORDER BY {sort_by} {order}
-      LIMIT ? OFFSET ?;
-    '''
-    words = cursor.execute(query, (group_id, per_page, offset)).fetchall()
+    # Opt-in keyset mode (see get_groups)
+    cursor_token = request.args.get('cursor')
+    stats, stats_params, sort_columns = _word_stats_join(student_id)
+    sort_column, id_column = sort_columns[sort_by]
+    try:
+      keyset, seek_params, backwards = _get_keyset_clause(
+          cursor_token, sort_by, sort_column, id_column, order, prefix='AND')
+    except ValueError as e:
+      return jsonify({"error": f"Invalid cursor: {e}"}), 400
+    if cursor_token is None:
+      limit_params = [per_page, offset]
+    else:
+      limit_params = [per_page + 1]
+
+    # Fetch words from the group with pagination and sorting
+    words = db.query(
+      'groups.words', stats_params + [group_id] + seek_params + limit_params, **stats, **keyset
+    ).fetchall()
 
     # Get total words count for pagination from the cached count in the groups table
-    total_words_in_group = cursor.execute("SELECT word_count FROM groups WHERE id = ?;", (group_id,)).fetchone()[0]
+    total_words_in_group = db.query('groups.word_count', (group_id,)).fetchone()[0]
     
-    # Generate pagination metadata
-    pagination = _get_pagination_metadata(
-        endpoint_name='get_words_from_group', 
-        total_items=total_words_in_group, 
-        current_page=page, 
-        per_page=per_page,
-        group_id=group_id, # Pass group_id for correct URL generation
-        sort_by=sort_by, 
-        order=order
-    )
-
-    # Format the response
-    result = []
-    for word in words:
-      word_dict = dict(word)
-      word_dict['correct_count'] = int(word_dict['correct_count'] or 0)
-      word_dict['wrong_count'] = int(word_dict['wrong_count'] or 0)
-      result.append(word_dict)
+    if cursor_token is None:
+      # Generate pagination metadata
+      pagination = _get_pagination_metadata(
+          endpoint_name='get_words_from_group', 
+          total_items=total_words_in_group, 
+          current_page=page, 
+          per_page=per_page,
+          group_id=group_id, # Pass group_id for correct URL generation
+          student_id=student_id,
+          sort_by=sort_by, 
+          order=order
+      )
+    else:
+      words, pagination = _get_cursor_pagination_metadata(
+          endpoint_name='get_words_from_group',
+          rows=words,
+          per_page=per_page,
+          cursor_token=cursor_token,
+          backwards=backwards,
+          cursor_field=sort_by,
+          sort_key=sort_by,
+          sort_by=sort_by,
+          total_items=total_words_in_group if _wants_total(request.args) else None,
+          group_id=group_id,
+          student_id=student_id,
+          order=order
+      )
 
     return jsonify({
       "group_id": group_id, 
       "group_name": group['name'], # Include group name for context
-      "words": result, 
+      "words": words, 
       "pagination": pagination
     })
 
   @app.route('/api/groups/<int:group_id>/study_sessions', methods=['GET'])
   @cross_origin()
+  @conditional_get()
   def get_study_sessions_for_group(group_id):
     """
     Retrieves a paginated list of study sessions associated with a specific group.
     """
-    cursor = db.cursor()
-    
     # First, check if the group exists
-    group = cursor.execute("SELECT id, name FROM groups WHERE id = ?", (group_id,)).fetchone()
+    group = db.query('groups.name', (group_id,)).fetchone()
     if not group:
       return jsonify({"error": "Group not found"}), 404
 
@@ -174,36 +251,45 @@ def load(app):
     per_page = app.config['PER_PAGE']
     offset = (page - 1) * per_page
 
-    # Get total count of sessions for this group
-    total_sessions_query = "SELECT COUNT(*) FROM study_sessions WHERE group_id = ?;"
-    total_sessions = cursor.execute(total_sessions_query, (group_id,)).fetchone()[0]
-
-    # Query to fetch paginated study sessions for the specific group
-    query = """
-        SELECT ss.id, sa.name AS activity_name, g.name AS group_name,
-               ss.created_at AS start_time, ss.end_time,
-               COUNT(wri.id) AS number_of_review_items
-        FROM study_sessions ss 
-        JOIN study_activities sa ON ss.study_activity_id = sa.id
-        JOIN groups g ON ss.group_id = g.id 
-        LEFT JOIN word_review_items wri ON ss.id = wri.study_session_id
-        WHERE ss.group_id = ? 
-        GROUP BY ss.id, sa.name, g.name, ss.created_at, ss.end_time
-        ORDER BY ss.created_at DESC 
-        LIMIT ? OFFSET ?;
-    """
-    study_sessions = cursor.execute(query, (group_id, per_page, offset)).fetchall()
+    # Opt-in keyset mode, seeking on (created_at, id) through the
+    # (group_id, created_at) index
+    cursor_token = request.args.get('cursor')
+    try:
+      keyset, seek_params, backwards = _get_keyset_clause(
+          cursor_token, 'start_time', 'ss.created_at', 'ss.id', 'DESC', prefix='AND')
+    except ValueError as e:
+      return jsonify({"error": f"Invalid cursor: {e}"}), 400
+    if cursor_token is None:
+      limit_params = [per_page, offset]
+    else:
+      limit_params = [per_page + 1]
+
+    # Fetch one page of the group's study sessions
+    study_sessions = db.query('groups.study_sessions', [group_id] + seek_params + limit_params, **keyset).fetchall()
     
-    # Generate pagination metadata
-    pagination = _get_pagination_metadata(
-        endpoint_name='get_study_sessions_for_group', 
-        total_items=total_sessions, 
-        current_page=page, 
-        per_page=per_page,
-        group_id=group_id, # Pass group_id for correct URL generation
-        sort_by=sort_by, 
-        order=order
-    )
+    if cursor_token is None:
+      # Generate pagination metadata (sessions of this group are counted by triggers)
+      pagination = _get_pagination_metadata(
+          endpoint_name='get_study_sessions_for_group', 
+          total_items=None, 
+          counter=('group_study_sessions', group_id),
+          current_page=page, 
+          per_page=per_page,
+          group_id=group_id # Pass group_id for correct URL generation
+      )
+    else:
+      total_sessions = db.count('group_study_sessions', group_id) if _wants_total(request.args) else None
+      study_sessions, pagination = _get_cursor_pagination_metadata(
+          endpoint_name='get_study_sessions_for_group',
+          rows=study_sessions,
+          per_page=per_page,
+          cursor_token=cursor_token,
+          backwards=backwards,
+          cursor_field='start_time',
+          sort_key='start_time',
+          total_items=total_sessions,
+          group_id=group_id
+      )
 
     # Format the response
     result = []
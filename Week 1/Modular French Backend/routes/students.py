@@ -0,0 +1,121 @@
+
+# backend/routes/students.py
+from flask import request, jsonify
+from flask_cors import cross_origin
+import sqlite3
+from lib.db import db
+from lib.etag import conditional_get
+from lib.utils import _get_pagination_metadata, _get_cursor_pagination_metadata, _get_keyset_clause, _keyset_variants, _wants_total, _format_datetime
+
+db.statements.register('students.list', '''
+  SELECT id, name, created_at FROM students
+  {seek}
+  ORDER BY {order_by}
+  {limit};
+''', _keyset_variants('id', 'id', orders=('ASC',)))
+db.statements.register('students.by_id', "SELECT id, name, created_at FROM students WHERE id = ?")
+db.statements.register('students.insert', "INSERT INTO students (name) VALUES (?)")
+
+def load(app):
+  """
+  Registers student-related API routes with the Flask application.
+  Per-student dashboards and word statistics live next to their global
+  versions (routes/dashboard.py, routes/words.py, routes/groups.py).
+  """
+
+  @app.route('/api/students', methods=['GET'])
+  @cross_origin()
+  @conditional_get()
+  def get_students():
+    """
+    Retrieves a paginated list of students, ordered by id.
+    """
+    page = int(request.args.get('page', 1))
+    per_page = app.config['PER_PAGE']
+    offset = (page - 1) * per_page
+
+    # Opt-in keyset mode: ?cursor= (empty for the first page) seeks past the
+    # previous page by id instead of skipping OFFSET rows
+    cursor_token = request.args.get('cursor')
+    try:
+      keyset, seek_params, backwards = _get_keyset_clause(
+          cursor_token, 'id', 'id', 'id', 'ASC')
+    except ValueError as e:
+      return jsonify({"error": f"Invalid cursor: {e}"}), 400
+    if cursor_token is None:
+      limit_params = [per_page, offset]
+    else:
+      limit_params = [per_page + 1] # One extra row tells if there is more
+
+    students = db.query('students.list', seek_params + limit_params, **keyset).fetchall()
+
+    if cursor_token is None:
+      # The total comes from the trigger-maintained counter
+      pagination = _get_pagination_metadata(
+          endpoint_name='get_students',
+          total_items=None,
+          counter='students',
+          current_page=page,
+          per_page=per_page
+      )
+    else:
+      total_students = db.count('students') if _wants_total(request.args) else None
+      students, pagination = _get_cursor_pagination_metadata(
+          endpoint_name='get_students',
+          rows=students,
+          per_page=per_page,
+          cursor_token=cursor_token,
+          backwards=backwards,
+          cursor_field='id',
+          sort_key='id',
+          total_items=total_students
+      )
+
+    result = []
+    for student in students:
+      student_dict = dict(student)
+      student_dict['created_at'] = _format_datetime(student_dict['created_at'])
+      result.append(student_dict)
+
+    return jsonify({"students": result, "pagination": pagination})
+
+  @app.route('/api/students/<int:student_id>', methods=['GET'])
+  @cross_origin()
+  @conditional_get()
+  def get_student_by_id(student_id):
+    """
+    Retrieves a student by ID.
+    """
+    student = db.query('students.by_id', (student_id,)).fetchone()
+    if not student:
+      return jsonify({"error": "Student not found"}), 404
+
+    student_dict = dict(student)
+    student_dict['created_at'] = _format_datetime(student_dict['created_at'])
+    return jsonify(student_dict)
+
+  @app.route('/api/students', methods=['POST'])
+  @cross_origin()
+  def create_student():
+    """
+    Creates a student. Expects {"name": str}; names are unique.
+    """
+    data = request.get_json(silent=True) or {}
+    name = data.get('name')
+    if not isinstance(name, str) or not name.strip():
+      return jsonify({"error": "name is required"}), 400
+
+    try:
+      with db.transaction() as cursor:
+        db.statements.execute(cursor, 'students.insert', (name.strip(),))
+        student_id = cursor.lastrowid
+    except sqlite3.IntegrityError:
+      return jsonify({"error": "A student with this name already exists"}), 409
+    except sqlite3.Error as e:
+      return jsonify({"error": f"Database error: {str(e)}"}), 500
+
+    return jsonify({
+      "message": "Student created successfully.",
+      "id": student_id,
+      "name": name.strip()
+    }), 201
@@ -3,8 +3,42 @@
 from flask import jsonify, request, url_for
 from flask_cors import cross_origin
 import math
+import sqlite3
 from lib.db import db
-from lib.utils import _get_pagination_metadata, _format_datetime
+from lib.etag import conditional_get
+from lib.utils import _get_pagination_metadata, _get_cursor_pagination_metadata, _get_keyset_clause, _keyset_variants, _wants_total, _format_datetime
+
+db.statements.register('study_activities.list', """
+    SELECT id, name, thumbnail_url, description, launch_url FROM study_activities
+    {seek}
+    ORDER BY {order_by}
+    {limit};
+""", _keyset_variants('id', 'id', orders=('ASC',)))
+db.statements.register(
+    'study_activities.by_id',
+    "SELECT id, name, thumbnail_url, description, launch_url FROM study_activities WHERE id = ?;"
+)
+db.statements.register('study_activities.name', "SELECT id, name FROM study_activities WHERE id = ?")
+db.statements.register('study_activities.launch_url', "SELECT launch_url FROM study_activities WHERE id = ?")
+
+# Review counts are looked up per returned session instead of aggregating
+# every session of the activity with GROUP BY.
+db.statements.register('study_activities.study_sessions', """
+    SELECT ss.id, g.name AS group_name, ss.created_at AS start_time, ss.end_time,
+           ss.compacted_reviews + (SELECT COUNT(*) FROM word_review_items wri
+            WHERE wri.study_session_id = ss.id) AS number_of_review_items
+    FROM study_sessions ss
+    JOIN groups g ON ss.group_id = g.id
+    WHERE ss.study_activity_id = ? {seek}
+    ORDER BY {order_by}
+    {limit};
+""", _keyset_variants('ss.created_at', 'ss.id', prefix='AND', orders=('DESC',)))
+
+db.statements.register('groups.exists', "SELECT 1 FROM groups WHERE id = ?")
+db.statements.register(
+    'study_sessions.insert',
+    "INSERT INTO study_sessions (group_id, study_activity_id, student_id) VALUES (?, ?, ?)"
+)
 
 def load(app):
     """
@@ -13,46 +47,64 @@ def load(app):
 
     @app.route('/api/study_activities', methods=['GET'])
     @cross_origin()
+    @conditional_get()
     def get_study_activities():
         """
         Retrieves a paginated list of all available study activities.
         """
-        cursor = db.cursor()
-        
         # Get pagination parameters from query string
         page = request.args.get('page', 1, type=int)
         per_page = app.config['PER_PAGE'] # Use global PER_PAGE from app config
         offset = (page - 1) * per_page
 
-        # Query to fetch study activities with pagination
-        query = "SELECT id, name, thumbnail_url, description, launch_url FROM study_activities LIMIT ? OFFSET ?;"
-        activities = cursor.execute(query, (per_page, offset)).fetchall()
-        
-        # Get total count of study activities for pagination metadata
-        total_activities = cursor.execute("SELECT COUNT(*) FROM study_activities;").fetchone()[0]
-        
-        # Generate pagination metadata
-        pagination = _get_pagination_metadata(
-            endpoint_name='get_study_activities', 
-            total_items=total_activities, 
-            current_page=page, 
-            per_page=per_page
-        )
+        # Opt-in keyset mode: ?cursor= (empty for the first page) seeks past
+        # the previous page by id instead of skipping OFFSET rows
+        cursor_token = request.args.get('cursor')
+        try:
+            keyset, seek_params, backwards = _get_keyset_clause(
+                cursor_token, 'id', 'id', 'id', 'ASC')
+        except ValueError as e:
+            return jsonify({"error": f"Invalid cursor: {e}"}), 400
+        if cursor_token is None:
+            limit_params = [per_page, offset]
+        else:
+            limit_params = [per_page + 1] # One extra row tells if there is more
+
+        # Fetch study activities with pagination
+        activities = db.query('study_activities.list', seek_params + limit_params, **keyset).fetchall()
         
-        # Format results
-        result = [dict(activity) for activity in activities]
+        if cursor_token is None:
+            # Generate pagination metadata (the total comes from the trigger-maintained counter)
+            pagination = _get_pagination_metadata(
+                endpoint_name='get_study_activities', 
+                total_items=None, 
+                counter='study_activities',
+                current_page=page, 
+                per_page=per_page
+            )
+        else:
+            total_activities = db.count('study_activities') if _wants_total(request.args) else None
+            activities, pagination = _get_cursor_pagination_metadata(
+                endpoint_name='get_study_activities',
+                rows=activities,
+                per_page=per_page,
+                cursor_token=cursor_token,
+                backwards=backwards,
+                cursor_field='id',
+                sort_key='id',
+                total_items=total_activities
+            )
         
-        return jsonify({"study_activities": result, "pagination": pagination})
+        return jsonify({"study_activities": activities, "pagination": pagination})
 
     @app.route('/api/study_activities/<int:activity_id>', methods=['GET'])
     @cross_origin()
+    @conditional_get()
     def get_study_activity_by_id(activity_id):
         """
         Retrieves details for a specific study activity by its ID.
         """
-        cursor = db.cursor()
-        query = "SELECT id, name, thumbnail_url, description, launch_url FROM study_activities WHERE id = ?;"
-        activity = cursor.execute(query, (activity_id,)).fetchone()
+        activity = db.query('study_activities.by_id', (activity_id,)).fetchone()
         
         if not activity:
             return jsonify({"error": "Study activity not found"}), 404
@@ -61,15 +113,14 @@ def load(app):
 
     @app.route('/api/study_activities/<int:activity_id>/study_sessions', methods=['GET'])
     @cross_origin()
+    @conditional_get()
     def get_study_sessions_for_activity(activity_id):
         """
         Retrieves a paginated list of study sessions associated with a specific activity.
         """
-        cursor = db.cursor()
-        
-        # First, verify if the activity exists
-        cursor.execute('SELECT id FROM study_activities WHERE id = ?', (activity_id,))
-        if not cursor.fetchone():
+        # First, verify if the activity exists and get its name
+        activity = db.query('study_activities.name', (activity_id,)).fetchone()
+        if not activity:
             return jsonify({'error': 'Study activity not found'}), 404
 
         # Get pagination parameters
@@ -77,32 +128,47 @@ def load(app):
         per_page = app.config['PER_PAGE']
         offset = (page - 1) * per_page
 
-        # Get total count of sessions for this activity for pagination
-        total_sessions_query = "SELECT COUNT(*) FROM study_sessions WHERE study_activity_id = ?;"
-        total_sessions = cursor.execute(total_sessions_query, (activity_id,)).fetchone()[0]
+        # Opt-in keyset mode, seeking on (created_at, id) through the
+        # (study_activity_id, created_at) index
+        cursor_token = request.args.get('cursor')
+        try:
+            keyset, seek_params, backwards = _get_keyset_clause(
+                cursor_token, 'start_time', 'ss.created_at', 'ss.id', 'DESC', prefix='AND')
+        except ValueError as e:
+            return jsonify({"error": f"Invalid cursor: {e}"}), 400
+        if cursor_token is None:
+            limit_params = [per_page, offset]
+        else:
+            limit_params = [per_page + 1]
 
-        # Query to fetch paginated study sessions for the specific activity
-        query = """
-            SELECT ss.id, g.name AS group_name, ss.created_at AS start_time, ss.end_time,
-                   COUNT(wri.id) AS number_of_review_items
-            FROM study_sessions ss 
-            JOIN groups g ON ss.group_id = g.id
-            LEFT JOIN word_review_items wri ON ss.id = wri.study_session_id
-            WHERE ss.study_activity_id = ? 
-            GROUP BY ss.id, g.name, ss.created_at, ss.end_time
-            ORDER BY ss.created_at DESC 
-            LIMIT ? OFFSET ?;
-        """
-        study_sessions = cursor.execute(query, (activity_id, per_page, offset)).fetchall()
+        # Fetch one page of the activity's study sessions
+        study_sessions = db.query(
+            'study_activities.study_sessions', [activity_id] + seek_params + limit_params, **keyset
+        ).fetchall()
         
-        # Generate pagination metadata
-        pagination = _get_pagination_metadata(
-            endpoint_name='get_study_sessions_for_activity', 
-            total_items=total_sessions, 
-            current_page=page, 
-            per_page=per_page,
-            activity_id=activity_id # Pass activity_id for correct URL generation
-        )
+        if cursor_token is None:
+            # Generate pagination metadata (sessions of this activity are counted by triggers)
+            pagination = _get_pagination_metadata(
+                endpoint_name='get_study_sessions_for_activity', 
+                total_items=None, 
+                counter=('activity_study_sessions', activity_id),
+                current_page=page, 
+                per_page=per_page,
+                activity_id=activity_id # Pass activity_id for correct URL generation
+            )
+        else:
+            total_sessions = db.count('activity_study_sessions', activity_id) if _wants_total(request.args) else None
+            study_sessions, pagination = _get_cursor_pagination_metadata(
+                endpoint_name='get_study_sessions_for_activity',
+                rows=study_sessions,
+                per_page=per_page,
+                cursor_token=cursor_token,
+                backwards=backwards,
+                cursor_field='start_time',
+                sort_key='start_time',
+                total_items=total_sessions,
+                activity_id=activity_id
+            )
         
         result = []
         for session in study_sessions:
@@ -124,32 +190,40 @@ def load(app):
     @cross_origin()
     def create_study_activity_session():
         """
-        Creates a new study session for a given group and study activity.
-        Returns the session ID and a launch URL for the activity.
+        Creates a new study session for a given group and study activity,
+        optionally for a student (student_id). Returns the session ID and a
+        launch URL for the activity.
         """
         cursor = db.cursor()
         data = request.get_json()
         
         group_id = data.get('group_id')
         study_activity_id = data.get('study_activity_id')
+        student_id = data.get('student_id')
         
         # Validate required fields
         if not group_id or not study_activity_id:
             return jsonify({"error": "group_id and study_activity_id are required"}), 400
+        if student_id is not None and (not isinstance(student_id, int) or isinstance(student_id, bool)):
+            return jsonify({"error": "student_id must be an integer"}), 400
         
         # Verify if group and activity exist
-        group = cursor.execute("SELECT 1 FROM groups WHERE id = ?", (group_id,)).fetchone()
+        group = db.statements.execute(cursor, 'groups.exists', (group_id,)).fetchone()
         if not group: 
             return jsonify({"error": "Group not found"}), 404
         
-        activity = cursor.execute("SELECT launch_url FROM study_activities WHERE id = ?", (study_activity_id,)).fetchone()
+        activity = db.statements.execute(cursor, 'study_activities.launch_url', (study_activity_id,)).fetchone()
         if not activity: 
             return jsonify({"error": "Study activity not found"}), 404
+
+        if student_id is not None:
+            student = db.statements.execute(cursor, 'students.exists', (student_id,)).fetchone()
+            if not student:
+                return jsonify({"error": "Student not found"}), 404
         
         try:
             # Insert a new study session record
-            cursor.execute("INSERT INTO study_sessions (group_id, study_activity_id) VALUES (?, ?)", 
-                           (group_id, study_activity_id))
+            db.statements.execute(cursor, 'study_sessions.insert', (group_id, study_activity_id, student_id))
             db.commit() # Commit the transaction
             
             session_id = cursor.lastrowid # Get the ID of the newly created session
@@ -3,54 +3,173 @@
 from flask import request, jsonify, url_for
 from flask_cors import cross_origin
 from datetime import datetime, timedelta, timezone
+import json
 import math
+import sqlite3
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from lib.db import db
-from lib.utils import _get_pagination_metadata, _format_datetime
+from lib.etag import conditional_get
+from lib.review_writer import ReviewQueueFull, ReviewWriterStopped
+from lib.utils import _get_pagination_metadata, _get_cursor_pagination_metadata, _get_keyset_clause, _keyset_variants, _wants_total, _format_datetime, _db_timestamp, _parse_client_timestamp
+
+# Review counts are looked up per returned session (index on
+# word_review_items.study_session_id) instead of a GROUP BY over all sessions.
+db.statements.register('study_sessions.list', """
+    SELECT ss.id, sa.name AS activity_name, g.name AS group_name,
+           ss.created_at AS start_time, ss.end_time,
+           ss.compacted_reviews + (SELECT COUNT(*) FROM word_review_items wri
+            WHERE wri.study_session_id = ss.id) AS number_of_review_items
+    FROM study_sessions ss
+    JOIN study_activities sa ON ss.study_activity_id = sa.id
+    JOIN groups g ON ss.group_id = g.id
+    {seek}
+    ORDER BY {order_by}
+    {limit};
+""", _keyset_variants('ss.created_at', 'ss.id', orders=('DESC',)))
+
+db.statements.register('study_sessions.by_id', """
+    SELECT ss.id, sa.name AS activity_name, g.name AS group_name,
+           ss.created_at AS start_time, ss.end_time,
+           ss.compacted_reviews + COUNT(wri.id) AS number_of_review_items
+    FROM study_sessions ss
+    JOIN study_activities sa ON ss.study_activity_id = sa.id
+    JOIN groups g ON ss.group_id = g.id
+    LEFT JOIN word_review_items wri ON ss.id = wri.study_session_id
+    WHERE ss.id = ?
+    GROUP BY ss.id, sa.name, g.name, ss.created_at, ss.end_time, ss.compacted_reviews;
+""")
+db.statements.register(
+    'study_sessions.group_name',
+    "SELECT ss.id, g.name AS group_name FROM study_sessions ss JOIN groups g ON ss.group_id = g.id WHERE ss.id = ?"
+)
+db.statements.register('study_sessions.review_items', """
+    SELECT w.id AS word_id, w.french_word, w.quebec_pronunciation, w.english,
+           wri.correct, wri.created_at
+    FROM word_review_items wri
+    JOIN words w ON wri.word_id = w.id
+    WHERE wri.study_session_id = ?
+    ORDER BY wri.created_at ASC;
+""")
+db.statements.register('study_sessions.group_id', "SELECT group_id FROM study_sessions WHERE id = ?")
+db.statements.register('study_sessions.exists', "SELECT 1 FROM study_sessions WHERE id = ?")
+
+# Both variants walk the group's range of idx_words_groups_group_id_next_due_word_id
+# (words_groups.next_due mirrors word_schedule, migration 013) in queue
+# order and stop after n rows, so the cost doesn't grow with the vocabulary
+db.statements.register('study_sessions.next_words', """
+    SELECT w.id, w.french_word, w.quebec_pronunciation, w.english,
+           s.ease, s.interval_days, s.repetitions, s.next_due, s.last_reviewed_at
+    FROM words_groups wg
+    JOIN word_schedule s ON s.word_id = wg.word_id
+    JOIN words w ON w.id = wg.word_id
+    WHERE wg.group_id = ? AND {condition}
+    ORDER BY wg.next_due, wg.word_id
+    LIMIT ?;
+""", [{'condition': "wg.next_due IS NOT NULL AND wg.next_due <= ?"}, {'condition': "wg.next_due IS NULL"}])
+
+db.statements.register('words.exists', "SELECT 1 FROM words WHERE id = ?")
+db.statements.register('words.existing_ids', "SELECT id FROM words WHERE id IN (SELECT value FROM json_each(?))")
+db.statements.register('reset.word_review_items', "DELETE FROM word_review_items;")
+db.statements.register('reset.review_rollups', "DELETE FROM review_rollups;")
+db.statements.register('reset.word_schedule_base', "DELETE FROM word_schedule_base;")
+# Nothing rewinds word_schedule when reviews are deleted, so a reset puts
+# every word back to its new-word state (migration 010 defaults)
+db.statements.register('reset.word_schedule', """
+    UPDATE word_schedule
+    SET ease = 2.5, interval_days = 0, repetitions = 0, next_due = NULL, last_reviewed_at = NULL
+    WHERE next_due IS NOT NULL OR last_reviewed_at IS NOT NULL;
+""")
+db.statements.register('reset.study_sessions', "DELETE FROM study_sessions;")
 
 def load(app):
   """
   Registers study session-related API routes with the Flask application.
   """
 
+  def _record_reviews(session_id, reviews, end_time):
+    """
+    Writes (word_id, correct, created_at) reviews for a session and returns
+    their ids once committed. Goes through the write-behind queue when
+    REVIEW_WRITE_BEHIND is enabled, otherwise writes in its own transaction.
+    Raises ReviewQueueFull or a futures TimeoutError under overload and
+    ReviewWriterStopped during shutdown; in each case nothing was or will
+    be written, so the client can retry. The exception is a batch that is
+    still being written after REVIEW_WRITE_TIMEOUT more seconds: that also
+    raises TimeoutError rather than hold the request thread, and may yet
+    commit.
+    """
+    review_writer = app.extensions.get('review_writer')
+    if review_writer is None:
+      with db.transaction() as cursor:
+        return db.insert_reviews(cursor, session_id, reviews, end_time)
+    future = review_writer.submit(session_id, reviews, end_time)
+    try:
+      return future.result(timeout=app.config.get('REVIEW_ACK_TIMEOUT', 5.0))
+    except FutureTimeoutError:
+      if future.cancel():
+        raise # Still queued: the writer will skip it
+      # Its batch is already being written; wait for the outcome so a
+      # retry can't write the reviews twice, unless the batch is stuck
+      return future.result(timeout=app.config.get('REVIEW_WRITE_TIMEOUT', 30.0))
+
+  def _overloaded_response():
+    """
+    503 response telling clients to retry when reviews can't be acknowledged.
+    """
+    response = jsonify({"error": "Review logging is busy, please retry shortly."})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
   @app.route('/api/study_sessions', methods=['GET'])
   @cross_origin()
+  @conditional_get()
   def get_all_study_sessions():
     """
     Retrieves a paginated list of all study sessions.
     Includes associated activity and group names, and review item count.
     """
-    cursor = db.cursor()
-    
     # Get pagination parameters
     page = int(request.args.get('page', 1))
     per_page = app.config['PER_PAGE']
     offset = (page - 1) * per_page
 
-    # Get total count of all study sessions for pagination
-    total_sessions = cursor.execute("SELECT COUNT(*) FROM study_sessions;").fetchone()[0]
-
-    # Query to fetch paginated study sessions with joined data
-    query = """
-        SELECT ss.id, sa.name AS activity_name, g.name AS group_name,
-               ss.created_at AS start_time, ss.end_time,
-               COUNT(wri.id) AS number_of_review_items
-        FROM study_sessions ss 
-        JOIN study_activities sa ON ss.study_activity_id = sa.id
-        JOIN groups g ON ss.group_id = g.id 
-        LEFT JOIN word_review_items wri ON ss.id = wri.study_session_id
-        GROUP BY ss.id, sa.name, g.name, ss.created_at, ss.end_time
-        ORDER BY ss.created_at DESC 
-        LIMIT ? OFFSET ?;
-    """
-    study_sessions = cursor.execute(query, (per_page, offset)).fetchall()
+    # Opt-in keyset mode: ?cursor= (empty for the first page) seeks on
+    # (created_at, id) through the created_at index instead of skipping OFFSET rows
+    cursor_token = request.args.get('cursor')
+    try:
+        keyset, seek_params, backwards = _get_keyset_clause(
+            cursor_token, 'start_time', 'ss.created_at', 'ss.id', 'DESC')
+    except ValueError as e:
+        return jsonify({"error": f"Invalid cursor: {e}"}), 400
+    if cursor_token is None:
+        limit_params = [per_page, offset]
+    else:
+        limit_params = [per_page + 1] # One extra row tells if there is more
+
+    # Fetch paginated study sessions with joined data
+    study_sessions = db.query('study_sessions.list', seek_params + limit_params, **keyset).fetchall()
     
-    # Generate pagination metadata
-    pagination = _get_pagination_metadata(
-        endpoint_name='get_all_study_sessions', 
-        total_items=total_sessions, 
-        current_page=page, 
-        per_page=per_page
-    )
+    if cursor_token is None:
+        # Generate pagination metadata (the total comes from the trigger-maintained counter)
+        pagination = _get_pagination_metadata(
+            endpoint_name='get_all_study_sessions', 
+            total_items=None, 
+            counter='study_sessions',
+            current_page=page, 
+            per_page=per_page
+        )
+    else:
+        total_sessions = db.count('study_sessions') if _wants_total(request.args) else None
+        study_sessions, pagination = _get_cursor_pagination_metadata(
+            endpoint_name='get_all_study_sessions',
+            rows=study_sessions,
+            per_page=per_page,
+            cursor_token=cursor_token,
+            backwards=backwards,
+            cursor_field='start_time',
+            sort_key='start_time',
+            total_items=total_sessions
+        )
     
     result = []
     for session in study_sessions:
@@ -68,23 +187,12 @@ def load(app):
 
   @app.route('/api/study_sessions/<int:session_id>', methods=['GET'])
   @cross_origin()
+  @conditional_get()
   def get_study_session_by_id(session_id):
     """
     Retrieves detailed information for a single study session by its ID.
     """
-    cursor = db.cursor()
-    query = """
-        SELECT ss.id, sa.name AS activity_name, g.name AS group_name,
-               ss.created_at AS start_time, ss.end_time,
-               COUNT(wri.id) AS number_of_review_items
-        FROM study_sessions ss 
-        JOIN study_activities sa ON ss.study_activity_id = sa.id
-        JOIN groups g ON ss.group_id = g.id 
-        LEFT JOIN word_review_items wri ON ss.id = wri.study_session_id
-        WHERE ss.id = ? 
-        GROUP BY ss.id, sa.name, g.name, ss.created_at, ss.end_time;
-    """
-    session = cursor.execute(query, (session_id,)).fetchone()
+    session = db.query('study_sessions.by_id', (session_id,)).fetchone()
     
     if not session:
         return jsonify({"error": "Study session not found"}), 404
@@ -99,31 +207,19 @@ def load(app):
 
   @app.route('/api/study_sessions/<int:session_id>/words', methods=['GET'])
   @cross_origin()
+  @conditional_get()
   def get_words_from_study_session(session_id):
     """
     Retrieves all word review items for a specific study session.
     Includes word details and whether the review was correct.
     """
-    cursor = db.cursor()
-    
     # Verify if the study session exists and get its group name
-    session_info = cursor.execute(
-        "SELECT ss.id, g.name AS group_name FROM study_sessions ss JOIN groups g ON ss.group_id = g.id WHERE ss.id = ?",
-        (session_id,)
-    ).fetchone()
+    session_info = db.query('study_sessions.group_name', (session_id,)).fetchone()
     if not session_info:
         return jsonify({"error": "Study session not found"}), 404
     
-    # Query to fetch all word review items for the given session
-    query = """
-        SELECT w.id AS word_id, w.french_word, w.quebec_pronunciation, w.english,
-               wri.correct, wri.created_at
-        FROM word_review_items wri 
-        JOIN words w ON wri.word_id = w.id
-        WHERE wri.study_session_id = ? 
-        ORDER BY wri.created_at ASC;
-    """
-    review_items = cursor.execute(query, (session_id,)).fetchall()
+    # Fetch all word review items for the given session
+    review_items = db.query('study_sessions.review_items', (session_id,)).fetchall()
     
     result = []
     for item in review_items:
@@ -138,6 +234,54 @@ def load(app):
         "word_review_items": result
     })
 
+  @app.route('/api/study_sessions/<int:session_id>/next_words', methods=['GET'])
+  @cross_origin()
+  def get_next_words(session_id):
+    """
+    Returns the next words to study in a session's group (?n=, default 10):
+    words that are due for review, most overdue first, topped up with words
+    that were never reviewed. Not cached with an ETag, since what is due
+    changes with the clock.
+    """
+    try:
+        n = int(request.args.get('n', 10))
+    except ValueError:
+        return jsonify({"error": "n must be an integer"}), 400
+    max_words = app.config.get('MAX_NEXT_WORDS', 100)
+    if not 1 <= n <= max_words:
+        return jsonify({"error": f"n must be between 1 and {max_words}"}), 400
+
+    session = db.query('study_sessions.group_id', (session_id,)).fetchone()
+    if not session:
+        return jsonify({"error": "Study session not found"}), 404
+
+    # Words that are due first, then never-reviewed ones
+    now = _db_timestamp(datetime.now(timezone.utc))
+    due_words = db.query(
+        'study_sessions.next_words', (session['group_id'], now, n),
+        condition="wg.next_due IS NOT NULL AND wg.next_due <= ?"
+    ).fetchall()
+    new_words = []
+    if len(due_words) < n:
+        new_words = db.query(
+            'study_sessions.next_words', (session['group_id'], n - len(due_words)),
+            condition="wg.next_due IS NULL"
+        ).fetchall()
+
+    result = []
+    for word in list(due_words) + list(new_words):
+        word_dict = dict(word)
+        word_dict['is_new'] = word_dict['next_due'] is None
+        word_dict['next_due'] = _format_datetime(word_dict['next_due'])
+        word_dict['last_reviewed_at'] = _format_datetime(word_dict['last_reviewed_at'])
+        result.append(word_dict)
+
+    return jsonify({
+        "study_session_id": session_id,
+        "group_id": session['group_id'],
+        "words": result
+    })
+
   @app.route('/api/study_sessions/<int:session_id>/words/<int:word_id>/review', methods=['POST'])
   @cross_origin()
   def log_word_review_attempt(session_id, word_id):
@@ -157,27 +301,19 @@ def load(app):
         return jsonify({"error": "Correct status must be a boolean (true/false)"}), 400
     
     # Verify session and word existence
-    session_exists = cursor.execute("SELECT 1 FROM study_sessions WHERE id = ?", (session_id,)).fetchone()
+    session_exists = db.statements.execute(cursor, 'study_sessions.exists', (session_id,)).fetchone()
     if not session_exists: 
         return jsonify({"error": "Study session not found"}), 404
     
-    word_exists = cursor.execute("SELECT 1 FROM words WHERE id = ?", (word_id,)).fetchone()
+    word_exists = db.statements.execute(cursor, 'words.exists', (word_id,)).fetchone()
     if not word_exists: 
         return jsonify({"error": "Word not found"}), 404
     
     try:
-        current_time = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S.%f') # Include microseconds
-        
-        # Insert the review item
-        cursor.execute("INSERT INTO word_review_items (word_id, study_session_id, correct, created_at) VALUES (?, ?, ?, ?)",
-                       (word_id, session_id, 1 if correct else 0, current_time))
-        db.commit() # Commit the insertion
-        
-        review_id = cursor.lastrowid # Get the ID of the new review item
+        current_time = _db_timestamp(datetime.now(timezone.utc)) # Include microseconds
         
-        # Update the study session's end_time to the current time
-        cursor.execute("UPDATE study_sessions SET end_time = ? WHERE id = ?", (current_time, session_id))
-        db.commit() # Commit the session update
+        # Insert the review item and update the session's end_time in one transaction
+        review_id = _record_reviews(session_id, [(word_id, correct, current_time)], current_time)[0]
         
         return jsonify({
             "message": "Word review recorded successfully.", 
@@ -187,22 +323,99 @@ def load(app):
             "correct": correct,
             "created_at": _format_datetime(current_time)
         }), 201 # 201 Created status code
+    except (ReviewQueueFull, ReviewWriterStopped, FutureTimeoutError):
+        return _overloaded_response()
+    except sqlite3.Error as e:
+        return jsonify({"error": f"Database error: {str(e)}"}), 500
+
+  @app.route('/api/study_sessions/<int:session_id>/reviews', methods=['POST'])
+  @cross_origin()
+  def log_word_review_batch(session_id):
+    """
+    Logs a batch of review attempts for a study session in one transaction.
+    Expects a JSON array of {"word_id": int, "correct": bool, "client_ts": str}
+    objects (client_ts is an optional ISO 8601 time of the answer; the server
+    time is used when it is missing). Updates the session's end_time once.
+    """
+    cursor = db.cursor()
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('reviews') # Also accept {"reviews": [...]}
+    if not isinstance(data, list) or not data:
+        return jsonify({"error": "Request body must be a non-empty JSON array of reviews"}), 400
+    max_batch = app.config.get('MAX_REVIEW_BATCH', 500)
+    if len(data) > max_batch:
+        return jsonify({"error": f"Too many reviews in one batch (maximum is {max_batch})"}), 400
+
+    # Validate every item before touching the database
+    now = datetime.now(timezone.utc)
+    current_time = _db_timestamp(now)
+    reviews = []
+    for index, item in enumerate(data):
+        if not isinstance(item, dict):
+            return jsonify({"error": f"Review {index} must be an object"}), 400
+        word_id = item.get('word_id')
+        correct = item.get('correct')
+        if not isinstance(word_id, int) or isinstance(word_id, bool):
+            return jsonify({"error": f"Review {index}: word_id must be an integer"}), 400
+        if not isinstance(correct, bool):
+            return jsonify({"error": f"Review {index}: correct must be a boolean (true/false)"}), 400
+        try:
+            created_at = _parse_client_timestamp(item.get('client_ts'), now) if item.get('client_ts') else current_time
+        except ValueError:
+            return jsonify({"error": f"Review {index}: client_ts must be an ISO 8601 timestamp"}), 400
+        reviews.append((word_id, correct, created_at))
+
+    session_exists = db.statements.execute(cursor, 'study_sessions.exists', (session_id,)).fetchone()
+    if not session_exists:
+        return jsonify({"error": "Study session not found"}), 404
+
+    # Validate all word ids with a single query
+    requested_ids = sorted({review[0] for review in reviews})
+    found_ids = {row[0] for row in db.statements.execute(cursor, 'words.existing_ids', (json.dumps(requested_ids),))}
+    missing_ids = [word_id for word_id in requested_ids if word_id not in found_ids]
+    if missing_ids:
+        return jsonify({"error": "Word not found", "missing_word_ids": missing_ids}), 404
+
+    try:
+        review_ids = _record_reviews(session_id, reviews, current_time)
+    except (ReviewQueueFull, ReviewWriterStopped, FutureTimeoutError):
+        return _overloaded_response()
     except sqlite3.Error as e:
-        db.get().rollback() # Rollback transaction on error
         return jsonify({"error": f"Database error: {str(e)}"}), 500
 
+    return jsonify({
+        "message": f"{len(review_ids)} word reviews recorded successfully.",
+        "study_session_id": session_id,
+        "end_time": _format_datetime(current_time),
+        "review_items": [
+            {
+                "review_item_id": review_id,
+                "word_id": word_id,
+                "correct": correct,
+                "created_at": _format_datetime(created_at)
+            }
+            for review_id, (word_id, correct, created_at) in zip(review_ids, reviews)
+        ]
+    }), 201
+
   @app.route('/api/reset_history', methods=['POST'])
   @cross_origin()
   def reset_history():
     """
-    Resets all study history by deleting all word review items and study sessions.
+    Resets all study history by deleting all word review items and study sessions,
+    and makes every word new again in the spaced-repetition schedule.
     """
     cursor = db.cursor()
     try:
         # Delete review items first due to foreign key constraints
-        cursor.execute("DELETE FROM word_review_items;")
+        db.statements.execute(cursor, 'reset.word_review_items')
+        # Compacted history goes too (see Db.compact_reviews)
+        db.statements.execute(cursor, 'reset.review_rollups')
+        db.statements.execute(cursor, 'reset.word_schedule_base')
+        db.statements.execute(cursor, 'reset.word_schedule')
         # Then delete study sessions
-        cursor.execute("DELETE FROM study_sessions;")
+        db.statements.execute(cursor, 'reset.study_sessions')
         db.commit() # Commit the deletions
         return jsonify({"message": "Study history cleared successfully."}), 200
     except sqlite3.Error as e:
@@ -214,7 +427,7 @@ def load(app):
   def full_reset():
     """
     Performs a full system reset: deletes all data and reinitializes the database
-    with seed data.
+    with seed data (restored from the seed template, see Db.restore_seed_template).
     """
     try:
         db.init_db_and_seed_data(app) # Call the init_db_and_seed_data method from Db class
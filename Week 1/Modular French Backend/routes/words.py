@@ -3,8 +3,129 @@
 from flask import request, jsonify, url_for
 from flask_cors import cross_origin
 import json
+import re
+import sqlite3
 from lib.db import db
-from lib.utils import _get_pagination_metadata, _format_datetime # Import _format_datetime even if not used here, for consistency
+from lib.etag import conditional_get
+from lib.utils import _get_pagination_metadata, _get_cursor_pagination_metadata, _get_keyset_clause, _keyset_variants, _wants_total, _check_student, _format_datetime # Import _format_datetime even if not used here, for consistency
+
+# Maps each accepted sort_by value to its column and the id column used as
+# tie-breaker. Counts break ties on ws.word_id so the word_stats index
+# provides the full ordering.
+SORT_COLUMNS = {
+  'french_word': ('w.french_word', 'w.id'),
+  'quebec_pronunciation': ('w.quebec_pronunciation', 'w.id'),
+  'english': ('w.english', 'w.id'),
+  'correct_count': ('ws.correct_count', 'ws.word_id'),
+  'wrong_count': ('ws.wrong_count', 'ws.word_id'),
+}
+
+# A student's counts come from student_word_stats, which only has rows for
+# the words they reviewed, so missing counts read as 0
+STUDENT_SORT_COLUMNS = {
+  **SORT_COLUMNS,
+  'correct_count': ('COALESCE(ws.correct_count, 0)', 'w.id'),
+  'wrong_count': ('COALESCE(ws.wrong_count, 0)', 'w.id'),
+}
+
+# Template parts exposing a word's review counts as {correct_count} and
+# {wrong_count}: the global word_stats, or one student's student_word_stats
+# rows (a primary key lookup per word, so other students' rows are never
+# read; the join binds the student id)
+GLOBAL_STATS = {
+  'stats_join': "JOIN word_stats ws ON ws.word_id = w.id",
+  'correct_count': SORT_COLUMNS['correct_count'][0],
+  'wrong_count': SORT_COLUMNS['wrong_count'][0],
+}
+STUDENT_STATS = {
+  'stats_join': "LEFT JOIN student_word_stats ws ON ws.student_id = ? AND ws.word_id = w.id",
+  'correct_count': STUDENT_SORT_COLUMNS['correct_count'][0],
+  'wrong_count': STUDENT_SORT_COLUMNS['wrong_count'][0],
+}
+
+def _word_stats_join(student_id):
+  """
+  Returns (template parts, join params, sort columns) for the global review
+  counts, or with a student_id for that student's.
+  """
+  if student_id is None:
+    return GLOBAL_STATS, [], SORT_COLUMNS
+  return STUDENT_STATS, [student_id], STUDENT_SORT_COLUMNS
+
+def _word_list_variants(prefix='WHERE'):
+  """
+  Lists every (review counts, sort key, keyset) part combination of a word
+  listing, for registering it in the statement catalog.
+  """
+  return [
+    {**stats, **keyset}
+    for stats, sort_columns in ((GLOBAL_STATS, SORT_COLUMNS), (STUDENT_STATS, STUDENT_SORT_COLUMNS))
+    for sort_column, id_column in sort_columns.values()
+    for keyset in _keyset_variants(sort_column, id_column, prefix)
+  ]
+
+# bm25() column weights for words_fts: a hit on the French word outranks one
+# on the translation, the pronunciation or the notes
+SEARCH_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+# Review counts come from the trigger-maintained word_stats table, so no
+# aggregation over word_review_items is needed and sorting by a count walks
+# the word_stats index. The id tie-breaker keeps pages stable.
+db.statements.register('words.list', """
+    SELECT w.id, w.french_word, w.quebec_pronunciation, w.english,
+           {correct_count} AS correct_count,
+           {wrong_count} AS wrong_count
+    FROM words w
+    {stats_join}
+    {seek}
+    ORDER BY {order_by}
+    {limit};
+""", _word_list_variants())
+
+# Ranking happens inside the FTS index (rowid = word id), so only one page
+# of words is ever joined
+db.statements.register('words.search', f"""
+    SELECT w.id, w.french_word, w.quebec_pronunciation, w.english,
+           {{correct_count}} AS correct_count,
+           {{wrong_count}} AS wrong_count
+    FROM (
+        SELECT rowid, bm25(words_fts, {', '.join(str(weight) for weight in SEARCH_WEIGHTS)}) AS score
+        FROM words_fts
+        WHERE words_fts MATCH ?
+        ORDER BY score, rowid
+        LIMIT ? OFFSET ?
+    ) hits
+    JOIN words w ON w.id = hits.rowid
+    {{stats_join}}
+    ORDER BY hits.score, hits.rowid;
+""", [GLOBAL_STATS, STUDENT_STATS])
+db.statements.register('words.search_count', "SELECT COUNT(*) FROM words_fts WHERE words_fts MATCH ?;")
+
+db.statements.register('words.by_id', """
+    SELECT w.id, w.french_word, w.quebec_pronunciation, w.english, w.parts,
+           {correct_count} AS correct_count, {wrong_count} AS wrong_count
+    FROM words w
+    {stats_join}
+    WHERE w.id = ?;
+""", [GLOBAL_STATS, STUDENT_STATS])
+db.statements.register('words.groups', """
+    SELECT g.id, g.name
+    FROM groups g
+    JOIN words_groups wg ON g.id = wg.group_id
+    WHERE wg.word_id = ?;
+""")
+
+def _fts_match_expression(query):
+  """
+  Turns free text into an FTS5 MATCH expression in which every term is a
+  quoted prefix query (so "ca v" finds "Comment ça va?"). Quoting keeps
+  user input from being parsed as FTS5 syntax. Returns None if there are no
+  searchable terms.
+  """
+  terms = re.findall(r"\w+", query)
+  if not terms:
+    return None
+  return ' '.join(f'"{term}"*' for term in terms)
 
 def load(app):
   """
@@ -12,13 +133,18 @@ def load(app):
   """
 
   @app.route('/api/words', methods=['GET'])
+  @app.route('/api/students/<int:student_id>/words', methods=['GET'])
   @cross_origin()
-  def get_words():
+  @conditional_get()
+  def get_words(student_id=None):
     """
     Retrieves a paginated and sortable list of all words in the database.
-    Includes correct/wrong review counts for each word.
+    Includes correct/wrong review counts for each word (one student's
+    counts under /api/students/<id>/).
     """
-    cursor = db.cursor()
+    not_found = _check_student(student_id)
+    if not_found:
+        return not_found
 
     # Get pagination parameters from query string (default to page 1, use app's PER_PAGE)
     page = int(request.args.get('page', 1))
@@ -38,65 +164,115 @@ def load(app):
     if order not in ['ASC', 'DESC']:
         return jsonify({"error": "Invalid order. Must be 'asc' or 'desc'"}), 400
 
-    # Query to fetch words with sorting and pagination
-    # Uses LEFT JOIN with word_review_items to get review counts,
-    # and GROUP BY to aggregate counts per word.
-    query = f"""
-        SELECT w.id, w.french_word, w.quebec_pronunciation, w.english,
-               SUM(CASE WHEN wri.correct = 1 THEN 1 ELSE 0 END) AS correct_count,
-               SUM(CASE WHEN wri.correct = 0 THEN 1 ELSE 0 END) AS wrong_count
-        FROM words w 
-        LEFT JOIN word_review_items wri ON w.id = wri.word_id
-        GROUP BY w.id, w.french_word, w.quebec_pronunciation, w.english
-        ORDER BY {sort_by} {order} 
-        LIMIT ? OFFSET ?;
+    # Opt-in keyset mode: ?cursor= (empty for the first page) seeks past the
+    # previous page through the sort index instead of skipping OFFSET rows
+    cursor_token = request.args.get('cursor')
+    stats, stats_params, sort_columns = _word_stats_join(student_id)
+    sort_column, id_column = sort_columns[sort_by]
+    try:
+        keyset, seek_params, backwards = _get_keyset_clause(
+            cursor_token, sort_by, sort_column, id_column, order)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid cursor: {e}"}), 400
+    if cursor_token is None:
+        limit_params = [per_page, offset]
+    else:
+        limit_params = [per_page + 1] # One extra row tells if there is more
+
+    # Fetch words with sorting and pagination (see the 'words.list' statement)
+    words = db.query('words.list', stats_params + seek_params + limit_params, **stats, **keyset).fetchall()
+
+    if cursor_token is None:
+        # Generate pagination metadata (the total comes from the trigger-maintained counter)
+        pagination = _get_pagination_metadata(
+            endpoint_name='get_words', 
+            total_items=None, 
+            counter='words',
+            current_page=page, 
+            per_page=per_page,
+            student_id=student_id,
+            sort_by=sort_by, # Pass sorting params for correct next/prev URLs
+            order=order
+        )
+    else:
+        # The total is optional in cursor mode
+        total_words = db.count('words') if _wants_total(request.args) else None
+        words, pagination = _get_cursor_pagination_metadata(
+            endpoint_name='get_words',
+            rows=words,
+            per_page=per_page,
+            cursor_token=cursor_token,
+            backwards=backwards,
+            cursor_field=sort_by,
+            sort_key=sort_by,
+            sort_by=sort_by,
+            total_items=total_words,
+            student_id=student_id,
+            order=order
+        )
+
+    # The rows already have the response shape (word_stats counts are NOT
+    # NULL integers), so they go to the JSON provider as-is
+    return jsonify({"words": words, "pagination": pagination})
+
+  @app.route('/api/words/search', methods=['GET'])
+  @app.route('/api/students/<int:student_id>/words/search', methods=['GET'])
+  @cross_origin()
+  @conditional_get()
+  def search_words(student_id=None):
+    """
+    Full-text, accent-insensitive search over French words, translations,
+    pronunciations and notes (?q=). Every term matches as a prefix; results
+    are ranked by BM25 relevance and paginated like /api/words.
     """
-    words = cursor.execute(query, (per_page, offset)).fetchall()
+    not_found = _check_student(student_id)
+    if not_found:
+        return not_found
+
+    query_text = request.args.get('q', '').strip()
+    match = _fts_match_expression(query_text)
+    if match is None:
+        return jsonify({"error": "Query parameter 'q' must contain at least one letter or digit"}), 400
+
+    page = int(request.args.get('page', 1))
+    per_page = app.config['PER_PAGE']
+    offset = (page - 1) * per_page
+
+    stats, stats_params, _ = _word_stats_join(student_id)
+    try:
+        words = db.query('words.search', [match, per_page, offset] + stats_params, **stats).fetchall()
+        total_matches = db.query('words.search_count', (match,)).fetchone()[0]
+    except sqlite3.Error as e:
+        return jsonify({"error": f"Database error: {str(e)}"}), 500
 
-    # Query the total number of words for pagination metadata
-    total_words = cursor.execute("SELECT COUNT(*) FROM words;").fetchone()[0]
-    
-    # Generate pagination metadata
     pagination = _get_pagination_metadata(
-        endpoint_name='get_words', 
-        total_items=total_words, 
-        current_page=page, 
+        endpoint_name='search_words',
+        total_items=total_matches,
+        current_page=page,
         per_page=per_page,
-        sort_by=sort_by, # Pass sorting params for correct next/prev URLs
-        order=order
+        student_id=student_id,
+        q=query_text
     )
 
-    # Format the response data
-    result = []
-    for word in words:
-        word_dict = dict(word)
-        # Ensure counts are integers, defaulting to 0 if NULL
-        word_dict['correct_count'] = int(word_dict['correct_count'] or 0)
-        word_dict['wrong_count'] = int(word_dict['wrong_count'] or 0)
-        result.append(word_dict)
-
-    return jsonify({"words": result, "pagination": pagination})
+    return jsonify({"query": query_text, "words": words, "pagination": pagination})
 
   @app.route('/api/words/<int:word_id>', methods=['GET'])
+  @app.route('/api/students/<int:student_id>/words/<int:word_id>', methods=['GET'])
   @cross_origin()
-  def get_word_by_id(word_id):
+  @conditional_get()
+  def get_word_by_id(word_id, student_id=None):
     """
     Retrieves detailed information for a single word by its ID.
-    Includes its parts (JSON parsed), study statistics, and associated groups.
+    Includes its parts (JSON parsed), study statistics (one student's under
+    /api/students/<id>/), and associated groups.
     """
-    cursor = db.cursor()
+    not_found = _check_student(student_id)
+    if not_found:
+        return not_found
     
-    # Query to fetch the word details and aggregate review counts
-    word_query = """
-        SELECT w.id, w.french_word, w.quebec_pronunciation, w.english, w.parts,
-               SUM(CASE WHEN wri.correct = 1 THEN 1 ELSE 0 END) AS correct_count,
-               SUM(CASE WHEN wri.correct = 0 THEN 1 ELSE 0 END) AS wrong_count
-        FROM words w 
-        LEFT JOIN word_review_items wri ON w.id = wri.word_id
-        WHERE w.id = ? 
-        GROUP BY w.id, w.french_word, w.quebec_pronunciation, w.english, w.parts;
-    """
-    word = cursor.execute(word_query, (word_id,)).fetchone()
+    # Fetch the word details and its cached review counts
+    stats, stats_params, _ = _word_stats_join(student_id)
+    word = db.query('words.by_id', stats_params + [word_id], **stats).fetchone()
     
     if not word:
         return jsonify({"error": "Word not found"}), 404
@@ -114,14 +290,8 @@ def load(app):
     del word_dict['correct_count']
     del word_dict['wrong_count']
 
-    # Query to fetch all groups associated with this word
-    groups_query = """
-        SELECT g.id, g.name 
-        FROM groups g 
-        JOIN words_groups wg ON g.id = wg.group_id 
-        WHERE wg.word_id = ?;
-    """
-    word_groups = cursor.execute(groups_query, (word_id,)).fetchall()
+    # Fetch all groups associated with this word
+    word_groups = db.query('words.groups', (word_id,)).fetchall()
     word_dict['word_groups'] = [dict(g) for g in word_groups]
     
     return jsonify(word_dict)
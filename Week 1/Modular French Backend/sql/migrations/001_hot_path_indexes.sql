@@ -0,0 +1,25 @@
+
+-- Indexes for the joins and sorts on the listing and dashboard routes.
+-- Review counts per word and per session are answered from the index alone.
+CREATE INDEX IF NOT EXISTS idx_word_review_items_word_id
+  ON word_review_items (word_id, correct);
+
+CREATE INDEX IF NOT EXISTS idx_word_review_items_study_session_id
+  ON word_review_items (study_session_id, correct);
+
+-- Group membership is looked up from both sides
+CREATE INDEX IF NOT EXISTS idx_words_groups_group_id_word_id
+  ON words_groups (group_id, word_id);
+
+CREATE INDEX IF NOT EXISTS idx_words_groups_word_id_group_id
+  ON words_groups (word_id, group_id);
+
+-- Session listings are ordered by creation time, globally and per group/activity
+CREATE INDEX IF NOT EXISTS idx_study_sessions_created_at
+  ON study_sessions (created_at);
+
+CREATE INDEX IF NOT EXISTS idx_study_sessions_group_id_created_at
+  ON study_sessions (group_id, created_at);
+
+CREATE INDEX IF NOT EXISTS idx_study_sessions_study_activity_id_created_at
+  ON study_sessions (study_activity_id, created_at);
@@ -0,0 +1,69 @@
+
+-- Denormalized per-word review counters, kept exact by triggers on
+-- word_review_items so word listings no longer aggregate the review history.
+CREATE TABLE IF NOT EXISTS word_stats (
+  word_id INTEGER PRIMARY KEY,
+  correct_count INTEGER NOT NULL DEFAULT 0,
+  wrong_count INTEGER NOT NULL DEFAULT 0,
+  FOREIGN KEY (word_id) REFERENCES words(id) ON DELETE CASCADE
+);
+
+-- The rowid (word_id) is implicitly part of each index, so sorting by a
+-- count with word_id as tie-breaker is a plain index walk.
+CREATE INDEX IF NOT EXISTS idx_word_stats_correct_count ON word_stats (correct_count);
+CREATE INDEX IF NOT EXISTS idx_word_stats_wrong_count ON word_stats (wrong_count);
+
+-- Backfill from the existing history
+INSERT OR REPLACE INTO word_stats (word_id, correct_count, wrong_count)
+SELECT w.id,
+       SUM(CASE WHEN wri.correct = 1 THEN 1 ELSE 0 END),
+       SUM(CASE WHEN wri.correct = 0 THEN 1 ELSE 0 END)
+FROM words w
+LEFT JOIN word_review_items wri ON w.id = wri.word_id
+GROUP BY w.id;
+
+-- Every word has a stats row so listings can use an inner join
+CREATE TRIGGER IF NOT EXISTS trg_words_insert_word_stats
+AFTER INSERT ON words
+BEGIN
+  INSERT OR IGNORE INTO word_stats (word_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_delete_word_stats
+AFTER DELETE ON words
+BEGIN
+  DELETE FROM word_stats WHERE word_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_insert_word_stats
+AFTER INSERT ON word_review_items
+BEGIN
+  INSERT OR IGNORE INTO word_stats (word_id) VALUES (NEW.word_id);
+  UPDATE word_stats
+  SET correct_count = correct_count + (CASE WHEN NEW.correct = 1 THEN 1 ELSE 0 END),
+      wrong_count = wrong_count + (CASE WHEN NEW.correct = 0 THEN 1 ELSE 0 END)
+  WHERE word_id = NEW.word_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_delete_word_stats
+AFTER DELETE ON word_review_items
+BEGIN
+  UPDATE word_stats
+  SET correct_count = correct_count - (CASE WHEN OLD.correct = 1 THEN 1 ELSE 0 END),
+      wrong_count = wrong_count - (CASE WHEN OLD.correct = 0 THEN 1 ELSE 0 END)
+  WHERE word_id = OLD.word_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_update_word_stats
+AFTER UPDATE OF word_id, correct ON word_review_items
+BEGIN
+  UPDATE word_stats
+  SET correct_count = correct_count - (CASE WHEN OLD.correct = 1 THEN 1 ELSE 0 END),
+      wrong_count = wrong_count - (CASE WHEN OLD.correct = 0 THEN 1 ELSE 0 END)
+  WHERE word_id = OLD.word_id;
+  INSERT OR IGNORE INTO word_stats (word_id) VALUES (NEW.word_id);
+  UPDATE word_stats
+  SET correct_count = correct_count + (CASE WHEN NEW.correct = 1 THEN 1 ELSE 0 END),
+      wrong_count = wrong_count + (CASE WHEN NEW.correct = 0 THEN 1 ELSE 0 END)
+  WHERE word_id = NEW.word_id;
+END;
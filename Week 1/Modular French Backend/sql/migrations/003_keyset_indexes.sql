@@ -0,0 +1,9 @@
+
+-- Sort indexes for keyset pagination. The rowid (id) is implicitly the last
+-- column of each index, matching the (sort key, id) seek and ORDER BY.
+CREATE INDEX IF NOT EXISTS idx_words_french_word ON words (french_word);
+CREATE INDEX IF NOT EXISTS idx_words_quebec_pronunciation ON words (quebec_pronunciation);
+CREATE INDEX IF NOT EXISTS idx_words_english ON words (english);
+
+CREATE INDEX IF NOT EXISTS idx_groups_name ON groups (name);
+CREATE INDEX IF NOT EXISTS idx_groups_word_count ON groups (word_count);
@@ -0,0 +1,142 @@
+
+-- Running dashboard totals, kept exact by triggers on the history tables so
+-- the dashboard reads one row instead of scanning every review and session.
+CREATE TABLE IF NOT EXISTS dashboard_aggregates (
+  id INTEGER PRIMARY KEY CHECK (id = 1),  -- Single-row table
+  total_reviews INTEGER NOT NULL DEFAULT 0,
+  correct_reviews INTEGER NOT NULL DEFAULT 0,
+  total_study_sessions INTEGER NOT NULL DEFAULT 0,
+  active_groups INTEGER NOT NULL DEFAULT 0,   -- Groups with at least one session
+  words_studied INTEGER NOT NULL DEFAULT 0    -- Words with at least one review
+);
+
+-- Daily rollup (UTC days, like the stored timestamps)
+CREATE TABLE IF NOT EXISTS dashboard_daily (
+  day TEXT PRIMARY KEY,  -- DATE(created_at)
+  study_sessions INTEGER NOT NULL DEFAULT 0,
+  reviews INTEGER NOT NULL DEFAULT 0,
+  correct_reviews INTEGER NOT NULL DEFAULT 0
+);
+
+-- Backfill from the existing history
+INSERT OR REPLACE INTO dashboard_aggregates
+  (id, total_reviews, correct_reviews, total_study_sessions, active_groups, words_studied)
+SELECT 1,
+       (SELECT COUNT(*) FROM word_review_items),
+       (SELECT COUNT(*) FROM word_review_items WHERE correct = 1),
+       (SELECT COUNT(*) FROM study_sessions),
+       (SELECT COUNT(DISTINCT group_id) FROM study_sessions),
+       (SELECT COUNT(DISTINCT word_id) FROM word_review_items);
+
+DELETE FROM dashboard_daily;
+INSERT INTO dashboard_daily (day, study_sessions, reviews, correct_reviews)
+SELECT day, SUM(study_sessions), SUM(reviews), SUM(correct_reviews)
+FROM (
+  SELECT DATE(created_at) AS day, COUNT(*) AS study_sessions, 0 AS reviews, 0 AS correct_reviews
+  FROM study_sessions GROUP BY DATE(created_at)
+  UNION ALL
+  SELECT DATE(created_at), 0, COUNT(*), SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END)
+  FROM word_review_items GROUP BY DATE(created_at)
+)
+WHERE day IS NOT NULL
+GROUP BY day;
+
+-- Reviews. "First/last review of a word" checks are index seeks on
+-- idx_word_review_items_word_id.
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_insert_dashboard
+AFTER INSERT ON word_review_items
+BEGIN
+  UPDATE dashboard_aggregates
+  SET total_reviews = total_reviews + 1,
+      correct_reviews = correct_reviews + (CASE WHEN NEW.correct = 1 THEN 1 ELSE 0 END),
+      words_studied = words_studied + (CASE WHEN EXISTS (
+        SELECT 1 FROM word_review_items WHERE word_id = NEW.word_id AND id <> NEW.id
+      ) THEN 0 ELSE 1 END)
+  WHERE id = 1;
+  INSERT INTO dashboard_daily (day, reviews, correct_reviews)
+  VALUES (DATE(NEW.created_at), 1, CASE WHEN NEW.correct = 1 THEN 1 ELSE 0 END)
+  ON CONFLICT (day) DO UPDATE SET
+    reviews = reviews + 1,
+    correct_reviews = correct_reviews + excluded.correct_reviews;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_delete_dashboard
+AFTER DELETE ON word_review_items
+BEGIN
+  UPDATE dashboard_aggregates
+  SET total_reviews = total_reviews - 1,
+      correct_reviews = correct_reviews - (CASE WHEN OLD.correct = 1 THEN 1 ELSE 0 END),
+      words_studied = words_studied - (CASE WHEN EXISTS (
+        SELECT 1 FROM word_review_items WHERE word_id = OLD.word_id
+      ) THEN 0 ELSE 1 END)
+  WHERE id = 1;
+  UPDATE dashboard_daily
+  SET reviews = reviews - 1,
+      correct_reviews = correct_reviews - (CASE WHEN OLD.correct = 1 THEN 1 ELSE 0 END)
+  WHERE day = DATE(OLD.created_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_update_dashboard
+AFTER UPDATE OF word_id, correct ON word_review_items
+BEGIN
+  UPDATE dashboard_aggregates
+  SET correct_reviews = correct_reviews
+        - (CASE WHEN OLD.correct = 1 THEN 1 ELSE 0 END)
+        + (CASE WHEN NEW.correct = 1 THEN 1 ELSE 0 END),
+      words_studied = words_studied
+        - (CASE WHEN OLD.word_id = NEW.word_id OR EXISTS (
+            SELECT 1 FROM word_review_items WHERE word_id = OLD.word_id
+          ) THEN 0 ELSE 1 END)
+        + (CASE WHEN OLD.word_id = NEW.word_id OR EXISTS (
+            SELECT 1 FROM word_review_items WHERE word_id = NEW.word_id AND id <> NEW.id
+          ) THEN 0 ELSE 1 END)
+  WHERE id = 1;
+  UPDATE dashboard_daily
+  SET correct_reviews = correct_reviews
+        - (CASE WHEN OLD.correct = 1 THEN 1 ELSE 0 END)
+        + (CASE WHEN NEW.correct = 1 THEN 1 ELSE 0 END)
+  WHERE day = DATE(NEW.created_at);
+END;
+
+-- Sessions. "First/last session of a group" checks are index seeks on
+-- idx_study_sessions_group_id_created_at.
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_insert_dashboard
+AFTER INSERT ON study_sessions
+BEGIN
+  UPDATE dashboard_aggregates
+  SET total_study_sessions = total_study_sessions + 1,
+      active_groups = active_groups + (CASE WHEN EXISTS (
+        SELECT 1 FROM study_sessions WHERE group_id = NEW.group_id AND id <> NEW.id
+      ) THEN 0 ELSE 1 END)
+  WHERE id = 1;
+  INSERT INTO dashboard_daily (day, study_sessions)
+  VALUES (DATE(NEW.created_at), 1)
+  ON CONFLICT (day) DO UPDATE SET study_sessions = study_sessions + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_delete_dashboard
+AFTER DELETE ON study_sessions
+BEGIN
+  UPDATE dashboard_aggregates
+  SET total_study_sessions = total_study_sessions - 1,
+      active_groups = active_groups - (CASE WHEN EXISTS (
+        SELECT 1 FROM study_sessions WHERE group_id = OLD.group_id
+      ) THEN 0 ELSE 1 END)
+  WHERE id = 1;
+  UPDATE dashboard_daily
+  SET study_sessions = study_sessions - 1
+  WHERE day = DATE(OLD.created_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_update_dashboard
+AFTER UPDATE OF group_id ON study_sessions
+WHEN OLD.group_id <> NEW.group_id
+BEGIN
+  UPDATE dashboard_aggregates
+  SET active_groups = active_groups
+        - (CASE WHEN EXISTS (SELECT 1 FROM study_sessions WHERE group_id = OLD.group_id) THEN 0 ELSE 1 END)
+        + (CASE WHEN EXISTS (
+            SELECT 1 FROM study_sessions WHERE group_id = NEW.group_id AND id <> NEW.id
+          ) THEN 0 ELSE 1 END)
+  WHERE id = 1;
+END;
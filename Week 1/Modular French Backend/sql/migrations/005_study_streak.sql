@@ -0,0 +1,77 @@
+
+-- Persisted study streak: the length of the latest run of consecutive (UTC)
+-- days with at least one session, and the last day of that run. Whether the
+-- run is still alive (last day is today or yesterday) is decided at read time.
+ALTER TABLE dashboard_aggregates ADD COLUMN current_streak INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE dashboard_aggregates ADD COLUMN last_study_date TEXT;
+
+-- Backfill with a gaps-and-islands query: julianday(day) - row_number() is
+-- constant within a run of consecutive days and grows with every gap, so the
+-- latest run is the island with the largest value.
+UPDATE dashboard_aggregates
+SET last_study_date = (SELECT MAX(DATE(created_at)) FROM study_sessions),
+    current_streak = COALESCE((
+      SELECT COUNT(*) FROM (
+        SELECT julianday(day) - ROW_NUMBER() OVER (ORDER BY day) AS island
+        FROM (SELECT DISTINCT DATE(created_at) AS day FROM study_sessions WHERE created_at IS NOT NULL)
+      )
+      GROUP BY island ORDER BY island DESC LIMIT 1
+    ), 0)
+WHERE id = 1;
+
+-- New sessions extend, keep or restart the streak in O(1). A backdated
+-- session may bridge an older gap, so that rare case recomputes the run.
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_insert_streak
+AFTER INSERT ON study_sessions
+WHEN NEW.created_at IS NOT NULL
+BEGIN
+  UPDATE dashboard_aggregates
+  SET current_streak = CASE
+        WHEN last_study_date IS NULL THEN 1
+        WHEN DATE(NEW.created_at) = last_study_date THEN current_streak
+        WHEN DATE(NEW.created_at) = DATE(last_study_date, '+1 day') THEN current_streak + 1
+        WHEN DATE(NEW.created_at) > last_study_date THEN 1
+        ELSE current_streak
+      END,
+      last_study_date = CASE
+        WHEN last_study_date IS NULL OR DATE(NEW.created_at) > last_study_date THEN DATE(NEW.created_at)
+        ELSE last_study_date
+      END
+  WHERE id = 1;
+
+  UPDATE dashboard_aggregates
+  SET current_streak = COALESCE((
+        SELECT COUNT(*) FROM (
+          SELECT julianday(day) - ROW_NUMBER() OVER (ORDER BY day) AS island
+          FROM (SELECT DISTINCT DATE(created_at) AS day FROM study_sessions WHERE created_at IS NOT NULL)
+        )
+        GROUP BY island ORDER BY island DESC LIMIT 1
+      ), 0)
+  WHERE id = 1 AND DATE(NEW.created_at) < last_study_date;
+END;
+
+-- Deleting the last session of a day inside the current run breaks it, so
+-- recompute. The day check is a range seek on idx_study_sessions_created_at,
+-- which keeps bulk deletes of older history cheap.
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_delete_streak
+AFTER DELETE ON study_sessions
+WHEN OLD.created_at IS NOT NULL
+  AND DATE(OLD.created_at) > (
+    SELECT DATE(last_study_date, '-' || current_streak || ' days') FROM dashboard_aggregates WHERE id = 1
+  )
+  AND NOT EXISTS (
+    SELECT 1 FROM study_sessions
+    WHERE created_at >= DATE(OLD.created_at) AND created_at < DATE(OLD.created_at, '+1 day')
+  )
+BEGIN
+  UPDATE dashboard_aggregates
+  SET last_study_date = (SELECT MAX(DATE(created_at)) FROM study_sessions),
+      current_streak = COALESCE((
+        SELECT COUNT(*) FROM (
+          SELECT julianday(day) - ROW_NUMBER() OVER (ORDER BY day) AS island
+          FROM (SELECT DISTINCT DATE(created_at) AS day FROM study_sessions WHERE created_at IS NOT NULL)
+        )
+        GROUP BY island ORDER BY island DESC LIMIT 1
+      ), 0)
+  WHERE id = 1;
+END;
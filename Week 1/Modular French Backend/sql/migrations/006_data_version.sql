@@ -0,0 +1,9 @@
+-- Global data version: a counter bumped by Db.commit() inside every write
+-- transaction. It is persisted, so all workers and processes agree on it,
+-- and drives ETags and cache invalidation for read endpoints.
+CREATE TABLE IF NOT EXISTS data_version (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0);
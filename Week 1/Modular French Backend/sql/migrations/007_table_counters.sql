@@ -0,0 +1,109 @@
+-- Exact row counts for pagination, kept by triggers so list routes never run
+-- COUNT(*). scope_id is 0 for whole-table counts, otherwise the id of the
+-- group or activity the count is restricted to.
+CREATE TABLE IF NOT EXISTS table_counters (
+  name TEXT NOT NULL,          -- 'words', 'groups', 'study_activities', 'study_sessions',
+                               -- 'group_study_sessions', 'activity_study_sessions'
+  scope_id INTEGER NOT NULL DEFAULT 0,
+  count INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (name, scope_id)
+) WITHOUT ROWID;
+
+-- Backfill
+DELETE FROM table_counters;
+INSERT INTO table_counters (name, scope_id, count)
+SELECT 'words', 0, COUNT(*) FROM words
+UNION ALL SELECT 'groups', 0, COUNT(*) FROM groups
+UNION ALL SELECT 'study_activities', 0, COUNT(*) FROM study_activities
+UNION ALL SELECT 'study_sessions', 0, COUNT(*) FROM study_sessions;
+INSERT INTO table_counters (name, scope_id, count)
+SELECT 'group_study_sessions', group_id, COUNT(*) FROM study_sessions GROUP BY group_id;
+INSERT INTO table_counters (name, scope_id, count)
+SELECT 'activity_study_sessions', study_activity_id, COUNT(*) FROM study_sessions GROUP BY study_activity_id;
+
+-- groups.word_count was only refreshed by the importer; keep it exact too
+UPDATE groups SET word_count = (SELECT COUNT(*) FROM words_groups WHERE group_id = groups.id);
+
+CREATE TRIGGER IF NOT EXISTS trg_words_insert_counters
+AFTER INSERT ON words
+BEGIN
+  UPDATE table_counters SET count = count + 1 WHERE name = 'words' AND scope_id = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_delete_counters
+AFTER DELETE ON words
+BEGIN
+  UPDATE table_counters SET count = count - 1 WHERE name = 'words' AND scope_id = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_groups_insert_counters
+AFTER INSERT ON groups
+BEGIN
+  UPDATE table_counters SET count = count + 1 WHERE name = 'groups' AND scope_id = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_groups_delete_counters
+AFTER DELETE ON groups
+BEGIN
+  UPDATE table_counters SET count = count - 1 WHERE name = 'groups' AND scope_id = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_activities_insert_counters
+AFTER INSERT ON study_activities
+BEGIN
+  UPDATE table_counters SET count = count + 1 WHERE name = 'study_activities' AND scope_id = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_activities_delete_counters
+AFTER DELETE ON study_activities
+BEGIN
+  UPDATE table_counters SET count = count - 1 WHERE name = 'study_activities' AND scope_id = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_insert_counters
+AFTER INSERT ON study_sessions
+BEGIN
+  UPDATE table_counters SET count = count + 1 WHERE name = 'study_sessions' AND scope_id = 0;
+  INSERT INTO table_counters (name, scope_id, count) VALUES ('group_study_sessions', NEW.group_id, 1)
+    ON CONFLICT (name, scope_id) DO UPDATE SET count = count + 1;
+  INSERT INTO table_counters (name, scope_id, count) VALUES ('activity_study_sessions', NEW.study_activity_id, 1)
+    ON CONFLICT (name, scope_id) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_delete_counters
+AFTER DELETE ON study_sessions
+BEGIN
+  UPDATE table_counters SET count = count - 1 WHERE name = 'study_sessions' AND scope_id = 0;
+  UPDATE table_counters SET count = count - 1 WHERE name = 'group_study_sessions' AND scope_id = OLD.group_id;
+  UPDATE table_counters SET count = count - 1 WHERE name = 'activity_study_sessions' AND scope_id = OLD.study_activity_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_update_counters
+AFTER UPDATE OF group_id, study_activity_id ON study_sessions
+BEGIN
+  UPDATE table_counters SET count = count - 1 WHERE name = 'group_study_sessions' AND scope_id = OLD.group_id;
+  INSERT INTO table_counters (name, scope_id, count) VALUES ('group_study_sessions', NEW.group_id, 1)
+    ON CONFLICT (name, scope_id) DO UPDATE SET count = count + 1;
+  UPDATE table_counters SET count = count - 1 WHERE name = 'activity_study_sessions' AND scope_id = OLD.study_activity_id;
+  INSERT INTO table_counters (name, scope_id, count) VALUES ('activity_study_sessions', NEW.study_activity_id, 1)
+    ON CONFLICT (name, scope_id) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_groups_insert_word_count
+AFTER INSERT ON words_groups
+BEGIN
+  UPDATE groups SET word_count = word_count + 1 WHERE id = NEW.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_groups_delete_word_count
+AFTER DELETE ON words_groups
+BEGIN
+  UPDATE groups SET word_count = word_count - 1 WHERE id = OLD.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_groups_update_word_count
+AFTER UPDATE OF group_id ON words_groups
+BEGIN
+  UPDATE groups SET word_count = word_count - 1 WHERE id = OLD.group_id;
+  UPDATE groups SET word_count = word_count + 1 WHERE id = NEW.group_id;
+END;
@@ -0,0 +1,48 @@
+-- Full-text vocabulary search. Contentless FTS5 index (rowid = words.id):
+-- the text lives only in words, the index only stores tokens. unicode61 with
+-- remove_diacritics 2 folds accents, so "etre" matches "être"; the prefix
+-- indexes make short "begins with" queries cheap.
+CREATE VIRTUAL TABLE IF NOT EXISTS words_fts USING fts5(
+  french_word,
+  english,
+  quebec_pronunciation,
+  notes,
+  content = '',
+  tokenize = 'unicode61 remove_diacritics 2',
+  prefix = '2 3'
+);
+
+-- Backfill
+INSERT INTO words_fts (rowid, french_word, english, quebec_pronunciation, notes)
+SELECT id, french_word, english, quebec_pronunciation,
+       CASE WHEN json_valid(parts) THEN json_extract(parts, '$.notes') END
+FROM words;
+
+-- Contentless tables are updated with the 'delete' command, which must be
+-- given exactly the values that were indexed
+CREATE TRIGGER IF NOT EXISTS trg_words_insert_fts
+AFTER INSERT ON words
+BEGIN
+  INSERT INTO words_fts (rowid, french_word, english, quebec_pronunciation, notes)
+  VALUES (NEW.id, NEW.french_word, NEW.english, NEW.quebec_pronunciation,
+          CASE WHEN json_valid(NEW.parts) THEN json_extract(NEW.parts, '$.notes') END);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_delete_fts
+AFTER DELETE ON words
+BEGIN
+  INSERT INTO words_fts (words_fts, rowid, french_word, english, quebec_pronunciation, notes)
+  VALUES ('delete', OLD.id, OLD.french_word, OLD.english, OLD.quebec_pronunciation,
+          CASE WHEN json_valid(OLD.parts) THEN json_extract(OLD.parts, '$.notes') END);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_update_fts
+AFTER UPDATE OF french_word, english, quebec_pronunciation, parts ON words
+BEGIN
+  INSERT INTO words_fts (words_fts, rowid, french_word, english, quebec_pronunciation, notes)
+  VALUES ('delete', OLD.id, OLD.french_word, OLD.english, OLD.quebec_pronunciation,
+          CASE WHEN json_valid(OLD.parts) THEN json_extract(OLD.parts, '$.notes') END);
+  INSERT INTO words_fts (rowid, french_word, english, quebec_pronunciation, notes)
+  VALUES (NEW.id, NEW.french_word, NEW.english, NEW.quebec_pronunciation,
+          CASE WHEN json_valid(NEW.parts) THEN json_extract(NEW.parts, '$.notes') END);
+END;
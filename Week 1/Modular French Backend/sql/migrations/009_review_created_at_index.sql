@@ -0,0 +1,4 @@
+-- Date-range scans of the review history (exports) walk this index in
+-- (created_at, id) order instead of sorting the whole table.
+CREATE INDEX IF NOT EXISTS idx_word_review_items_created_at
+  ON word_review_items (created_at);
@@ -0,0 +1,82 @@
+
+-- Spaced-repetition state per word (SM-2 with pass/fail grades, as in Anki):
+-- a correct answer grows the interval (1 day, 6 days, then interval * ease),
+-- a wrong one costs 0.2 ease (floor 1.3) and makes the word due again at
+-- once. next_due is NULL for words that were never reviewed.
+CREATE TABLE IF NOT EXISTS word_schedule (
+  word_id INTEGER PRIMARY KEY,
+  ease REAL NOT NULL DEFAULT 2.5,
+  interval_days INTEGER NOT NULL DEFAULT 0,
+  repetitions INTEGER NOT NULL DEFAULT 0,
+  next_due DATETIME,
+  last_reviewed_at DATETIME,
+  FOREIGN KEY (word_id) REFERENCES words(id) ON DELETE CASCADE
+);
+
+-- The due queue: (next_due, word_id) order, with new words (NULL) first
+CREATE INDEX IF NOT EXISTS idx_word_schedule_next_due ON word_schedule (next_due);
+
+-- Backfill by replaying each word's history in order. With MAX(n), SQLite
+-- takes the bare columns from each word's last replayed step.
+WITH RECURSIVE ordered AS MATERIALIZED (
+  SELECT word_id, correct, created_at,
+         ROW_NUMBER() OVER (PARTITION BY word_id ORDER BY created_at, id) AS n
+  FROM word_review_items
+),
+replay (word_id, n, ease, interval_days, repetitions, reviewed_at) AS (
+  SELECT id, 0, 2.5, 0, 0, NULL FROM words
+  UNION ALL
+  SELECT r.word_id, o.n,
+         CASE WHEN o.correct = 1 THEN r.ease ELSE MAX(1.3, r.ease - 0.2) END,
+         CASE WHEN o.correct = 0 THEN 0
+              WHEN r.repetitions = 0 THEN 1
+              WHEN r.repetitions = 1 THEN 6
+              ELSE CAST(ROUND(r.interval_days * r.ease) AS INTEGER) END,
+         CASE WHEN o.correct = 1 THEN r.repetitions + 1 ELSE 0 END,
+         o.created_at
+  FROM replay r
+  JOIN ordered o ON o.word_id = r.word_id AND o.n = r.n + 1
+)
+INSERT OR REPLACE INTO word_schedule (word_id, ease, interval_days, repetitions, next_due, last_reviewed_at)
+SELECT word_id, ease, interval_days, repetitions,
+       datetime(reviewed_at, '+' || interval_days || ' days'),
+       reviewed_at
+FROM (
+  SELECT word_id, MAX(n), ease, interval_days, repetitions, reviewed_at
+  FROM replay
+  GROUP BY word_id
+);
+
+-- Every word has a schedule row so the due queue can use an inner join
+CREATE TRIGGER IF NOT EXISTS trg_words_insert_word_schedule
+AFTER INSERT ON words
+BEGIN
+  INSERT OR IGNORE INTO word_schedule (word_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_delete_word_schedule
+AFTER DELETE ON words
+BEGIN
+  DELETE FROM word_schedule WHERE word_id = OLD.id;
+END;
+
+-- One SM-2 step per review. SET expressions all see the old row, so the new
+-- interval is computed from the previous repetitions and ease.
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_insert_word_schedule
+AFTER INSERT ON word_review_items
+BEGIN
+  INSERT OR IGNORE INTO word_schedule (word_id) VALUES (NEW.word_id);
+  UPDATE word_schedule
+  SET ease = CASE WHEN NEW.correct = 1 THEN ease ELSE MAX(1.3, ease - 0.2) END,
+      interval_days = CASE WHEN NEW.correct = 0 THEN 0
+                           WHEN repetitions = 0 THEN 1
+                           WHEN repetitions = 1 THEN 6
+                           ELSE CAST(ROUND(interval_days * ease) AS INTEGER) END,
+      repetitions = CASE WHEN NEW.correct = 1 THEN repetitions + 1 ELSE 0 END,
+      next_due = datetime(NEW.created_at, '+' || (CASE WHEN NEW.correct = 0 THEN 0
+                                                       WHEN repetitions = 0 THEN 1
+                                                       WHEN repetitions = 1 THEN 6
+                                                       ELSE CAST(ROUND(interval_days * ease) AS INTEGER) END) || ' days'),
+      last_reviewed_at = NEW.created_at
+  WHERE word_id = NEW.word_id;
+END;
@@ -0,0 +1,204 @@
+
+-- Students. Sessions and reviews carry the student they belong to; history
+-- recorded before this migration (or without a student) stays unassigned
+-- and only counts towards the global statistics.
+CREATE TABLE IF NOT EXISTS students (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  name TEXT NOT NULL UNIQUE,
+  created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE study_sessions ADD COLUMN student_id INTEGER REFERENCES students(id) ON DELETE CASCADE;
+
+-- Copied from the session when a review is written, so per-student reads
+-- never have to join through study_sessions
+ALTER TABLE word_review_items ADD COLUMN student_id INTEGER REFERENCES students(id) ON DELETE CASCADE;
+
+-- Every per-student lookup is a range seek on one of these
+CREATE INDEX IF NOT EXISTS idx_study_sessions_student_id_created_at
+  ON study_sessions (student_id, created_at);
+
+CREATE INDEX IF NOT EXISTS idx_study_sessions_student_id_group_id
+  ON study_sessions (student_id, group_id);
+
+CREATE INDEX IF NOT EXISTS idx_word_review_items_student_id_created_at
+  ON word_review_items (student_id, created_at);
+
+-- Per-student dashboard totals and streak (see 004 and 005 for the global ones)
+CREATE TABLE IF NOT EXISTS student_aggregates (
+  student_id INTEGER PRIMARY KEY,
+  total_reviews INTEGER NOT NULL DEFAULT 0,
+  correct_reviews INTEGER NOT NULL DEFAULT 0,
+  total_study_sessions INTEGER NOT NULL DEFAULT 0,
+  active_groups INTEGER NOT NULL DEFAULT 0,
+  words_studied INTEGER NOT NULL DEFAULT 0,
+  current_streak INTEGER NOT NULL DEFAULT 0,
+  last_study_date TEXT,
+  FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE
+);
+
+-- Per-student review counters, only for words the student has reviewed.
+-- Clustered on (student_id, word_id), so one student's rows are contiguous.
+CREATE TABLE IF NOT EXISTS student_word_stats (
+  student_id INTEGER NOT NULL,
+  word_id INTEGER NOT NULL,
+  correct_count INTEGER NOT NULL DEFAULT 0,
+  wrong_count INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (student_id, word_id)
+) WITHOUT ROWID;
+
+INSERT OR IGNORE INTO table_counters (name, scope_id, count)
+SELECT 'students', 0, COUNT(*) FROM students;
+
+CREATE TRIGGER IF NOT EXISTS trg_students_insert
+AFTER INSERT ON students
+BEGIN
+  INSERT OR IGNORE INTO student_aggregates (student_id) VALUES (NEW.id);
+  UPDATE table_counters SET count = count + 1 WHERE name = 'students' AND scope_id = 0;
+END;
+
+-- Removing a student removes their history; the history triggers keep the
+-- global statistics right on the way out
+CREATE TRIGGER IF NOT EXISTS trg_students_delete
+AFTER DELETE ON students
+BEGIN
+  DELETE FROM word_review_items WHERE student_id = OLD.id;
+  DELETE FROM study_sessions WHERE student_id = OLD.id;
+  DELETE FROM student_word_stats WHERE student_id = OLD.id;
+  DELETE FROM student_aggregates WHERE student_id = OLD.id;
+  UPDATE table_counters SET count = count - 1 WHERE name = 'students' AND scope_id = 0;
+END;
+
+-- Reviews. "First/last review of a word" is answered by the student's
+-- student_word_stats row, so no review history is scanned.
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_insert_student
+AFTER INSERT ON word_review_items
+WHEN NEW.student_id IS NOT NULL
+BEGIN
+  UPDATE student_aggregates
+  SET total_reviews = total_reviews + 1,
+      correct_reviews = correct_reviews + (CASE WHEN NEW.correct = 1 THEN 1 ELSE 0 END),
+      words_studied = words_studied + (CASE WHEN EXISTS (
+        SELECT 1 FROM student_word_stats WHERE student_id = NEW.student_id AND word_id = NEW.word_id
+      ) THEN 0 ELSE 1 END)
+  WHERE student_id = NEW.student_id;
+  INSERT INTO student_word_stats (student_id, word_id, correct_count, wrong_count)
+  VALUES (NEW.student_id, NEW.word_id,
+          CASE WHEN NEW.correct = 1 THEN 1 ELSE 0 END,
+          CASE WHEN NEW.correct = 0 THEN 1 ELSE 0 END)
+  ON CONFLICT (student_id, word_id) DO UPDATE SET
+    correct_count = correct_count + excluded.correct_count,
+    wrong_count = wrong_count + excluded.wrong_count;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_delete_student
+AFTER DELETE ON word_review_items
+WHEN OLD.student_id IS NOT NULL
+BEGIN
+  UPDATE student_word_stats
+  SET correct_count = correct_count - (CASE WHEN OLD.correct = 1 THEN 1 ELSE 0 END),
+      wrong_count = wrong_count - (CASE WHEN OLD.correct = 0 THEN 1 ELSE 0 END)
+  WHERE student_id = OLD.student_id AND word_id = OLD.word_id;
+  UPDATE student_aggregates
+  SET total_reviews = total_reviews - 1,
+      correct_reviews = correct_reviews - (CASE WHEN OLD.correct = 1 THEN 1 ELSE 0 END),
+      words_studied = words_studied - (CASE WHEN EXISTS (
+        SELECT 1 FROM student_word_stats
+        WHERE student_id = OLD.student_id AND word_id = OLD.word_id AND correct_count + wrong_count > 0
+      ) THEN 0 ELSE 1 END)
+  WHERE student_id = OLD.student_id;
+  DELETE FROM student_word_stats
+  WHERE student_id = OLD.student_id AND word_id = OLD.word_id AND correct_count + wrong_count = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_update_student
+AFTER UPDATE OF correct ON word_review_items
+WHEN NEW.student_id IS NOT NULL AND OLD.correct <> NEW.correct
+BEGIN
+  UPDATE student_word_stats
+  SET correct_count = correct_count + (CASE WHEN NEW.correct = 1 THEN 1 ELSE -1 END),
+      wrong_count = wrong_count + (CASE WHEN NEW.correct = 0 THEN 1 ELSE -1 END)
+  WHERE student_id = NEW.student_id AND word_id = NEW.word_id;
+  UPDATE student_aggregates
+  SET correct_reviews = correct_reviews + (CASE WHEN NEW.correct = 1 THEN 1 ELSE -1 END)
+  WHERE student_id = NEW.student_id;
+END;
+
+-- Sessions: totals, active groups (a seek on the (student_id, group_id)
+-- index) and the streak, maintained like the global one in 005 but only
+-- over the student's own sessions.
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_insert_student
+AFTER INSERT ON study_sessions
+WHEN NEW.student_id IS NOT NULL
+BEGIN
+  UPDATE student_aggregates
+  SET total_study_sessions = total_study_sessions + 1,
+      active_groups = active_groups + (CASE WHEN EXISTS (
+        SELECT 1 FROM study_sessions
+        WHERE student_id = NEW.student_id AND group_id = NEW.group_id AND id <> NEW.id
+      ) THEN 0 ELSE 1 END),
+      current_streak = CASE
+        WHEN NEW.created_at IS NULL THEN current_streak
+        WHEN last_study_date IS NULL THEN 1
+        WHEN DATE(NEW.created_at) = last_study_date THEN current_streak
+        WHEN DATE(NEW.created_at) = DATE(last_study_date, '+1 day') THEN current_streak + 1
+        WHEN DATE(NEW.created_at) > last_study_date THEN 1
+        ELSE current_streak
+      END,
+      last_study_date = CASE
+        WHEN NEW.created_at IS NOT NULL AND (last_study_date IS NULL OR DATE(NEW.created_at) > last_study_date)
+          THEN DATE(NEW.created_at)
+        ELSE last_study_date
+      END
+  WHERE student_id = NEW.student_id;
+
+  -- A backdated session may bridge an older gap: recompute that student's run
+  UPDATE student_aggregates
+  SET current_streak = COALESCE((
+        SELECT COUNT(*) FROM (
+          SELECT julianday(day) - ROW_NUMBER() OVER (ORDER BY day) AS island
+          FROM (
+            SELECT DISTINCT DATE(created_at) AS day FROM study_sessions
+            WHERE student_id = NEW.student_id AND created_at IS NOT NULL
+          )
+        )
+        GROUP BY island ORDER BY island DESC LIMIT 1
+      ), 0)
+  WHERE student_id = NEW.student_id AND DATE(NEW.created_at) < last_study_date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_delete_student
+AFTER DELETE ON study_sessions
+WHEN OLD.student_id IS NOT NULL
+BEGIN
+  UPDATE student_aggregates
+  SET total_study_sessions = total_study_sessions - 1,
+      active_groups = active_groups - (CASE WHEN EXISTS (
+        SELECT 1 FROM study_sessions WHERE student_id = OLD.student_id AND group_id = OLD.group_id
+      ) THEN 0 ELSE 1 END)
+  WHERE student_id = OLD.student_id;
+
+  -- Deleting the last session of a day inside the current run breaks it
+  UPDATE student_aggregates
+  SET last_study_date = (
+        SELECT MAX(DATE(created_at)) FROM study_sessions WHERE student_id = OLD.student_id
+      ),
+      current_streak = COALESCE((
+        SELECT COUNT(*) FROM (
+          SELECT julianday(day) - ROW_NUMBER() OVER (ORDER BY day) AS island
+          FROM (
+            SELECT DISTINCT DATE(created_at) AS day FROM study_sessions
+            WHERE student_id = OLD.student_id AND created_at IS NOT NULL
+          )
+        )
+        GROUP BY island ORDER BY island DESC LIMIT 1
+      ), 0)
+  WHERE student_id = OLD.student_id
+    AND OLD.created_at IS NOT NULL
+    AND DATE(OLD.created_at) > DATE(last_study_date, '-' || current_streak || ' days')
+    AND NOT EXISTS (
+      SELECT 1 FROM study_sessions
+      WHERE student_id = OLD.student_id
+        AND created_at >= DATE(OLD.created_at) AND created_at < DATE(OLD.created_at, '+1 day')
+    );
+END;
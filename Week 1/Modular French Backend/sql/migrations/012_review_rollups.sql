@@ -0,0 +1,160 @@
+
+-- Compacted review history (Db.compact_reviews): reviews older than the
+-- retention period are folded into one row per word, UTC day and student
+-- and deleted from word_review_items, which keeps the hot table small.
+-- The trigger-maintained statistics (word_stats, dashboard and student
+-- aggregates, word_schedule) are not touched by compaction, and everything
+-- that recomputes them reads raw rows plus rollups.
+CREATE TABLE IF NOT EXISTS review_rollups (
+  word_id INTEGER NOT NULL,
+  day TEXT NOT NULL,                      -- DATE(created_at)
+  student_id INTEGER NOT NULL DEFAULT 0,  -- 0: reviews without a student
+  correct_count INTEGER NOT NULL DEFAULT 0,
+  wrong_count INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (word_id, day, student_id),
+  FOREIGN KEY (word_id) REFERENCES words(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- Per-student rebuilds and student deletion
+CREATE INDEX IF NOT EXISTS idx_review_rollups_student_id_word_id
+  ON review_rollups (student_id, word_id);
+
+-- Review counts of compacted sessions, added to the raw counts wherever a
+-- session's number of reviews is shown
+ALTER TABLE study_sessions ADD COLUMN compacted_reviews INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE study_sessions ADD COLUMN compacted_correct INTEGER NOT NULL DEFAULT 0;
+
+-- Spaced-repetition state of each word after its compacted reviews, the
+-- starting point for replaying the remaining raw history (see migration 010)
+CREATE TABLE IF NOT EXISTS word_schedule_base (
+  word_id INTEGER PRIMARY KEY,
+  ease REAL NOT NULL,
+  interval_days INTEGER NOT NULL,
+  repetitions INTEGER NOT NULL,
+  reviewed_at DATETIME,
+  FOREIGN KEY (word_id) REFERENCES words(id) ON DELETE CASCADE
+);
+
+-- "First/last review of a word" now also looks for compacted reviews (a
+-- seek on the rollup primary key)
+DROP TRIGGER IF EXISTS trg_word_review_items_insert_dashboard;
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_insert_dashboard
+AFTER INSERT ON word_review_items
+BEGIN
+  UPDATE dashboard_aggregates
+  SET total_reviews = total_reviews + 1,
+      correct_reviews = correct_reviews + (CASE WHEN NEW.correct = 1 THEN 1 ELSE 0 END),
+      words_studied = words_studied + (CASE WHEN EXISTS (
+        SELECT 1 FROM word_review_items WHERE word_id = NEW.word_id AND id <> NEW.id
+      ) OR EXISTS (
+        SELECT 1 FROM review_rollups WHERE word_id = NEW.word_id
+      ) THEN 0 ELSE 1 END)
+  WHERE id = 1;
+  INSERT INTO dashboard_daily (day, reviews, correct_reviews)
+  VALUES (DATE(NEW.created_at), 1, CASE WHEN NEW.correct = 1 THEN 1 ELSE 0 END)
+  ON CONFLICT (day) DO UPDATE SET
+    reviews = reviews + 1,
+    correct_reviews = correct_reviews + excluded.correct_reviews;
+END;
+
+DROP TRIGGER IF EXISTS trg_word_review_items_delete_dashboard;
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_delete_dashboard
+AFTER DELETE ON word_review_items
+BEGIN
+  UPDATE dashboard_aggregates
+  SET total_reviews = total_reviews - 1,
+      correct_reviews = correct_reviews - (CASE WHEN OLD.correct = 1 THEN 1 ELSE 0 END),
+      words_studied = words_studied - (CASE WHEN EXISTS (
+        SELECT 1 FROM word_review_items WHERE word_id = OLD.word_id
+      ) OR EXISTS (
+        SELECT 1 FROM review_rollups WHERE word_id = OLD.word_id
+      ) THEN 0 ELSE 1 END)
+  WHERE id = 1;
+  UPDATE dashboard_daily
+  SET reviews = reviews - 1,
+      correct_reviews = correct_reviews - (CASE WHEN OLD.correct = 1 THEN 1 ELSE 0 END)
+  WHERE day = DATE(OLD.created_at);
+END;
+
+DROP TRIGGER IF EXISTS trg_word_review_items_update_dashboard;
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_update_dashboard
+AFTER UPDATE OF word_id, correct ON word_review_items
+BEGIN
+  UPDATE dashboard_aggregates
+  SET correct_reviews = correct_reviews
+        - (CASE WHEN OLD.correct = 1 THEN 1 ELSE 0 END)
+        + (CASE WHEN NEW.correct = 1 THEN 1 ELSE 0 END),
+      words_studied = words_studied
+        - (CASE WHEN OLD.word_id = NEW.word_id OR EXISTS (
+            SELECT 1 FROM word_review_items WHERE word_id = OLD.word_id
+          ) OR EXISTS (
+            SELECT 1 FROM review_rollups WHERE word_id = OLD.word_id
+          ) THEN 0 ELSE 1 END)
+        + (CASE WHEN OLD.word_id = NEW.word_id OR EXISTS (
+            SELECT 1 FROM word_review_items WHERE word_id = NEW.word_id AND id <> NEW.id
+          ) OR EXISTS (
+            SELECT 1 FROM review_rollups WHERE word_id = NEW.word_id
+          ) THEN 0 ELSE 1 END)
+  WHERE id = 1;
+  UPDATE dashboard_daily
+  SET correct_reviews = correct_reviews
+        - (CASE WHEN OLD.correct = 1 THEN 1 ELSE 0 END)
+        + (CASE WHEN NEW.correct = 1 THEN 1 ELSE 0 END)
+  WHERE day = DATE(NEW.created_at);
+END;
+
+-- Removing compacted history (reset, student deletion) takes it out of the
+-- statistics like removing the raw reviews would
+CREATE TRIGGER IF NOT EXISTS trg_review_rollups_delete
+AFTER DELETE ON review_rollups
+BEGIN
+  UPDATE word_stats
+  SET correct_count = correct_count - OLD.correct_count,
+      wrong_count = wrong_count - OLD.wrong_count
+  WHERE word_id = OLD.word_id;
+  UPDATE dashboard_aggregates
+  SET total_reviews = total_reviews - (OLD.correct_count + OLD.wrong_count),
+      correct_reviews = correct_reviews - OLD.correct_count,
+      words_studied = words_studied - (CASE WHEN EXISTS (
+        SELECT 1 FROM word_review_items WHERE word_id = OLD.word_id
+      ) OR EXISTS (
+        SELECT 1 FROM review_rollups WHERE word_id = OLD.word_id
+      ) THEN 0 ELSE 1 END)
+  WHERE id = 1;
+  UPDATE dashboard_daily
+  SET reviews = reviews - (OLD.correct_count + OLD.wrong_count),
+      correct_reviews = correct_reviews - OLD.correct_count
+  WHERE day = OLD.day;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_review_rollups_delete_student
+AFTER DELETE ON review_rollups
+WHEN OLD.student_id <> 0
+BEGIN
+  UPDATE student_word_stats
+  SET correct_count = correct_count - OLD.correct_count,
+      wrong_count = wrong_count - OLD.wrong_count
+  WHERE student_id = OLD.student_id AND word_id = OLD.word_id;
+  UPDATE student_aggregates
+  SET total_reviews = total_reviews - (OLD.correct_count + OLD.wrong_count),
+      correct_reviews = correct_reviews - OLD.correct_count,
+      words_studied = words_studied - (CASE WHEN EXISTS (
+        SELECT 1 FROM student_word_stats
+        WHERE student_id = OLD.student_id AND word_id = OLD.word_id AND correct_count + wrong_count > 0
+      ) THEN 0 ELSE 1 END)
+  WHERE student_id = OLD.student_id;
+  DELETE FROM student_word_stats
+  WHERE student_id = OLD.student_id AND word_id = OLD.word_id AND correct_count + wrong_count = 0;
+END;
+
+DROP TRIGGER IF EXISTS trg_students_delete;
+CREATE TRIGGER IF NOT EXISTS trg_students_delete
+AFTER DELETE ON students
+BEGIN
+  DELETE FROM word_review_items WHERE student_id = OLD.id;
+  DELETE FROM review_rollups WHERE student_id = OLD.id;
+  DELETE FROM study_sessions WHERE student_id = OLD.id;
+  DELETE FROM student_word_stats WHERE student_id = OLD.id;
+  DELETE FROM student_aggregates WHERE student_id = OLD.id;
+  UPDATE table_counters SET count = count - 1 WHERE name = 'students' AND scope_id = 0;
+END;
@@ -0,0 +1,42 @@
+
+-- Per-group due queue for next_words. word_schedule is keyed by word only,
+-- so picking one group's due words walked the global next_due index and
+-- probed words_groups for every due or new word of every group. Each group
+-- membership now carries a copy of its word's next_due, and the group's
+-- queue is a range of (group_id, next_due, word_id): LIMIT n stops after n
+-- rows of that group.
+ALTER TABLE words_groups ADD COLUMN next_due DATETIME;
+
+UPDATE words_groups
+SET next_due = s.next_due
+FROM word_schedule s
+WHERE s.word_id = words_groups.word_id AND s.next_due IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_words_groups_group_id_next_due_word_id
+  ON words_groups (group_id, next_due, word_id);
+
+-- A word joining a group brings its schedule along (new words stay NULL)
+CREATE TRIGGER IF NOT EXISTS trg_words_groups_insert_next_due
+AFTER INSERT ON words_groups
+WHEN (SELECT next_due FROM word_schedule WHERE word_id = NEW.word_id) IS NOT NULL
+BEGIN
+  UPDATE words_groups
+  SET next_due = (SELECT next_due FROM word_schedule WHERE word_id = NEW.word_id)
+  WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_groups_update_next_due
+AFTER UPDATE OF word_id ON words_groups
+BEGIN
+  UPDATE words_groups
+  SET next_due = (SELECT next_due FROM word_schedule WHERE word_id = NEW.word_id)
+  WHERE id = NEW.id;
+END;
+
+-- Every schedule change (reviews, reset_history) reaches the word's groups
+CREATE TRIGGER IF NOT EXISTS trg_word_schedule_update_next_due
+AFTER UPDATE OF next_due ON word_schedule
+WHEN NEW.next_due IS NOT OLD.next_due
+BEGIN
+  UPDATE words_groups SET next_due = NEW.next_due WHERE word_id = NEW.word_id;
+END;
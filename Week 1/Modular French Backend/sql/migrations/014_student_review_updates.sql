@@ -0,0 +1,54 @@
+-- Per-student counters under review updates. The 011 trigger only followed
+-- changes of `correct`: moving a review to another word, student or session
+-- left student_word_stats and student_aggregates counting the old row. An
+-- update now takes the old row out, like a delete, and puts the new one in,
+-- like an insert. A statement that names no student matches no row, so
+-- reviews without a student on either side are skipped.
+DROP TRIGGER IF EXISTS trg_word_review_items_update_student;
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_update_student
+AFTER UPDATE OF correct, word_id, student_id, study_session_id ON word_review_items
+WHEN OLD.correct IS NOT NEW.correct OR OLD.word_id IS NOT NEW.word_id
+  OR OLD.student_id IS NOT NEW.student_id OR OLD.study_session_id IS NOT NEW.study_session_id
+BEGIN
+  -- Out with the old row (see trg_word_review_items_delete_student)
+  UPDATE student_word_stats
+  SET correct_count = correct_count - (CASE WHEN OLD.correct = 1 THEN 1 ELSE 0 END),
+      wrong_count = wrong_count - (CASE WHEN OLD.correct = 0 THEN 1 ELSE 0 END)
+  WHERE student_id = OLD.student_id AND word_id = OLD.word_id;
+  UPDATE student_aggregates
+  SET total_reviews = total_reviews - 1,
+      correct_reviews = correct_reviews - (CASE WHEN OLD.correct = 1 THEN 1 ELSE 0 END),
+      words_studied = words_studied - (CASE WHEN EXISTS (
+        SELECT 1 FROM student_word_stats
+        WHERE student_id = OLD.student_id AND word_id = OLD.word_id AND correct_count + wrong_count > 0
+      ) THEN 0 ELSE 1 END)
+  WHERE student_id = OLD.student_id;
+  DELETE FROM student_word_stats
+  WHERE student_id = OLD.student_id AND word_id = OLD.word_id AND correct_count + wrong_count = 0;
+
+  -- A review's student is copied from its session when it is written, and
+  -- follows the review to another session. Recursive triggers are off, so
+  -- this doesn't fire the trigger again: the row as stored is counted below.
+  UPDATE word_review_items
+  SET student_id = (SELECT student_id FROM study_sessions WHERE id = NEW.study_session_id)
+  WHERE id = NEW.id AND OLD.study_session_id IS NOT NEW.study_session_id;
+
+  -- In with the new one (see trg_word_review_items_insert_student)
+  UPDATE student_aggregates
+  SET total_reviews = total_reviews + 1,
+      correct_reviews = correct_reviews + (CASE WHEN NEW.correct = 1 THEN 1 ELSE 0 END),
+      words_studied = words_studied + (CASE WHEN EXISTS (
+        SELECT 1 FROM student_word_stats sws
+        WHERE sws.student_id = student_aggregates.student_id AND sws.word_id = NEW.word_id
+      ) THEN 0 ELSE 1 END)
+  WHERE student_id = (SELECT student_id FROM word_review_items WHERE id = NEW.id);
+  INSERT INTO student_word_stats (student_id, word_id, correct_count, wrong_count)
+  SELECT student_id, word_id,
+         CASE WHEN correct = 1 THEN 1 ELSE 0 END,
+         CASE WHEN correct = 0 THEN 1 ELSE 0 END
+  FROM word_review_items
+  WHERE id = NEW.id AND student_id IS NOT NULL
+  ON CONFLICT (student_id, word_id) DO UPDATE SET
+    correct_count = correct_count + excluded.correct_count,
+    wrong_count = wrong_count + excluded.wrong_count;
+END;
@@ -0,0 +1,86 @@
+-- Out-of-order reviews. The 010 trigger applied one SM-2 step per insert, in
+-- insert order, while rebuild_word_schedule replays each word's history by
+-- created_at. A review dated before the word's last one (a batch with an old
+-- client_ts) left the two disagreeing and moved last_reviewed_at backwards.
+-- Such a review now replays the word's history, with the same view the
+-- rebuild uses, instead of stepping.
+
+-- The words the view below replays. Filled and emptied within one statement
+-- by the trigger, or one transaction by rebuild_word_schedule.
+CREATE TABLE IF NOT EXISTS word_schedule_replay_words (
+  word_id INTEGER PRIMARY KEY
+);
+
+-- Each listed word's SM-2 state after replaying its reviews in (created_at,
+-- id) order, starting from its compacted state (word_schedule_base, 012).
+-- With MAX(n), SQLite takes the bare columns from each word's last step.
+CREATE VIEW IF NOT EXISTS word_schedule_replay AS
+WITH RECURSIVE ordered AS MATERIALIZED (
+  SELECT word_id, correct, created_at,
+         ROW_NUMBER() OVER (PARTITION BY word_id ORDER BY created_at, id) AS n
+  FROM word_review_items
+  WHERE word_id IN (SELECT word_id FROM word_schedule_replay_words)
+),
+replay (word_id, n, ease, interval_days, repetitions, reviewed_at) AS (
+  SELECT w.word_id, 0, COALESCE(b.ease, 2.5), COALESCE(b.interval_days, 0),
+         COALESCE(b.repetitions, 0), b.reviewed_at
+  FROM word_schedule_replay_words w
+  LEFT JOIN word_schedule_base b ON b.word_id = w.word_id
+  UNION ALL
+  SELECT r.word_id, o.n,
+         CASE WHEN o.correct = 1 THEN r.ease ELSE MAX(1.3, r.ease - 0.2) END,
+         CASE WHEN o.correct = 0 THEN 0
+              WHEN r.repetitions = 0 THEN 1
+              WHEN r.repetitions = 1 THEN 6
+              ELSE CAST(ROUND(r.interval_days * r.ease) AS INTEGER) END,
+         CASE WHEN o.correct = 1 THEN r.repetitions + 1 ELSE 0 END,
+         o.created_at
+  FROM replay r
+  JOIN ordered o ON o.word_id = r.word_id AND o.n = r.n + 1
+)
+SELECT word_id, ease, interval_days, repetitions,
+       datetime(reviewed_at, '+' || interval_days || ' days') AS next_due,
+       reviewed_at AS last_reviewed_at
+FROM (
+  SELECT word_id, MAX(n), ease, interval_days, repetitions, reviewed_at
+  FROM replay
+  GROUP BY word_id
+);
+
+-- A review at or after the word's last one is the next SM-2 step, as in 010
+-- (ties go to the later id, as in the replay); an earlier one is not.
+DROP TRIGGER IF EXISTS trg_word_review_items_insert_word_schedule;
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_insert_word_schedule
+AFTER INSERT ON word_review_items
+BEGIN
+  INSERT OR IGNORE INTO word_schedule (word_id) VALUES (NEW.word_id);
+  UPDATE word_schedule
+  SET ease = CASE WHEN NEW.correct = 1 THEN ease ELSE MAX(1.3, ease - 0.2) END,
+      interval_days = CASE WHEN NEW.correct = 0 THEN 0
+                           WHEN repetitions = 0 THEN 1
+                           WHEN repetitions = 1 THEN 6
+                           ELSE CAST(ROUND(interval_days * ease) AS INTEGER) END,
+      repetitions = CASE WHEN NEW.correct = 1 THEN repetitions + 1 ELSE 0 END,
+      next_due = datetime(NEW.created_at, '+' || (CASE WHEN NEW.correct = 0 THEN 0
+                                                       WHEN repetitions = 0 THEN 1
+                                                       WHEN repetitions = 1 THEN 6
+                                                       ELSE CAST(ROUND(interval_days * ease) AS INTEGER) END) || ' days'),
+      last_reviewed_at = NEW.created_at
+  WHERE word_id = NEW.word_id AND (last_reviewed_at IS NULL OR last_reviewed_at <= NEW.created_at);
+END;
+
+-- An earlier review replays the word instead. Whichever of the two triggers
+-- fires first, only one of them applies: a step leaves last_reviewed_at at
+-- NEW.created_at, a replay leaves it after NEW.created_at.
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_replay_word_schedule
+AFTER INSERT ON word_review_items
+WHEN (SELECT last_reviewed_at FROM word_schedule WHERE word_id = NEW.word_id) > NEW.created_at
+BEGIN
+  INSERT OR IGNORE INTO word_schedule_replay_words (word_id) VALUES (NEW.word_id);
+  UPDATE word_schedule
+  SET ease = r.ease, interval_days = r.interval_days, repetitions = r.repetitions,
+      next_due = r.next_due, last_reviewed_at = r.last_reviewed_at
+  FROM word_schedule_replay r
+  WHERE word_schedule.word_id = NEW.word_id AND r.word_id = word_schedule.word_id;
+  DELETE FROM word_schedule_replay_words WHERE word_id = NEW.word_id;
+END;
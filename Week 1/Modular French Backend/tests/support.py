@@ -0,0 +1,88 @@
+# backend/tests/support.py
+"""
+Shared test fixtures. Importing this module makes the backend packages
+importable; the base classes give each test its own temporary directory
+and database, and close every pooled connection before removing them.
+
+    AppTestCase  an app from create_app() on a migrated, seeded database
+    DbTestCase   a standalone Db with the migrations applied, for tests
+                 of the schema and triggers that need no app
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Make the backend packages importable when run from anywhere
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from lib.db import Db, db
+
+
+def temporary_directory(add_cleanup, prefix=None):
+    """
+    Creates a temporary directory and registers its removal with
+    `add_cleanup` (a TestCase's addCleanup, or addClassCleanup).
+    """
+    path = tempfile.mkdtemp(prefix=prefix)
+    add_cleanup(shutil.rmtree, path)
+    return path
+
+
+class TempDirTestCase(unittest.TestCase):
+    """
+    Gives every test a fresh temporary directory in self.tmpdir.
+    """
+    TMPDIR_PREFIX = None
+
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = temporary_directory(self.addCleanup, self.TMPDIR_PREFIX)
+
+
+class AppTestCase(TempDirTestCase):
+    """
+    Every test gets an app on its own database (self.app, self.client,
+    self.database). CONFIG is applied over the test defaults; with
+    INITIALIZE = False the database is left for the test to prepare.
+    """
+    DATABASE = 'test.db'
+    CONFIG = {}
+    INITIALIZE = True
+
+    def setUp(self):
+        super().setUp()
+        self.database = os.path.join(self.tmpdir, self.DATABASE)
+        # Cleanups run last in, first out: connections close before the
+        # directory is removed
+        self.addCleanup(db.close_all)
+        if self.INITIALIZE:
+            self.app = self.make_app()
+            self.client = self.app.test_client()
+
+    def make_app(self, initialize=True, **config):
+        """
+        Creates an app on the test database, with `config` applied over
+        CONFIG, and applies the migrations and seed data unless told not to.
+        """
+        app = create_app({'DATABASE': self.database, 'PER_PAGE': 10, 'DB_SLOW_QUERY_MS': None,
+                          **self.CONFIG, **config})
+        if initialize:
+            with app.app_context():
+                db.initialize(app)
+        return app
+
+
+class DbTestCase(TempDirTestCase):
+    """
+    Every test gets its own migrated Db in self.db, without seed data.
+    """
+    DATABASE = 'test.db'
+
+    def setUp(self):
+        super().setUp()
+        self.db = Db(os.path.join(self.tmpdir, self.DATABASE))
+        self.addCleanup(self.db.close_all)
+        self.db.migrate()
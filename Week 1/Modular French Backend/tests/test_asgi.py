@@ -0,0 +1,250 @@
+# backend/tests/test_asgi.py
+"""
+Tests for the ASGI serving mode (asgi.py / lib/asgi.py): the adapter must
+return exactly what the WSGI app returns, stream request and response
+bodies, stop a response whose client has gone, and run slow views side by
+side instead of one after another.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import asyncio
+import json
+import os
+import threading
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import temporary_directory
+from asgi import create_asgi_app
+from lib.asgi import AsgiAdapter
+from lib.db import db
+
+
+async def call(app, method, path, query=b'', body=b'', headers=(), disconnect_after=None):
+    """
+    Sends one HTTP request through an ASGI app and collects the response.
+    `body` may be a list of chunks, sent as separate http.request messages.
+    Like a server, receive() reports http.disconnect once the response is
+    complete, or after `disconnect_after` response body messages.
+    Returns (status, headers dict, body, number of body messages).
+    """
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'root_path': '',
+        'query_string': query, 'http_version': '1.1', 'scheme': 'http',
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 1234),
+        'headers': [(b'host', b'testserver')] + list(headers),
+    }
+    chunks = [body] if isinstance(body, bytes) else list(body)
+    requests = [{'type': 'http.request', 'body': chunk, 'more_body': i < len(chunks) - 1}
+                for i, chunk in enumerate(chunks)]
+    messages = []
+    gone = asyncio.Event()
+
+    async def receive():
+        if requests:
+            return requests.pop(0)
+        await gone.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if gone.is_set():
+            return # Servers drop messages to a closed connection
+        messages.append(message)
+        if message['type'] == 'http.response.body' and (
+                not message['more_body'] or len(messages) - 1 == disconnect_after):
+            gone.set()
+            await asyncio.sleep(0.01) # Let the adapter see the disconnect
+
+    await app(scope, receive, send)
+    start = messages[0]
+    chunks = [m['body'] for m in messages[1:]]
+    return start['status'], {k.decode(): v.decode() for k, v in start['headers']}, b''.join(chunks), len(chunks)
+
+
+async def lifespan(app, phase):
+    """
+    Runs one lifespan phase ('startup' or 'shutdown') and returns the reply.
+    """
+    replies = []
+    queue = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+    if phase == 'shutdown':
+        queue.pop(0)
+
+    async def receive():
+        return queue.pop(0)
+
+    async def send(message):
+        replies.append(message['type'])
+        if message['type'] == 'lifespan.startup.complete':
+            raise asyncio.CancelledError # Stop after startup without shutting down
+
+    try:
+        await app({'type': 'lifespan'}, receive, send)
+    except asyncio.CancelledError:
+        pass
+    return replies[0]
+
+
+class AsgiTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = temporary_directory(cls.addClassCleanup)
+        cls.addClassCleanup(db.close_all)
+        cls.asgi_app = create_asgi_app({
+            'DATABASE': os.path.join(cls.tmpdir, 'asgi.db'),
+            'PER_PAGE': 100,
+            'EXPORT_BATCH_SIZE': 2,
+        })
+        cls.flask_app = cls.asgi_app.wsgi_app
+        # Startup applies the migrations and seeds the sample data
+        assert asyncio.run(lifespan(cls.asgi_app, 'startup')) == 'lifespan.startup.complete'
+
+    @classmethod
+    def tearDownClass(cls):
+        asyncio.run(lifespan(cls.asgi_app, 'shutdown'))
+
+    def assertSameAsWsgi(self, path, query=''):
+        status, headers, body, _ = asyncio.run(call(self.asgi_app, 'GET', path, query.encode()))
+        expected = self.flask_app.test_client().get(f'{path}?{query}' if query else path)
+        self.assertEqual(status, expected.status_code)
+        self.assertEqual(headers['content-type'], expected.headers['Content-Type'])
+        self.assertEqual(body, expected.get_data())
+
+    def test_json_contracts_match_wsgi(self):
+        for path, query in (
+            ('/api', ''),
+            ('/api/dashboard/quick-stats', ''),
+            ('/api/words', 'sort_by=english&order=desc'),
+            ('/api/words/search', 'q=bonjour'),
+            ('/api/groups', ''),
+            ('/api/groups/1/words', 'page=1'),
+            ('/api/study_activities', ''),
+            ('/api/study_sessions', ''),
+            ('/api/words/999999', ''),
+        ):
+            with self.subTest(path=path):
+                self.assertSameAsWsgi(path, query)
+
+    def start_session(self):
+        status, _, body, _ = asyncio.run(call(
+            self.asgi_app, 'POST', '/api/study_activities',
+            body=json.dumps({'group_id': 1, 'study_activity_id': 1}).encode(),
+            headers=[(b'content-type', b'application/json')]
+        ))
+        self.assertEqual(status, 201, body)
+        return json.loads(body)['study_session_id']
+
+    def test_post_body_and_conditional_get(self):
+        session_id = self.start_session()
+        self.assertSameAsWsgi(f'/api/study_sessions/{session_id}')
+
+        _, headers, _, _ = asyncio.run(call(self.asgi_app, 'GET', '/api/groups'))
+        status, _, body, _ = asyncio.run(call(
+            self.asgi_app, 'GET', '/api/groups', headers=[(b'if-none-match', headers['etag'].encode())]
+        ))
+        self.assertEqual((status, body), (304, b''))
+
+    def test_exports_are_streamed(self):
+        for _ in range(5):
+            self.start_session()
+        status, headers, body, messages = asyncio.run(call(self.asgi_app, 'GET', '/api/export/sessions'))
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['content-type'], 'application/x-ndjson')
+        expected = self.flask_app.test_client().get('/api/export/sessions').get_data()
+        self.assertEqual(body, expected)
+        self.assertGreater(messages, 1)
+
+    def test_disconnect_stops_an_export(self):
+        for _ in range(5):
+            self.start_session()
+        produced, closed = [], []
+        def tracking_app(environ, start_response):
+            result = self.flask_app(environ, start_response)
+            def chunks():
+                try:
+                    for chunk in result:
+                        produced.append(chunk)
+                        yield chunk
+                finally:
+                    closed.append(True)
+                    result.close()
+            return chunks()
+
+        adapter = AsgiAdapter(tracking_app, max_threads=1)
+        status, _, _, messages = asyncio.run(call(adapter, 'GET', '/api/export/sessions', disconnect_after=1))
+        adapter.executor.shutdown()
+        full = self.flask_app.test_client().get('/api/export/sessions', buffered=False)
+        batches = len(list(full.response))
+        full.close()
+        self.assertEqual((status, messages), (200, 1))
+        self.assertEqual(closed, [True])
+        self.assertLess(len(produced), batches)
+
+    def test_request_body_is_streamed(self):
+        received = []
+        def reading_app(environ, start_response):
+            stream = environ['wsgi.input']
+            received.append(stream.read(3))
+            received.append(stream.read())
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [str(environ.get('CONTENT_LENGTH')).encode()]
+
+        adapter = AsgiAdapter(reading_app, max_threads=1)
+        _, _, body, _ = asyncio.run(call(adapter, 'POST', '/upload', body=[b'abcdef', b'', b'ghi']))
+        adapter.executor.shutdown()
+        self.assertEqual(received, [b'abc', b'defghi'])
+        # A chunked upload has no length; the body ends where the client's does
+        self.assertEqual(body, b'None')
+
+    def test_word_import_over_asgi(self):
+        lines = [json.dumps({'french_word': f'mot{i}', 'quebec_pronunciation': f'mo{i}', 'english': f'word{i}'})
+                 for i in range(50)]
+        chunks = [('\n'.join(lines[i:i + 10]) + '\n').encode() for i in range(0, 50, 10)]
+        status, _, body, _ = asyncio.run(call(
+            self.asgi_app, 'POST', '/api/admin/import_words', b'group_name=Streamed&format=ndjson', chunks
+        ))
+        self.assertEqual(status, 201, body)
+        self.assertEqual(json.loads(body)['words_imported'], 50)
+
+    def test_upload_cut_short_imports_nothing(self):
+        scope = {
+            'type': 'http', 'method': 'POST', 'path': '/api/admin/import_words', 'root_path': '',
+            'query_string': b'group_name=Abandoned&format=ndjson', 'headers': [],
+        }
+        requests = [
+            {'type': 'http.request', 'body': b'{"french_word": "a", "quebec_pronunciation": "a", "english": "a"}\n',
+             'more_body': True},
+            {'type': 'http.disconnect'},
+        ]
+        messages = []
+        async def receive():
+            return requests.pop(0) if requests else {'type': 'http.disconnect'}
+        async def send(message):
+            messages.append(message)
+        asyncio.run(self.asgi_app(scope, receive, send))
+        self.assertEqual(messages, [])
+        with self.flask_app.app_context():
+            group = db.cursor().execute("SELECT id FROM groups WHERE name = 'Abandoned'").fetchone()
+        self.assertIsNone(group)
+
+    def test_slow_views_run_concurrently(self):
+        # Four views that each wait for all the others can only finish if
+        # the adapter runs them at the same time
+        barrier = threading.Barrier(4, timeout=5)
+        def slow_app(environ, start_response):
+            barrier.wait()
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [environ['PATH_INFO'].encode()]
+
+        adapter = AsgiAdapter(slow_app, max_threads=4)
+        async def run_all():
+            return await asyncio.gather(*(call(adapter, 'GET', f'/slow/{i}') for i in range(4)))
+        results = asyncio.run(run_all())
+        self.assertEqual([body for _, _, body, _ in results], [f'/slow/{i}'.encode() for i in range(4)])
+        adapter.executor.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+# backend/tests/test_dashboard.py
+"""
+Tests for the dashboard's precomputed data: the in-process payload cache
+(lib/cache.py) stays bounded, and GET /api/dashboard/daily reads the
+dashboard_daily rollup (migration 004), which must match the history it
+summarizes.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import os
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import AppTestCase
+from lib.cache import WriteInvalidatedCache
+from lib.db import db
+
+SESSIONS = [
+    # (group_id, created_at, [(word_id, correct, created_at)])
+    (1, '2025-03-08 10:00:00', [(1, True, '2025-03-08 10:01:00'), (2, False, '2025-03-08 10:02:00')]),
+    (2, '2025-03-08 23:59:00', [(3, True, '2025-03-09 00:00:30.500000')]),
+    (1, '2025-03-10 09:00:00.250000', [(1, True, '2025-03-10 09:01:00'), (4, True, '2025-03-10 09:02:00'),
+                                       (5, False, '2025-03-10 09:03:00')]),
+]
+
+
+class FakeDb:
+    """
+    Stands in for Db: only the data version matters to the cache.
+    """
+    version = 1
+
+    def data_version(self):
+        return self.version
+
+
+class WriteInvalidatedCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.db = FakeDb()
+        self.cache = WriteInvalidatedCache(self.db, max_entries=3)
+        self.computed = []
+
+    def get(self, key):
+        def compute():
+            self.computed.append(key)
+            return (key, self.db.version)
+        return self.cache.get_or_compute(key, compute)
+
+    def test_entries_are_bounded(self):
+        for day in range(10):
+            self.get(('quick_stats', None, day))
+        self.assertEqual(len(self.cache), 3)
+        # The oldest keys were evicted, the newest are still cached
+        self.get(('quick_stats', None, 9))
+        self.get(('quick_stats', None, 0))
+        self.assertEqual(self.computed[10:], [('quick_stats', None, 0)])
+        self.assertEqual(len(self.cache), 3)
+
+    def test_least_recently_used_is_evicted(self):
+        for key in ('a', 'b', 'c'):
+            self.get(key)
+        self.get('a') # Now the most recently used
+        self.get('d') # Evicts 'b'
+        self.computed.clear()
+        for key in ('a', 'c', 'd'):
+            self.get(key)
+        self.assertEqual(self.computed, [])
+        self.get('b')
+        self.assertEqual(self.computed, ['b'])
+
+    def test_writes_invalidate(self):
+        self.assertEqual(self.get('a'), ('a', 1))
+        self.db.version = 2
+        self.assertEqual(self.get('a'), ('a', 2))
+        self.assertEqual(self.computed, ['a', 'a'])
+        self.assertEqual(len(self.cache), 1)
+
+
+class DailyActivityTestCase(AppTestCase):
+    CONFIG = {'DASHBOARD_CACHE_SIZE': 5}
+
+    def setUp(self):
+        super().setUp()
+        with db.transaction() as cursor:
+            for group_id, created_at, reviews in SESSIONS:
+                cursor.execute('INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (?, 1, ?)',
+                               (group_id, created_at))
+                db.insert_reviews(cursor, cursor.lastrowid, reviews, reviews[-1][2])
+
+    def daily(self, **params):
+        response = self.client.get('/api/dashboard/daily', query_string=params)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def recount(self):
+        """
+        Days recomputed from the raw history, as the rollup should have them.
+        """
+        return [tuple(row) for row in db.get().execute('''
+            SELECT day, SUM(sessions), SUM(reviews), SUM(correct)
+            FROM (
+              SELECT DATE(created_at) AS day, 1 AS sessions, 0 AS reviews, 0 AS correct FROM study_sessions
+              UNION ALL
+              SELECT DATE(created_at), 0, 1, correct FROM word_review_items
+            )
+            GROUP BY day ORDER BY day
+        ''')]
+
+    def test_days_match_the_history(self):
+        result = self.daily()
+        self.assertEqual([(day['day'], day['study_sessions'], day['reviews'], day['correct_reviews'])
+                          for day in result['days']], self.recount())
+        self.assertEqual([day['day'] for day in result['days']], ['2025-03-08', '2025-03-09', '2025-03-10'])
+        self.assertEqual(result['days'][0]['success_rate_percentage'], 50.0)
+        self.assertEqual(result['totals'], {'study_sessions': 3, 'reviews': 6, 'correct_reviews': 4,
+                                            'active_days': 3, 'success_rate_percentage': 66.67})
+        # The overall totals agree with the quick stats
+        quick_stats = self.client.get('/api/dashboard/quick-stats').get_json()
+        self.assertEqual(quick_stats['success_rate_percentage'], result['totals']['success_rate_percentage'])
+        self.assertEqual(quick_stats['total_study_sessions'], result['totals']['study_sessions'])
+
+    def test_date_range(self):
+        self.assertEqual([day['day'] for day in self.daily(since='2025-03-09')['days']], ['2025-03-09', '2025-03-10'])
+        self.assertEqual([day['day'] for day in self.daily(until='2025-03-09')['days']], ['2025-03-08'])
+        result = self.daily(since='2025-03-09', until='2025-03-10')
+        self.assertEqual(result['totals'], {'study_sessions': 0, 'reviews': 1, 'correct_reviews': 1,
+                                            'active_days': 1, 'success_rate_percentage': 100.0})
+        self.assertEqual(self.daily(since='2025-04-01')['totals']['success_rate_percentage'], 0.0)
+        for params in ({'since': 'last week'}, {'until': '2025-03-10T12:00:00'}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/dashboard/daily', query_string=params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_rollup_follows_deletes_and_compaction(self):
+        with db.transaction() as cursor:
+            cursor.execute("DELETE FROM word_review_items WHERE created_at LIKE '2025-03-09%'")
+            cursor.execute("DELETE FROM study_sessions WHERE created_at LIKE '2025-03-08 10%'")
+        result = self.daily()
+        # Days left without history are omitted
+        self.assertEqual([(day['day'], day['study_sessions'], day['reviews'], day['correct_reviews'])
+                          for day in result['days']], self.recount())
+        self.assertEqual([day['day'] for day in result['days']], ['2025-03-08', '2025-03-10'])
+
+        db.compact_reviews('2025-03-11')
+        self.assertEqual(db.get().execute('SELECT COUNT(*) FROM word_review_items').fetchone()[0], 0)
+        self.assertEqual(self.daily(), result)
+
+    def test_cache_size_is_configured(self):
+        dashboard_cache = self.app.extensions['dashboard_cache']
+        self.assertEqual(dashboard_cache.max_entries, 5)
+        for student in range(1, 9):
+            self.client.post('/api/students', json={'name': f'Student {student}'})
+            self.client.get(f'/api/students/{student}/dashboard/study_progress')
+        self.assertLessEqual(len(dashboard_cache), 5)
+
+    def test_apps_do_not_share_cached_payloads(self):
+        stats = self.client.get('/api/dashboard/quick-stats').get_json()
+        self.assertEqual(stats['total_study_sessions'], 3)
+        with self.app.app_context():
+            version = db.data_version()
+        # Another app on an empty database that happens to be at the same data version
+        other = self.make_app(DATABASE=os.path.join(self.tmpdir, 'other.db'))
+        with other.app_context():
+            with db.transaction() as cursor:
+                cursor.execute('UPDATE data_version SET version = ? WHERE id = 1', (version - 1,))
+            self.assertEqual(db.data_version(), version)
+        stats = other.test_client().get('/api/dashboard/quick-stats').get_json()
+        self.assertEqual(stats['total_study_sessions'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+# backend/tests/test_db_pool.py
+"""
+Tests for the per-thread connection pool (Db._checkout / _checkin /
+close_all): a thread gets its own connection back, a checkin never leaves a
+transaction open, and broken, inherited or closed-down connections are never
+handed out again.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import sqlite3
+import threading
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import DbTestCase
+
+
+class DbPoolTestCase(DbTestCase):
+
+    def checkout_on_other_thread(self):
+        result = []
+        thread = threading.Thread(target=lambda: result.append(self.db._checkout()))
+        thread.start()
+        thread.join(5)
+        return result[0]
+
+    def assertClosed(self, conn):
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute('SELECT 1')
+
+    def test_connection_is_reused_on_the_same_thread(self):
+        conn = self.db._checkout()
+        self.db._checkin(conn)
+        self.assertIs(self.db._checkout(), conn)
+        # The read-only connection is pooled separately
+        reader = self.db._checkout(read_only=True)
+        self.assertIsNot(reader, conn)
+        self.assertIs(self.db._checkout(read_only=True), reader)
+        # Another thread gets a connection of its own
+        self.assertIsNot(self.checkout_on_other_thread(), conn)
+        self.assertEqual(len(self.db._connections), 3)
+
+    def test_checkin_rolls_back_an_open_transaction(self):
+        conn = self.db._checkout()
+        conn.execute('BEGIN')
+        conn.execute("INSERT INTO groups (name) VALUES ('Unfinished')")
+        self.db._checkin(conn)
+        self.assertFalse(conn.in_transaction)
+        self.assertIs(self.db._checkout(), conn)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM groups WHERE name = 'Unfinished'").fetchone()[0], 0)
+
+    def test_health_check_drops_a_closed_connection(self):
+        self.db.health_check_interval = -1 # Check on every checkout
+        conn = self.db._checkout()
+        self.assertIs(self.db._checkout(), conn) # Healthy, so kept
+        conn.close()
+        replacement = self.db._checkout()
+        self.assertIsNot(replacement, conn)
+        self.assertEqual(replacement.execute('SELECT 1').fetchone()[0], 1)
+        self.assertEqual(self.db._connections, {replacement})
+
+    def test_pid_change_discards_inherited_connections(self):
+        conn = self.db._checkout()
+        self.db._pid = -1 # As if this were a forked worker
+        fresh = self.db._checkout()
+        self.assertIsNot(fresh, conn)
+        self.assertEqual(self.db._connections, {fresh})
+        # Forgotten, not closed: the inherited one belongs to the parent
+        self.assertEqual(conn.execute('SELECT 1').fetchone()[0], 1)
+        conn.close()
+
+    def test_close_all_closes_every_pooled_connection(self):
+        connections = [self.db._checkout(), self.db._checkout(read_only=True), self.checkout_on_other_thread()]
+        self.db.close_all()
+        for conn in connections:
+            self.assertClosed(conn)
+        self.assertEqual(self.db._connections, set())
+        # The pool starts over with new connections
+        self.assertNotIn(self.db._checkout(), connections)
+
+
+if __name__ == '__main__':
+    unittest.main()
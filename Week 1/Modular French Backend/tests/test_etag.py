@@ -0,0 +1,73 @@
+# backend/tests/test_etag.py
+"""
+Tests for conditional GET (lib/etag.py): a matching If-None-Match answers
+304, and any write, migration or response format change produces a new ETag.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import sqlite3
+import unittest
+from unittest import mock
+
+# Shared fixtures; this also makes the backend packages importable
+from support import AppTestCase
+from lib import etag
+
+
+class ConditionalGetTestCase(AppTestCase):
+
+    def tag(self, path='/api/groups'):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+        return response.headers['ETag']
+
+    def revalidate(self, tag, path='/api/groups'):
+        return self.client.get(path, headers={'If-None-Match': tag})
+
+    def test_if_none_match(self):
+        tag = self.tag()
+        for header in (tag, f'"other", {tag}', f'W/{tag}', '*'):
+            with self.subTest(header=header):
+                response = self.revalidate(header)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.get_data(), b'')
+                self.assertEqual(response.headers['ETag'], tag)
+        response = self.revalidate('"v0.0.0"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['ETag'], tag)
+
+    def test_write_produces_a_new_tag(self):
+        tag = self.tag()
+        response = self.client.post('/api/study_activities', json={'group_id': 1, 'study_activity_id': 1})
+        self.assertEqual(response.status_code, 201)
+        response = self.revalidate(tag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], tag)
+        # Every endpoint moves on together, whatever the write touched
+        self.assertEqual(self.revalidate(response.headers['ETag'], '/api/words').status_code, 304)
+
+    def test_migration_produces_a_new_tag(self):
+        tag = self.tag()
+        conn = sqlite3.connect(self.database)
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        conn.execute(f'PRAGMA user_version = {version + 1}')
+        conn.close()
+        self.assertEqual(self.revalidate(tag).status_code, 200)
+
+    def test_response_version_produces_a_new_tag(self):
+        tag = self.tag()
+        with mock.patch.object(etag, 'RESPONSE_VERSION', etag.RESPONSE_VERSION + 1):
+            response = self.revalidate(tag)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.revalidate(response.headers['ETag']).status_code, 304)
+
+    def test_errors_are_not_tagged(self):
+        response = self.client.get('/api/groups/99999')
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+# backend/tests/test_export.py
+"""
+Tests for the study history exports (routes/export.py): NDJSON and CSV carry
+the same records, ?since= is inclusive and ?until= exclusive whatever the
+bound's precision or time zone, and a streamed export is a consistent
+snapshot that doesn't hold up writes made while it is being downloaded.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import csv
+import io
+import json
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import AppTestCase
+from lib.db import db
+from lib.utils import _format_datetime
+from routes.export import REVIEW_FIELDS, SESSION_FIELDS
+
+# Review times: whole seconds (as CURRENT_TIMESTAMP writes them) and
+# microseconds, around midnight and on a bound used below
+REVIEW_TIMES = [
+    '2025-03-09 23:59:59', '2025-03-10 00:00:00', '2025-03-10 00:00:00.000001',
+    '2025-03-10 12:00:00', '2025-03-10 12:00:00.500000', '2025-03-10 12:00:01',
+    '2025-03-11 08:30:00.250000', '2025-03-11 23:59:59.999999', '2025-03-12 00:00:00',
+]
+
+
+class ExportTestCase(AppTestCase):
+    CONFIG = {'EXPORT_BATCH_SIZE': 2}
+
+    def setUp(self):
+        super().setUp()
+        with db.transaction() as cursor:
+            cursor.executemany('INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (?, ?, ?)',
+                               [(1, 1, '2025-03-09 23:59:00'), (2, 2, '2025-03-10 12:00:00'),
+                                (1, 2, '2025-03-11 08:00:00.500000')])
+            self.sessions = [row[0] for row in cursor.execute('SELECT id FROM study_sessions ORDER BY id')]
+            # Inserted out of time order: exports sort by created_at, then id
+            reviews = [(self.sessions[n % 3], n % 5 + 1, n % 2 == 0, created_at)
+                       for n, created_at in enumerate(reversed(REVIEW_TIMES))]
+            cursor.executemany('INSERT INTO word_review_items (study_session_id, word_id, correct, created_at) '
+                               'VALUES (?, ?, ?, ?)', reviews)
+
+    def export(self, path, **params):
+        response = self.client.get(path, query_string=params)
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        return response
+
+    def ndjson(self, path, **params):
+        response = self.export(path, **params)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    def csv(self, path, **params):
+        response = self.export(path, format='csv', **params)
+        self.assertEqual(response.mimetype, 'text/csv')
+        return list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+
+    def review_times(self, **params):
+        return [review['created_at'] for review in self.ndjson('/api/export/reviews', **params)]
+
+    def test_ndjson_reviews(self):
+        response = self.export('/api/export/reviews')
+        self.assertEqual(response.headers['Content-Disposition'], 'attachment; filename="reviews.ndjson"')
+        reviews = self.ndjson('/api/export/reviews')
+        self.assertEqual(len(reviews), len(REVIEW_TIMES))
+        self.assertEqual([list(review) for review in reviews], [sorted(REVIEW_FIELDS)] * len(reviews))
+        # Chronological, with times as ISO 8601 UTC
+        self.assertEqual([review['created_at'] for review in reviews],
+                         [_format_datetime(created_at) for created_at in REVIEW_TIMES])
+        self.assertEqual(reviews[4]['created_at'], '2025-03-10T12:00:00.500000Z')
+        stored = {row['id']: row for row in db.get().execute(
+            'SELECT wri.*, w.french_word, w.english FROM word_review_items wri JOIN words w ON w.id = wri.word_id')}
+        for review in reviews:
+            row = stored[review['id']]
+            self.assertIs(review['correct'], bool(row['correct']))
+            self.assertEqual((review['study_session_id'], review['word_id'], review['french_word'], review['english']),
+                             (row['study_session_id'], row['word_id'], row['french_word'], row['english']))
+
+    def test_csv_matches_ndjson(self):
+        for name, fields in (('reviews', REVIEW_FIELDS), ('sessions', SESSION_FIELDS)):
+            with self.subTest(name=name):
+                path = f'/api/export/{name}'
+                records = self.ndjson(path)
+                rows = self.csv(path)
+                self.assertEqual(rows[0], list(fields))
+                self.assertEqual(rows[1:], [['' if record[field] is None else str(record[field]) for field in fields]
+                                            for record in records])
+                self.assertEqual(self.export(path, format='csv').headers['Content-Disposition'],
+                                 f'attachment; filename="{name}.csv"')
+
+    def test_sessions(self):
+        sessions = self.ndjson('/api/export/sessions')
+        self.assertEqual([session['id'] for session in sessions], self.sessions)
+        self.assertEqual(sum(session['number_of_review_items'] for session in sessions), len(REVIEW_TIMES))
+        self.assertEqual(sessions[2]['start_time'], '2025-03-11T08:00:00.500000Z')
+        self.assertEqual([session['id'] for session in self.ndjson('/api/export/sessions', since='2025-03-10',
+                                                                   until='2025-03-11T08:00:00.5Z')],
+                         [self.sessions[1]])
+
+    def test_range_bounds(self):
+        everything = self.review_times()
+        cases = {
+            # ?since= is inclusive, ?until= exclusive
+            ('2025-03-10', '2025-03-11'): everything[1:6],
+            ('2025-03-10T12:00:00', '2025-03-10T12:00:01'): everything[3:5],
+            ('2025-03-10T12:00:00.5', None): everything[4:],
+            (None, '2025-03-10T12:00:00.500001Z'): everything[:5],
+            ('2025-03-10T00:00:00.000001Z', '2025-03-12'): everything[2:8],
+            # Other time zones are converted to UTC
+            ('2025-03-10T14:00:00+02:00', '2025-03-10T08:00:01-04:00'): everything[3:5],
+            ('2025-03-12', None): everything[8:],
+            ('2025-03-13', None): [],
+        }
+        for (since, until), expected in cases.items():
+            with self.subTest(since=since, until=until):
+                params = {key: value for key, value in (('since', since), ('until', until)) if value}
+                self.assertEqual(self.review_times(**params), expected)
+                self.assertEqual(len(self.csv('/api/export/reviews', **params)), len(expected) + 1)
+
+    def test_invalid_parameters(self):
+        for params in ({'since': 'yesterday'}, {'until': '2025-13-01'}, {'format': 'xml'}):
+            with self.subTest(params=params):
+                for path in ('/api/export/reviews', '/api/export/sessions'):
+                    response = self.client.get(path, query_string=params)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn('error', response.get_json())
+
+    def test_streamed_while_writing(self):
+        expected = self.ndjson('/api/export/reviews')
+        response = self.client.get('/api/export/reviews', buffered=False)
+        chunks = iter(response.response)
+        received = next(chunks) # One batch of EXPORT_BATCH_SIZE rows
+        self.assertEqual(len(received.splitlines()), 2)
+
+        # Writes go through while the export is still open...
+        with db.transaction() as cursor:
+            cursor.execute('DELETE FROM word_review_items WHERE id = ?', (expected[-1]['id'],))
+            cursor.execute("INSERT INTO word_review_items (study_session_id, word_id, correct, created_at) "
+                           "VALUES (?, 1, 1, '2025-03-10 06:00:00')", (self.sessions[0],))
+        session_id = self.client.post('/api/study_activities', json={'group_id': 1, 'study_activity_id': 1}) \
+            .get_json()['study_session_id']
+        review = self.client.post(f'/api/study_sessions/{session_id}/words/2/review', json={'correct': True})
+        self.assertEqual(review.status_code, 201)
+
+        # ...and don't show up in it: the export reads one snapshot
+        received += b''.join(chunks)
+        response.close()
+        self.assertEqual([json.loads(line) for line in received.splitlines()], expected)
+
+        after = self.ndjson('/api/export/reviews')
+        self.assertEqual(len(after), len(expected) + 1)
+        self.assertNotIn(expected[-1]['id'], [row['id'] for row in after])
+        self.assertIn(review.get_json()['review_item_id'], [row['id'] for row in after])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+# backend/tests/test_json_provider.py
+"""
+Tests for the JSON providers (lib/json_provider.py): orjson output must
+decode to exactly what the stdlib provider produces, dates and Decimals
+included, and the app must fall back to the stdlib when orjson is missing.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import datetime
+import decimal
+import importlib.util
+import json
+import sqlite3
+import sys
+import unittest
+import uuid
+from unittest import mock
+
+# Shared fixtures; this also makes the backend packages importable
+from support import AppTestCase
+from flask import Flask
+from lib import json_provider
+from lib.db import db
+
+HAS_ORJSON = json_provider.orjson is not None
+
+PATHS = [
+    '/api/words?sort_by=correct_count&order=desc',
+    '/api/words/1',
+    '/api/words/search?q=ca%20va',
+    '/api/groups',
+    '/api/study_sessions',
+    '/api/study_sessions/1',
+    '/api/dashboard/quick-stats',
+    '/api/dashboard/study_progress',
+    '/api/dashboard/last_study_session',
+]
+
+
+def sample_row():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    return conn.execute("SELECT 1 AS id, 'Ça va?' AS french_word, 2.5 AS ease, NULL AS next_due").fetchone()
+
+
+@unittest.skipUnless(HAS_ORJSON, 'orjson is not installed')
+class ProviderParityTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.stdlib = json_provider.RowJSONProvider(self.app)
+        self.orjson = json_provider.OrjsonProvider(self.app)
+
+    def assertSameJSON(self, obj):
+        expected = self.stdlib.dumps(obj)
+        actual = self.orjson.dumps(obj)
+        self.assertEqual(json.loads(actual), json.loads(expected))
+        return expected, actual
+
+    def test_values(self):
+        values = [
+            {'b': 1, 'a': [1, 2.5, None, True, False], 'c': {'z': 'é', 'y': []}},
+            'Ça va? « guillemets »   "quotes" <script>',
+            [0.1, 1e16, 1e-7, -0.0, 123456789.123],
+            [2 ** 53 + 1, -2 ** 63, 2 ** 63 - 1],
+            {10: 'ten', 2: 'two'},
+            (1, 2),
+            sample_row(),
+            [sample_row(), sample_row()],
+        ]
+        for value in values:
+            with self.subTest(value=value):
+                self.assertSameJSON(value)
+
+    def test_sorted_compact_output(self):
+        with self.app.app_context():
+            body = self.orjson.response({'b': 1, 'a': {'d': 2, 'c': 3}}).get_data()
+        self.assertEqual(body, b'{"a":{"c":3,"d":2},"b":1}\n')
+
+    def test_dates_and_decimals(self):
+        values = {
+            'naive': datetime.datetime(2025, 3, 10, 12, 30, 5, 123456),
+            'utc': datetime.datetime(2025, 3, 10, 12, 30, 5, tzinfo=datetime.timezone.utc),
+            'offset': datetime.datetime(2025, 3, 10, 8, 30, 5, tzinfo=datetime.timezone(datetime.timedelta(hours=-4))),
+            'date': datetime.date(2025, 3, 10),
+            'decimal': decimal.Decimal('1.10'),
+            'decimal_exponent': decimal.Decimal('1E+3'),
+            'uuid': uuid.UUID(int=5),
+        }
+        expected, _ = self.assertSameJSON(values)
+        decoded = json.loads(expected)
+        # Flask's conventions: RFC 822 dates in UTC, Decimals as exact strings
+        self.assertEqual(decoded['utc'], 'Mon, 10 Mar 2025 12:30:05 GMT')
+        self.assertEqual(decoded['offset'], decoded['utc'])
+        self.assertEqual(decoded['date'], 'Mon, 10 Mar 2025 00:00:00 GMT')
+        self.assertEqual(decoded['decimal'], '1.10')
+
+    def test_values_orjson_rejects(self):
+        # Integers beyond 64 bits are re-encoded with the stdlib provider
+        for value in ({'big': 2 ** 64}, [-2 ** 70, 1]):
+            with self.subTest(value=value):
+                self.assertSameJSON(value)
+                self.assertEqual(self.orjson.dumps(value), json.dumps(value, separators=(',', ':')))
+        with self.assertRaises(TypeError):
+            self.orjson.dumps({'time': datetime.time(12, 0)})
+
+    def test_loads(self):
+        text = '{"word": "\\u00e9cole", "n": [1, 2.5, null]}'
+        self.assertEqual(self.orjson.loads(text), self.stdlib.loads(text))
+        self.assertEqual(self.orjson.loads(text.encode('utf-8')), self.stdlib.loads(text))
+        # Large integers stay exact integers, as with the stdlib provider
+        for text in ('{"big": 18446744073709551616}', '[-1180591620717411303424, NaN, Infinity]'):
+            with self.subTest(text=text):
+                self.assertEqual(repr(self.orjson.loads(text)), repr(self.stdlib.loads(text)))
+
+
+class ProviderResponsesTestCase(AppTestCase):
+    """
+    The API gives the same responses with either provider.
+    """
+    INITIALIZE = False # Each test creates its apps
+
+    def responses(self, provider, debug=False):
+        app = self.make_app(JSON_PROVIDER=provider)
+        app.debug = debug
+        client = app.test_client()
+        if not db.count('study_sessions'):
+            session_id = client.post('/api/study_activities', json={'group_id': 1, 'study_activity_id': 1}) \
+                .get_json()['study_session_id']
+            client.post(f'/api/study_sessions/{session_id}/reviews',
+                        json=[{'word_id': 1, 'correct': True}, {'word_id': 2, 'correct': False}])
+        results = {}
+        for path in PATHS:
+            response = client.get(path)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertEqual(response.mimetype, 'application/json')
+            results[path] = response.get_data()
+        return app, results
+
+    @unittest.skipUnless(HAS_ORJSON, 'orjson is not installed')
+    def test_same_responses(self):
+        for debug in (False, True):
+            with self.subTest(debug=debug):
+                stdlib_app, expected = self.responses('stdlib', debug)
+                orjson_app, actual = self.responses('orjson', debug)
+                self.assertIsInstance(stdlib_app.json, json_provider.RowJSONProvider)
+                self.assertIsInstance(orjson_app.json, json_provider.OrjsonProvider)
+                for path in PATHS:
+                    self.assertEqual(json.loads(actual[path]), json.loads(expected[path]), path)
+                    # Both end with a newline, and only the debug output is indented
+                    self.assertTrue(actual[path].endswith(b'\n'))
+                    self.assertEqual(b'\n  ' in actual[path], debug, path)
+
+    def test_fallback_without_orjson(self):
+        with mock.patch.object(json_provider, 'orjson', None):
+            app, _ = self.responses('auto')
+            self.assertIs(type(app.json), json_provider.RowJSONProvider)
+            with self.assertRaises(RuntimeError):
+                self.make_app(initialize=False, JSON_PROVIDER='orjson')
+        with self.assertRaises(ValueError):
+            self.make_app(initialize=False, JSON_PROVIDER='ujson')
+
+    def test_import_without_orjson(self):
+        # A fresh copy of the module, imported as if orjson were not installed
+        spec = importlib.util.spec_from_file_location('json_provider_without_orjson', json_provider.__file__)
+        module = importlib.util.module_from_spec(spec)
+        with mock.patch.dict(sys.modules, {'orjson': None}):
+            spec.loader.exec_module(module)
+        self.assertIsNone(module.orjson)
+        app = Flask(__name__)
+        self.assertEqual(module.install_json_provider(app), 'stdlib')
+        with app.app_context():
+            self.assertEqual(json.loads(app.json.response(sample_row()).get_data()),
+                             {'id': 1, 'french_word': 'Ça va?', 'ease': 2.5, 'next_due': None})
+
+
+if __name__ == '__main__':
+    unittest.main()
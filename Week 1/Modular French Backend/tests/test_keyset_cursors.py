@@ -0,0 +1,144 @@
+# backend/tests/test_keyset_cursors.py
+"""
+Tests for keyset (cursor) pagination (lib/utils.py): walking a listing with
+next cursors and back with prev cursors must visit the same rows, in the same
+order, as page-number pagination, for every sort column and order, also when
+rows tie on the sort key. A malformed or tampered cursor is a 400.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import base64
+import json
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import AppTestCase
+from lib.db import db
+from lib.utils import _encode_cursor
+
+PER_PAGE = 4
+
+# (path, response key, sort fields) of the sortable listings
+LISTINGS = [
+    ('/api/words', 'words', ('french_word', 'quebec_pronunciation', 'english', 'correct_count', 'wrong_count')),
+    ('/api/students/1/words', 'words', ('correct_count', 'wrong_count')),
+    ('/api/groups/6/words', 'words', ('french_word', 'english', 'correct_count', 'wrong_count')),
+    ('/api/groups', 'groups', ('name', 'word_count')),
+]
+
+
+def token(payload):
+    """
+    Encodes an arbitrary cursor payload the way _encode_cursor does.
+    """
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+class KeysetCursorTestCase(AppTestCase):
+    CONFIG = {'PER_PAGE': PER_PAGE}
+
+    def setUp(self):
+        super().setUp()
+        response = self.client.post('/api/students', json={'name': 'Ana'})
+        student_id = response.get_json()['id']
+        # A few reviews so the count columns have ties above zero as well
+        response = self.client.post('/api/study_activities',
+                                    json={'group_id': 6, 'study_activity_id': 1, 'student_id': student_id})
+        session_id = response.get_json()['study_session_id']
+        reviews = [{'word_id': word_id, 'correct': correct}
+                   for word_id, correct in ((45, True), (46, True), (47, True), (48, False), (49, False), (45, False))]
+        response = self.client.post(f'/api/study_sessions/{session_id}/reviews', json={'reviews': reviews})
+        self.assertEqual(response.status_code, 201)
+
+    def get(self, path, **params):
+        response = self.client.get(path, query_string=params)
+        self.assertEqual(response.status_code, 200, (path, params))
+        return response.get_json()
+
+    def pages_by_number(self, path, key, **params):
+        first = self.get(path, page=1, **params)
+        pages = [first[key]]
+        for page in range(2, first['pagination']['total_pages'] + 1):
+            pages.append(self.get(path, page=page, **params)[key])
+        return pages
+
+    def pages_by_cursor(self, path, key, **params):
+        """
+        Walks to the last page with next cursors, then back with prev cursors.
+        Returns the pages of both walks, the second one back in display order.
+        """
+        page = self.get(path, cursor='', **params)
+        self.assertIsNone(page['pagination']['prev_cursor'])
+        forward = [page[key]]
+        while page['pagination']['next_cursor']:
+            page = self.get(path, cursor=page['pagination']['next_cursor'], **params)
+            forward.append(page[key])
+        backward = [page[key]]
+        while page['pagination']['prev_cursor']:
+            page = self.get(path, cursor=page['pagination']['prev_cursor'], **params)
+            backward.append(page[key])
+        backward.reverse()
+        return forward, backward
+
+    def test_round_trip_matches_page_numbers(self):
+        for path, key, fields in LISTINGS:
+            for sort_by in fields:
+                for order in ('asc', 'desc'):
+                    with self.subTest(path=path, sort_by=sort_by, order=order):
+                        expected = self.pages_by_number(path, key, sort_by=sort_by, order=order)
+                        forward, backward = self.pages_by_cursor(path, key, sort_by=sort_by, order=order)
+                        self.assertGreater(len(expected), 1)
+                        self.assertEqual(forward, expected)
+                        self.assertEqual(backward, expected)
+
+    def test_ties_on_the_sort_key(self):
+        forward, _ = self.pages_by_cursor('/api/words', 'words', sort_by='correct_count', order='desc')
+        words = [word for page in forward for word in page]
+        # Every word exactly once, ties broken by id in the listing's order
+        self.assertEqual(len(words), len({word['id'] for word in words}))
+        self.assertEqual(len(words), db.count('words'))
+        self.assertEqual([word['id'] for word in words],
+                         [word['id'] for word in sorted(words, key=lambda word: (word['correct_count'], word['id']),
+                                                        reverse=True)])
+        # A page boundary inside a run of equal sort keys
+        boundary = forward[1][-1]
+        self.assertEqual(boundary['correct_count'], forward[2][0]['correct_count'])
+
+    def test_sessions_with_the_same_start_time(self):
+        with db.transaction() as cursor:
+            cursor.executemany('INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (?, ?, ?)',
+                               [(1, 1, '2025-03-10 12:00:00')] * 7 + [(2, 1, '2025-03-11 09:00:00')] * 3)
+        expected = self.pages_by_number('/api/study_sessions', 'study_sessions')
+        forward, backward = self.pages_by_cursor('/api/study_sessions', 'study_sessions')
+        self.assertEqual(forward, expected)
+        self.assertEqual(backward, expected)
+
+    def test_malformed_or_tampered_cursor(self):
+        valid = _encode_cursor('correct_count', 'next', 0, 10)
+        cursors = {
+            'not base64': '!!!',
+            'not json': base64.urlsafe_b64encode(b'{"sort"').decode('ascii'),
+            'truncated': valid[:-3],
+            'not a list': token({'sort_by': 'correct_count'}),
+            'too few values': token(['correct_count', 'next', 0]),
+            'other sort field': _encode_cursor('english', 'next', 'Hello', 1),
+            'bad direction': token(['correct_count', 'sideways', 0, 10]),
+            'id not an integer': token(['correct_count', 'next', 0, '10']),
+            'id out of range': token(['correct_count', 'next', 0, 2 ** 70]),
+            'sort key a list': token(['correct_count', 'next', [0], 10]),
+            'sort key an object': token(['correct_count', 'next', {'$gt': 0}, 10]),
+            'sort key out of range': token(['correct_count', 'next', -2 ** 70, 10]),
+        }
+        for name, cursor in cursors.items():
+            with self.subTest(name):
+                response = self.client.get('/api/words', query_string={'sort_by': 'correct_count', 'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('Invalid cursor', response.get_json()['error'])
+        # A cursor issued for one listing is rejected by one sorted differently
+        response = self.client.get('/api/study_sessions', query_string={'cursor': valid})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
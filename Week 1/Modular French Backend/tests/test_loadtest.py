@@ -0,0 +1,93 @@
+# backend/tests/test_loadtest.py
+"""
+Tests for the synthetic-load benchmark (benchmarks/loadtest): the workload
+covers every registered route with requests that succeed, and the fast
+(trigger-deferring) build gives the same database as row-by-row inserts.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import os
+import random
+import sqlite3
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import AppTestCase
+from benchmarks.loadtest import runner, synthetic, workload
+
+SCALE = {'words': 300, 'groups': 3, 'students': 10, 'sessions': 60, 'reviews': 3000, 'days': 20}
+
+
+class LoadTestCase(AppTestCase):
+    INITIALIZE = False # The benchmark dataset replaces the seed data
+
+    def setUp(self):
+        super().setUp()
+        synthetic.build(self.database, batch_size=1000, log=lambda message: None, **SCALE)
+        self.app = self.make_app(initialize=False)
+
+    def test_dataset(self):
+        data = workload.Dataset(self.database)
+        self.assertEqual(data.counts, {'words': 300, 'groups': 3, 'students': 10,
+                                       'study_sessions': 60, 'word_review_items': 3000})
+        self.assertEqual(data.groups, (1, 3))
+        self.assertLessEqual((data.last_day - data.first_day).days, 20)
+
+    def test_every_route_has_a_workload(self):
+        routes = workload.check_coverage(self.app)
+        self.assertEqual({(route.method, route.rule) for route in routes}, workload.registered_rules(self.app))
+
+        @self.app.route('/api/unmeasured')
+        def unmeasured():
+            return 'ok'
+        with self.assertRaisesRegex(workload.WorkloadError, 'GET /api/unmeasured'):
+            workload.check_coverage(self.app)
+
+    def test_every_request_succeeds(self):
+        transport = runner.ClientTransport(self.app)
+        data = workload.Dataset(self.database)
+        rng = random.Random(1)
+        # The destructive routes last, as in a run
+        for route in sorted(workload.check_coverage(self.app), key=lambda route: route.final):
+            path, body = route.make(rng, data)
+            self.assertIn(transport.request(route.method, path, body), route.expect, path)
+
+    def test_run(self):
+        routes = workload.check_coverage(self.app)
+        results = runner.run(runner.ClientTransport(self.app), routes, workload.Dataset(self.database),
+                             concurrency=2, duration=0.5, warmup=0.1, write_ratio=0.5)
+        total = results['total']
+        self.assertGreater(total['requests'], 0)
+        self.assertEqual(total['errors'], 0)
+        self.assertEqual(total['requests'], sum(e['requests'] for e in results['endpoints'].values()))
+        self.assertLessEqual(total['p50_ms'], total['p95_ms'])
+        self.assertLessEqual(total['p95_ms'], total['p99_ms'])
+        self.assertFalse(any(label.startswith('POST /api/full_reset') for label in results['endpoints']))
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(runner.percentile(values, 50), 50)
+        self.assertEqual(runner.percentile(values, 99), 99)
+        self.assertEqual(runner.percentile([7], 95), 7)
+        self.assertIsNone(runner.percentile([], 50))
+
+    def test_deferred_build_matches_triggers(self):
+        database = os.path.join(self.tmpdir, 'triggers.db')
+        synthetic.build(database, batch_size=1000, defer_triggers=False, log=lambda message: None, **SCALE)
+        fast, slow = sqlite3.connect(self.database), sqlite3.connect(database)
+        try:
+            for table in ('word_stats', 'word_schedule', 'dashboard_aggregates', 'dashboard_daily',
+                          'student_word_stats', 'student_aggregates', 'table_counters', 'word_review_items',
+                          'words_groups'):
+                query = f'SELECT * FROM {table} ORDER BY 1, 2'
+                self.assertEqual(fast.execute(query).fetchall(), slow.execute(query).fetchall(), table)
+            schema = "SELECT name, sql FROM sqlite_master WHERE type IN ('index', 'trigger') ORDER BY name"
+            self.assertEqual(fast.execute(schema).fetchall(), slow.execute(schema).fetchall())
+        finally:
+            fast.close()
+            slow.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+# backend/tests/test_metrics.py
+"""
+Tests for request metrics (lib/metrics.py): per-endpoint latency and SQL
+counters in the Prometheus text format, the Server-Timing header, and
+N+1 detection.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import re
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import AppTestCase
+from lib.db import db
+from lib.metrics import metrics
+
+
+def sample(text, name, **labels):
+    """
+    Returns the value of one sample in Prometheus text, or None.
+    """
+    wanted = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf'^{name}{{{re.escape(wanted)}}} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+class MetricsTestCase(AppTestCase):
+    CONFIG = {'METRICS_ENABLED': True, 'SERVER_TIMING': True, 'N_PLUS_ONE_THRESHOLD': 3}
+
+    def setUp(self):
+        super().setUp()
+        metrics.reset()
+
+    def scrape(self):
+        response = self.client.get('/api/_metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return response.get_data(as_text=True)
+
+    def test_latency_and_sql_per_endpoint(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get('/api/words').status_code, 200)
+        self.assertEqual(self.client.get('/api/groups/999').status_code, 404)
+
+        text = self.scrape()
+        self.assertEqual(sample(text, 'portal_request_duration_seconds_count', endpoint='get_words', method='GET'), 3)
+        self.assertEqual(sample(text, 'portal_request_duration_seconds_bucket',
+                                endpoint='get_words', method='GET', le='+Inf'), 3)
+        self.assertEqual(sample(text, 'portal_requests_total', endpoint='get_group_by_id', method='GET', status=404), 1)
+        # Each listing reads the data version, the page and the counter
+        self.assertEqual(sample(text, 'portal_request_sql_queries_total', endpoint='get_words'), 9)
+        self.assertEqual(sample(text, 'portal_sql_statement_executions_total', statement='words.list'), 3)
+        self.assertGreater(sample(text, 'portal_request_sql_seconds_total', endpoint='get_words'), 0)
+
+    def test_server_timing_header(self):
+        response = self.client.get('/api/groups')
+        self.assertRegex(response.headers['Server-Timing'], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"$')
+
+    def test_repeated_statement_is_flagged(self):
+        @self.app.route('/test/n_plus_one')
+        def n_plus_one():
+            for word_id in range(1, 5):
+                db.query('words.exists', (word_id,)).fetchone()
+            return 'ok'
+
+        self.client.get('/test/n_plus_one')
+        self.client.get('/api/words') # Runs each statement once
+        text = self.scrape()
+        self.assertEqual(sample(text, 'portal_n_plus_one_requests_total',
+                                endpoint='n_plus_one', statement='words.exists'), 1)
+        self.assertNotIn('endpoint="get_words",statement', text)
+
+    def test_disabled(self):
+        app = self.make_app(initialize=False, METRICS_ENABLED=False)
+        client = app.test_client()
+        self.assertNotIn('Server-Timing', client.get('/api/groups').headers)
+        self.assertEqual(client.get('/api/_metrics').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
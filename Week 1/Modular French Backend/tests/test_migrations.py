@@ -0,0 +1,98 @@
+# backend/tests/test_migrations.py
+"""
+Tests for the migration runner (Db.migrate and Db.initialize): migrations
+are applied once each, in order, a failing one leaves no trace, and an
+existing database is upgraded in place with its data kept.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import os
+import sqlite3
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import AppTestCase, TempDirTestCase
+from lib.db import Db, db
+
+
+class MigrateTestCase(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.db = Db(os.path.join(self.tmpdir, 'test.db'))
+        self.addCleanup(self.db.close_all)
+
+    def add_migration(self, version, name, script):
+        # Served from the SQL text cache, as if the file were in sql/migrations
+        filepath = f'migrations/{version:03d}_{name}.sql'
+        self.db._sql_text[filepath] = script
+        migrations = Db.migrations(self.db)
+        self.db.migrations = lambda: migrations + [(version, name, filepath)]
+
+    def test_migrations_run_in_order_once(self):
+        migrations = self.db.migrations()
+        self.assertEqual([version for version, _, _ in migrations], list(range(1, len(migrations) + 1)))
+        applied = self.db.migrate()
+        self.assertEqual(applied, [f'{version:03d}_{name}' for version, name, _ in migrations])
+        self.assertEqual(self.db.schema_version(), migrations[-1][0])
+        # Already applied: nothing runs again
+        self.assertEqual(self.db.migrate(), [])
+        self.assertEqual(self.db.schema_version(), migrations[-1][0])
+
+    def test_failing_migration_rolls_back(self):
+        self.db.migrate()
+        version = self.db.schema_version()
+        self.add_migration(version + 1, 'broken', '''
+            CREATE TABLE half_done (id INTEGER PRIMARY KEY);
+            INSERT INTO no_such_table VALUES (1);
+        ''')
+        with self.assertRaises(sqlite3.OperationalError):
+            self.db.migrate()
+        self.assertEqual(self.db.schema_version(), version)
+        conn = self.db.get_writer()
+        self.assertFalse(conn.in_transaction)
+        self.assertIsNone(conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'half_done'").fetchone())
+
+        # Fixed, it applies on the next run
+        self.add_migration(version + 1, 'fixed', 'CREATE TABLE half_done (id INTEGER PRIMARY KEY);')
+        self.assertEqual(self.db.migrate(), [f'{version + 1:03d}_fixed'])
+        self.assertEqual(self.db.schema_version(), version + 1)
+
+
+class InitializeTestCase(AppTestCase):
+    INITIALIZE = False
+
+    def test_baseline_database_is_upgraded_in_place(self):
+        app = self.make_app(initialize=False)
+        with app.app_context():
+            # The schema before any migration, with some data in it
+            db.setup_tables(db.cursor())
+            conn = db.get_writer()
+            self.assertEqual(db.schema_version(), 0)
+            conn.execute("INSERT INTO groups (name) VALUES ('Mine')")
+            conn.execute("INSERT INTO words (french_word, quebec_pronunciation, english, parts) "
+                         "VALUES ('tuque', 'took', 'winter hat', '{}')")
+            conn.execute("INSERT INTO words_groups (word_id, group_id) VALUES (1, 1)")
+            conn.execute("INSERT INTO study_activities (name, launch_url) VALUES ('Activity', 'http://localhost')")
+            conn.execute("INSERT INTO study_sessions (group_id, study_activity_id) VALUES (1, 1)")
+            conn.execute("INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (1, 1, 1)")
+            conn.commit()
+
+            db.initialize(app)
+            self.assertEqual(db.schema_version(), db.migrations()[-1][0])
+            # Not reseeded: only the existing data, now with its derived tables
+            self.assertEqual(db.count('words'), 1)
+            self.assertEqual([row[0] for row in conn.execute('SELECT name FROM groups')], ['Mine'])
+            stats = conn.execute('SELECT correct_count, wrong_count FROM word_stats WHERE word_id = 1').fetchone()
+            self.assertEqual(tuple(stats), (1, 0))
+            self.assertEqual(db.check_counters(), [])
+
+        # The upgraded database serves the API
+        response = app.test_client().get('/api/words')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([word['french_word'] for word in response.get_json()['words']], ['tuque'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+# backend/tests/test_read_snapshots.py
+"""
+Tests for the read-only snapshot connections: GET requests read through
+mode=ro/query_only connections that neither block nor wait for the writer,
+and every read transaction sees one consistent WAL snapshot.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import sqlite3
+import threading
+import time
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import DbTestCase
+from flask import Flask
+from lib.db import Db
+
+
+class ReadSnapshotTestCase(DbTestCase):
+    TMPDIR_PREFIX = 'read snapshots ' # A space in the path exercises the URI
+
+    def setUp(self):
+        super().setUp()
+        with self.db.transaction() as cursor:
+            cursor.execute("INSERT INTO groups (name) VALUES ('Group')")
+            cursor.execute("INSERT INTO study_activities (name, launch_url) VALUES ('Activity', 'http://localhost')")
+            cursor.execute("INSERT INTO study_sessions (group_id, study_activity_id) VALUES (1, 1)")
+            cursor.execute("INSERT INTO words (french_word, quebec_pronunciation, english, parts) VALUES ('un', 'un', 'one', '{}')")
+
+    def add_review(self, db=None):
+        db = db or self.db
+        with db.transaction() as cursor:
+            db.insert_reviews(cursor, 1, [(1, True, '2025-03-10 12:00:00.000000')], '2025-03-10 12:00:00.000000')
+
+    def review_count(self, conn):
+        return conn.execute("SELECT COUNT(*) FROM word_review_items").fetchone()[0]
+
+    def test_reader_cannot_write(self):
+        reader = self.db.connect(read_only=True)
+        try:
+            with self.assertRaises(sqlite3.OperationalError):
+                reader.execute("DELETE FROM word_review_items")
+            self.assertEqual(reader.execute("PRAGMA query_only").fetchone()[0], 1)
+        finally:
+            reader.close()
+
+    def test_reader_not_blocked_by_open_write_transaction(self):
+        writer = self.db.connect()
+        reader = self.db.connect(read_only=True)
+        try:
+            writer.execute("BEGIN IMMEDIATE")
+            writer.execute(
+                "INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (1, 1, 1)"
+            )
+            # The write lock is held and the change is pending: the reader
+            # answers at once, from the last committed state
+            started = time.monotonic()
+            self.assertEqual(self.review_count(reader), 0)
+            self.assertLess(time.monotonic() - started, 1.0)
+            writer.commit()
+            self.assertEqual(self.review_count(reader), 1)
+        finally:
+            writer.close()
+            reader.close()
+
+    def test_writer_not_blocked_by_open_snapshot(self):
+        reader = self.db.connect(read_only=True)
+        try:
+            reader.execute("BEGIN")
+            self.assertEqual(self.review_count(reader), 0) # Snapshot taken here
+
+            # Commits from another thread go through while the snapshot is open
+            errors = []
+            def write():
+                try:
+                    for _ in range(5):
+                        self.add_review()
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    self.db.close_all()
+            writer_thread = threading.Thread(target=write)
+            started = time.monotonic()
+            writer_thread.start()
+            writer_thread.join(timeout=10)
+            self.assertFalse(writer_thread.is_alive())
+            self.assertEqual(errors, [])
+            self.assertLess(time.monotonic() - started, 2.0)
+
+            # The open snapshot still sees the old state; a new one sees the writes
+            self.assertEqual(self.review_count(reader), 0)
+            reader.rollback()
+            self.assertEqual(self.review_count(reader), 5)
+        finally:
+            reader.close()
+
+    def test_concurrent_readers_see_consistent_snapshots(self):
+        # Each review bumps word_review_items and dashboard_aggregates in one
+        # transaction; a reader that could see a half-applied state (or block
+        # and time out) would report a mismatch or an error
+        stop = threading.Event()
+        errors = []
+        reads = []
+
+        def read():
+            reader = self.db.connect(read_only=True)
+            count = 0
+            try:
+                while not stop.is_set():
+                    reader.execute("BEGIN")
+                    rows = self.review_count(reader)
+                    total = reader.execute("SELECT total_reviews FROM dashboard_aggregates WHERE id = 1").fetchone()[0]
+                    reader.rollback()
+                    if rows != total:
+                        errors.append(f"Inconsistent snapshot: {rows} rows, total_reviews {total}")
+                    count += 1
+            except Exception as e:
+                errors.append(e)
+            finally:
+                reader.close()
+                reads.append(count)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for thread in readers:
+            thread.start()
+        try:
+            for _ in range(100):
+                self.add_review()
+        finally:
+            stop.set()
+            for thread in readers:
+                thread.join(timeout=10)
+
+        self.assertEqual(errors, [])
+        self.assertTrue(all(count > 0 for count in reads))
+        self.assertEqual(self.review_count(self.db.get()), 100)
+
+    def test_get_requests_use_snapshot_connections(self):
+        app = Flask(__name__)
+        app.config['DATABASE'] = self.db.database
+        db = Db()
+        db.init_app(app)
+        app.teardown_appcontext(lambda exception: db.close())
+        try:
+            with app.test_request_context('/api/words', method='GET'):
+                reader = db.get()
+                self.assertEqual(reader.execute("PRAGMA query_only").fetchone()[0], 1)
+                self.assertEqual(self.review_count(reader), 0)
+                self.assertTrue(reader.in_transaction) # Held for the whole request
+                # Writes requested from a GET still go through the writer
+                self.add_review(db)
+                self.assertEqual(self.review_count(reader), 0)
+            with app.test_request_context('/api/words', method='GET'):
+                self.assertEqual(self.review_count(db.get()), 1)
+            with app.test_request_context('/api/study_sessions/1/reviews', method='POST'):
+                writer = db.get()
+                self.assertEqual(writer.execute("PRAGMA query_only").fetchone()[0], 0)
+        finally:
+            db.close_all()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+# backend/tests/test_review_batch.py
+"""
+Tests for batch review ingest (POST /api/study_sessions/<id>/reviews): a
+batch is written completely or not at all, unknown words or any invalid item
+reject it before anything is written, and the returned review ids are the
+ids of the stored rows, also when batches share a write-behind commit.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import sqlite3
+import threading
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import AppTestCase
+
+
+class ReviewBatchTestCase(AppTestCase):
+    CONFIG = {'MAX_REVIEW_BATCH': 50}
+
+    def setUp(self):
+        super().setUp()
+        response = self.client.post('/api/study_activities', json={'group_id': 1, 'study_activity_id': 1})
+        self.session_id = response.get_json()['study_session_id']
+
+    def tearDown(self):
+        writer = self.app.extensions.get('review_writer')
+        if writer is not None:
+            writer.stop()
+
+    def post(self, reviews, session_id=None):
+        return self.client.post(f'/api/study_sessions/{session_id or self.session_id}/reviews', json=reviews)
+
+    def state(self):
+        """
+        Everything a batch writes: the reviews, the session end times, the
+        cached counts and the review id sequence.
+        """
+        conn = sqlite3.connect(self.database)
+        try:
+            return {
+                'reviews': conn.execute('SELECT * FROM word_review_items ORDER BY id').fetchall(),
+                'sessions': conn.execute('SELECT id, end_time FROM study_sessions ORDER BY id').fetchall(),
+                'word_stats': conn.execute('SELECT * FROM word_stats ORDER BY word_id').fetchall(),
+                'sequence': conn.execute(
+                    "SELECT seq FROM sqlite_sequence WHERE name = 'word_review_items'").fetchall(),
+            }
+        finally:
+            conn.close()
+
+    def stored(self, ids):
+        conn = sqlite3.connect(self.database)
+        try:
+            rows = conn.execute(
+                'SELECT id, word_id, correct, study_session_id FROM word_review_items WHERE id IN (%s) ORDER BY id'
+                % ','.join('?' * len(ids)), ids).fetchall()
+        finally:
+            conn.close()
+        return {row[0]: row[1:] for row in rows}
+
+    def assertIdsMatchRows(self, response, reviews, session_id=None):
+        self.assertEqual(response.status_code, 201, response.get_json())
+        items = response.get_json()['review_items']
+        self.assertEqual([(item['word_id'], item['correct']) for item in items],
+                         [(review['word_id'], review['correct']) for review in reviews])
+        ids = [item['review_item_id'] for item in items]
+        self.assertEqual(len(set(ids)), len(ids))
+        stored = self.stored(ids)
+        self.assertEqual(len(stored), len(ids))
+        for item in items:
+            self.assertEqual(stored[item['review_item_id']],
+                             (item['word_id'], int(item['correct']), session_id or self.session_id))
+
+    def test_returned_ids_match_stored_rows(self):
+        # Repeated words and client times out of order
+        reviews = [
+            {'word_id': 3, 'correct': True, 'client_ts': '2025-03-10T12:00:05Z'},
+            {'word_id': 1, 'correct': False},
+            {'word_id': 3, 'correct': False, 'client_ts': '2025-03-10T12:00:01+00:00'},
+            {'word_id': 2, 'correct': True},
+        ]
+        response = self.post(reviews)
+        self.assertIdsMatchRows(response, reviews)
+        # Also with the {"reviews": [...]} body
+        response = self.post({'reviews': reviews[:2]})
+        self.assertIdsMatchRows(response, reviews[:2])
+        self.assertEqual(len(self.state()['reviews']), 6)
+
+    def test_unknown_word_ids(self):
+        before = self.state()
+        response = self.post([{'word_id': 1, 'correct': True}, {'word_id': 99999, 'correct': True},
+                              {'word_id': 1, 'correct': False}, {'word_id': 88888, 'correct': False}])
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json()['missing_word_ids'], [88888, 99999])
+        self.assertEqual(self.state(), before)
+
+    def test_unknown_session(self):
+        before = self.state()
+        response = self.post([{'word_id': 1, 'correct': True}], session_id=99999)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.state(), before)
+
+    def test_invalid_item_rejects_the_batch(self):
+        before = self.state()
+        valid = [{'word_id': 1, 'correct': True}, {'word_id': 2, 'correct': False}]
+        invalid = [
+            'not an object',
+            {'correct': True},
+            {'word_id': '2', 'correct': True},
+            {'word_id': True, 'correct': True},
+            {'word_id': 2},
+            {'word_id': 2, 'correct': 1},
+            {'word_id': 2, 'correct': True, 'client_ts': 'yesterday'},
+            {'word_id': 2, 'correct': True, 'client_ts': 1741608000},
+        ]
+        for item in invalid:
+            with self.subTest(item=item):
+                response = self.post(valid + [item] + valid)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('Review 2', response.get_json()['error'])
+                self.assertEqual(self.state(), before)
+        for body in ([], {}, {'reviews': []}, valid * 26):
+            with self.subTest(body=body):
+                self.assertEqual(self.post(body).status_code, 400)
+                self.assertEqual(self.state(), before)
+
+
+class WriteBehindReviewBatchTestCase(ReviewBatchTestCase):
+    """
+    The same batches through the write-behind queue, where concurrent
+    requests are inserted in one transaction.
+    """
+    CONFIG = {**ReviewBatchTestCase.CONFIG,
+              'REVIEW_WRITE_BEHIND': True, 'REVIEW_BATCH_INTERVAL_MS': 300, 'REVIEW_ACK_TIMEOUT': 5.0}
+
+    def test_concurrent_batches_get_their_own_ids(self):
+        sessions = [self.session_id] + [
+            self.client.post('/api/study_activities', json={'group_id': 1, 'study_activity_id': 1})
+            .get_json()['study_session_id'] for _ in range(3)]
+        batches = {session_id: [{'word_id': (session_id + n) % 5 + 1, 'correct': n % 2 == 0} for n in range(4)]
+                   for session_id in sessions}
+        responses = {}
+
+        def post(session_id):
+            with self.app.test_client() as client:
+                responses[session_id] = client.post(f'/api/study_sessions/{session_id}/reviews',
+                                                    json=batches[session_id])
+
+        threads = [threading.Thread(target=post, args=(session_id,)) for session_id in sessions]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        self.assertEqual(self.app.extensions['review_writer'].stats()['batches'], 1)
+        for session_id in sessions:
+            self.assertIdsMatchRows(responses[session_id], batches[session_id], session_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
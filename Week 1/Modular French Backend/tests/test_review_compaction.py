@@ -0,0 +1,149 @@
+# backend/tests/test_review_compaction.py
+"""
+Tests for review compaction (migration 012, Db.compact_reviews): folding old
+reviews into review_rollups must not change any statistic, session count or
+rebuild result, and removing compacted history must still update them.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import io
+import json
+import sqlite3
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import AppTestCase
+from lib.db import db
+from benchmarks.loadtest import synthetic
+
+SCALE = {'words': 120, 'groups': 3, 'students': 4, 'sessions': 40, 'reviews': 2000, 'days': 12}
+
+# Reads whose results must survive compaction unchanged
+PATHS = [
+    '/api/dashboard/quick-stats',
+    '/api/dashboard/study_progress',
+    '/api/dashboard/last_study_session',
+    '/api/words?page=1&sort_by=correct_count&order=desc',
+    '/api/words?page=2&sort_by=wrong_count&order=asc',
+    '/api/groups/1/words?sort_by=correct_count&order=desc',
+    '/api/study_sessions',
+    '/api/study_sessions/1',
+    '/api/groups/2/study_sessions',
+    '/api/study_activities/1/study_sessions',
+    '/api/export/sessions',
+] + [
+    f'/api/students/{student}/{path}' for student in (1, 2)
+    for path in ('dashboard/quick-stats', 'dashboard/study_progress', 'words?sort_by=correct_count&order=desc')
+]
+
+# Trigger-maintained tables the rebuild_* helpers recompute
+STATS_TABLES = ('word_stats', 'word_schedule', 'dashboard_aggregates', 'student_word_stats', 'student_aggregates')
+
+
+class ReviewCompactionTestCase(AppTestCase):
+    INITIALIZE = False # Migrated over the benchmark dataset below
+
+    def setUp(self):
+        super().setUp()
+        synthetic.build(self.database, batch_size=500, log=lambda message: None, **SCALE)
+        self.app = self.make_app()
+        self.client = self.app.test_client()
+        conn = sqlite3.connect(self.database)
+        days = [row[0] for row in conn.execute(
+            'SELECT DISTINCT DATE(created_at) FROM word_review_items ORDER BY 1')]
+        conn.close()
+        self.cutoff = days[len(days) // 2]
+
+    def responses(self):
+        results = {}
+        for path in PATHS:
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200, path)
+            results[path] = response.get_data(as_text=True)
+        return results
+
+    def tables(self, *names):
+        conn = sqlite3.connect(self.database)
+        try:
+            return {name: conn.execute(f'SELECT * FROM {name} ORDER BY 1, 2').fetchall() for name in names}
+        finally:
+            conn.close()
+
+    def aggregates(self):
+        conn = sqlite3.connect(self.database)
+        try:
+            return conn.execute(
+                'SELECT total_reviews, correct_reviews, words_studied FROM dashboard_aggregates WHERE id = 1'
+            ).fetchone()
+        finally:
+            conn.close()
+
+    def assertMatchesRebuild(self, tables=STATS_TABLES):
+        incremental = self.tables(*tables)
+        db.rebuild_word_stats()
+        db.rebuild_word_schedule()
+        db.rebuild_student_stats()
+        self.assertEqual(self.tables(*tables), incremental)
+
+    def test_reads_are_unchanged(self):
+        before = self.responses()
+        stats = self.tables(*STATS_TABLES, 'dashboard_daily')
+        archive = io.StringIO()
+        result = db.compact_reviews(self.cutoff, archive=archive)
+        self.assertGreater(result['reviews'], 0)
+        self.assertEqual(result['days'], len({json.loads(line)['created_at'][:10]
+                                              for line in archive.getvalue().splitlines()}))
+        self.assertEqual(len(archive.getvalue().splitlines()), result['reviews'])
+
+        conn = sqlite3.connect(self.database)
+        oldest = conn.execute('SELECT MIN(created_at) FROM word_review_items').fetchone()[0]
+        conn.close()
+        self.assertGreaterEqual(oldest, self.cutoff)
+        self.assertEqual(self.tables(*STATS_TABLES, 'dashboard_daily'), stats)
+        after = self.responses()
+        for path in PATHS:
+            self.assertEqual(after[path], before[path], path)
+        self.assertMatchesRebuild()
+
+    def test_compacting_again_is_a_no_op(self):
+        db.compact_reviews(self.cutoff)
+        self.assertEqual(db.compact_reviews(self.cutoff), {'reviews': 0, 'days': 0})
+
+    def test_new_reviews_after_compaction(self):
+        db.compact_reviews(self.cutoff)
+        # A word whose whole history was compacted is still "studied"
+        conn = sqlite3.connect(self.database)
+        word_id = conn.execute('''
+            SELECT word_id FROM review_rollups
+            WHERE word_id NOT IN (SELECT word_id FROM word_review_items) LIMIT 1
+        ''').fetchone()[0]
+        conn.close()
+        studied = self.aggregates()
+        response = self.client.post(f'/api/study_sessions/1/words/{word_id}/review', json={'correct': True})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.aggregates(), (studied[0] + 1, studied[1] + 1, studied[2]))
+        self.assertMatchesRebuild()
+
+    def test_deleting_compacted_history(self):
+        db.compact_reviews(self.cutoff)
+        with db.transaction() as cursor:
+            cursor.execute('DELETE FROM students WHERE id = 1')
+        conn = sqlite3.connect(self.database)
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM review_rollups WHERE student_id = 1').fetchone()[0], 0)
+        conn.close()
+        # Deleting reviews doesn't rewind the schedule (migration 010), raw or compacted
+        counters = [table for table in STATS_TABLES if table != 'word_schedule']
+        self.assertMatchesRebuild(counters)
+
+        response = self.client.post('/api/reset_history')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.tables('review_rollups', 'word_schedule_base'),
+                         {'review_rollups': [], 'word_schedule_base': []})
+        self.assertEqual(self.aggregates(), (0, 0, 0))
+        # reset_history does rewind it
+        self.assertMatchesRebuild()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+# backend/tests/test_review_writer.py
+"""
+Tests for write-behind review logging (lib/review_writer.py): concurrent
+submissions share one commit, a failing request is rolled back alone, and
+overload or shutdown answers 503 without ever writing the reviews later.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import sqlite3
+import threading
+import time
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import AppTestCase
+from lib.review_writer import ReviewWriter, ReviewWriterStopped
+
+CREATED_AT = '2025-03-10 12:00:00.000000'
+
+
+class WriteBehindTestCase(AppTestCase):
+    """
+    An app with REVIEW_WRITE_BEHIND on and one study session.
+    """
+    CONFIG = {'REVIEW_WRITE_BEHIND': True, 'REVIEW_BATCH_INTERVAL_MS': 200, 'REVIEW_ACK_TIMEOUT': 5.0}
+
+    def setUp(self):
+        super().setUp()
+        self.writer = self.app.extensions['review_writer']
+        response = self.client.post('/api/study_activities', json={'group_id': 1, 'study_activity_id': 1})
+        self.session_id = response.get_json()['study_session_id']
+
+    def tearDown(self):
+        self.writer.stop()
+
+    def reviews(self):
+        conn = sqlite3.connect(self.database)
+        try:
+            return conn.execute('SELECT id, word_id, correct FROM word_review_items ORDER BY id').fetchall()
+        finally:
+            conn.close()
+
+    def post_review(self, word_id, results):
+        with self.app.test_client() as client:
+            response = client.post(f'/api/study_sessions/{self.session_id}/words/{word_id}/review',
+                                   json={'correct': True})
+            results[word_id] = (response.status_code, response.get_json())
+
+
+class ReviewWriterTestCase(WriteBehindTestCase):
+
+    def test_group_commit(self):
+        futures = [self.writer.submit(self.session_id, [(word_id, word_id % 2 == 0, CREATED_AT)], CREATED_AT)
+                   for word_id in range(1, 6)]
+        ids = [future.result(timeout=5)[0] for future in futures]
+        stats = self.writer.stats()
+        self.assertEqual(stats['batches'], 1)
+        self.assertEqual(stats['committed_reviews'], 5)
+        self.assertEqual(self.reviews(), [(ids[n], n + 1, (n + 1) % 2 == 0) for n in range(5)])
+
+    def test_failed_request_is_rolled_back_alone(self):
+        first = self.writer.submit(self.session_id, [(1, True, CREATED_AT)], CREATED_AT)
+        # word_id is NOT NULL: the second review fails after the first row of
+        # its request was inserted
+        broken = self.writer.submit(self.session_id, [(2, True, CREATED_AT), (None, True, CREATED_AT)], CREATED_AT)
+        last = self.writer.submit(self.session_id, [(3, False, CREATED_AT)], CREATED_AT)
+        self.assertEqual(len(first.result(timeout=5)), 1)
+        with self.assertRaises(sqlite3.IntegrityError):
+            broken.result(timeout=5)
+        self.assertEqual(len(last.result(timeout=5)), 1)
+        self.assertEqual([row[1:] for row in self.reviews()], [(1, 1), (3, 0)])
+        stats = self.writer.stats()
+        self.assertEqual((stats['batches'], stats['failed_requests']), (1, 1))
+
+    def test_shutdown_answers_503(self):
+        self.writer.stop()
+        results = {}
+        self.post_review(1, results)
+        self.assertEqual(results[1][0], 503)
+        self.assertEqual(self.reviews(), [])
+
+    def test_stopped_writer_stays_stopped(self):
+        self.writer.stop()
+        # A submit (or start) after stop() must not bring the thread back
+        for attempt in (self.writer.start, lambda: self.writer.submit(self.session_id, [], CREATED_AT)):
+            with self.assertRaises(ReviewWriterStopped):
+                attempt()
+        self.assertIsNone(self.writer._thread)
+
+    def test_stop_racing_submit(self):
+        for _ in range(20):
+            writer = ReviewWriter(self.writer.db, flush_interval_ms=0)
+            started = threading.Event()
+            def submit():
+                started.set()
+                try:
+                    writer.submit(self.session_id, [], CREATED_AT)
+                except ReviewWriterStopped:
+                    pass
+            thread = threading.Thread(target=submit)
+            thread.start()
+            started.wait()
+            writer.stop()
+            thread.join(5)
+            # Whichever came first, the writer ends up stopped
+            self.assertFalse(writer._thread is not None and writer._thread.is_alive())
+
+
+class ReviewWriterOverloadTestCase(WriteBehindTestCase):
+    """
+    A blocked writer: one request being written, one queued, queue full.
+    """
+    CONFIG = {**WriteBehindTestCase.CONFIG,
+              'REVIEW_QUEUE_SIZE': 1, 'REVIEW_BATCH_INTERVAL_MS': 5, 'REVIEW_ACK_TIMEOUT': 0.3}
+
+    def setUp(self):
+        super().setUp()
+        # Hold the write lock so the writer thread waits in BEGIN IMMEDIATE
+        self.blocker = sqlite3.connect(self.database, isolation_level=None)
+        self.blocker.execute('BEGIN IMMEDIATE')
+
+    def tearDown(self):
+        self.blocker.close()
+        super().tearDown()
+
+    def test_timeout_and_queue_full(self):
+        results = {}
+        running = threading.Thread(target=self.post_review, args=(1, results))
+        running.start()
+        time.sleep(0.1) # The writer has taken it and waits for the lock
+        # Queued behind it: not acknowledged in time, so cancelled and 503
+        self.post_review(2, results)
+        self.assertEqual(results[2][0], 503)
+        # Its slot is still taken, so the queue is full
+        self.post_review(3, results)
+        self.assertEqual(results[3][0], 503)
+
+        self.blocker.execute('COMMIT')
+        running.join(10)
+        # The request already being written waited for its commit
+        self.assertEqual(results[1][0], 201)
+        self.writer.stop()
+        self.assertEqual(self.reviews(), [(results[1][1]['review_item_id'], 1, 1)])
+        stats = self.writer.stats()
+        self.assertEqual((stats['cancelled_requests'], stats['rejected_requests']), (1, 1))
+
+    def test_stuck_batch_answers_503(self):
+        self.app.config['REVIEW_WRITE_TIMEOUT'] = 0.3
+        results = {}
+        started = time.monotonic()
+        # Taken by the writer, then stuck behind the lock past both waits
+        self.post_review(1, results)
+        self.assertEqual(results[1][0], 503)
+        self.assertLess(time.monotonic() - started, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
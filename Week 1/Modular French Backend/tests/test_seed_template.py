@@ -0,0 +1,107 @@
+# backend/tests/test_seed_template.py
+"""
+Tests for full resets from the seed template (Db.build_seed_template and
+Db.restore_seed_template): a restore must give the same database as
+reseeding, keep the data version moving forward, and replace the data
+atomically for concurrent readers.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import os
+import shutil
+import sqlite3
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import AppTestCase
+from lib.db import db
+
+
+class SeedTemplateTestCase(AppTestCase):
+
+    def dump(self, path):
+        # Every table except the data version, which only moves forward
+        conn = sqlite3.connect(path)
+        try:
+            tables = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name <> 'data_version' ORDER BY name")]
+            schema = conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall()
+            rows = {table: sorted(conn.execute(f'SELECT * FROM "{table}"').fetchall(), key=repr) for table in tables}
+            return schema, rows, conn.execute('PRAGMA user_version').fetchone()[0]
+        finally:
+            conn.close()
+
+    def data_version(self):
+        with self.app.app_context():
+            return db.data_version()
+
+    def make_history(self):
+        self.assertEqual(self.client.post('/api/students', json={'name': 'Ana'}).status_code, 201)
+        response = self.client.post('/api/study_activities', json={'group_id': 1, 'study_activity_id': 1})
+        session_id = response.get_json()['study_session_id']
+        self.client.post(f'/api/study_sessions/{session_id}/words/1/review', json={'correct': True})
+
+    def test_template_is_built_on_startup(self):
+        template = db.seed_template_path()
+        self.assertTrue(os.path.exists(template))
+        self.assertEqual(os.listdir(self.tmpdir).count(os.path.basename(template)), 1)
+        # Freshly seeded, like the database itself
+        self.assertEqual(self.dump(template), self.dump(self.database))
+
+    def test_restore_matches_reseeding(self):
+        seeded = self.dump(self.database)
+        self.make_history()
+        self.assertNotEqual(self.dump(self.database), seeded)
+        response = self.client.post('/api/full_reset')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.dump(self.database), seeded)
+        with sqlite3.connect(self.database) as conn:
+            self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+
+        # Same result as the drop-and-reseed path
+        self.make_history()
+        db.seed_template = False
+        try:
+            self.assertEqual(self.client.post('/api/full_reset').status_code, 200)
+        finally:
+            db.seed_template = True
+        self.assertEqual(self.dump(self.database), seeded)
+
+    def test_data_version_moves_forward(self):
+        self.make_history()
+        before = self.data_version()
+        etag = self.client.get('/api/dashboard/quick-stats').headers['ETag']
+        self.client.post('/api/full_reset')
+        self.assertGreater(self.data_version(), before)
+        self.assertNotEqual(self.client.get('/api/dashboard/quick-stats').headers['ETag'], etag)
+        self.assertEqual(self.client.get('/api/students').get_json()['students'], [])
+
+    def test_readers_see_old_or_new_database(self):
+        self.make_history()
+        reader = sqlite3.connect(self.database, isolation_level=None)
+        try:
+            reader.execute('BEGIN')
+            self.assertEqual(reader.execute('SELECT COUNT(*) FROM students').fetchone()[0], 1)
+            self.assertEqual(self.client.post('/api/full_reset').status_code, 200)
+            # An open snapshot keeps the old database until it ends...
+            self.assertEqual(reader.execute('SELECT COUNT(*) FROM word_review_items').fetchone()[0], 1)
+            reader.execute('COMMIT')
+            # ...and the next one sees the whole new one
+            self.assertEqual(reader.execute('SELECT COUNT(*) FROM students').fetchone()[0], 0)
+            self.assertEqual(reader.execute('SELECT COUNT(*) FROM word_review_items').fetchone()[0], 0)
+        finally:
+            reader.close()
+
+    def test_stale_templates_are_replaced(self):
+        stale = f'{self.database}.seed-000000000000'
+        shutil.copy(db.seed_template_path(), stale)
+        os.remove(db.seed_template_path())
+        self.assertEqual(self.client.post('/api/full_reset').status_code, 200)
+        self.assertTrue(os.path.exists(db.seed_template_path()))
+        self.assertFalse(os.path.exists(stale))
+        self.assertFalse([name for name in os.listdir(self.tmpdir) if name.endswith('.tmp')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+# backend/tests/test_server.py
+"""
+Tests for the pre-forking server (lib/server.py): workers boot warmed up,
+dead workers are replaced, and SIGTERM lets in-flight requests finish.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import http.client
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+from support import TempDirTestCase
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Runs the server in a subprocess, with one deliberately slow route
+SERVER_SCRIPT = """
+import sys, time
+sys.path.insert(0, {backend!r})
+from app import create_app
+from lib.server import PreforkServer
+
+app = create_app({{'DATABASE': {database!r}, 'PER_PAGE': 100}})
+
+@app.route('/slow')
+def slow():
+    time.sleep(1.5)
+    return 'done'
+
+server = PreforkServer(app, host='127.0.0.1', port=0, workers=2, threads=2, graceful_timeout=10)
+server.bind()
+print('PORT', server.port, flush=True)
+server.run()
+"""
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), "The pre-forking server needs os.fork")
+class PreforkServerTestCase(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        script = SERVER_SCRIPT.format(backend=BACKEND_DIR, database=os.path.join(self.tmpdir, 'serve.db'))
+        self.process = subprocess.Popen(
+            [sys.executable, '-u', '-c', script], cwd=BACKEND_DIR,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+        )
+        self.lines = []
+        self.ready = threading.Condition()
+        threading.Thread(target=self._collect_output, daemon=True).start()
+        self.port = int(self.wait_for(r'^PORT (\d+)').group(1))
+        self.worker_pids = [int(self.wait_for(r'^\[(\d+)\] Worker ready', occurrence=i).group(1)) for i in range(2)]
+
+    def tearDown(self):
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+
+    def _collect_output(self):
+        for line in self.process.stdout:
+            with self.ready:
+                self.lines.append(line.rstrip('\n'))
+                self.ready.notify_all()
+
+    def wait_for(self, pattern, occurrence=0, timeout=30):
+        """
+        Waits for the nth output line matching `pattern` and returns its match.
+        """
+        deadline = time.monotonic() + timeout
+        with self.ready:
+            while True:
+                matches = [m for m in map(re.compile(pattern).search, self.lines) if m]
+                if len(matches) > occurrence:
+                    return matches[occurrence]
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.fail(f"Timed out waiting for {pattern!r}; output:\n" + '\n'.join(self.lines))
+                self.ready.wait(remaining)
+
+    def get(self, path):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=10)
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            return response.status, response.read()
+        finally:
+            conn.close()
+
+    def test_serves_and_replaces_dead_workers(self):
+        for _ in range(6):
+            self.assertEqual(self.get('/api/groups')[0], 200)
+
+        os.kill(self.worker_pids[0], signal.SIGKILL)
+        replacement = int(self.wait_for(r'^\[(\d+)\] Worker ready', occurrence=2).group(1))
+        self.assertNotIn(replacement, self.worker_pids)
+        for _ in range(6):
+            self.assertEqual(self.get('/api/words')[0], 200)
+
+    def test_sigterm_finishes_in_flight_requests(self):
+        result = {}
+        request = threading.Thread(target=lambda: result.update(response=self.get('/slow')))
+        request.start()
+        time.sleep(0.5) # Let a worker pick the request up
+        self.process.send_signal(signal.SIGTERM)
+        request.join(timeout=10)
+        self.assertEqual(result.get('response'), (200, b'done'))
+        self.assertEqual(self.process.wait(timeout=15), 0)
+        for pid in self.worker_pids:
+            with self.assertRaises(ProcessLookupError):
+                os.kill(pid, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+# backend/tests/test_slow_queries.py
+"""
+Tests for the slow-query log (lib/slow_queries.py): statements over the
+threshold are kept in a bounded ring buffer with their parameters and
+EXPLAIN QUERY PLAN, and full scans of word_review_items are reported
+however fast they ran.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import sqlite3
+import threading
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import AppTestCase
+from lib.db import db
+from lib.slow_queries import SlowQueryLog, _table_names
+
+
+class SlowQueryLogTestCase(AppTestCase):
+    CONFIG = {'DB_SLOW_QUERY_MS': 0} # Log everything
+
+    def setUp(self):
+        super().setUp()
+        db.slow_queries.clear()
+
+    def tearDown(self):
+        db.set_slow_query_threshold(None)
+
+    def log(self):
+        response = self.client.get('/api/admin/slow_queries')
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def test_slow_statements_are_logged_with_plan(self):
+        self.assertEqual(self.client.get('/api/groups/1/words?sort_by=english').status_code, 200)
+        entries = {entry['statement']: entry for entry in self.log()['slow_queries']}
+        entry = entries['groups.words']
+        self.assertEqual(entry['params'], [1, 10, 0])
+        self.assertGreaterEqual(entry['duration_ms'], 0)
+        self.assertTrue(any('idx_words_groups_group_id_word_id' in line for line in entry['plan']), entry['plan'])
+        self.assertEqual(entry['full_scans'], [])
+
+    def test_ring_buffer_keeps_newest(self):
+        self.make_app(initialize=False, DB_SLOW_QUERY_LOG_SIZE=3)
+        for word_id in range(1, 6):
+            self.client.get(f'/api/words/{word_id}')
+        log = self.log()
+        self.assertEqual(log['capacity'], 3)
+        self.assertEqual(len(log['slow_queries']), 3)
+        self.assertEqual(log['slow_queries'][0]['statement'], 'words.groups') # Newest first
+        self.assertEqual(log['slow_queries'][0]['params'], [5])
+
+    def test_full_scans_of_reviews_reported_below_threshold(self):
+        self.make_app(initialize=False, DB_SLOW_QUERY_MS=10000)
+        self.client.get('/api/export/reviews?since=2025-01-01').get_data()
+        self.assertEqual(self.log()['full_scans'], [])
+
+        self.client.get('/api/export/reviews').get_data()
+        log = self.log()
+        self.assertEqual(log['slow_queries'], [])
+        self.assertEqual([report['statement'] for report in log['full_scans']], ['export.reviews'])
+        self.assertTrue(log['full_scans'][0]['full_scans'][0].startswith('SCAN wri'))
+
+    def test_clear_and_disable(self):
+        self.client.get('/api/groups')
+        self.assertEqual(self.client.delete('/api/admin/slow_queries').status_code, 200)
+        self.assertEqual(self.log()['slow_queries'], [])
+
+        self.make_app(initialize=False, DB_SLOW_QUERY_MS=None)
+        self.client.get('/api/groups')
+        log = self.log()
+        self.assertFalse(log['enabled'])
+        self.assertEqual(log['slow_queries'], [])
+        self.assertNotIn(db.slow_queries.observe, db.statements.observers)
+
+    def test_planned_statements_are_bounded(self):
+        log = SlowQueryLog(threshold_ms=10000, max_plans=3)
+        conn = sqlite3.connect(':memory:', check_same_thread=False)
+        conn.execute('CREATE TABLE word_review_items (id INTEGER PRIMARY KEY, word_id INTEGER)')
+        explained = []
+        explain = log._explain
+        log._explain = lambda cursor, sql, params: explained.append(sql) or explain(cursor, sql, params)
+
+        def observe(sql):
+            log.observe('reviews', sql, (), 0, conn.cursor())
+
+        # Every IN list length is its own statement text
+        statements = [f"SELECT * FROM word_review_items WHERE word_id IN ({', '.join('?' * n)})"
+                      for n in range(1, 6)]
+        threads = [threading.Thread(target=observe, args=(sql,)) for sql in statements * 4]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(log._plans), 3)
+
+        # The most recently used texts are kept, and aren't planned again
+        explained.clear()
+        observe(statements[-1])
+        self.assertEqual(explained, [])
+        observe(statements[0])
+        self.assertEqual(len(log._plans), 3)
+
+        # Full scans are reported once per statement, however often planned
+        for _ in range(2):
+            for sql in ('SELECT * FROM word_review_items', 'SELECT * FROM word_review_items w WHERE w.id > 0'):
+                observe(sql)
+        reports = log.snapshot()['full_scans']
+        self.assertEqual([report['statement'] for report in reports], ['reviews'])
+        self.assertEqual(reports[0]['sql'], 'SELECT * FROM word_review_items')
+        conn.close()
+
+    def test_table_aliases(self):
+        self.assertEqual(_table_names("SELECT * FROM word_review_items wri JOIN words w", 'word_review_items'),
+                         {'word_review_items', 'wri'})
+        self.assertEqual(_table_names("DELETE FROM word_review_items WHERE id = ?", 'word_review_items'),
+                         {'word_review_items'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+# backend/tests/test_statements.py
+"""
+Tests for the SQL statement catalog (lib/statements.py): every statement the
+routes register compiles against the migrated schema, and a statement that
+no longer matches the schema stops startup.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import os
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import AppTestCase
+from flask import Flask
+from lib.db import Db, db
+from lib.statements import StatementCatalog, StatementError, _parameter_count
+
+
+class StatementCatalogTestCase(AppTestCase):
+    INITIALIZE = False # Each test prepares its own database
+
+    def test_registered_statements_match_schema(self):
+        app = self.make_app(initialize=False)
+        with app.app_context():
+            db.migrate()
+            checked = db.check_statements()
+        # Every listing registers each sort key, order and pagination mode
+        self.assertGreater(checked, 100)
+        for name in ('words.list', 'groups.words', 'study_sessions.list', 'export.reviews', 'students.exists'):
+            self.assertIn(name, db.statements)
+
+    def test_variants_must_be_declared(self):
+        catalog = StatementCatalog()
+        catalog.register('words.sorted', "SELECT id FROM words ORDER BY {column}",
+                         [{'column': 'french_word'}, {'column': 'english'}])
+        self.assertEqual(catalog.sql('words.sorted', column='english'), "SELECT id FROM words ORDER BY english")
+        with self.assertRaises(KeyError):
+            catalog.sql('words.sorted', column='parts; DROP TABLE words')
+        with self.assertRaises(KeyError):
+            catalog.sql('words.missing')
+        with self.assertRaises(ValueError):
+            catalog.register('words.sorted', "SELECT 1")
+
+    def test_parameter_count_ignores_literals_and_comments(self):
+        self.assertEqual(_parameter_count("SELECT '?' FROM t -- ?\nWHERE a = ? /* ? */ AND b = ?"), 2)
+        self.assertEqual(_parameter_count("SELECT ?3, ?1"), 3)
+
+    def test_startup_fails_when_a_statement_no_longer_matches(self):
+        local_db = Db(os.path.join(self.tmpdir, 'drift.db'))
+        local_db.statements.register('words.by_gender', "SELECT id FROM words WHERE gender = ?")
+        app = Flask(__name__)
+        app.config.update(DATABASE=local_db.database)
+        try:
+            with app.app_context():
+                with self.assertRaises(StatementError) as raised:
+                    local_db.initialize(app)
+            self.assertIn('words.by_gender', str(raised.exception))
+            self.assertIn('gender', str(raised.exception))
+        finally:
+            local_db.close_all()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+# backend/tests/test_student_stats.py
+"""
+Tests for the per-student statistics (migration 011): student_aggregates and
+student_word_stats must track each student's own history only, and always
+equal a full recomputation.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import DbTestCase
+
+
+class StudentStatsTestCase(DbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with self.db.transaction() as cursor:
+            cursor.execute("INSERT INTO groups (name) VALUES ('Group A'), ('Group B')")
+            cursor.execute("INSERT INTO study_activities (name, launch_url) VALUES ('Activity', 'http://localhost')")
+            cursor.execute("INSERT INTO students (name) VALUES ('Ana'), ('Ben')")
+            for word in ('un', 'deux', 'trois'):
+                cursor.execute(
+                    "INSERT INTO words (french_word, quebec_pronunciation, english, parts) VALUES (?, ?, ?, '{}')",
+                    (word, word, word)
+                )
+
+    def add_session(self, student_id, created_at, group_id=1):
+        with self.db.transaction() as cursor:
+            cursor.execute(
+                "INSERT INTO study_sessions (group_id, study_activity_id, student_id, created_at) VALUES (?, 1, ?, ?)",
+                (group_id, student_id, created_at)
+            )
+            return cursor.lastrowid
+
+    def review(self, session_id, word_id, correct, created_at='2025-03-10 12:00:00.000000'):
+        with self.db.transaction() as cursor:
+            return self.db.insert_reviews(cursor, session_id, [(word_id, correct, created_at)], created_at)[0]
+
+    def aggregates(self, student_id):
+        row = self.db.get().execute("""
+            SELECT total_reviews, correct_reviews, total_study_sessions, active_groups,
+                   words_studied, current_streak, last_study_date
+            FROM student_aggregates WHERE student_id = ?
+        """, (student_id,)).fetchone()
+        return tuple(row)
+
+    def snapshot(self):
+        conn = self.db.get()
+        return (
+            [tuple(row) for row in conn.execute("SELECT * FROM student_aggregates ORDER BY student_id")],
+            [tuple(row) for row in conn.execute("SELECT * FROM student_word_stats ORDER BY student_id, word_id")],
+        )
+
+    def assertMatchesRebuild(self):
+        # The incremental state must always equal a full recomputation
+        incremental = self.snapshot()
+        self.db.rebuild_student_stats()
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_new_student_starts_empty(self):
+        self.assertEqual(self.aggregates(1), (0, 0, 0, 0, 0, 0, None))
+
+    def test_students_are_counted_separately(self):
+        ana = self.add_session(1, '2025-03-10 08:00:00')
+        ben = self.add_session(2, '2025-03-10 09:00:00', group_id=2)
+        self.review(ana, 1, True)
+        self.review(ana, 1, False)
+        self.review(ana, 2, True)
+        self.review(ben, 1, False)
+        self.assertEqual(self.aggregates(1), (3, 2, 1, 1, 2, 1, '2025-03-10'))
+        self.assertEqual(self.aggregates(2), (1, 0, 1, 1, 1, 1, '2025-03-10'))
+        stats = self.db.get().execute(
+            "SELECT correct_count, wrong_count FROM student_word_stats WHERE student_id = 1 AND word_id = 1"
+        ).fetchone()
+        self.assertEqual(tuple(stats), (1, 1))
+        self.assertMatchesRebuild()
+
+    def test_unassigned_history_is_global_only(self):
+        with self.db.transaction() as cursor:
+            cursor.execute("INSERT INTO study_sessions (group_id, study_activity_id) VALUES (1, 1)")
+            session_id = cursor.lastrowid
+        self.review(session_id, 1, True)
+        self.assertEqual(self.aggregates(1)[0], 0)
+        total = self.db.get().execute("SELECT total_reviews FROM dashboard_aggregates WHERE id = 1").fetchone()[0]
+        self.assertEqual(total, 1)
+
+    def test_deleting_reviews_and_sessions(self):
+        first = self.add_session(1, '2025-03-09 12:00:00')
+        second = self.add_session(1, '2025-03-10 12:00:00', group_id=2)
+        review_id = self.review(first, 1, True)
+        self.review(second, 2, False)
+        with self.db.transaction() as cursor:
+            cursor.execute("DELETE FROM word_review_items WHERE id = ?", (review_id,))
+        self.assertEqual(self.aggregates(1)[:5], (1, 0, 2, 2, 1))
+        with self.db.transaction() as cursor:
+            cursor.execute("DELETE FROM study_sessions WHERE id = ?", (first,))
+        self.assertEqual(self.aggregates(1)[2:], (1, 1, 1, 1, '2025-03-10'))
+        self.assertMatchesRebuild()
+
+    def test_updating_reviews(self):
+        ana = self.add_session(1, '2025-03-10 08:00:00')
+        ben = self.add_session(2, '2025-03-10 09:00:00')
+        with self.db.transaction() as cursor:
+            cursor.execute("INSERT INTO study_sessions (group_id, study_activity_id) VALUES (1, 1)")
+            unassigned = cursor.lastrowid
+        review_id = self.review(ana, 1, True)
+        self.review(ana, 2, False)
+
+        def update(sql, *params):
+            with self.db.transaction() as cursor:
+                cursor.execute(f"UPDATE word_review_items SET {sql} WHERE id = ?", (*params, review_id))
+            self.assertMatchesRebuild()
+
+        update("correct = 0")
+        self.assertEqual(self.aggregates(1)[:5], (2, 0, 1, 1, 2))
+        # Moved to another word: the old word is no longer studied
+        update("word_id = 3, correct = 1")
+        self.assertEqual(self.aggregates(1)[:5], (2, 1, 1, 1, 2))
+        update("word_id = 2")
+        self.assertEqual(self.aggregates(1)[:5], (2, 1, 1, 1, 1))
+        # Moved to another student's session, the review follows the session's student
+        update("study_session_id = ?", ben)
+        student_id = self.db.get().execute("SELECT student_id FROM word_review_items WHERE id = ?",
+                                           (review_id,)).fetchone()[0]
+        self.assertEqual(student_id, 2)
+        self.assertEqual(self.aggregates(1)[:5], (1, 0, 1, 1, 1))
+        self.assertEqual(self.aggregates(2)[:5], (1, 1, 1, 1, 1))
+        # Moving a session and a word at once
+        update("study_session_id = ?, word_id = 1", ana)
+        self.assertEqual(self.aggregates(1)[:5], (2, 1, 1, 1, 2))
+        self.assertEqual(self.aggregates(2)[:5], (0, 0, 1, 1, 0))
+        # Out of every student's statistics, and back in
+        update("study_session_id = ?", unassigned)
+        self.assertEqual(self.aggregates(1)[:5], (1, 0, 1, 1, 1))
+        update("student_id = 2")
+        self.assertEqual(self.aggregates(2)[:5], (1, 1, 1, 1, 1))
+        self.assertEqual(self.db.check_counters(), [])
+
+    def test_streak_is_per_student(self):
+        for day in ('2025-03-08', '2025-03-09', '2025-03-10'):
+            self.add_session(1, f'{day} 12:00:00')
+        self.add_session(2, '2025-03-10 12:00:00')
+        # A backdated session bridges Ben's gap only
+        self.add_session(2, '2025-03-08 12:00:00')
+        self.assertEqual(self.aggregates(1)[5:], (3, '2025-03-10'))
+        self.assertEqual(self.aggregates(2)[5:], (1, '2025-03-10'))
+        self.add_session(2, '2025-03-09 12:00:00')
+        self.assertEqual(self.aggregates(2)[5:], (3, '2025-03-10'))
+        self.assertMatchesRebuild()
+
+    def test_deleting_a_student_removes_their_history(self):
+        ana = self.add_session(1, '2025-03-10 08:00:00')
+        ben = self.add_session(2, '2025-03-10 09:00:00')
+        self.review(ana, 1, True)
+        self.review(ben, 2, True)
+        with self.db.transaction() as cursor:
+            cursor.execute("DELETE FROM students WHERE id = 1")
+        conn = self.db.get()
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM word_review_items").fetchone()[0], 1)
+        self.assertEqual(conn.execute("SELECT total_reviews FROM dashboard_aggregates").fetchone()[0], 1)
+        self.assertEqual(self.db.count('students'), 1)
+        self.assertEqual(self.db.check_counters(), [])
+        self.assertMatchesRebuild()
+
+
+if __name__ == '__main__':
+    unittest.main()
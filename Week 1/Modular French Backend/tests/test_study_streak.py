@@ -0,0 +1,173 @@
+# backend/tests/test_study_streak.py
+"""
+Tests for the persisted study streak (migration 005) and its read-time check.
+Streak days are UTC calendar days of study_sessions.created_at.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import unittest
+from datetime import date, datetime, timedelta, timezone
+
+# Shared fixtures; this also makes the backend packages importable
+from support import DbTestCase
+from lib.utils import _current_streak, _parse_client_timestamp
+
+
+class StudyStreakTestCase(DbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with self.db.transaction() as cursor:
+            cursor.execute("INSERT INTO groups (name) VALUES ('Streak Group')")
+            cursor.execute("INSERT INTO study_activities (name, launch_url) VALUES ('Streak Activity', 'http://localhost')")
+
+    def add_session(self, created_at):
+        with self.db.transaction() as cursor:
+            cursor.execute(
+                "INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (1, 1, ?)",
+                (created_at,)
+            )
+            return cursor.lastrowid
+
+    def delete_session(self, session_id):
+        with self.db.transaction() as cursor:
+            cursor.execute("DELETE FROM study_sessions WHERE id = ?", (session_id,))
+
+    def state(self):
+        row = self.db.get().execute(
+            "SELECT current_streak, last_study_date FROM dashboard_aggregates WHERE id = 1"
+        ).fetchone()
+        return row[0], row[1]
+
+    def assertMatchesRebuild(self):
+        # The incremental state must always equal a full recomputation
+        incremental = self.state()
+        self.assertEqual(self.db.rebuild_study_streak(), incremental)
+
+    def test_empty(self):
+        self.assertEqual(self.state(), (0, None))
+        self.assertEqual(_current_streak(0, None, date(2025, 3, 10)), 0)
+
+    def test_consecutive_days(self):
+        for day in ('2025-03-08', '2025-03-09', '2025-03-10'):
+            self.add_session(f'{day} 12:00:00')
+        self.assertEqual(self.state(), (3, '2025-03-10'))
+        self.assertMatchesRebuild()
+
+    def test_several_sessions_same_day_count_once(self):
+        self.add_session('2025-03-10 08:00:00')
+        self.add_session('2025-03-10 20:00:00')
+        self.assertEqual(self.state(), (1, '2025-03-10'))
+
+    def test_gap_restarts_streak(self):
+        self.add_session('2025-03-07 12:00:00')
+        self.add_session('2025-03-08 12:00:00')
+        self.add_session('2025-03-10 12:00:00')
+        self.assertEqual(self.state(), (1, '2025-03-10'))
+        self.assertMatchesRebuild()
+
+    def test_midnight_boundary(self):
+        # One second apart, but on two UTC calendar days
+        self.add_session('2025-03-09 23:59:59')
+        self.add_session('2025-03-10 00:00:00')
+        self.assertEqual(self.state(), (2, '2025-03-10'))
+
+    def test_microsecond_timestamps(self):
+        # Review-path timestamps carry microseconds; DATE() must still parse them
+        self.add_session('2025-03-09 23:59:59.999999')
+        self.add_session('2025-03-10 00:00:00.000001')
+        self.assertEqual(self.state(), (2, '2025-03-10'))
+
+    def test_month_and_year_boundaries(self):
+        for ts in ('2024-02-28 10:00:00', '2024-02-29 10:00:00', '2024-03-01 10:00:00'):
+            self.add_session(ts)
+        self.assertEqual(self.state(), (3, '2024-03-01'))
+        for ts in ('2024-12-31 23:00:00', '2025-01-01 01:00:00'):
+            self.add_session(ts)
+        self.assertEqual(self.state(), (2, '2025-01-01'))
+        self.assertMatchesRebuild()
+
+    def test_client_offsets_are_counted_in_utc(self):
+        now = datetime(2025, 3, 11, tzinfo=timezone.utc)
+        # 21:00 in Montreal (UTC-4) on the 9th is already the 10th in UTC
+        evening = _parse_client_timestamp('2025-03-09T21:00:00-04:00', now)
+        self.assertTrue(evening.startswith('2025-03-10 01:00:00'))
+        self.add_session('2025-03-09 12:00:00')
+        self.add_session(evening)
+        self.assertEqual(self.state(), (2, '2025-03-10'))
+        # The same local evening a day earlier lands on the 9th: no new day
+        self.add_session(_parse_client_timestamp('2025-03-08T21:00:00-04:00', now))
+        self.assertEqual(self.state(), (2, '2025-03-10'))
+
+    def test_backdated_session_bridges_gap(self):
+        self.add_session('2025-03-08 12:00:00')
+        self.add_session('2025-03-10 12:00:00')
+        self.assertEqual(self.state(), (1, '2025-03-10'))
+        self.add_session('2025-03-09 12:00:00')
+        self.assertEqual(self.state(), (3, '2025-03-10'))
+        self.assertMatchesRebuild()
+
+    def test_backdated_session_outside_run(self):
+        self.add_session('2025-03-09 12:00:00')
+        self.add_session('2025-03-10 12:00:00')
+        self.add_session('2025-03-01 12:00:00')
+        self.assertEqual(self.state(), (2, '2025-03-10'))
+
+    def test_delete_breaks_streak(self):
+        self.add_session('2025-03-08 12:00:00')
+        middle = self.add_session('2025-03-09 12:00:00')
+        self.add_session('2025-03-10 12:00:00')
+        self.delete_session(middle)
+        self.assertEqual(self.state(), (1, '2025-03-10'))
+        self.assertMatchesRebuild()
+
+    def test_delete_latest_day_moves_last_study_date(self):
+        self.add_session('2025-03-08 12:00:00')
+        self.add_session('2025-03-09 12:00:00')
+        latest = self.add_session('2025-03-10 12:00:00')
+        self.delete_session(latest)
+        self.assertEqual(self.state(), (2, '2025-03-09'))
+
+    def test_delete_keeps_day_with_other_sessions(self):
+        self.add_session('2025-03-09 12:00:00')
+        first = self.add_session('2025-03-10 08:00:00')
+        self.add_session('2025-03-10 20:00:00')
+        self.delete_session(first)
+        self.assertEqual(self.state(), (2, '2025-03-10'))
+
+    def test_delete_all_resets(self):
+        for day in ('2025-03-08', '2025-03-09', '2025-03-10'):
+            self.add_session(f'{day} 12:00:00')
+        with self.db.transaction() as cursor:
+            cursor.execute("DELETE FROM study_sessions")
+        self.assertEqual(self.state(), (0, None))
+
+    def test_streak_alive_today_or_yesterday(self):
+        today = date(2025, 3, 10)
+        self.assertEqual(_current_streak(4, '2025-03-10', today), 4)
+        self.assertEqual(_current_streak(4, '2025-03-09', today), 4)
+        self.assertEqual(_current_streak(4, '2025-03-08', today), 0)
+        # Across a month boundary
+        self.assertEqual(_current_streak(2, '2025-02-28', date(2025, 3, 1)), 2)
+        self.assertEqual(_current_streak(2, '2025-02-27', date(2025, 3, 1)), 0)
+
+    def test_streak_at_utc_midnight(self):
+        # 23:59 local time in Vancouver is already the next UTC day
+        self.add_session('2025-03-10 12:00:00')
+        just_after_midnight = datetime(2025, 3, 11, 0, 0, 1, tzinfo=timezone.utc)
+        today = just_after_midnight.date()
+        self.assertEqual(_current_streak(*self.state(), today), 1)
+        self.assertEqual(_current_streak(*self.state(), today + timedelta(days=1)), 0)
+
+    def test_migration_backfills_existing_sessions(self):
+        # Simulate a pre-005 database: drop the streak state and re-run the backfill
+        for day in ('2025-03-05', '2025-03-07', '2025-03-08'):
+            self.add_session(f'{day} 12:00:00')
+        with self.db.transaction() as cursor:
+            cursor.execute("UPDATE dashboard_aggregates SET current_streak = 0, last_study_date = NULL")
+        self.assertEqual(self.db.rebuild_study_streak(), (2, '2025-03-08'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+# backend/tests/test_table_counters.py
+"""
+Tests for the trigger-maintained row counters (migration 007): table_counters
+and groups.word_count must match COUNT(*) after inserts and deletes, bulk
+imports and both resets, since pagination totals are read from them.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import AppTestCase
+from lib.db import db
+
+
+class TableCountersTestCase(AppTestCase):
+
+    def assertCountersExact(self):
+        self.assertEqual(db.check_counters(), [])
+        # The totals the list routes report come from the counters
+        for path, table in (('/api/words', 'words'), ('/api/groups', 'groups'),
+                            ('/api/study_sessions', 'study_sessions')):
+            total = db.get().execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+            pagination = self.client.get(path).get_json()['pagination']
+            self.assertEqual(pagination['total_items'], total, path)
+
+    def start_session(self, group_id=1, activity_id=1):
+        response = self.client.post('/api/study_activities',
+                                    json={'group_id': group_id, 'study_activity_id': activity_id})
+        self.assertEqual(response.status_code, 201)
+        return response.get_json()['study_session_id']
+
+    def test_seeded_counts(self):
+        self.assertGreater(db.count('words'), 0)
+        self.assertCountersExact()
+
+    def test_inserts_and_deletes(self):
+        sessions = [self.start_session(group_id) for group_id in (1, 1, 2)]
+        self.assertEqual(db.count('group_study_sessions', 1), 2)
+        with db.transaction() as cursor:
+            cursor.execute('DELETE FROM study_sessions WHERE id = ?', (sessions[0],))
+            cursor.execute('UPDATE study_sessions SET group_id = 3 WHERE id = ?', (sessions[2],))
+            cursor.execute("INSERT INTO groups (name) VALUES ('Extra')")
+            cursor.execute('DELETE FROM words WHERE id IN (SELECT word_id FROM words_groups WHERE group_id = 2 LIMIT 3)')
+            cursor.execute('DELETE FROM words_groups WHERE word_id NOT IN (SELECT id FROM words)')
+        self.assertEqual(db.count('group_study_sessions', 1), 1)
+        self.assertEqual(db.count('group_study_sessions', 3), 1)
+        self.assertCountersExact()
+
+    def test_bulk_import(self):
+        rows = [(f'mot{n}', f'mo{n}', f'word {n}', '{}') for n in range(250)]
+        group_id, imported = db.bulk_import_words('Imported', iter(rows), batch_size=100, defer_indexes=True)
+        self.assertEqual(imported, 250)
+        word_count = db.get().execute('SELECT word_count FROM groups WHERE id = ?', (group_id,)).fetchone()[0]
+        self.assertEqual(word_count, 250)
+        self.assertCountersExact()
+
+    def test_resets(self):
+        self.start_session()
+        self.start_session(group_id=2, activity_id=2)
+        self.assertEqual(self.client.post('/api/reset_history').status_code, 200)
+        self.assertEqual(db.count('study_sessions'), 0)
+        self.assertCountersExact()
+
+        self.start_session()
+        db.bulk_import_words('Imported', iter([('mot', 'mo', 'word', '{}')]))
+        self.assertEqual(self.client.post('/api/full_reset').status_code, 200)
+        self.assertCountersExact()
+        # Also through the drop-and-reseed path
+        db.seed_template = False
+        try:
+            self.start_session()
+            self.assertEqual(self.client.post('/api/full_reset').status_code, 200)
+        finally:
+            db.seed_template = True
+        self.assertCountersExact()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+# backend/tests/test_word_import.py
+"""
+Tests for the bulk vocabulary import (lib/word_import.py, Db.bulk_import_words
+and POST /api/admin/import_words): every format streams in, a malformed row
+rolls the whole file back, and word_stats, the table counters and the search
+index stay consistent either way.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import io
+import json
+import sqlite3
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import AppTestCase
+from lib.db import db
+from lib.word_import import WordImportError, _iter_json_array, iter_word_records, iter_word_rows
+
+WORDS = [
+    {'french_word': 'écureuil', 'quebec_pronunciation': 'ay-kuh-roy', 'english': 'squirrel',
+     'parts': {'notes': 'Souvent vu au parc'}},
+    {'french_word': 'tuque', 'quebec_pronunciation': 'took', 'english': 'winter hat', 'parts': {}},
+    {'french_word': 'dépanneur', 'quebec_pronunciation': 'day-pan-urr', 'english': 'corner store'},
+]
+
+CSV = (
+    'french_word,quebec_pronunciation,english,notes\n'
+    'écureuil,ay-kuh-roy,squirrel,Souvent vu au parc\n'
+    'tuque,took,winter hat,\n'
+    '"dépanneur",day-pan-urr,corner store,\n'
+)
+
+
+class WordRecordsTestCase(unittest.TestCase):
+
+    def test_json_array_across_chunks(self):
+        source = io.StringIO(json.dumps(WORDS, ensure_ascii=False))
+        self.assertEqual(list(iter_word_records(source, 'json')), WORDS)
+        # Chunks smaller than one record split objects and strings
+        self.assertEqual(list(_iter_json_array(io.StringIO(json.dumps(WORDS)), chunk_size=7)), WORDS)
+
+    def test_formats_give_the_same_rows(self):
+        ndjson = '\n'.join(json.dumps(word) for word in WORDS) + '\n\n'
+        rows = {fmt: list(iter_word_rows(iter_word_records(io.StringIO(source), fmt)))
+                for fmt, source in (('json', json.dumps(WORDS)), ('ndjson', ndjson), ('csv', CSV))}
+        self.assertEqual([row[:3] for row in rows['json']], [row[:3] for row in rows['csv']])
+        self.assertEqual(rows['json'], rows['ndjson'])
+        self.assertEqual(json.loads(rows['csv'][0][3]), {'notes': 'Souvent vu au parc'})
+
+    def test_malformed_sources(self):
+        sources = {
+            'json': ['{"french_word": "x"}', '[{"french_word": "x"', '[{"french_word": }]'],
+            'ndjson': ['{"french_word": "x"}\nnot json\n'],
+            'csv': ['french_word,quebec_pronunciation,english,parts\nx,y,z,{bad json\n'],
+            'xml': ['<words/>'],
+        }
+        for fmt, documents in sources.items():
+            for document in documents:
+                with self.subTest(fmt=fmt, document=document):
+                    with self.assertRaises(WordImportError):
+                        list(iter_word_rows(iter_word_records(io.StringIO(document), fmt)))
+
+    def test_invalid_records(self):
+        valid = {'french_word': 'tuque', 'quebec_pronunciation': 'took', 'english': 'winter hat'}
+        for record in ('tuque', {'french_word': 'tuque', 'english': 'winter hat'},
+                       {**valid, 'french_word': ''}, {**valid, 'french_word': 1},
+                       {**valid, 'english': ['hat']}, {**valid, 'quebec_pronunciation': {'ipa': 'tʏk'}},
+                       {**valid, 'english': 'x' * 1001}, {**valid, 'parts': ['notes']}):
+            with self.subTest(record=record):
+                with self.assertRaisesRegex(WordImportError, '^Record 2'):
+                    list(iter_word_rows([WORDS[0], record]))
+
+
+class ImportWordsRouteTestCase(AppTestCase):
+
+    def schema(self):
+        conn = sqlite3.connect(self.database)
+        try:
+            return conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall()
+        finally:
+            conn.close()
+
+    def snapshot(self):
+        conn = sqlite3.connect(self.database)
+        try:
+            return {table: conn.execute(f'SELECT * FROM {table} ORDER BY 1, 2').fetchall()
+                    for table in ('words', 'groups', 'words_groups', 'word_stats', 'word_schedule', 'table_counters')}
+        finally:
+            conn.close()
+
+    def search(self, query):
+        response = self.client.get('/api/words/search', query_string={'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [word['french_word'] for word in response.get_json()['words']]
+
+    def assertConsistent(self):
+        # Counters and cached stats match a recount from the base tables
+        self.assertEqual(db.check_counters(), [])
+        stats = self.snapshot()
+        db.rebuild_word_stats()
+        db.rebuild_word_schedule()
+        self.assertEqual(self.snapshot(), stats)
+        # One search index entry per word
+        conn = sqlite3.connect(self.database)
+        try:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM words_fts').fetchone()[0],
+                             conn.execute('SELECT COUNT(*) FROM words').fetchone()[0])
+        finally:
+            conn.close()
+
+    def post(self, body, group_name='Quebec Life', filename=None, **params):
+        if filename:
+            return self.client.post('/api/admin/import_words', query_string={'group_name': group_name, **params},
+                                    data={'file': (io.BytesIO(body.encode('utf-8')), filename)},
+                                    content_type='multipart/form-data')
+        return self.client.post('/api/admin/import_words', query_string={'group_name': group_name, **params},
+                                data=body.encode('utf-8'))
+
+    def test_valid_stream(self):
+        schema = self.schema()
+        words_before = db.count('words')
+        uploads = [
+            (json.dumps(WORDS), None, {}),
+            ('\n'.join(json.dumps(word) for word in WORDS), 'words.ndjson', {}),
+            (CSV, None, {'format': 'csv', 'defer_indexes': 'true'}),
+        ]
+        for number, (body, filename, params) in enumerate(uploads, start=1):
+            with self.subTest(filename=filename, params=params):
+                response = self.post(body, group_name=f'Import {number}', filename=filename, **params)
+                self.assertEqual(response.status_code, 201, response.get_json())
+                result = response.get_json()
+                self.assertEqual(result['words_imported'], len(WORDS))
+                group = self.client.get(f"/api/groups/{result['group_id']}").get_json()
+                self.assertEqual(group['total_word_count'], len(WORDS))
+        self.assertEqual(db.count('words'), words_before + 3 * len(WORDS))
+        # The new words are searchable, accents folded, notes included
+        self.assertEqual(self.search('ecureuil'), ['écureuil'] * 3)
+        self.assertEqual(self.search('parc'), ['écureuil'] * 3)
+        # The suspended triggers and dropped indexes are back
+        self.assertEqual(self.schema(), schema)
+        self.assertConsistent()
+
+    def test_malformed_row_rolls_back_everything(self):
+        schema = self.schema()
+        before = self.snapshot()
+        rows = [WORDS[0]] * 20 + [{'french_word': 'tuque', 'english': 'winter hat'}] + [WORDS[1]]
+        for params in ({}, {'defer_indexes': 'true'}):
+            with self.subTest(params=params):
+                response = self.post(json.dumps(rows), **params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('Record 21 is missing: quebec_pronunciation', response.get_json()['error'])
+                # No word, no group, and the dropped indexes and trigger are back
+                self.assertEqual(self.snapshot(), before)
+                self.assertEqual(self.schema(), schema)
+                self.assertEqual(self.search('ecureuil'), [])
+
+        response = self.post('[{"french_word": "tuque", "quebec_pronunciation": "took", "english": "hat"}, {"fr')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.snapshot(), before)
+
+        # A value of the wrong type is a bad row too, not a database error
+        response = self.post(json.dumps([WORDS[0], {**WORDS[1], 'french_word': 1}]))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Record 2: french_word must be a string', response.get_json()['error'])
+        self.assertEqual(self.snapshot(), before)
+        self.assertConsistent()
+
+        # The search trigger still indexes words added one at a time
+        with db.transaction() as cursor:
+            cursor.execute("INSERT INTO words (french_word, quebec_pronunciation, english, parts) "
+                           "VALUES ('ouaouaron', 'wah-wah-ron', 'bullfrog', '{}')")
+        self.assertEqual(self.search('ouaouaron'), ['ouaouaron'])
+        self.assertConsistent()
+
+    def test_missing_group_name(self):
+        response = self.client.post('/api/admin/import_words', data=json.dumps(WORDS))
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+# backend/tests/test_word_schedule.py
+"""
+Tests for the spaced-repetition schedule (migration 010): the SM-2 step the
+review trigger applies and the history replay used for backfills.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import AppTestCase, DbTestCase
+from lib.db import db
+
+
+class WordScheduleTestCase(DbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with self.db.transaction() as cursor:
+            cursor.execute("INSERT INTO groups (name) VALUES ('Schedule Group')")
+            cursor.execute("INSERT INTO study_activities (name, launch_url) VALUES ('Schedule Activity', 'http://localhost')")
+            cursor.execute("INSERT INTO study_sessions (group_id, study_activity_id) VALUES (1, 1)")
+            cursor.execute("INSERT INTO words (french_word, quebec_pronunciation, english, parts) VALUES ('être', 'ett', 'to be', '{}')")
+
+    def review(self, correct, created_at, word_id=1):
+        with self.db.transaction() as cursor:
+            self.db.insert_reviews(cursor, 1, [(word_id, correct, created_at)], created_at)
+
+    def state(self, word_id=1):
+        row = self.db.get().execute(
+            "SELECT ease, interval_days, repetitions, next_due FROM word_schedule WHERE word_id = ?",
+            (word_id,)
+        ).fetchone()
+        return round(row[0], 2), row[1], row[2], row[3]
+
+    def schedule(self):
+        conn = self.db.get()
+        return (conn.execute("SELECT * FROM word_schedule ORDER BY word_id").fetchall(),
+                conn.execute("SELECT word_id, group_id, next_due FROM words_groups ORDER BY 1, 2").fetchall())
+
+    def assertMatchesRebuild(self):
+        # The incremental state must always equal a replay of the history
+        incremental = self.schedule()
+        self.db.rebuild_word_schedule()
+        self.assertEqual(self.schedule(), incremental)
+
+    def test_new_word_is_unscheduled(self):
+        self.assertEqual(self.state(), (2.5, 0, 0, None))
+
+    def test_correct_answers_grow_the_interval(self):
+        self.review(True, '2025-03-01 10:00:00.000000')
+        self.assertEqual(self.state(), (2.5, 1, 1, '2025-03-02 10:00:00'))
+        self.review(True, '2025-03-02 10:00:00.000000')
+        self.assertEqual(self.state(), (2.5, 6, 2, '2025-03-08 10:00:00'))
+        self.review(True, '2025-03-08 10:00:00.000000')
+        self.assertEqual(self.state(), (2.5, 15, 3, '2025-03-23 10:00:00'))
+        self.assertMatchesRebuild()
+
+    def test_wrong_answer_lowers_ease_and_is_due_again(self):
+        self.review(True, '2025-03-01 10:00:00.000000')
+        self.review(True, '2025-03-02 10:00:00.000000')
+        self.review(False, '2025-03-08 10:00:00.000000')
+        self.assertEqual(self.state(), (2.3, 0, 0, '2025-03-08 10:00:00'))
+        # Relearning restarts at one day, then grows with the lower ease
+        self.review(True, '2025-03-08 10:05:00.000000')
+        self.review(True, '2025-03-09 10:05:00.000000')
+        self.review(True, '2025-03-15 10:05:00.000000')
+        self.assertEqual(self.state(), (2.3, 14, 3, '2025-03-29 10:05:00'))
+        self.assertMatchesRebuild()
+
+    def test_ease_has_a_floor(self):
+        for minute in range(10):
+            self.review(False, f'2025-03-01 10:{minute:02d}:00.000000')
+        self.assertEqual(self.state()[0], 1.3)
+        self.assertMatchesRebuild()
+
+    def test_out_of_order_reviews_replay_the_history(self):
+        # A review older than the word's last one is replayed by created_at,
+        # not applied as the next step
+        self.review(True, '2025-03-02 10:00:00.000000')
+        self.review(False, '2025-03-01 10:00:00.000000')
+        self.assertEqual(self.state(), (2.3, 1, 1, '2025-03-03 10:00:00'))
+        self.assertMatchesRebuild()
+
+    def test_out_of_order_batch(self):
+        with self.db.transaction() as cursor:
+            cursor.execute("INSERT INTO words (french_word, quebec_pronunciation, english, parts) VALUES ('avoir', 'avwar', 'to have', '{}')")
+            cursor.execute("INSERT INTO words_groups (word_id, group_id) VALUES (1, 1), (2, 1)")
+        self.review(True, '2025-03-10 09:00:00.000000')
+        self.review(True, '2025-03-11 09:00:00.000000')
+        # One batch, as an offline client sends it: old answers interleaved
+        # with current ones, for both words, one of them tied with a review
+        batch = [(1, False, '2020-01-01 00:00:00.000000'), (2, True, '2025-03-12 09:00:00.000000'),
+                 (1, True, '2025-03-11 09:00:00.000000'), (2, False, '2025-03-01 09:00:00.000000'),
+                 (1, True, '2025-03-12 09:00:00.000000'), (1, False, '2025-03-10 12:00:00.000000')]
+        with self.db.transaction() as cursor:
+            self.db.insert_reviews(cursor, 1, batch, '2025-03-12 09:00:00.000000')
+        last_reviewed = self.db.get().execute(
+            "SELECT word_id, last_reviewed_at FROM word_schedule ORDER BY word_id").fetchall()
+        # last_reviewed_at never moves back to an older answer
+        self.assertEqual([tuple(row) for row in last_reviewed],
+                         [(1, '2025-03-12 09:00:00.000000'), (2, '2025-03-12 09:00:00.000000')])
+        self.assertMatchesRebuild()
+        # No words are left queued for a replay
+        self.assertEqual(self.db.get().execute("SELECT COUNT(*) FROM word_schedule_replay_words").fetchone()[0], 0)
+
+    def test_group_queue_follows_the_schedule(self):
+        # words_groups.next_due (migration 013) mirrors the word's schedule
+        def queued():
+            return self.db.get().execute("SELECT next_due FROM words_groups WHERE word_id = 1").fetchall()
+        with self.db.transaction() as cursor:
+            cursor.execute("INSERT INTO words_groups (word_id, group_id) VALUES (1, 1)")
+        self.review(True, '2025-03-01 10:00:00.000000')
+        self.assertEqual([tuple(row) for row in queued()], [('2025-03-02 10:00:00',)])
+        # A group joined later starts from the current schedule
+        with self.db.transaction() as cursor:
+            cursor.execute("INSERT INTO groups (name) VALUES ('Second Group')")
+            cursor.execute("INSERT INTO words_groups (word_id, group_id) VALUES (1, 2)")
+        self.assertEqual([tuple(row) for row in queued()], [('2025-03-02 10:00:00',)] * 2)
+        with self.db.transaction() as cursor:
+            cursor.execute("UPDATE words_groups SET next_due = NULL")
+        self.db.rebuild_word_schedule()
+        self.assertEqual([tuple(row) for row in queued()], [('2025-03-02 10:00:00',)] * 2)
+
+    def test_deleting_a_word_drops_its_schedule(self):
+        with self.db.transaction() as cursor:
+            cursor.execute("DELETE FROM words WHERE id = 1")
+        count = self.db.get().execute("SELECT COUNT(*) FROM word_schedule").fetchone()[0]
+        self.assertEqual(count, 0)
+
+
+class ResetHistoryScheduleTestCase(AppTestCase):
+    """
+    reset_history through the API: the schedule must forget every review.
+    """
+
+    def start_session(self):
+        response = self.client.post('/api/study_activities', json={'group_id': 1, 'study_activity_id': 1})
+        return response.get_json()['study_session_id']
+
+    def next_words(self, session_id):
+        response = self.client.get(f'/api/study_sessions/{session_id}/next_words?n=100')
+        self.assertEqual(response.status_code, 200)
+        return {word['id']: word for word in response.get_json()['words']}
+
+    def test_reset_history_makes_every_word_new(self):
+        session_id = self.start_session()
+        reviewed = list(self.next_words(session_id))[:3]
+        for word_id, correct in zip(reviewed, (True, False, True)):
+            response = self.client.post(f'/api/study_sessions/{session_id}/words/{word_id}/review',
+                                        json={'correct': correct})
+            self.assertEqual(response.status_code, 201)
+        # The wrong answer is due again at once
+        self.assertFalse(self.next_words(session_id)[reviewed[1]]['is_new'])
+
+        self.assertEqual(self.client.post('/api/reset_history').status_code, 200)
+        words = self.next_words(self.start_session())
+        for word_id in reviewed:
+            self.assertEqual(
+                {key: words[word_id][key] for key in ('is_new', 'ease', 'interval_days', 'repetitions',
+                                                      'next_due', 'last_reviewed_at')},
+                {'is_new': True, 'ease': 2.5, 'interval_days': 0, 'repetitions': 0,
+                 'next_due': None, 'last_reviewed_at': None}
+            )
+        self.assertTrue(all(word['is_new'] for word in words.values()))
+
+
+class OutOfOrderBatchTestCase(AppTestCase):
+    """
+    A batch answer with an old client_ts, after a live one: the schedule the
+    review trigger leaves must be the one a rebuild computes.
+    """
+
+    def test_old_client_ts_matches_rebuild(self):
+        response = self.client.post('/api/study_activities', json={'group_id': 1, 'study_activity_id': 1})
+        session_id = response.get_json()['study_session_id']
+        response = self.client.post(f'/api/study_sessions/{session_id}/words/1/review', json={'correct': True})
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post(f'/api/study_sessions/{session_id}/reviews',
+                                    json=[{'word_id': 1, 'correct': False, 'client_ts': '2020-01-01T00:00:00Z'}])
+        self.assertEqual(response.status_code, 201)
+
+        def schedule():
+            conn = db.get()
+            return (tuple(conn.execute("SELECT * FROM word_schedule WHERE word_id = 1").fetchone()),
+                    conn.execute("SELECT next_due FROM words_groups WHERE word_id = 1").fetchall())
+        incremental = schedule()
+        # Replayed: the wrong answer came first, the live correct one last
+        self.assertEqual(incremental[0][1:4], (2.3, 1, 1))
+        self.assertFalse(incremental[0][4].startswith('2020'))
+        db.rebuild_word_schedule()
+        self.assertEqual(schedule(), incremental)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+# backend/tests/test_word_search.py
+"""
+Tests for vocabulary search (migration 008, GET /api/words/search): matching
+ignores accents and case, the contentless FTS index follows every insert,
+update and delete of a word, and FTS5 query syntax in user input is searched
+for literally instead of being interpreted.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import json
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import AppTestCase
+from lib.db import db
+from routes.words import _fts_match_expression
+
+WORDS = [
+    ('école', 'ay-kol', 'school', {'notes': 'Une grande bâtisse'}),
+    ('être', 'etr', 'to be', {}),
+    ('Garçon', 'gar-son', 'boy', {'notes': 'Aussi: "serveur"'}),
+    ('OR', 'or', 'gold', {}),
+]
+
+
+class WordSearchTestCase(AppTestCase):
+    CONFIG = {'PER_PAGE': 50}
+
+    def setUp(self):
+        super().setUp()
+        for french_word, pronunciation, english, parts in WORDS:
+            self.insert(french_word, pronunciation, english, json.dumps(parts))
+
+    def insert(self, french_word, pronunciation, english, parts='{}'):
+        with db.transaction() as cursor:
+            cursor.execute('INSERT INTO words (french_word, quebec_pronunciation, english, parts) VALUES (?, ?, ?, ?)',
+                           (french_word, pronunciation, english, parts))
+            return cursor.lastrowid
+
+    def search(self, query, path='/api/words/search'):
+        response = self.client.get(path, query_string={'q': query})
+        self.assertEqual(response.status_code, 200, query)
+        body = response.get_json()
+        words = [word['french_word'] for word in body['words']]
+        self.assertEqual(body['pagination']['total_items'], len(words))
+        return words
+
+    def assertIndexMatchesWords(self):
+        conn = db.get()
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM words_fts').fetchone()[0],
+                         conn.execute('SELECT COUNT(*) FROM words').fetchone()[0])
+
+    def test_accent_and_case_insensitive(self):
+        for query in ('ecole', 'école', 'ECOLE', 'Écol', 'ec'):
+            with self.subTest(query=query):
+                self.assertIn('école', self.search(query))
+        self.assertEqual(self.search('etre'), ['être'])
+        self.assertEqual(self.search('garcon'), ['Garçon'])
+        # Pronunciations, translations and notes are searched too
+        self.assertEqual(self.search('ay-kol'), ['école'])
+        self.assertEqual(self.search('batisse'), ['école'])
+        self.assertEqual(self.search('school'), ['école'])
+        # Every term must match
+        self.assertEqual(self.search('ecole school'), ['école'])
+        self.assertEqual(self.search('ecole boy'), [])
+
+    def test_student_search(self):
+        response = self.client.post('/api/students', json={'name': 'Ana'})
+        student_id = response.get_json()['id']
+        self.assertEqual(self.search('ecole', f'/api/students/{student_id}/words/search'), ['école'])
+        response = self.client.get('/api/students/99999/words/search', query_string={'q': 'ecole'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_index_follows_inserts_updates_and_deletes(self):
+        word_id = self.insert('pamplemousse', 'pan-pluh-mooss', 'grapefruit', json.dumps({'notes': 'agrume'}))
+        self.assertEqual(self.search('pamplemousse'), ['pamplemousse'])
+        self.assertEqual(self.search('agrume'), ['pamplemousse'])
+        self.assertIndexMatchesWords()
+
+        with db.transaction() as cursor:
+            cursor.execute("UPDATE words SET french_word = 'pomme', english = 'apple', parts = ? WHERE id = ?",
+                           (json.dumps({'notes': 'fruit rouge'}), word_id))
+        for query in ('pamplemousse', 'grapefruit', 'agrume'):
+            self.assertEqual(self.search(query), [], query)
+        self.assertEqual(self.search('pomme'), ['pomme'])
+        self.assertEqual(self.search('rouge'), ['pomme'])
+        # The pronunciation wasn't changed and is still indexed
+        self.assertEqual(self.search('pan-pluh'), ['pomme'])
+
+        # Notes that aren't valid JSON are not indexed, before or after
+        with db.transaction() as cursor:
+            cursor.execute("UPDATE words SET parts = 'not json' WHERE id = ?", (word_id,))
+        self.assertEqual(self.search('rouge'), [])
+        with db.transaction() as cursor:
+            cursor.execute("UPDATE words SET parts = ? WHERE id = ?", (json.dumps({'notes': 'fruit vert'}), word_id))
+        self.assertEqual(self.search('vert'), ['pomme'])
+
+        with db.transaction() as cursor:
+            cursor.execute('DELETE FROM words WHERE id = ?', (word_id,))
+        for query in ('pomme', 'apple', 'vert', 'pan-pluh'):
+            self.assertEqual(self.search(query), [], query)
+        self.assertIndexMatchesWords()
+
+    def test_query_syntax_is_literal(self):
+        # FTS5 operators, column filters and special characters are searched
+        # as plain words; none of them may cause an error
+        queries = ['ecole OR boy', 'ecole AND NOT boy', 'NEAR(ecole school)', 'french_word:ecole',
+                   'english:school', '"ecole', 'ecole"', 'ecole*', '^ecole', '(ecole', 'ecole)', '-ecole',
+                   '+ecole', "l'école", 'ecole; DROP TABLE words', 'é́cole', '{french_word english}: boy']
+        for query in queries:
+            with self.subTest(query=query):
+                self.search(query)
+        self.assertEqual(self.search('ecole OR boy'), [])
+        # Every term is a prefix, "OR" included
+        self.assertEqual(self.search('OR')[0], 'OR')
+        self.assertIn('Ordinateur', self.search('OR'))
+        self.assertEqual(self.search('ecole*'), ['école'])
+        self.assertEqual(self.search('"serveur"'), ['Garçon'])
+        self.assertIndexMatchesWords()
+
+    def test_queries_without_terms(self):
+        for query in ('', '   ', '"', '*', '()', '-- ^'):
+            with self.subTest(query=query):
+                response = self.client.get('/api/words/search', query_string={'q': query})
+                self.assertEqual(response.status_code, 400)
+
+    def test_match_expression(self):
+        self.assertEqual(_fts_match_expression('ça va'), '"ça"* "va"*')
+        self.assertEqual(_fts_match_expression('a OR "b*" c:d'), '"a"* "OR"* "b"* "c"* "d"*')
+        self.assertIsNone(_fts_match_expression('"*^'))
+
+
+if __name__ == '__main__':
+    unittest.main()
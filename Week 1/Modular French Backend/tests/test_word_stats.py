@@ -0,0 +1,92 @@
+# backend/tests/test_word_stats.py
+"""
+Tests for the per-word review counters (migration 002): word_stats must equal
+a fresh COUNT(*) over the review history after every insert, delete and
+update, and rebuild_word_stats must give the same numbers.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+import unittest
+
+# Shared fixtures; this also makes the backend packages importable
+from support import DbTestCase
+
+
+class WordStatsTestCase(DbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with self.db.transaction() as cursor:
+            cursor.execute("INSERT INTO groups (name) VALUES ('Stats Group')")
+            cursor.execute("INSERT INTO study_activities (name, launch_url) VALUES ('Stats Activity', 'http://localhost')")
+            cursor.execute("INSERT INTO study_sessions (group_id, study_activity_id) VALUES (1, 1)")
+            for word in ('un', 'deux', 'trois'):
+                cursor.execute(
+                    "INSERT INTO words (french_word, quebec_pronunciation, english, parts) VALUES (?, ?, ?, '{}')",
+                    (word, word, word)
+                )
+
+    def review(self, word_id, correct):
+        with self.db.transaction() as cursor:
+            return self.db.insert_reviews(cursor, 1, [(word_id, correct, '2025-03-10 12:00:00.000000')],
+                                          '2025-03-10 12:00:00.000000')[0]
+
+    def execute(self, sql, params=()):
+        with self.db.transaction() as cursor:
+            cursor.execute(sql, params)
+
+    def stats(self):
+        return [tuple(row) for row in self.db.get().execute(
+            "SELECT word_id, correct_count, wrong_count FROM word_stats ORDER BY word_id")]
+
+    def counted(self):
+        return [tuple(row) for row in self.db.get().execute("""
+            SELECT w.id,
+                   (SELECT COUNT(*) FROM word_review_items WHERE word_id = w.id AND correct = 1),
+                   (SELECT COUNT(*) FROM word_review_items WHERE word_id = w.id AND correct = 0)
+            FROM words w ORDER BY w.id
+        """)]
+
+    def assertCountsExact(self):
+        self.assertEqual(self.stats(), self.counted())
+        self.assertEqual(self.db.rebuild_word_stats(), 3)
+        self.assertEqual(self.stats(), self.counted())
+
+    def test_new_words_start_at_zero(self):
+        self.assertEqual(self.stats(), [(1, 0, 0), (2, 0, 0), (3, 0, 0)])
+
+    def test_inserts(self):
+        self.review(1, True)
+        self.review(1, True)
+        self.review(1, False)
+        self.review(2, False)
+        self.assertEqual(self.stats(), [(1, 2, 1), (2, 0, 1), (3, 0, 0)])
+        self.assertCountsExact()
+
+    def test_deletes(self):
+        first = self.review(1, True)
+        self.review(1, False)
+        self.review(2, True)
+        self.execute("DELETE FROM word_review_items WHERE id = ?", (first,))
+        self.assertEqual(self.stats(), [(1, 0, 1), (2, 1, 0), (3, 0, 0)])
+        self.execute("DELETE FROM word_review_items")
+        self.assertCountsExact()
+
+    def test_updates(self):
+        review_id = self.review(1, True)
+        self.review(2, False)
+        self.execute("UPDATE word_review_items SET correct = 0 WHERE id = ?", (review_id,))
+        self.assertEqual(self.stats(), [(1, 0, 1), (2, 0, 1), (3, 0, 0)])
+        # Moving a review to another word moves its count
+        self.execute("UPDATE word_review_items SET word_id = 3, correct = 1 WHERE id = ?", (review_id,))
+        self.assertEqual(self.stats(), [(1, 0, 0), (2, 0, 1), (3, 1, 0)])
+        self.assertCountsExact()
+
+    def test_deleting_a_word_drops_its_stats(self):
+        self.execute("DELETE FROM words WHERE id = 3")
+        self.assertEqual([row[0] for row in self.stats()], [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()